@@ -0,0 +1,131 @@
+"""Represent dependencies kept for the lifetime of the process"""
+import asyncio
+import logging
+from typing import Callable, Iterable, Mapping
+
+from config_access import ConfigAccess, ConfigAccessFromConfigDataSet
+from config_data import ConfigData
+from data_access import AsyncDataAccess
+from data_publish.publish import DataPublisher
+
+
+logger = logging.getLogger(__name__)
+
+
+class ApplicationContext:
+    """Represent dependencies of the application shared by invocations
+
+    Config data is shared as given, so refresh rules are applied by the
+    config data itself, e.g. `ConfigDataRefreshed`. Data access is created
+    once and updated with the latest config on each invocation. It is only
+    created again when its WSDL changes. Data publisher is created once and
+    only created again when its config changes. Coroutines run on one event
+    loop, so that open connections are reused by later invocations.
+    """
+
+    def __init__(self, config_data_collection: Iterable[ConfigData],
+                 create_data_access: Callable[[Mapping], AsyncDataAccess],
+                 create_data_publisher: Callable[[Mapping], DataPublisher]):
+        """Create an instance of `ApplicationContext`
+
+        :param config_data_collection: Config data passed to
+                                       `ConfigAccessFromConfigDataSet`
+        :param create_data_access: Function creating data access from data
+                                   access config
+        :param create_data_publisher: Function creating data publisher from
+                                      data publisher config
+        """
+        self._config_data_collection = tuple(config_data_collection)
+        self._create_data_access = create_data_access
+        self._create_data_publisher = create_data_publisher
+        self._data_access = None
+        self._data_access_wsdl = None
+        self._data_publisher = None
+        self._data_publisher_config = None
+        self._event_loop = asyncio.new_event_loop()
+
+    def get_config_access(self) -> ConfigAccess:
+        """Get access to the latest configuration
+
+        :return: Access to configuration
+        """
+        return ConfigAccessFromConfigDataSet(*self._config_data_collection)
+
+    def get_data_access(self, data_access_config: Mapping) -> AsyncDataAccess:
+        """Get data access updated with the latest data access config
+
+        :param data_access_config: Data access configuration
+        :return: Data access
+        """
+        if self._data_access is None \
+                or self._data_access_wsdl != data_access_config['wsdl']:
+            self._close_data_access()
+            logger.info('Creating data access for %s',
+                        data_access_config['wsdl'])
+            self._data_access = self._create_data_access(data_access_config)
+            self._data_access_wsdl = data_access_config['wsdl']
+        else:
+            self._data_access.update_config(data_access_config)
+        return self._data_access
+
+    def get_data_publisher(self, data_publisher_config: Mapping)\
+            -> DataPublisher:
+        """Get data publisher created with the latest data publisher config
+
+        :param data_publisher_config: Data publisher configuration
+        :return: Data publisher
+        """
+        if self._data_publisher is None \
+                or self._data_publisher_config != data_publisher_config:
+            self._close_data_publisher()
+            logger.info('Creating data publisher')
+            self._data_publisher = \
+                self._create_data_publisher(data_publisher_config)
+            self._data_publisher_config = data_publisher_config
+        return self._data_publisher
+
+    def warm_up(self) -> None:
+        """Fetch config data and create data access ahead of the first
+        invocation
+
+        :return: None
+        """
+        config_access = self.get_config_access()
+        self.get_data_access(config_access.get_data_access_config())
+        self.get_data_publisher(config_access.get_data_publisher_config())
+
+    def run(self, coroutine):
+        """Run a coroutine on the event loop of the context
+
+        :param coroutine: Coroutine to run
+        :return: Result of the coroutine
+        """
+        return self._event_loop.run_until_complete(coroutine)
+
+    def close(self) -> None:
+        """Close data access, data publisher and the event loop of the
+        context
+
+        :return: None
+        """
+        self._close_data_access()
+        self._close_data_publisher()
+        self._event_loop.close()
+
+    def _close_data_access(self):
+        if self._data_access is not None \
+                and hasattr(self._data_access, 'aclose'):
+            self.run(self._data_access.aclose())
+        self._data_access = None
+
+    def _close_data_publisher(self):
+        if self._data_publisher is not None \
+                and hasattr(self._data_publisher, 'close'):
+            self._data_publisher.close()
+        self._data_publisher = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
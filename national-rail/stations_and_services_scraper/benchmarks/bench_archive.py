@@ -0,0 +1,108 @@
+"""Benchmark appending station and services to the partitioned archive and
+reading a time range back
+
+Run from the scraper directory with `python -m benchmarks.bench_archive`.
+Each call of a publish benchmark appends one scrape of `--stations`
+station and services, the clock advancing so that `--snapshots-per-hour`
+of them fall in each hour, so snapshots per second is the number of
+stations divided by the time per call. The archive is written to a
+temporary directory removed at exit.
+"""
+import argparse
+import atexit
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED, STATIONS
+from benchmarks.runner import Benchmark, main
+from data_access.darwin.darwin_access import get_station_and_services
+from data_model import Station, StationAndServices
+from data_publish import ArchiveDataPublisher, ArchiveReader
+
+
+START = datetime(2022, 2, 9, 0, 0, tzinfo=timezone.utc)
+
+
+class Clock:
+    """Represent time advancing by a step each time it is read"""
+
+    def __init__(self, step: timedelta):
+        self.time = START
+        self._step = step
+
+    def __call__(self) -> datetime:
+        time = self.time
+        self.time += self._step
+        return time
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    root = tempfile.mkdtemp(prefix='bench_archive_')
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    departure_board = generate_departure_board(
+        args.services, args.calling_points, seed=args.seed)
+    services = get_station_and_services(
+        departure_board, CALLING_POINT_NAMES_INCLUDED).services
+    stations_and_services = [
+        StationAndServices(Station(STATIONS[i % len(STATIONS)][0], True,
+                                   ''), services)
+        for i in range(args.stations)]
+    step = timedelta(hours=1) / args.snapshots_per_hour
+    params = {'stations': args.stations, 'services': args.services,
+              'calling_points': args.calling_points,
+              'snapshots_per_hour': args.snapshots_per_hour}
+
+    benchmarks = []
+    for segment_size in args.segment_sizes:
+        publisher = ArchiveDataPublisher(f'{root}/publish_{segment_size}',
+                                         segment_size, Clock(step))
+        atexit.register(publisher.close)
+        benchmarks.append(Benchmark(
+            f'ArchiveDataPublisher.publish[{segment_size}]',
+            lambda p=publisher: p.publish(stations_and_services),
+            {**params, 'segment_size': segment_size}))
+
+    # An archive of the hours read back, written once
+    read_root = f'{root}/read'
+    clock = Clock(step)
+    with ArchiveDataPublisher(read_root, args.segment_sizes[0],
+                              clock) as publisher:
+        while clock.time < START + timedelta(hours=args.hours):
+            publisher.publish(stations_and_services)
+    reader = ArchiveReader(read_root)
+    station_name = stations_and_services[0].station.name
+    end = START + timedelta(hours=1)
+    for name, station_names in (('all', None), ('one', [station_name])):
+        number_of_records = sum(1 for _ in reader.read(START, end,
+                                                       station_names))
+        print(f'ArchiveReader.read[1h,{name}]: {number_of_records} records',
+              file=sys.stderr)
+        benchmarks.append(Benchmark(
+            f'ArchiveReader.read[1h,{name}]',
+            lambda s=station_names: sum(1 for _ in reader.read(START, end,
+                                                               s)),
+            {**params, 'hours_archived': args.hours,
+             'records': number_of_records}))
+    return benchmarks
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--stations', type=int, default=20,
+                        help='Station and services published per scrape')
+    parser.add_argument('--services', type=int, default=20)
+    parser.add_argument('--calling-points', type=int, default=10)
+    parser.add_argument('--snapshots-per-hour', type=int, default=5000)
+    parser.add_argument('--segment-sizes', type=int, nargs='+',
+                        default=(1024 * 1024, 64 * 1024 * 1024),
+                        help='Sizes in bytes from which segments are sealed')
+    parser.add_argument('--hours', type=int, default=3,
+                        help='Hours archived before reading one back')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
@@ -0,0 +1,69 @@
+"""Benchmark size and speed of the binary serializer against the json
+serializers on synthetic boards
+
+Run from the scraper directory with `python -m benchmarks.bench_binary`.
+"""
+import argparse
+import json
+import sys
+from typing import List
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.runner import Benchmark, main
+from data_access.darwin.darwin_access import get_station_and_services
+from data_publish import JsonDataSerializer, CompactJsonDataSerializer, \
+    BinaryDataSerializer, BinaryDataDeserializer
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    stations_and_services = [
+        get_station_and_services(
+            generate_departure_board(args.services, args.calling_points,
+                                     alert_ratio=args.alerts, seed=seed),
+            CALLING_POINT_NAMES_INCLUDED)
+        for seed in range(args.stations)]
+    params = {'services': args.services,
+              'calling_points': args.calling_points,
+              'stations': args.stations}
+    json_serializer = JsonDataSerializer()
+    compact_json_serializer = CompactJsonDataSerializer()
+    binary_serializer = BinaryDataSerializer()
+    binary_deserializer = BinaryDataDeserializer()
+    serialized_json = json_serializer.serialize(stations_and_services)
+    serialized_compact_json = \
+        compact_json_serializer.serialize(stations_and_services)
+    serialized_binary = binary_serializer.serialize(stations_and_services)
+    print(f'JsonDataSerializer: {len(serialized_json.encode())} bytes\n'
+          f'CompactJsonDataSerializer: '
+          f'{len(serialized_compact_json.encode())} bytes\n'
+          f'BinaryDataSerializer: {len(serialized_binary)} bytes',
+          file=sys.stderr)
+
+    return [
+        Benchmark('serialize[JsonDataSerializer]',
+                  lambda: json_serializer.serialize(stations_and_services),
+                  params),
+        Benchmark('serialize[CompactJsonDataSerializer]',
+                  lambda: compact_json_serializer.serialize(
+                      stations_and_services), params),
+        Benchmark('serialize[BinaryDataSerializer]',
+                  lambda: binary_serializer.serialize(stations_and_services),
+                  params),
+        Benchmark('deserialize[json]',
+                  lambda: json.loads(serialized_compact_json), params),
+        Benchmark('deserialize[BinaryDataDeserializer]',
+                  lambda: binary_deserializer.deserialize(serialized_binary),
+                  params)]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--services', type=int, default=50)
+    parser.add_argument('--calling-points', type=int, default=10)
+    parser.add_argument('--alerts', type=float, default=0.1)
+    parser.add_argument('--stations', type=int, default=20,
+                        help='Stations and services serialized at once')
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
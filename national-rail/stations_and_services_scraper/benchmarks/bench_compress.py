@@ -0,0 +1,83 @@
+"""Benchmark compressing serialized stations and services with gzip and
+zstd at several levels
+
+Run from the scraper directory with `python -m benchmarks.bench_compress`.
+The sizes of the compressed documents are printed to stderr.
+"""
+import argparse
+import io
+import sys
+from typing import List
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.runner import Benchmark, main
+from data_access.darwin.darwin_access import get_station_and_services
+from data_publish import JsonDataSerializer, CompactJsonDataSerializer, \
+    JsonStreamDataSerializer, BinaryDataSerializer, GzipCompressor, \
+    ZstdCompressor, CompressingDataSerializer, \
+    CompressingStreamDataSerializer
+from data_publish.compress import zstandard
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    departure_board = generate_departure_board(
+        args.services, args.calling_points, alert_ratio=args.alerts,
+        seed=args.seed)
+    stations_and_services = [
+        get_station_and_services(departure_board,
+                                 CALLING_POINT_NAMES_INCLUDED)
+        for _ in range(args.stations)]
+    params = {'services': args.services,
+              'calling_points': args.calling_points,
+              'stations': args.stations}
+    compressors = [(f'gzip{level}', GzipCompressor(level))
+                   for level in args.gzip_levels]
+    if zstandard is not None:
+        compressors.extend((f'zstd{level}', ZstdCompressor(level))
+                           for level in args.zstd_levels)
+    serializers = [('json', JsonDataSerializer()),
+                   ('compact', CompactJsonDataSerializer()),
+                   ('binary', BinaryDataSerializer())]
+
+    benchmarks = []
+    for serializer_name, serializer in serializers:
+        size = len(serializer.serialize(stations_and_services))
+        print(f'{serializer_name}: {size} bytes', file=sys.stderr)
+        for compressor_name, compressor in compressors:
+            name = f'{serializer_name}+{compressor_name}'
+            compressing_serializer = CompressingDataSerializer(serializer,
+                                                               compressor)
+            compressed_size = len(compressing_serializer.serialize(
+                stations_and_services))
+            print(f'{name}: {compressed_size} bytes '
+                  f'({compressed_size / size:.1%})', file=sys.stderr)
+            benchmarks.append(Benchmark(
+                name, lambda s=compressing_serializer:
+                s.serialize(stations_and_services),
+                {**params, 'bytes': compressed_size}))
+    for compressor_name, compressor in compressors:
+        stream_serializer = CompressingStreamDataSerializer(
+            JsonStreamDataSerializer(), compressor)
+        benchmarks.append(Benchmark(
+            f'stream+{compressor_name}',
+            lambda s=stream_serializer: s.serialize_to(
+                iter(stations_and_services), io.BytesIO()), params))
+    return benchmarks
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--services', type=int, default=50)
+    parser.add_argument('--calling-points', type=int, default=10)
+    parser.add_argument('--alerts', type=float, default=0.1)
+    parser.add_argument('--stations', type=int, default=20,
+                        help='Stations and services serialized at once')
+    parser.add_argument('--gzip-levels', type=int, nargs='+',
+                        default=(1, 6, 9))
+    parser.add_argument('--zstd-levels', type=int, nargs='+',
+                        default=(1, 3, 9))
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
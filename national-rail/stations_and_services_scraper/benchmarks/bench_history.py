@@ -0,0 +1,127 @@
+"""Benchmark adding runs to the SQLite history store and querying delay
+and cancellation history
+
+Run from the scraper directory with `python -m benchmarks.bench_history`.
+The store is first filled with `--days` days of `--runs-per-day` runs of
+`--stations` origins and `--services` services each, e.g. `--days 30` for
+about 3 million service snapshots and twice as many calling points. It is
+written to a temporary file removed at exit.
+"""
+import argparse
+import atexit
+import os
+import random
+import sys
+import tempfile
+import time as timer
+from datetime import datetime, time, timedelta
+from typing import List
+
+from benchmarks.board_generator import STATIONS, CANCEL_REASONS, \
+    DELAY_REASONS
+from benchmarks.runner import Benchmark, main
+from data_model import Station, Status, ServiceStatus, CallingPoint, \
+    Service, StationAndServices
+from data_publish import HistoryStore
+
+
+START = datetime(2022, 2, 1, 6, 0)
+
+
+def create_run(random_generator: random.Random,
+               args: argparse.Namespace) -> List[StationAndServices]:
+    """Create station and services of a run, the same services departing
+    every few minutes from 06:00 in every run, with random statuses"""
+    stations_and_services = []
+    for origin in range(args.stations):
+        services = []
+        for number in range(args.services):
+            scheduled_minute = minute = 6 * 60 + number * 5 + origin % 5
+            status = random_generator.choices(
+                (Status.OnTime, Status.NewTime, Status.Delayed,
+                 Status.Cancelled), (0.8, 0.12, 0.03, 0.05))[0]
+            if status == Status.NewTime:
+                minute += random_generator.randint(1, 20)
+            message = random_generator.choice(CANCEL_REASONS) \
+                if status == Status.Cancelled \
+                else random_generator.choice(DELAY_REASONS) \
+                if status != Status.OnTime else None
+            service = Service(
+                f'{origin:04d}{number:04d}',
+                ServiceStatus(status, message),
+                time(minute // 60 % 24, minute % 60),
+                [CallingPoint(name, f'{minute // 60 % 24:02d}:30',
+                              status == Status.Cancelled, None)
+                 for name, _ in STATIONS[-2:]])
+            service.set_scheduled_time(
+                time(scheduled_minute // 60 % 24, scheduled_minute % 60))
+            services.append(service)
+        stations_and_services.append(StationAndServices(
+            Station(STATIONS[origin % len(STATIONS)][0] + f' {origin}',
+                    True, None), services))
+    return stations_and_services
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    descriptor, path = tempfile.mkstemp(prefix='bench_history_',
+                                        suffix='.sqlite')
+    os.close(descriptor)
+    store = HistoryStore(path)
+    atexit.register(lambda: [store.close()] + [
+        os.remove(p) for p in (path, path + '-wal', path + '-shm')
+        if os.path.exists(p)])
+    random_generator = random.Random(args.seed)
+    runs = [create_run(random_generator, args)
+            for _ in range(args.runs_per_day)]
+
+    start = timer.perf_counter()
+    for day in range(args.days):
+        for number, run in enumerate(runs):
+            store.add(run, START + timedelta(days=day, minutes=10 * number))
+    elapsed = timer.perf_counter() - start
+    snapshots = args.days * args.runs_per_day * args.stations * args.services
+    print(f'Filled {snapshots} service snapshots in {elapsed:.1f}s '
+          f'({snapshots / elapsed:.0f}/s), '
+          f'{os.path.getsize(path) / 1024 / 1024:.0f} MiB', file=sys.stderr)
+
+    params = {'days': args.days, 'runs_per_day': args.runs_per_day,
+              'stations': args.stations, 'services': args.services,
+              'service_snapshots': snapshots}
+    published_at = [START + timedelta(days=args.days)]
+
+    def add_run():
+        published_at[0] += timedelta(minutes=1)
+        store.add(runs[0], published_at[0])
+
+    origin_name = runs[0][0].station.name
+    first_date = START.date()
+    last_date = first_date + timedelta(days=args.days)
+    service_id = runs[0][0].services[0].id
+    return [
+        Benchmark('HistoryStore.add', add_run, params),
+        Benchmark('HistoryStore.get_departures',
+                  lambda: store.get_departures(origin_name, time(6, 0),
+                                               first_date, last_date),
+                  params),
+        Benchmark('HistoryStore.get_delay_statistics',
+                  lambda: store.get_delay_statistics(
+                      origin_name, time(6, 0), first_date, last_date),
+                  params),
+        Benchmark('HistoryStore.get_cancellations',
+                  lambda: store.get_cancellations(origin_name, first_date,
+                                                  last_date),
+                  params),
+        Benchmark('HistoryStore.get_service_history',
+                  lambda: store.get_service_history(service_id), params)]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--runs-per-day', type=int, default=20)
+    parser.add_argument('--stations', type=int, default=50)
+    parser.add_argument('--services', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
@@ -0,0 +1,106 @@
+"""Benchmark extracting stations and services from departure boards and
+serializing them
+
+Run from the scraper directory with `python -m benchmarks.bench_hot_path`,
+adding `--output results.json` to save results and `--baseline
+results.json` to compare with saved results.
+"""
+import argparse
+import sys
+from typing import List
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.runner import Benchmark, main
+from data_access.darwin.darwin_access import get_station_and_services, \
+    get_lazy_station_and_services
+from data_access.darwin.service import get_services, is_valid_service, \
+    get_calling_points
+from data_access.darwin.station import get_station
+from data_publish import JsonDataSerializer
+
+
+DEFAULT_SIZES = ('10x5', '20x10', '100x20')
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    benchmarks = []
+    for size in args.sizes:
+        number_of_services, number_of_calling_points = \
+            (int(n) for n in size.split('x'))
+        benchmarks.extend(create_size_benchmarks(
+            number_of_services, number_of_calling_points, args))
+    return benchmarks
+
+
+def create_size_benchmarks(number_of_services: int,
+                           number_of_calling_points: int,
+                           args: argparse.Namespace) -> List[Benchmark]:
+    """Create benchmarks of the hot path for a board size
+
+    :param number_of_services: Number of services on the board
+    :param number_of_calling_points: Number of calling points per service
+    :param args: Parsed arguments with the mix of the board
+    :return: Benchmarks
+    """
+    params = {'services': number_of_services,
+              'calling_points': number_of_calling_points,
+              'cancelled': args.cancelled, 'delayed': args.delayed,
+              'alerts': args.alerts, 'included': args.included}
+    departure_board = generate_departure_board(
+        number_of_services, number_of_calling_points, args.cancelled,
+        args.delayed, args.alerts, args.included, args.seed)
+    names = CALLING_POINT_NAMES_INCLUDED
+    service_items = departure_board['trainServices']['service']
+    valid_service_items = [s for s in service_items
+                           if is_valid_service(s, names)]
+    stations_and_services = [get_station_and_services(departure_board, names)
+                             for _ in range(args.stations)]
+    serializer = JsonDataSerializer()
+    suffix = f'[{number_of_services}x{number_of_calling_points}]'
+
+    return [
+        Benchmark('get_station' + suffix,
+                  lambda: get_station(departure_board), params),
+        Benchmark('is_valid_service' + suffix,
+                  lambda: [is_valid_service(s, names) for s in service_items],
+                  params),
+        Benchmark('get_calling_points' + suffix,
+                  lambda: [get_calling_points(s, names)
+                           for s in valid_service_items], params),
+        Benchmark('get_services' + suffix,
+                  lambda: get_services(departure_board, names), params),
+        Benchmark('get_station_and_services' + suffix,
+                  lambda: get_station_and_services(departure_board, names),
+                  params),
+        Benchmark('first_service' + suffix,
+                  lambda: next(iter(get_station_and_services(
+                      departure_board, names).services), None), params),
+        Benchmark('first_service_lazy' + suffix,
+                  lambda: next(iter(get_lazy_station_and_services(
+                      departure_board, names).services), None), params),
+        Benchmark('JsonDataSerializer.serialize' + suffix,
+                  lambda: serializer.serialize(stations_and_services),
+                  {**params, 'stations': args.stations})]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Board sizes as <services>x<calling points>')
+    parser.add_argument('--cancelled', type=float, default=0.05,
+                        help='Ratio of cancelled services')
+    parser.add_argument('--delayed', type=float, default=0.15,
+                        help='Ratio of delayed services')
+    parser.add_argument('--alerts', type=float, default=0.1,
+                        help='Ratio of services and calling points with '
+                             'alerts')
+    parser.add_argument('--included', type=float, default=0.5,
+                        help='Ratio of services calling at included '
+                             'stations')
+    parser.add_argument('--stations', type=int, default=10,
+                        help='Stations and services serialized at once')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
@@ -0,0 +1,114 @@
+"""Benchmark memory of services extracted from departure boards with the
+slotted data models against models with an instance `__dict__`
+
+The departure board is written as a Darwin response and parsed back for
+each board held, so each name on it is a distinct string, as on boards
+received from Darwin, and the boards are dropped once their services are
+extracted.
+
+Run from the scraper directory with `python -m benchmarks.bench_memory`.
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Callable, Mapping
+from unittest import mock
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.board_xml import create_departure_board_response
+from data_access.darwin.raw_board import parse_departure_board
+from data_access.darwin.service import get_services
+
+
+class DictServiceStatus:
+    def __init__(self, status, abnormality_message):
+        self.status = status
+        self.abnormality_message = abnormality_message
+
+
+class DictCallingPoint:
+    def __init__(self, name, time, is_cancelled, alert):
+        self.name = name
+        self.time = time
+        self.is_cancelled = is_cancelled
+        self.alert = alert
+
+
+class DictService:
+    def __init__(self, id_, status, time, calling_points):
+        self.id = id_
+        self.status = status
+        self.time = time
+        self.calling_points = calling_points
+        self.length = None
+        self.platform = None
+        self.scheduled_time = None
+
+    def set_length(self, length):
+        self.length = length
+
+    def set_platform(self, platform):
+        self.platform = platform
+
+    def set_scheduled_time(self, scheduled_time):
+        self.scheduled_time = scheduled_time
+
+
+def measure(get: Callable[[], list]) -> Mapping:
+    """Measure memory allocated by objects a function returns
+
+    :param get: Function returning a list of objects
+    :return: Bytes allocated and number of objects
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects = get()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'bytes': size, 'services': len(objects)}
+
+
+def get_services_with_dict_models(departure_board) -> list:
+    with mock.patch.multiple('data_access.darwin.service',
+                             Service=DictService,
+                             ServiceStatus=DictServiceStatus,
+                             CallingPoint=DictCallingPoint):
+        return get_services(departure_board, CALLING_POINT_NAMES_INCLUDED)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--services', type=int, default=1000)
+    parser.add_argument('--calling-points', type=int, default=10)
+    parser.add_argument('--boards', type=int, default=10,
+                        help='Number of departure boards held at once')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    response = create_departure_board_response(generate_departure_board(
+        args.services, args.calling_points, included_ratio=1.0,
+        seed=args.seed))
+    results = {}
+    for name, get_board_services in (
+            ('dict', get_services_with_dict_models),
+            ('slots', lambda b: get_services(b,
+                                             CALLING_POINT_NAMES_INCLUDED))):
+        result = measure(lambda: [
+            s for _ in range(args.boards)
+            for s in get_board_services(parse_departure_board(response))])
+        result['bytes_per_service'] = result['bytes'] / result['services']
+        results[name] = result
+        print(f'{name:<6} {result["bytes_per_service"]:>10.1f} bytes per '
+              f'service')
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
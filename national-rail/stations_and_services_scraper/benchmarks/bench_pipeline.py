@@ -0,0 +1,87 @@
+"""Benchmark time to first publish and total time of scraping then
+publishing against pipelining scraping into publishing
+
+Stations and services are scraped through the real Darwin data access from
+a local `DarwinStandInServer` with lognormal latency.
+
+Run from the scraper directory with `python -m benchmarks.bench_pipeline`.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Iterable, Mapping
+
+from benchmarks.darwin_stand_in import DarwinStandInServer
+from benchmarks.load_test import create_data_access_config, create_services
+from data_access import AsyncDarwinDataAccess
+from data_publish import publish, publish_stream_async
+from data_publish.publish import DataPublisher
+from data_scrape import scrape_stations_and_services_async, \
+    iterate_stations_and_services_async
+
+
+class TimingDataPublisher(DataPublisher):
+    """Represent data publisher recording when station and services arrive"""
+
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.times = []
+
+    def publish(self, data: Iterable) -> None:
+        self.publish_stream(data)
+
+    def publish_stream(self, items: Iterable) -> None:
+        for _ in items:
+            self.times.append(time.perf_counter() - self.start_time)
+
+
+async def run(mode: str, wsdl: str, args: argparse.Namespace) -> Mapping:
+    config = create_data_access_config(wsdl, args.stations, {})
+    services = create_services(args.stations)
+    async with AsyncDarwinDataAccess(config) as data_access:
+        data_publisher = TimingDataPublisher(time.perf_counter())
+        if mode == 'batch':
+            publish(data_publisher, await scrape_stations_and_services_async(
+                data_access, services, args.concurrency))
+        else:
+            await publish_stream_async(
+                data_publisher, iterate_stations_and_services_async(
+                    data_access, services, args.concurrency,
+                    is_ordered=mode == 'pipeline_ordered'))
+    return {'mode': mode, 'first_publish': data_publisher.times[0],
+            'last_publish': data_publisher.times[-1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stations', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-median', type=float, default=0.05)
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    latency = {'distribution': 'lognormal', 'median': args.latency_median,
+               'sigma': args.latency_sigma}
+    # Warm up imports and WSDL parsing, which the first run would pay for
+    with DarwinStandInServer(seed=args.seed) as server:
+        asyncio.run(run('batch', server.wsdl, args))
+    results = []
+    print(f'{"mode":<18} {"first ms":>9} {"last ms":>9}')
+    for mode in ('batch', 'pipeline_ordered', 'pipeline'):
+        with DarwinStandInServer(latency=latency, seed=args.seed) as server:
+            result = asyncio.run(run(mode, server.wsdl, args))
+        results.append(result)
+        print(f'{mode:<18} {result["first_publish"] * 1000:>9.1f} '
+              f'{result["last_publish"] * 1000:>9.1f}')
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Benchmark peak memory of publishing stations and services as one
+document against streaming them one at a time
+
+Run from the scraper directory with
+`python -m benchmarks.bench_publish_memory`.
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from typing import Callable, Iterator
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from data_access.darwin.darwin_access import get_station_and_services
+from data_model import StationAndServices
+from data_publish import JsonDataSerializer, JsonStreamDataSerializer
+
+
+class DiscardingSink:
+    """Represent a sink counting the characters written to it"""
+
+    def __init__(self):
+        self.characters = 0
+
+    def write(self, text: str) -> int:
+        self.characters += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def measure_peak(publish: Callable[[], None]) -> int:
+    tracemalloc.start()
+    publish()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stations', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    parser.add_argument('--services', type=int, default=20)
+    parser.add_argument('--calling-points', type=int, default=10)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    departure_board = generate_departure_board(args.services,
+                                               args.calling_points)
+
+    def produce(number_of_stations: int) -> Iterator[StationAndServices]:
+        for _ in range(number_of_stations):
+            yield get_station_and_services(departure_board,
+                                           CALLING_POINT_NAMES_INCLUDED)
+
+    results = []
+    print(f'{"stations":>8} {"document KiB":>14} {"stream KiB":>12}')
+    for number_of_stations in args.stations:
+        document_peak = measure_peak(lambda: DiscardingSink().write(
+            JsonDataSerializer().serialize(
+                list(produce(number_of_stations)))))
+        stream_peak = measure_peak(
+            lambda: JsonStreamDataSerializer().serialize_to(
+                produce(number_of_stations), DiscardingSink()))
+        results.append({'stations': number_of_stations,
+                        'document_peak': document_peak,
+                        'stream_peak': stream_peak})
+        print(f'{number_of_stations:>8} {document_peak / 1024:>14.1f} '
+              f'{stream_peak / 1024:>12.1f}')
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
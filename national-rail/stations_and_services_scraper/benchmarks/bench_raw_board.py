@@ -0,0 +1,76 @@
+"""Benchmark deserializing departure boards with zeep against the raw XML
+extractor
+
+Run from the scraper directory with `python -m benchmarks.bench_raw_board`.
+"""
+import argparse
+import json
+import pathlib
+import timeit
+from os import path
+from unittest.mock import patch
+
+import requests
+
+from data_access.darwin.darwin_access import DarwinClient
+
+
+TEST_DATA_DIRECTORY = path.join(
+    str(pathlib.Path(__file__).parent.parent.resolve()),
+    'tests', 'unit', 'test_data')
+RAW_DATA_FILE = path.join(TEST_DATA_DIRECTORY,
+                          'test_darwin_departure_board.xml')
+WSDL_FILE = path.join(TEST_DATA_DIRECTORY, 'wsdl', 'ldb.wsdl')
+
+
+def create_response(content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.headers['Content-Type'] = 'text/xml; charset=utf-8'
+    return response
+
+
+def benchmark_response_mode(response_mode: str, content: bytes,
+                            number: int) -> float:
+    """Time getting a recorded departure board through `DarwinClient`
+
+    :param response_mode: `zeep` or `raw`
+    :param content: Recorded soap response
+    :param number: Number of departure boards got per timing
+    :return: Best seconds per departure board
+    """
+    darwin_client = DarwinClient({
+        'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+        'wsdl': WSDL_FILE,
+        'token': 'token',
+        'response_mode': response_mode})
+    with patch.object(darwin_client._client.transport, 'post',
+                      side_effect=lambda *args, **kwargs:
+                      create_response(content)):
+        timings = timeit.repeat(
+            lambda: darwin_client.get_departure_board_with_details(
+                'Charlton'), number=number, repeat=5)
+    return min(timings) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file', default=RAW_DATA_FILE,
+                        help='Recorded GetDepBoardWithDetails response')
+    parser.add_argument('--number', type=int, default=200,
+                        help='Departure boards per timing')
+    args = parser.parse_args()
+
+    with open(args.file, 'rb') as file:
+        content = file.read()
+    timings = {response_mode: benchmark_response_mode(
+                   response_mode, content, args.number)
+               for response_mode in ('zeep', 'raw')}
+    for response_mode, timing in timings.items():
+        print(f'{response_mode}: {timing * 1e6:.1f} us per board')
+    print(f'speed-up: {timings["zeep"] / timings["raw"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
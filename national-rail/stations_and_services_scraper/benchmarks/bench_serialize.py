@@ -0,0 +1,57 @@
+"""Benchmark serializing stations and services with the compact serializer
+against `JsonDataSerializer` and its `Encoder`
+
+Run from the scraper directory with `python -m benchmarks.bench_serialize`.
+"""
+import argparse
+import json
+import sys
+from typing import List
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.runner import Benchmark, main
+from data_access.darwin.darwin_access import get_station_and_services
+from data_publish import JsonDataSerializer, CompactJsonDataSerializer
+from data_publish.serialize import Encoder, orjson
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    departure_board = generate_departure_board(
+        args.services, args.calling_points, alert_ratio=args.alerts,
+        seed=args.seed)
+    stations_and_services = [
+        get_station_and_services(departure_board,
+                                 CALLING_POINT_NAMES_INCLUDED)
+        for _ in range(args.stations)]
+    params = {'services': args.services,
+              'calling_points': args.calling_points,
+              'stations': args.stations}
+    serializers = [
+        ('JsonDataSerializer', JsonDataSerializer().serialize),
+        ('Encoder_compact', lambda data: json.dumps(
+            data, cls=Encoder, separators=(',', ':'), ensure_ascii=False)),
+        ('CompactJsonDataSerializer[json]',
+         CompactJsonDataSerializer('json').serialize)]
+    if orjson is not None:
+        serializers.append(('CompactJsonDataSerializer[orjson]',
+                            CompactJsonDataSerializer('orjson').serialize))
+    for name, serialize in serializers:
+        print(f'{name}: {len(serialize(stations_and_services))} characters',
+              file=sys.stderr)
+    return [Benchmark(name, lambda s=serialize: s(stations_and_services),
+                      params)
+            for name, serialize in serializers]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--services', type=int, default=50)
+    parser.add_argument('--calling-points', type=int, default=10)
+    parser.add_argument('--alerts', type=float, default=0.1)
+    parser.add_argument('--stations', type=int, default=20,
+                        help='Stations and services serialized at once')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
@@ -0,0 +1,88 @@
+"""Benchmark extracting services from departure boards in a single pass
+against filtering and extracting them in separate passes
+
+Run from the scraper directory with
+`python -m benchmarks.bench_service_extraction`.
+"""
+import argparse
+import sys
+from typing import List
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.runner import Benchmark, main
+from data_access.darwin.darwin_time import parse_optional_time
+from data_access.darwin.service import get_services, is_valid_service, \
+    get_service_status, get_service_time, get_calling_point
+from data_model import Service
+
+
+DEFAULT_SIZES = ('100x10', '500x20', '2000x20')
+
+
+def get_services_in_passes(departure_board_with_details,
+                           calling_point_names_included) -> List[Service]:
+    """Extract services the way they were before the single pass: validate
+    each service over its calling points, filter them again and normalise
+    the estimated departure time for each of the status and time"""
+    services = departure_board_with_details['trainServices']
+    if not services:
+        return []
+    extracted_services = []
+    for service_item in services['service']:
+        if not is_valid_service(service_item, calling_point_names_included):
+            continue
+        calling_points = service_item[
+            'subsequentCallingPoints']['callingPointList'][0]['callingPoint']
+        service = Service(
+            service_item['serviceID'], get_service_status(service_item),
+            get_service_time(service_item),
+            list(map(get_calling_point, filter(
+                lambda c: c['locationName'] in calling_point_names_included,
+                calling_points))))
+        if service_item['length']:
+            service.set_length(service_item['length'])
+        if 'platform' in service_item and service_item['platform']:
+            service.set_platform(service_item['platform'])
+        service.set_scheduled_time(
+            parse_optional_time(service_item['std']))
+        extracted_services.append(service)
+    return extracted_services
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    benchmarks = []
+    names = CALLING_POINT_NAMES_INCLUDED
+    for size in args.sizes:
+        number_of_services, number_of_calling_points = \
+            (int(n) for n in size.split('x'))
+        departure_board = generate_departure_board(
+            number_of_services, number_of_calling_points,
+            included_ratio=args.included, seed=args.seed)
+        if get_services(departure_board, names) \
+                != get_services_in_passes(departure_board, names):
+            raise AssertionError(f'Services of {size} board differ')
+        params = {'services': number_of_services,
+                  'calling_points': number_of_calling_points,
+                  'included': args.included}
+        benchmarks.append(Benchmark(
+            f'get_services_in_passes[{size}]',
+            lambda b=departure_board: get_services_in_passes(b, names),
+            params))
+        benchmarks.append(Benchmark(
+            f'get_services[{size}]',
+            lambda b=departure_board: get_services(b, names), params))
+    return benchmarks
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Board sizes as <services>x<calling points>')
+    parser.add_argument('--included', type=float, default=0.5,
+                        help='Ratio of services calling at included '
+                             'stations')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
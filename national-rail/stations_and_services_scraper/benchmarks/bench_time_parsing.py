@@ -0,0 +1,45 @@
+"""Benchmark parsing Darwin times with `datetime.strptime` against looking
+them up in the precomputed time table
+
+Run from the scraper directory with `python -m benchmarks.bench_time_parsing`.
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import List
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.runner import Benchmark, main
+from data_access.darwin.darwin_time import parse_time
+from data_access.darwin.service import get_services
+
+
+def create_benchmarks(args: argparse.Namespace) -> List[Benchmark]:
+    departure_board = generate_departure_board(
+        args.services, args.calling_points, seed=args.seed)
+    service_items = departure_board['trainServices']['service']
+    texts = [s['std'] for s in service_items]
+    services = get_services(departure_board, CALLING_POINT_NAMES_INCLUDED)
+    print(f'{len(services)} services share '
+          f'{len({id(s.time) for s in services})} time objects',
+          file=sys.stderr)
+    params = {'services': args.services,
+              'calling_points': args.calling_points}
+    return [
+        Benchmark('strptime', lambda: [
+            datetime.strptime(t, '%H:%M').time() for t in texts], params),
+        Benchmark('parse_time', lambda: [parse_time(t) for t in texts],
+                  params),
+        Benchmark('get_services', lambda: get_services(
+            departure_board, CALLING_POINT_NAMES_INCLUDED), params)]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--services', type=int, default=1000)
+    parser.add_argument('--calling-points', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_benchmarks, __doc__.splitlines()[0], add_arguments))
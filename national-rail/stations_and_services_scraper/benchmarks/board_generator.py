@@ -0,0 +1,188 @@
+"""Generate synthetic departure boards in the shape Darwin web service
+returns them"""
+import random
+import string
+from datetime import datetime, timedelta, timezone
+from typing import List, Mapping, Optional, Sequence
+
+
+STATIONS = (
+    ('Dartford', 'DFD'), ('Slade Green', 'SGR'), ('Erith', 'ERH'),
+    ('Belvedere', 'BVD'), ('Abbey Wood', 'ABW'), ('Plumstead', 'PLU'),
+    ('Woolwich Arsenal', 'WWA'), ('Woolwich Dockyard', 'WWD'),
+    ('Charlton', 'CTN'), ('Westcombe Park', 'WCB'), ('Maze Hill', 'MZH'),
+    ('Greenwich', 'GNW'), ('Deptford', 'DEP'), ('Blackheath', 'BKH'),
+    ('Lewisham', 'LEW'), ('St Johns', 'SAJ'), ('New Cross', 'NWX'),
+    ('London Bridge', 'LBG'), ('London Cannon Street', 'CST'),
+    ('London Waterloo East', 'WAE'), ('London Charing Cross', 'CHX'))
+CALLING_POINT_NAMES_INCLUDED = frozenset(
+    {'London Cannon Street', 'London Charing Cross'})
+CANCEL_REASONS = ('This train has been cancelled because of a shortage of '
+                  'train crew',
+                  'This train has been cancelled because of a fault on this '
+                  'train')
+DELAY_REASONS = ('This train has been delayed by a signalling fault',
+                 'This train has been delayed by overcrowding')
+ALERTS = ('This train will be formed of 4 coaches instead of the usual 8',
+          'Please use the front 4 coaches only at Woolwich Dockyard')
+NRCC_MESSAGE = ('\nA reduced service will operate on Southeastern routes '
+                'until further notice.')
+
+
+def generate_departure_board(
+        number_of_services: int = 20, number_of_calling_points: int = 10,
+        cancelled_ratio: float = 0.05, delayed_ratio: float = 0.15,
+        alert_ratio: float = 0.1, included_ratio: float = 0.5,
+        seed: Optional[int] = 0,
+        generated_at: datetime = datetime(2022, 2, 9, 7, 30,
+                                          tzinfo=timezone.utc)) -> Mapping:
+    """Generate a departure board with details
+
+    Services depart every few minutes from the first station of `STATIONS`
+    and call at the stations after it, ending at a London terminus.
+
+    :param number_of_services: Number of services on the board
+    :param number_of_calling_points: Number of subsequent calling points of
+                                     each service, at most the number of
+                                     stations after the origin
+    :param cancelled_ratio: Ratio of cancelled services
+    :param delayed_ratio: Ratio of delayed or late services
+    :param alert_ratio: Ratio of services and calling points with alerts
+    :param included_ratio: Ratio of services calling at a station in
+                           `CALLING_POINT_NAMES_INCLUDED`
+    :param seed: Seed of the random generator, None for a random board
+    :param generated_at: Time the board is generated at
+    :return: Departure board in the shape zeep deserializes it
+    """
+    if number_of_calling_points < 1:
+        raise ValueError('A service calls at least at its destination')
+    random_generator = random.Random(seed)
+    origin_name, origin_crs = STATIONS[0]
+    services = []
+    departure_time = generated_at + timedelta(minutes=2)
+    for _ in range(number_of_services):
+        services.append(generate_service(
+            random_generator, departure_time, number_of_calling_points,
+            cancelled_ratio, delayed_ratio, alert_ratio, included_ratio))
+        departure_time += timedelta(minutes=random_generator.randint(2, 8))
+    return {
+        'generatedAt': generated_at,
+        'locationName': origin_name,
+        'crs': origin_crs,
+        'filterLocationName': None,
+        'filtercrs': None,
+        'filterType': None,
+        'nrccMessages': {'message': [{'_value_1': NRCC_MESSAGE}]},
+        'platformAvailable': True,
+        'areServicesAvailable': True,
+        'trainServices': {'service': services} if services else None,
+        'busServices': None,
+        'ferryServices': None}
+
+
+def generate_service(random_generator: random.Random,
+                     departure_time: datetime,
+                     number_of_calling_points: int, cancelled_ratio: float,
+                     delayed_ratio: float, alert_ratio: float,
+                     included_ratio: float) -> Mapping:
+    is_cancelled = random_generator.random() < cancelled_ratio
+    delay = 0 if is_cancelled or random_generator.random() >= delayed_ratio \
+        else random_generator.choice((None, random_generator.randint(1, 20)))
+    calling_points = generate_calling_points(
+        random_generator, departure_time, number_of_calling_points,
+        is_cancelled, delay,
+        random_generator.random() < included_ratio, alert_ratio)
+    return {
+        'sta': None,
+        'eta': None,
+        'std': format_time(departure_time),
+        'etd': 'Cancelled' if is_cancelled else 'Delayed' if delay is None
+        else format_time(departure_time + timedelta(minutes=delay))
+        if delay else 'On time',
+        'platform': str(random_generator.randint(1, 4)),
+        'operator': 'Southeastern',
+        'operatorCode': 'SE',
+        'isCircularRoute': None,
+        'isCancelled': True if is_cancelled else None,
+        'filterLocationCancelled': None,
+        'serviceType': 'train',
+        'length': random_generator.choice((None, 4, 6, 8, 10, 12)),
+        'detachFront': None,
+        'isReverseFormation': None,
+        'cancelReason': random_generator.choice(CANCEL_REASONS)
+        if is_cancelled else None,
+        'delayReason': random_generator.choice(DELAY_REASONS)
+        if delay is None or delay > 5 else None,
+        'serviceID': generate_service_id(random_generator),
+        'adhocAlerts': generate_alerts(random_generator, alert_ratio),
+        'rsid': None,
+        'origin': {'location': [create_location(*STATIONS[0])]},
+        'destination': {'location': [create_location(
+            calling_points[-1]['locationName'], calling_points[-1]['crs'])]},
+        'previousCallingPoints': None,
+        'subsequentCallingPoints': {'callingPointList': [{
+            'callingPoint': calling_points, 'serviceType': 'train',
+            'serviceChangeRequired': False, 'assocIsCancelled': False}]}}
+
+
+def generate_calling_points(random_generator: random.Random,
+                            departure_time: datetime,
+                            number_of_calling_points: int, is_cancelled: bool,
+                            delay: Optional[int], is_included: bool,
+                            alert_ratio: float) -> List[Mapping]:
+    stations = STATIONS[1:]
+    route = select_route(random_generator, stations,
+                         min(number_of_calling_points, len(stations)),
+                         is_included)
+    calling_points = []
+    time = departure_time
+    for name, crs in route:
+        time += timedelta(minutes=random_generator.randint(2, 4))
+        calling_points.append({
+            'locationName': name,
+            'crs': crs,
+            'st': format_time(time),
+            'et': 'Cancelled' if is_cancelled else 'Delayed'
+            if delay is None else format_time(time + timedelta(minutes=delay))
+            if delay else 'On time',
+            'at': None,
+            'isCancelled': True if is_cancelled else None,
+            'length': None,
+            'detachFront': None,
+            'adhocAlerts': generate_alerts(random_generator, alert_ratio)})
+    return calling_points
+
+
+def select_route(random_generator: random.Random,
+                 stations: Sequence[tuple], number_of_calling_points: int,
+                 is_included: bool) -> Sequence[tuple]:
+    """Select consecutive stations, ending at a station included or not"""
+    ends = [i for i, (name, _) in enumerate(stations)
+            if i + 1 >= number_of_calling_points
+            and (name in CALLING_POINT_NAMES_INCLUDED) == is_included]
+    end = random_generator.choice(ends) if ends \
+        else max(number_of_calling_points - 1, 0)
+    route = stations[end + 1 - number_of_calling_points:end + 1]
+    if not is_included:
+        route = [s for s in route if s[0] not in CALLING_POINT_NAMES_INCLUDED]
+    return route
+
+
+def generate_alerts(random_generator: random.Random, alert_ratio: float)\
+        -> Optional[Mapping]:
+    return {'adhocAlertText': [random_generator.choice(ALERTS)]} \
+        if random_generator.random() < alert_ratio else None
+
+
+def generate_service_id(random_generator: random.Random) -> str:
+    return ''.join(random_generator.choice(
+        string.ascii_letters + string.digits) for _ in range(22)) + '=='
+
+
+def create_location(name: str, crs: str) -> Mapping:
+    return {'locationName': name, 'crs': crs, 'via': None,
+            'futureChangeTo': None, 'assocIsCancelled': None}
+
+
+def format_time(time: datetime) -> str:
+    return time.strftime('%H:%M')
@@ -0,0 +1,135 @@
+"""Write departure boards as `GetDepBoardWithDetails` soap responses"""
+from datetime import datetime
+from typing import List, Mapping
+from xml.sax.saxutils import escape
+
+
+SERVICE_FIELDS = ('sta', 'eta', 'std', 'etd', 'platform', 'operator',
+                  'operatorCode', 'isCircularRoute', 'isCancelled',
+                  'filterLocationCancelled', 'serviceType', 'length',
+                  'detachFront', 'isReverseFormation', 'cancelReason',
+                  'delayReason', 'serviceID', 'adhocAlerts', 'rsid', 'origin',
+                  'destination', 'previousCallingPoints',
+                  'subsequentCallingPoints')
+CALLING_POINT_FIELDS = ('locationName', 'crs', 'st', 'et', 'at',
+                        'isCancelled', 'length', 'detachFront', 'adhocAlerts')
+LOCATION_FIELDS = ('locationName', 'crs', 'via', 'futureChangeTo',
+                   'assocIsCancelled')
+CALLING_POINT_LIST_ATTRIBUTES = ('serviceType', 'serviceChangeRequired',
+                                 'assocIsCancelled')
+
+ENVELOPE_START = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+    '<soap:Body>'
+    '<GetDepBoardWithDetailsResponse '
+    'xmlns="http://thalesgroup.com/RTTI/2021-11-01/ldb/">'
+    '<GetStationBoardResult '
+    'xmlns:lt="http://thalesgroup.com/RTTI/2021-11-01/ldb/types">')
+ENVELOPE_END = ('</GetStationBoardResult></GetDepBoardWithDetailsResponse>'
+                '</soap:Body></soap:Envelope>')
+
+
+def create_departure_board_response(departure_board: Mapping) -> bytes:
+    """Write a departure board as a `GetDepBoardWithDetails` soap response
+
+    :param departure_board: Departure board in the shape zeep deserializes
+    :return: Soap response
+    """
+    parts = [ENVELOPE_START]
+    write_element(parts, 'generatedAt',
+                  format_generated_at(departure_board['generatedAt']))
+    for field in ('locationName', 'crs', 'filterLocationName', 'filtercrs',
+                  'filterType'):
+        write_element(parts, field, departure_board.get(field))
+    if departure_board.get('nrccMessages'):
+        parts.append('<lt:nrccMessages>')
+        for message in departure_board['nrccMessages']['message']:
+            write_element(parts, 'message', message['_value_1'])
+        parts.append('</lt:nrccMessages>')
+    for field in ('platformAvailable', 'areServicesAvailable'):
+        write_element(parts, field, departure_board.get(field))
+    if departure_board.get('trainServices'):
+        parts.append('<lt:trainServices>')
+        for service in departure_board['trainServices']['service']:
+            write_service(parts, service)
+        parts.append('</lt:trainServices>')
+    parts.append(ENVELOPE_END)
+    return ''.join(parts).encode('utf-8')
+
+
+def write_service(parts: List[str], service: Mapping) -> None:
+    parts.append('<lt:service>')
+    for field in SERVICE_FIELDS:
+        value = service.get(field)
+        if field == 'adhocAlerts':
+            write_alerts(parts, value)
+        elif field in ('origin', 'destination'):
+            write_locations(parts, field, value)
+        elif field.endswith('CallingPoints'):
+            write_calling_points(parts, field, value)
+        else:
+            write_element(parts, field, value)
+    parts.append('</lt:service>')
+
+
+def write_calling_points(parts: List[str], tag: str, calling_points) -> None:
+    if calling_points is None:
+        return
+    parts.append(f'<lt:{tag}>')
+    for calling_point_list in calling_points['callingPointList']:
+        attributes = ''.join(
+            f' {attribute}="{format_value(calling_point_list[attribute])}"'
+            for attribute in CALLING_POINT_LIST_ATTRIBUTES
+            if calling_point_list.get(attribute) is not None)
+        parts.append(f'<lt:callingPointList{attributes}>')
+        for calling_point in calling_point_list['callingPoint']:
+            parts.append('<lt:callingPoint>')
+            for field in CALLING_POINT_FIELDS:
+                if field == 'adhocAlerts':
+                    write_alerts(parts, calling_point.get(field))
+                else:
+                    write_element(parts, field, calling_point.get(field))
+            parts.append('</lt:callingPoint>')
+        parts.append('</lt:callingPointList>')
+    parts.append(f'</lt:{tag}>')
+
+
+def write_locations(parts: List[str], tag: str, locations) -> None:
+    if locations is None:
+        return
+    parts.append(f'<lt:{tag}>')
+    for location in locations['location']:
+        parts.append('<lt:location>')
+        for field in LOCATION_FIELDS:
+            write_element(parts, field, location.get(field))
+        parts.append('</lt:location>')
+    parts.append(f'</lt:{tag}>')
+
+
+def write_alerts(parts: List[str], alerts) -> None:
+    if alerts is None:
+        return
+    parts.append('<lt:adhocAlerts>')
+    for alert in alerts['adhocAlertText']:
+        write_element(parts, 'adhocAlertText', alert)
+    parts.append('</lt:adhocAlerts>')
+
+
+def write_element(parts: List[str], tag: str, value) -> None:
+    if value is not None:
+        parts.append(f'<lt:{tag}>{format_value(value)}</lt:{tag}>')
+
+
+def format_value(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return escape(str(value))
+
+
+def format_generated_at(generated_at) -> str:
+    if isinstance(generated_at, str):
+        generated_at = datetime.fromisoformat(generated_at)
+    if generated_at.tzinfo is None:
+        return generated_at.isoformat() + '+00:00'
+    return generated_at.isoformat()
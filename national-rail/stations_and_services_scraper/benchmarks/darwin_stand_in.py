@@ -0,0 +1,394 @@
+"""Local stand-in for Darwin OpenLDBWS web service
+
+The stand-in serves the OpenLDBWS WSDL and answers `GetDepBoardWithDetails`
+requests with recorded or synthetic departure boards. Latency, error rate and
+throttling are configurable, so that Darwin clients can be load tested
+without an access token.
+
+Run from the scraper directory with `python -m benchmarks.darwin_stand_in`.
+"""
+import argparse
+import glob
+import logging
+import math
+import pathlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from typing import Callable, Mapping, Optional, Union
+
+from lxml import etree
+
+from benchmarks.board_xml import create_departure_board_response
+
+
+logger = logging.getLogger(__name__)
+
+WSDL_DIRECTORY = path.join(
+    str(pathlib.Path(__file__).parent.parent.resolve()),
+    'tests', 'unit', 'test_data', 'wsdl')
+RECORDED_RESPONSE_FILE = path.join(
+    str(pathlib.Path(__file__).parent.parent.resolve()),
+    'tests', 'unit', 'test_data', 'test_darwin_departure_board.xml')
+SERVICE_PATH = '/OpenLDBWS/ldb12.asmx'
+WSDL_PATH = '/OpenLDBWS/wsdl.aspx'
+SCHEMA_PATH = '/OpenLDBWS/'
+ORIGINAL_SERVICE_ADDRESS = b'http://localhost:8080/OpenLDBWS/ldb12.asmx'
+REQUEST_FIELDS = {'numRows': int, 'crs': str, 'filterCrs': str,
+                  'filterType': str, 'timeOffset': int, 'timeWindow': int}
+
+SOAP_FAULT = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+    '<soap:Body><soap:Fault><faultcode>soap:{code}</faultcode>'
+    '<faultstring>{message}</faultstring></soap:Fault></soap:Body>'
+    '</soap:Envelope>')
+
+DepartureBoardSource = Callable[[Mapping], Union[bytes, Mapping]]
+
+
+def replay_recorded_responses(recorded: str = RECORDED_RESPONSE_FILE)\
+        -> DepartureBoardSource:
+    """Create a source replaying recorded soap responses
+
+    :param recorded: A recorded response file replayed for every station, or
+                     a directory of `<CRS>.xml` files with an optional
+                     `default.xml` for stations without a recording
+    :return: Departure board source
+    """
+    if path.isdir(recorded):
+        responses = {}
+        for file_name in glob.glob(path.join(recorded, '*.xml')):
+            with open(file_name, 'rb') as file:
+                responses[pathlib.Path(file_name).stem.upper()] = file.read()
+        default_response = responses.get('DEFAULT')
+    else:
+        with open(recorded, 'rb') as file:
+            default_response = file.read()
+        responses = {}
+
+    def get_response(request: Mapping) -> bytes:
+        response = responses.get(request['crs'], default_response)
+        if response is None:
+            raise LookupError(f'No recorded response for {request["crs"]}')
+        return response
+    return get_response
+
+
+def filter_departure_board(departure_board: Mapping, request: Mapping)\
+        -> Mapping:
+    """Apply `filterCrs` and `numRows` of a request to a departure board
+
+    :param departure_board: Departure board in the shape zeep deserializes
+    :param request: Parameters of departure board request
+    :return: Departure board with the services the request asks for
+    """
+    services = (departure_board.get('trainServices') or {}).get('service')
+    if not services:
+        return departure_board
+    filter_crs = request.get('filterCrs')
+    if filter_crs:
+        services = [s for s in services if any(
+            c.get('crs') == filter_crs
+            for calling_point_list in
+            (s.get('subsequentCallingPoints')
+             or {'callingPointList': []})['callingPointList']
+            for c in calling_point_list['callingPoint'])]
+    services = services[:request.get('numRows') or len(services)]
+    return {**departure_board,
+            'trainServices': {'service': services} if services else None}
+
+
+def create_latency_sampler(config: Optional[Mapping],
+                           random_generator: random.Random)\
+        -> Callable[[], float]:
+    """Create a sampler of response latencies in seconds
+
+    Supported distributions are `constant` with `value`, `uniform` with `low`
+    and `high`, `exponential` with `mean` and `lognormal` with `median` and
+    `sigma`. The sample is added to `minimum`, which defaults to 0.
+
+    :param config: Latency config settings, no latency if None
+    :param random_generator: Random number generator
+    :return: Latency sampler
+    """
+    if not config:
+        return lambda: 0.0
+    distribution = config.get('distribution', 'constant')
+    minimum = config.get('minimum', 0.0)
+    if distribution == 'constant':
+        value = config.get('value', 0.0)
+        return lambda: minimum + value
+    if distribution == 'uniform':
+        return lambda: minimum + random_generator.uniform(config['low'],
+                                                          config['high'])
+    if distribution == 'exponential':
+        return lambda: minimum + random_generator.expovariate(
+            1 / config['mean'])
+    if distribution == 'lognormal':
+        mu = math.log(config['median'])
+        return lambda: minimum + random_generator.lognormvariate(
+            mu, config.get('sigma', 0.5))
+    raise ValueError(f'Unknown latency distribution {distribution}')
+
+
+class Throttle:
+    """Represent a token bucket refusing requests over a rate"""
+
+    def __init__(self, rate: float, burst: float):
+        """Create an instance of `Throttle`
+
+        :param rate: Requests allowed per second
+        :param burst: Largest burst of requests allowed
+        """
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Take a token if there is one
+
+        :return: True if the request is allowed
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst,
+                self._tokens + (now - self._updated_time) * self._rate)
+            self._updated_time = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class DarwinStandInServer:
+    """Represent a local stand-in for Darwin OpenLDBWS web service"""
+
+    def __init__(self, departure_board_source: DepartureBoardSource = None,
+                 latency: Optional[Mapping] = None, error_rate: float = 0.0,
+                 throttle: Optional[Mapping] = None,
+                 host: str = '127.0.0.1', port: int = 0,
+                 seed: Optional[int] = None):
+        """Create an instance of `DarwinStandInServer`
+
+        :param departure_board_source: Function returning a recorded soap
+                                       response or a departure board for a
+                                       request, replays the recorded test
+                                       response if None
+        :param latency: Latency distribution config settings
+        :param error_rate: Ratio of requests answered with a soap fault
+        :param throttle: `rate` and `burst` of requests over which requests
+                         are refused with http status 503, None for no limit
+        :param host: Host to listen on
+        :param port: Port to listen on, 0 for any free port
+        :param seed: Seed of the random latencies and errors
+        """
+        self.departure_board_source = \
+            departure_board_source or replay_recorded_responses()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._sample_latency = create_latency_sampler(latency, self._random)
+        self._error_rate = error_rate
+        self._throttle = Throttle(throttle['rate'],
+                                  throttle.get('burst', throttle['rate'])) \
+            if throttle else None
+        self._statistics = {'requests': 0, 'errors': 0, 'throttled': 0}
+        self._statistics_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            (host, port), self._create_request_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base url of the server"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def wsdl(self) -> str:
+        """Url of the WSDL served"""
+        return self.url + WSDL_PATH
+
+    def start(self) -> 'DarwinStandInServer':
+        """Start serving in a background thread
+
+        :return: This server
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={'poll_interval': 0.01}, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted
+
+        :return: None
+        """
+        try:
+            self._server.serve_forever(poll_interval=0.1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket
+
+        :return: None
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def get_statistics(self) -> Mapping:
+        """Get numbers of requests, errors and throttled requests
+
+        :return: Server statistics
+        """
+        with self._statistics_lock:
+            return dict(self._statistics)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _count(self, name: str) -> None:
+        with self._statistics_lock:
+            self._statistics[name] += 1
+
+    def _sample(self):
+        with self._random_lock:
+            return self._sample_latency(), \
+                self._random.random() < self._error_rate
+
+    def _respond(self, body: bytes) -> tuple:
+        """Create status code and soap response for a request body"""
+        self._count('requests')
+        if self._throttle is not None and not self._throttle.allow():
+            self._count('throttled')
+            return 503, 'text/plain', b'Service Unavailable'
+        latency, is_error = self._sample()
+        if latency:
+            time.sleep(latency)
+        if is_error:
+            self._count('errors')
+            return 500, 'text/xml; charset=utf-8', SOAP_FAULT.format(
+                code='Server', message='Unexpected server error').encode()
+        try:
+            request = parse_request(body)
+            departure_board = self.departure_board_source(request)
+        except (etree.XMLSyntaxError, LookupError, ValueError) as error:
+            self._count('errors')
+            return 500, 'text/xml; charset=utf-8', SOAP_FAULT.format(
+                code='Client', message=error).encode()
+        if not isinstance(departure_board, bytes):
+            departure_board = create_departure_board_response(
+                filter_departure_board(departure_board, request))
+        return 200, 'text/xml; charset=utf-8', departure_board
+
+    def _get_document(self, request_path: str) -> Optional[bytes]:
+        if request_path.split('?')[0] == WSDL_PATH:
+            with open(path.join(WSDL_DIRECTORY, 'ldb.wsdl'), 'rb') as file:
+                return file.read().replace(
+                    ORIGINAL_SERVICE_ADDRESS,
+                    (self.url + SERVICE_PATH).encode())
+        name = request_path[len(SCHEMA_PATH):]
+        if request_path.startswith(SCHEMA_PATH) and name.endswith('.xsd') \
+                and '/' not in name:
+            try:
+                with open(path.join(WSDL_DIRECTORY, name), 'rb') as file:
+                    return file.read()
+            except OSError:
+                return None
+        return None
+
+    def _create_request_handler(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                document = server._get_document(self.path)
+                if document is None:
+                    self._send(404, 'text/plain', b'Not Found')
+                else:
+                    self._send(200, 'text/xml; charset=utf-8', document)
+
+            def do_POST(self):
+                body = self.rfile.read(
+                    int(self.headers.get('Content-Length', 0)))
+                if self.path != SERVICE_PATH:
+                    self._send(404, 'text/plain', b'Not Found')
+                    return
+                self._send(*server._respond(body))
+
+            def _send(self, status_code, content_type, body):
+                self.send_response(status_code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return RequestHandler
+
+
+def parse_request(body: bytes) -> Mapping:
+    """Get parameters of a `GetDepBoardWithDetails` soap request
+
+    :param body: Soap request
+    :return: Parameters of the departure board request
+    """
+    request = {}
+    for element in etree.fromstring(body).iter():
+        if not isinstance(element.tag, str):
+            continue
+        tag = etree.QName(element).localname
+        if tag in REQUEST_FIELDS and element.text is not None:
+            request[tag] = REQUEST_FIELDS[tag](element.text)
+    if 'crs' not in request:
+        raise ValueError('No crs code supplied')
+    return request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--recorded', default=RECORDED_RESPONSE_FILE,
+                        help='Recorded response file or directory')
+    parser.add_argument('--latency-median', type=float, default=0.0,
+                        help='Median of lognormal latency in seconds')
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float,
+                        help='Requests per second allowed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = DarwinStandInServer(
+        replay_recorded_responses(args.recorded),
+        {'distribution': 'lognormal', 'median': args.latency_median,
+         'sigma': args.latency_sigma} if args.latency_median else None,
+        args.error_rate,
+        {'rate': args.throttle_rate} if args.throttle_rate else None,
+        port=args.port)
+    logger.info('Serving WSDL at %s', server.wsdl)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
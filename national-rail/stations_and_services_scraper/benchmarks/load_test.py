@@ -0,0 +1,247 @@
+"""Load test scraping stations and services from the Darwin stand-in
+
+Each concurrency level scrapes the same services through the real Darwin
+data access, zeep and http against a local `DarwinStandInServer`, and
+reports throughput and latency percentiles.
+
+Run from the scraper directory with `python -m benchmarks.load_test`.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import threading
+import time
+from typing import Iterable, List, Mapping, Optional
+
+from benchmarks.darwin_stand_in import DarwinStandInServer
+from data_access import DataAccess, AsyncDataAccess, DarwinDataAccess, \
+    AsyncDarwinDataAccess
+from data_model import OriginAndCallingPointNames, StationAndServices
+from data_scrape import scrape_stations_and_services, \
+    scrape_stations_and_services_async
+
+
+CALLING_POINT_NAMES = {'London Cannon Street', 'London Charing Cross'}
+
+
+class LatencyRecorder:
+    """Represent latencies and errors of scraped services"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, start_time: float, error: Optional[Exception]) -> None:
+        with self._lock:
+            if error is None:
+                self.latencies.append(time.perf_counter() - start_time)
+            else:
+                self.errors += 1
+
+
+class TimedDataAccess(DataAccess):
+    """Represent data access recording latency of each service, counting
+    errors instead of raising them"""
+
+    def __init__(self, data_access: DataAccess, recorder: LatencyRecorder):
+        self._data_access = data_access
+        self._recorder = recorder
+
+    def plan(self, services_origin_and_calling_point_names):
+        return TimedDataAccess(
+            self._data_access.plan(services_origin_and_calling_point_names),
+            self._recorder)
+
+    def get_station_and_services(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> Optional[StationAndServices]:
+        start_time = time.perf_counter()
+        try:
+            station_and_services = self._data_access.get_station_and_services(
+                origin_and_calling_point_names)
+        except Exception as error:
+            self._recorder.record(start_time, error)
+            return None
+        self._recorder.record(start_time, None)
+        return station_and_services
+
+
+class AsyncTimedDataAccess(AsyncDataAccess):
+    """Represent asynchronous data access recording latency of each service,
+    counting errors instead of raising them"""
+
+    def __init__(self, data_access: AsyncDataAccess,
+                 recorder: LatencyRecorder):
+        self._data_access = data_access
+        self._recorder = recorder
+
+    def plan(self, services_origin_and_calling_point_names):
+        return AsyncTimedDataAccess(
+            self._data_access.plan(services_origin_and_calling_point_names),
+            self._recorder)
+
+    async def get_station_and_services(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> Optional[StationAndServices]:
+        start_time = time.perf_counter()
+        try:
+            station_and_services = \
+                await self._data_access.get_station_and_services(
+                    origin_and_calling_point_names)
+        except Exception as error:
+            self._recorder.record(start_time, error)
+            return None
+        self._recorder.record(start_time, None)
+        return station_and_services
+
+
+def create_services(number_of_stations: int)\
+        -> List[OriginAndCallingPointNames]:
+    return [OriginAndCallingPointNames(f'Station {i}', CALLING_POINT_NAMES)
+            for i in range(number_of_stations)]
+
+
+def create_data_access_config(wsdl: str, number_of_stations: int,
+                              extra_config: Mapping) -> Mapping:
+    return {
+        'station_name_crs_code_mapping': json.dumps(
+            {f'Station {i}': f'S{i:02X}' for i in range(number_of_stations)}),
+        'wsdl': wsdl,
+        'token': 'token',
+        **extra_config}
+
+
+def get_percentile(latencies: List[float], percentile: float) -> float:
+    if not latencies:
+        return float('nan')
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1,
+                         max(0, math.ceil(percentile * len(latencies)) - 1))]
+
+
+def summarize(concurrency: int, elapsed: float, recorder: LatencyRecorder)\
+        -> Mapping:
+    completed = len(recorder.latencies)
+    return {
+        'concurrency': concurrency,
+        'services': completed + recorder.errors,
+        'errors': recorder.errors,
+        'elapsed': elapsed,
+        'throughput': completed / elapsed if elapsed else 0.0,
+        'p50': get_percentile(recorder.latencies, 0.5),
+        'p90': get_percentile(recorder.latencies, 0.9),
+        'p99': get_percentile(recorder.latencies, 0.99)}
+
+
+def run_level(mode: str, wsdl: str, concurrency: int,
+              number_of_stations: int, extra_config: Mapping) -> Mapping:
+    """Scrape services at a concurrency level
+
+    :param mode: `sync` for a thread pool, `async` for asyncio
+    :param wsdl: WSDL url of the stand-in
+    :param concurrency: Worker threads or requests in flight
+    :param number_of_stations: Number of distinct origin stations
+    :param extra_config: Extra data access config settings
+    :return: Throughput and latency percentiles of the level
+    """
+    config = create_data_access_config(wsdl, number_of_stations,
+                                       extra_config)
+    services = create_services(number_of_stations)
+    recorder = LatencyRecorder()
+    if mode == 'sync':
+        data_access = TimedDataAccess(DarwinDataAccess(config), recorder)
+        start_time = time.perf_counter()
+        scrape_stations_and_services(data_access, services, concurrency)
+        elapsed = time.perf_counter() - start_time
+    else:
+        async def scrape():
+            async with AsyncDarwinDataAccess(config) as darwin_data_access:
+                start = time.perf_counter()
+                await scrape_stations_and_services_async(
+                    AsyncTimedDataAccess(darwin_data_access, recorder),
+                    services, concurrency)
+                return time.perf_counter() - start
+        elapsed = asyncio.run(scrape())
+    return summarize(concurrency, elapsed, recorder)
+
+
+def run_load_test(mode: str, concurrency_levels: Iterable[int],
+                  number_of_stations: int, server_options: Mapping,
+                  extra_config: Mapping) -> List[Mapping]:
+    """Scrape services at each concurrency level against a fresh stand-in
+
+    :param mode: `sync` or `async`
+    :param concurrency_levels: Concurrency levels to run
+    :param number_of_stations: Number of distinct origin stations
+    :param server_options: Keyword arguments of `DarwinStandInServer`
+    :param extra_config: Extra data access config settings
+    :return: Results of each level
+    """
+    results = []
+    for concurrency in concurrency_levels:
+        with DarwinStandInServer(**server_options) as server:
+            result = run_level(mode, server.wsdl, concurrency,
+                               number_of_stations, extra_config)
+            result['server'] = server.get_statistics()
+        results.append(result)
+    return results
+
+
+def format_results(results: List[Mapping]) -> str:
+    lines = [f'{"concurrency":>11} {"services":>8} {"errors":>6} '
+             f'{"per sec":>8} {"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8}']
+    for r in results:
+        lines.append(
+            f'{r["concurrency"]:>11} {r["services"]:>8} {r["errors"]:>6} '
+            f'{r["throughput"]:>8.1f} {r["p50"] * 1000:>8.1f} '
+            f'{r["p90"] * 1000:>8.1f} {r["p99"] * 1000:>8.1f}')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 2, 4, 8, 16])
+    parser.add_argument('--stations', type=int, default=64,
+                        help='Number of distinct origin stations')
+    parser.add_argument('--latency-median', type=float, default=0.05,
+                        help='Median of lognormal latency in seconds')
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float,
+                        help='Requests per second the stand-in allows')
+    parser.add_argument('--config', type=json.loads, default={},
+                        help='Extra data access config as JSON, e.g. '
+                             '\'{"response_mode": "raw"}\'')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server_options = {
+        'latency': {'distribution': 'lognormal',
+                    'median': args.latency_median,
+                    'sigma': args.latency_sigma}
+        if args.latency_median else None,
+        'error_rate': args.error_rate,
+        'throttle': {'rate': args.throttle_rate}
+        if args.throttle_rate else None,
+        'seed': args.seed}
+    results = run_load_test(args.mode, args.concurrency, args.stations,
+                            server_options, args.config)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'mode': args.mode, 'config': args.config,
+                       'server_options': server_options,
+                       'results': results}, file, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
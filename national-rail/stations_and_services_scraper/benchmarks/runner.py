@@ -0,0 +1,163 @@
+"""Run benchmarks, write their results as JSON and compare them with a
+saved baseline"""
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import sys
+import timeit
+from typing import Callable, Iterable, List, Mapping, Optional
+
+
+class Benchmark:
+    """Represent a function timed by a benchmark"""
+
+    def __init__(self, name: str, function: Callable[[], object],
+                 params: Optional[Mapping] = None):
+        """Create an instance of `Benchmark`
+
+        :param name: Unique name of the benchmark
+        :param function: Function timed, called without arguments
+        :param params: Parameters of the benchmark recorded with its result
+        """
+        self.name = name
+        self.function = function
+        self.params = params or {}
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = 5,
+                  min_time: float = 0.2) -> Mapping:
+    """Time a benchmark
+
+    The number of calls per timing is chosen so that a timing takes at least
+    `min_time` seconds. Times are seconds per call.
+
+    :param benchmark: Benchmark to run
+    :param repeat: Number of timings
+    :param min_time: Minimum seconds of each timing
+    :return: Result of the benchmark
+    """
+    timer = timeit.Timer(benchmark.function)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / elapsed * 1.1)) \
+            if elapsed else number * 10
+    timings = [t / number for t in timer.repeat(repeat, number)]
+    return {'name': benchmark.name, 'params': benchmark.params,
+            'number': number, 'repeat': repeat,
+            'min': min(timings), 'median': statistics.median(timings),
+            'mean': statistics.mean(timings),
+            'stdev': statistics.stdev(timings) if repeat > 1 else 0.0}
+
+
+def run_benchmarks(benchmarks: Iterable[Benchmark], repeat: int = 5,
+                   min_time: float = 0.2,
+                   pattern: Optional[str] = None) -> Mapping:
+    """Time benchmarks
+
+    :param benchmarks: Benchmarks to run
+    :param repeat: Number of timings of each benchmark
+    :param min_time: Minimum seconds of each timing
+    :param pattern: Shell style pattern of the names of benchmarks to run
+    :return: Environment and results of the benchmarks
+    """
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': [run_benchmark(b, repeat, min_time) for b in benchmarks
+                    if pattern is None
+                    or fnmatch.fnmatchcase(b.name, pattern)]}
+
+
+def compare_with_baseline(results: Mapping, baseline: Mapping,
+                          threshold: float) -> List[Mapping]:
+    """Compare results with baseline results by median time per call
+
+    :param results: Results of `run_benchmarks`
+    :param baseline: Saved results of `run_benchmarks`
+    :param threshold: Ratio to baseline above which a benchmark regressed
+    :return: Comparison of each benchmark found in both results
+    """
+    baseline_results = {r['name']: r for r in baseline['results']}
+    comparisons = []
+    for result in results['results']:
+        baseline_result = baseline_results.get(result['name'])
+        if baseline_result is None:
+            continue
+        ratio = result['median'] / baseline_result['median']
+        comparisons.append({'name': result['name'],
+                            'baseline': baseline_result['median'],
+                            'current': result['median'], 'ratio': ratio,
+                            'regressed': ratio > threshold})
+    return comparisons
+
+
+def format_results(results: Mapping) -> str:
+    lines = [f'{"benchmark":<48} {"median us":>12} {"min us":>12}']
+    for result in results['results']:
+        lines.append(f'{result["name"]:<48} {result["median"] * 1e6:>12.2f} '
+                     f'{result["min"] * 1e6:>12.2f}')
+    return '\n'.join(lines)
+
+
+def format_comparisons(comparisons: List[Mapping]) -> str:
+    lines = [f'{"benchmark":<48} {"baseline us":>12} {"current us":>12} '
+             f'{"ratio":>7}']
+    for comparison in comparisons:
+        lines.append(
+            f'{comparison["name"]:<48} {comparison["baseline"] * 1e6:>12.2f} '
+            f'{comparison["current"] * 1e6:>12.2f} '
+            f'{comparison["ratio"]:>7.2f}'
+            f'{"  REGRESSED" if comparison["regressed"] else ""}')
+    return '\n'.join(lines)
+
+
+def main(create_benchmarks: Callable[[argparse.Namespace],
+                                     Iterable[Benchmark]],
+         description: str,
+         add_arguments: Optional[Callable[[argparse.ArgumentParser],
+                                          None]] = None) -> int:
+    """Run benchmarks from the command line
+
+    :param create_benchmarks: Function creating the benchmarks from the
+                              parsed arguments
+    :param description: Description of the command
+    :param add_arguments: Function adding benchmark specific arguments
+    :return: Exit status, 1 if a benchmark regressed and
+             `--fail-on-regression` is given
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Minimum seconds of each timing')
+    parser.add_argument('--filter', help='Shell style benchmark name pattern')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    parser.add_argument('--baseline', help='Compare with saved JSON results')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='Ratio to baseline counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    if add_arguments is not None:
+        add_arguments(parser)
+    args = parser.parse_args()
+
+    results = run_benchmarks(create_benchmarks(args), args.repeat,
+                             args.min_time, args.filter)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+    if args.baseline:
+        with open(args.baseline) as file:
+            comparisons = compare_with_baseline(results, json.load(file),
+                                                args.threshold)
+        print()
+        print(format_comparisons(comparisons))
+        if args.fail_on_regression and any(c['regressed']
+                                           for c in comparisons):
+            return 1
+    return 0
@@ -1,6 +1,6 @@
 """Represent config_access settings"""
 from abc import ABC, abstractmethod
-from typing import Mapping, Iterable
+from typing import Mapping, Iterable, Optional
 import json
 
 from data_model import OriginAndCallingPointNames
@@ -41,7 +41,9 @@ class ConfigAccessFromConfigDataSet(ConfigAccess):
     def __init__(self, origins_and_calling_points_config_data: ConfigData,
                  stations_crs_codes_config_data: ConfigData,
                  darwin_access_config_data: ConfigData,
-                 darwin_token_config_data: ConfigData) -> None:
+                 darwin_token_config_data: ConfigData,
+                 data_publisher_config_data: Optional[ConfigData] = None)\
+            -> None:
         """Create an instance of `ConfigAccessFromConfigDataSet`
 
         :param origins_and_calling_points_config_data: origins and calling
@@ -49,6 +51,9 @@ class ConfigAccessFromConfigDataSet(ConfigAccess):
         :param stations_crs_codes_config_data: stations crs codes config data
         :param darwin_access_config_data: darwin access config data
         :param darwin_token_config_data: darwin token config data
+        :param data_publisher_config_data: data publisher config data, None
+                                           or config data getting None to
+                                           publish to console
         :return: An instance of `ConfigAccessFromConfigDataSet`
         """
         self._origins_and_calling_points_config_data = \
@@ -57,17 +62,32 @@ class ConfigAccessFromConfigDataSet(ConfigAccess):
             stations_crs_codes_config_data.get()
         self._darwin_access_config_data = darwin_access_config_data.get()
         self._darwin_token_config_data = darwin_token_config_data.get()
+        self._data_publisher_config_data = None \
+            if data_publisher_config_data is None \
+            else data_publisher_config_data.get()
 
     def get_data_access_config(self) -> Mapping:
         """Get data access config
 
         :return: Data access configuration
         """
+        darwin_access_config = json.loads(self._darwin_access_config_data)
         return {
             'station_name_crs_code_mapping':
                 self._stations_crs_codes_config_data,
-            'wsdl': json.loads(self._darwin_access_config_data)['wsdl'],
-            'token': self._darwin_token_config_data
+            'wsdl': darwin_access_config['wsdl'],
+            'token': self._darwin_token_config_data,
+            'max_workers': darwin_access_config.get('max_workers', 1),
+            'max_concurrency': darwin_access_config.get('max_concurrency'),
+            'wsdl_cache': darwin_access_config.get('wsdl_cache'),
+            'board_cache': darwin_access_config.get('board_cache'),
+            'response_mode': darwin_access_config.get('response_mode', 'zeep'),
+            'filter_calling_points':
+                darwin_access_config.get('filter_calling_points', False),
+            'lazy_services': darwin_access_config.get('lazy_services', False),
+            'rate_limit': darwin_access_config.get('rate_limit'),
+            'hedging': darwin_access_config.get('hedging'),
+            'pipeline': darwin_access_config.get('pipeline')
         }
 
     def get_services_origin_and_calling_point_names(self) \
@@ -84,4 +104,24 @@ class ConfigAccessFromConfigDataSet(ConfigAccess):
 
         :return: Data publish configuration
         """
-        return {}
+        if self._data_publisher_config_data is None:
+            return {'publisher': 'console'}
+        data_publisher_config = json.loads(self._data_publisher_config_data)
+        return {
+            'publisher': data_publisher_config.get('publisher', 'console'),
+            'region_name': data_publisher_config.get('region_name'),
+            'endpoint_url': data_publisher_config.get('endpoint_url'),
+            'max_pool_connections':
+                data_publisher_config.get('max_pool_connections', 10),
+            'max_concurrency': data_publisher_config.get('max_concurrency', 4),
+            'max_attempts': data_publisher_config.get('max_attempts', 3),
+            'retry_delay': data_publisher_config.get('retry_delay', 0.1),
+            's3': data_publisher_config.get('s3'),
+            'firehose': data_publisher_config.get('firehose'),
+            'kinesis': data_publisher_config.get('kinesis'),
+            'archive': data_publisher_config.get('archive'),
+            'history': data_publisher_config.get('history'),
+            'compression': data_publisher_config.get('compression'),
+            'publishers': data_publisher_config.get('publishers'),
+            'max_queued': data_publisher_config.get('max_queued', 16)
+        }
@@ -1,2 +1,2 @@
 from .config_data import ConfigData, ConfigDataAwsS3, \
-    ConfigDataAwsSecretManager
+    ConfigDataAwsSecretManager, ConfigDataRefreshed
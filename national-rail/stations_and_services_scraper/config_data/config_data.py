@@ -1,43 +1,63 @@
 """Represent config data"""
 import json
 import boto3
+from botocore.exceptions import ClientError
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+
+# Error codes of a missing key. Without the s3:ListBucket permission S3
+# answers AccessDenied rather than NoSuchKey for a key that does not exist
+MISSING_KEY_ERROR_CODES = frozenset(('NoSuchKey', 'AccessDenied'))
 
 
 class ConfigData(ABC):
     """Represent config data"""
     @abstractmethod
-    def get(self) -> str:
+    def get(self) -> Optional[str]:
         """Get raw config data
 
-        :return: Raw config data in string
+        :return: Raw config data in string, None if there is none
         """
         pass
 
 
 class ConfigDataAwsS3(ConfigData):
     """Represent config data stored by AWS S3 service"""
-    def __init__(self, bucket_name: str, key_name: str):
+    def __init__(self, bucket_name: str, key_name: str,
+                 is_optional: bool = False):
         """Create an instance of `ConfigDataAwsS3`
 
         :param bucket_name: Bucket name the S3 session connected to
         :param key_name: Key name the S3 session connected to
+        :param is_optional: Whether a missing key, or one access is denied
+                            to, is no config data rather than an error
        """
         self._s3 = boto3.resource('s3')
         self._bucket_name = bucket_name
         self._key_name = key_name
+        self._is_optional = is_optional
         self._config_data = None
+        self._is_fetched = False
 
-    def get(self) -> str:
+    def get(self) -> Optional[str]:
         """Get raw config data from a key in AWS S3 bucket
 
-        :return: Raw config data in string
+        :return: Raw config data in string, None if the key is optional and
+                 missing
         """
-        if self._config_data is None:
+        if not self._is_fetched:
             s3_object = self._s3.Object(
                 bucket_name=self._bucket_name, key=self._key_name)
-            self._config_data = s3_object.get()['Body'].read()
+            try:
+                self._config_data = s3_object.get()['Body'].read()
+            except ClientError as error:
+                if not self._is_optional \
+                        or error.response['Error']['Code'] \
+                        not in MISSING_KEY_ERROR_CODES:
+                    raise
+            self._is_fetched = True
         return self._config_data
 
 
@@ -133,3 +153,34 @@ class ConfigDataAwsAppConfig(ConfigData):
         config_expiry_time = self._last_get_latest_config_time\
                              + timedelta(seconds=self._poll_interval_seconds)
         return config_expiry_time < datetime.utcnow()
+
+
+class ConfigDataRefreshed(ConfigData):
+    """Represent config data fetched again once it is older than a maximum
+    age"""
+    def __init__(self, create_config_data: Callable[[], ConfigData],
+                 max_age: Optional[timedelta] = None):
+        """Create an instance of `ConfigDataRefreshed`
+
+        :param create_config_data: Function creating the config data to fetch
+        :param max_age: Maximum age of the fetched config data, the config
+                        data is fetched once if None
+        """
+        self._create_config_data = create_config_data
+        self._max_age = max_age
+        self._config_data = None
+        self._last_get_config_time = None
+
+    def get(self) -> Optional[str]:
+        """Get raw config data, fetching it again if it is too old
+
+        :return: Raw config data in string, None if there is none
+        """
+        if self._last_get_config_time is None or self._is_max_age_passed():
+            self._config_data = self._create_config_data().get()
+            self._last_get_config_time = datetime.utcnow()
+        return self._config_data
+
+    def _is_max_age_passed(self):
+        return self._max_age is not None \
+            and self._last_get_config_time + self._max_age <= datetime.utcnow()
@@ -1,2 +1,2 @@
-from .data_access import DataAccess
-from .darwin.darwin_access import DarwinDataAccess
+from .data_access import DataAccess, AsyncDataAccess
+from .darwin.darwin_access import DarwinDataAccess, AsyncDarwinDataAccess
@@ -0,0 +1,224 @@
+"""Cache for departure boards from Darwin web service"""
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Hashable, Mapping, Optional
+
+from zeep.helpers import serialize_object
+
+from .departure_board import get_departure_board_request_key
+
+
+DATETIME_KEY = '$datetime'
+
+
+def encode_datetime(value):
+    """Encode a datetime of a departure board as a JSON object
+
+    :param value: Value not serializable to JSON by default
+    :return: JSON object with the datetime in ISO 8601 format
+    """
+    if isinstance(value, datetime):
+        return {DATETIME_KEY: value.isoformat()}
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def decode_datetime(value: dict):
+    """Decode a JSON object encoded by `encode_datetime`
+
+    :param value: JSON object
+    :return: The datetime it encodes, or the object itself
+    """
+    if len(value) == 1 and DATETIME_KEY in value:
+        return datetime.fromisoformat(value[DATETIME_KEY])
+    return value
+
+
+class DepartureBoardCache(ABC):
+    """Represent a cache of departure boards keyed by their request"""
+
+    # Whether getting and putting departure boards blocks on I/O, so that
+    # asynchronous clients run them in an executor
+    is_blocking = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._statistics_lock = threading.Lock()
+
+    def get(self, request: Mapping) -> Optional[Mapping]:
+        """Get departure board cached for a request
+
+        :param request: Parameters of departure board request
+        :return: Departure board, None if it is not cached or has expired
+        """
+        departure_board = self._get(self._create_key(request))
+        with self._statistics_lock:
+            if departure_board is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return departure_board
+
+    def put(self, request: Mapping, departure_board: Mapping) -> None:
+        """Cache departure board of a request
+
+        :param request: Parameters of departure board request
+        :param departure_board: Departure board
+        :return: None
+        """
+        self._put(self._create_key(request), departure_board)
+
+    def get_statistics(self) -> Mapping:
+        """Get numbers of cache hits and misses
+
+        :return: Numbers of cache hits and misses
+        """
+        with self._statistics_lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    @staticmethod
+    def _create_key(request: Mapping) -> Hashable:
+        return get_departure_board_request_key(request)
+
+    @abstractmethod
+    def _get(self, key: Hashable) -> Optional[Mapping]:
+        pass
+
+    @abstractmethod
+    def _put(self, key: Hashable, departure_board: Mapping) -> None:
+        pass
+
+
+class InMemoryDepartureBoardCache(DepartureBoardCache):
+    """Represent a cache of departure boards in memory, evicting the least
+    recently used departure board when full"""
+
+    def __init__(self, ttl: float, max_size: int):
+        """Create an instance of `InMemoryDepartureBoardCache`
+
+        :param ttl: Seconds that a departure board is cached for
+        :param max_size: Maximum number of departure boards cached
+        """
+        super().__init__()
+        self._ttl = ttl
+        self._max_size = max_size
+        self._departure_boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable) -> Optional[Mapping]:
+        with self._lock:
+            cached = self._departure_boards.get(key)
+            if cached is None:
+                return None
+            expiry_time, departure_board = cached
+            if expiry_time <= time.monotonic():
+                del self._departure_boards[key]
+                return None
+            self._departure_boards.move_to_end(key)
+            return departure_board
+
+    def _put(self, key: Hashable, departure_board: Mapping) -> None:
+        with self._lock:
+            self._departure_boards[key] = \
+                (time.monotonic() + self._ttl, departure_board)
+            self._departure_boards.move_to_end(key)
+            while len(self._departure_boards) > self._max_size:
+                self._departure_boards.popitem(last=False)
+
+
+class DiskDepartureBoardCache(DepartureBoardCache):
+    """Represent a cache of departure boards in files of a directory,
+    evicting the least recently used departure board when full
+
+    Departure boards are stored as JSON with datetimes encoded explicitly,
+    so a cached board is read in the same way as one from Darwin web
+    service and reading a file never runs code from it.
+    """
+
+    is_blocking = True
+    _suffix = '.board'
+
+    def __init__(self, directory: str, ttl: float, max_size: int):
+        """Create an instance of `DiskDepartureBoardCache`
+
+        :param directory: Directory the departure boards are stored in
+        :param ttl: Seconds that a departure board is cached for
+        :param max_size: Maximum number of departure boards cached
+        """
+        super().__init__()
+        self._directory = directory
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _get(self, key: Hashable) -> Optional[Mapping]:
+        path = self._get_path(key)
+        with self._lock:
+            try:
+                stored_time = os.stat(path).st_mtime
+                if stored_time + self._ttl <= time.time():
+                    os.remove(path)
+                    return None
+                with open(path, encoding='utf-8') as file:
+                    departure_board = json.load(file,
+                                                object_hook=decode_datetime)
+                os.utime(path, (time.time(), stored_time))
+                return departure_board
+            except (OSError, ValueError):
+                return None
+
+    def _put(self, key: Hashable, departure_board: Mapping) -> None:
+        path = self._get_path(key)
+        temporary_path = f'{path}.{os.getpid()}.{threading.get_ident()}'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(serialize_object(departure_board, dict), file,
+                      default=encode_datetime)
+        with self._lock:
+            os.replace(temporary_path, path)
+            self._evict()
+
+    def _get_path(self, key: Hashable) -> str:
+        name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self._directory, name + self._suffix)
+
+    def _evict(self):
+        paths = [os.path.join(self._directory, name)
+                 for name in os.listdir(self._directory)
+                 if name.endswith(self._suffix)]
+        if len(paths) <= self._max_size:
+            return
+        paths.sort(key=lambda p: os.stat(p).st_atime)
+        for path in paths[:len(paths) - self._max_size]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def create_departure_board_cache(config: Optional[Mapping])\
+        -> Optional[DepartureBoardCache]:
+    """Create a cache of departure boards from config
+
+    Supported settings are `type` (`memory` or `disk`), `ttl` in seconds,
+    `max_size` and `directory` of the disk cache.
+
+    :param config: Cache config settings, no cache is created if None
+    :return: A departure board cache or None
+    """
+    if not config:
+        return None
+    cache_type = config.get('type', 'memory')
+    ttl = config.get('ttl', 30)
+    max_size = config.get('max_size', 256)
+    if cache_type == 'memory':
+        return InMemoryDepartureBoardCache(ttl, max_size)
+    if cache_type == 'disk':
+        return DiskDepartureBoardCache(config['directory'], ttl, max_size)
+    raise ValueError(f'Unknown departure board cache type {cache_type}')
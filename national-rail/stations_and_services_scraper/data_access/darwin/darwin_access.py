@@ -1,15 +1,31 @@
 """Represent access to Darwin web service"""
+import asyncio
+import copy
 import json
+import logging
 import zeep
-from typing import Mapping
+from typing import Iterable, List, Mapping, Optional
+from zeep.cache import Base
 
 from .station import get_station
-from .service import get_services
-from data_access import DataAccess
+from .service import get_services, LazyServices
+from .schema_cache import create_schema_cache
+from .board_cache import create_departure_board_cache
+from .rate_limit import create_rate_limiter
+from .hedging import create_hedger
+from .raw_board import get_departure_board_from_response
+from .departure_board import create_departure_board_request, \
+    create_departure_board_requests, merge_departure_boards
+from .query_planner import DepartureBoardQueryPlanner, \
+    AsyncDepartureBoardQueryPlanner
+from data_access import DataAccess, AsyncDataAccess
 from error import StationCrsCodeNotFoundError
 from data_model import OriginAndCallingPointNames, StationAndServices
 
 
+logger = logging.getLogger(__name__)
+
+
 class DarwinClient:
     """Represent the client to use Darwin soap web service"""
 
@@ -18,16 +34,46 @@ class DarwinClient:
 
         :param config: Config settings for initialization
         """
-        self._station_name_crs_code_mapping = \
-            json.loads(config.get('station_name_crs_code_mapping'))
+        self._is_raw_response = config.get('response_mode') == 'raw'
         self._client = self._create_soap_client(
-            config.get('wsdl'))
-        self._header = self._create_soap_headers(
-            config.get('token'))
+            config.get('wsdl'), create_schema_cache(config.get('wsdl_cache')),
+            zeep.Settings(raw_response=self._is_raw_response))
+        self.board_cache = \
+            create_departure_board_cache(config.get('board_cache'))
+        self.rate_limiter = create_rate_limiter(config.get('rate_limit'))
+        self.hedger = create_hedger(config.get('hedging'),
+                                    config.get('max_workers') or 1)
+        self._station_name_crs_code_mapping_config = None
+        self._token = None
+        self.update_config(config)
+
+    def update_config(self, config: Mapping) -> None:
+        """Update station crs codes, token and calling point filtering,
+        keeping the soap client
+
+        :param config: Config settings
+        :return: None
+        """
+        station_name_crs_code_mapping_config = \
+            config.get('station_name_crs_code_mapping')
+        if station_name_crs_code_mapping_config != \
+                self._station_name_crs_code_mapping_config:
+            self._station_name_crs_code_mapping = \
+                json.loads(station_name_crs_code_mapping_config)
+            self._station_name_crs_code_mapping_config = \
+                station_name_crs_code_mapping_config
+        token = config.get('token')
+        if token != self._token:
+            self._header = self._create_soap_headers(token)
+            self._token = token
+        self._is_filtering_calling_points = \
+            bool(config.get('filter_calling_points'))
 
     @staticmethod
-    def _create_soap_client(wsdl: str):
-        return zeep.Client(wsdl=wsdl)
+    def _create_soap_client(wsdl: str, cache: Optional[Base],
+                            settings: zeep.Settings):
+        return zeep.Client(wsdl=wsdl, transport=zeep.Transport(cache=cache),
+                           settings=settings)
 
     @staticmethod
     def _create_soap_headers(token: str):
@@ -44,12 +90,105 @@ class DarwinClient:
         :param station_name: Name of the station
         :return: Departure board with details from Darwin web service
         """
-        station_crs_code = self._get_station_crs_code(station_name)
-        return self._client.service.GetDepBoardWithDetails(
-            numRows=20, crs=station_crs_code, timeOffset=0, timeWindow=120,
-            _soapheaders=[self._header])
+        return self.get_departure_board(create_departure_board_request(
+            self.get_station_crs_code(station_name)))
+
+    def create_departure_board_requests(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> List[Mapping]:
+        """Create the departure board requests for a service's origin
+
+        With calling point filtering on, a request filtered to each calling
+        point is created, so that Darwin web service leaves out the services
+        calling at none of them. Otherwise a single unfiltered request is
+        created.
+
+        :param origin_and_calling_point_names: The service's origin and
+                                               calling point names
+        :return: Parameters of the departure board requests
+        """
+        filter_crs_codes = self._get_filter_crs_codes(
+            origin_and_calling_point_names.calling_point_names) \
+            if self._is_filtering_calling_points else []
+        return create_departure_board_requests(
+            self.get_station_crs_code(
+                origin_and_calling_point_names.origin_name),
+            filter_crs_codes, origin_and_calling_point_names.num_rows,
+            origin_and_calling_point_names.time_offset,
+            origin_and_calling_point_names.time_window)
+
+    def _get_filter_crs_codes(self, calling_point_names: Iterable[str])\
+            -> List[str]:
+        try:
+            return sorted({self.get_station_crs_code(calling_point_name)
+                           for calling_point_name in calling_point_names})
+        except StationCrsCodeNotFoundError as error:
+            logger.warning('%s, requesting unfiltered departure board',
+                           error)
+            return []
+
+    def get_departure_board(self, request: Mapping) -> Mapping:
+        """Get departure board of a request from Darwin web service
 
-    def _get_station_crs_code(self, station_name: str) -> str:
+        :param request: Parameters of departure board request
+        :return: Departure board with details from Darwin web service
+        """
+        if self.board_cache is not None:
+            departure_board = self.board_cache.get(request)
+            if departure_board is not None:
+                return departure_board
+        departure_board = self._call_get_departure_board(request) \
+            if self.hedger is None \
+            else self.hedger.call(
+                lambda: self._call_get_departure_board(request))
+        if self.board_cache is not None:
+            self.board_cache.put(request, departure_board)
+        return departure_board
+
+    def _call_get_departure_board(self, request: Mapping) -> Mapping:
+        if self.rate_limiter is None:
+            return self._send_get_departure_board(request)
+        with self.rate_limiter.limit():
+            return self._send_get_departure_board(request)
+
+    def _send_get_departure_board(self, request: Mapping) -> Mapping:
+        departure_board = self._client.service.GetDepBoardWithDetails(
+            **request, _soapheaders=[self._header])
+        if self._is_raw_response:
+            departure_board = \
+                get_departure_board_from_response(departure_board)
+        return departure_board
+
+    def get_statistics(self) -> Mapping:
+        """Get statistics of the departure board cache, rate limiter and
+        hedger that are configured
+
+        :return: Statistics keyed by `board_cache`, `rate_limiter` and
+                 `hedger`
+        """
+        statistics = {}
+        if self.board_cache is not None:
+            statistics['board_cache'] = self.board_cache.get_statistics()
+        if self.rate_limiter is not None:
+            statistics['rate_limiter'] = self.rate_limiter.get_metrics()
+        if self.hedger is not None:
+            statistics['hedger'] = self.hedger.get_statistics()
+        return statistics
+
+    def close(self) -> None:
+        """Stop the threads hedging calls
+
+        :return: None
+        """
+        if self.hedger is not None:
+            self.hedger.shutdown()
+
+    def get_station_crs_code(self, station_name: str) -> str:
+        """Get crs code of a station
+
+        :param station_name: Name of the station
+        :return: Crs code of the station
+        """
         station_crs_code = \
             self._station_name_crs_code_mapping.get(station_name, None)
         if not station_crs_code:
@@ -58,6 +197,75 @@ class DarwinClient:
         return station_crs_code
 
 
+class AsyncDarwinClient(DarwinClient):
+    """Represent the client to use Darwin soap web service asynchronously"""
+
+    @staticmethod
+    def _create_soap_client(wsdl: str, cache: Optional[Base],
+                            settings: zeep.Settings):
+        return zeep.AsyncClient(
+            wsdl=wsdl, transport=zeep.transports.AsyncTransport(cache=cache),
+            settings=settings)
+
+    async def get_departure_board_with_details(self, station_name: str)\
+            -> Mapping:
+        """Get departure board with details from Darwin web service
+
+        :param station_name: Name of the station
+        :return: Departure board with details from Darwin web service
+        """
+        return await self.get_departure_board(create_departure_board_request(
+            self.get_station_crs_code(station_name)))
+
+    async def get_departure_board(self, request: Mapping) -> Mapping:
+        """Get departure board of a request from Darwin web service
+
+        :param request: Parameters of departure board request
+        :return: Departure board with details from Darwin web service
+        """
+        if self.board_cache is not None:
+            departure_board = await self._run_board_cache(
+                self.board_cache.get, request)
+            if departure_board is not None:
+                return departure_board
+        departure_board = await self._call_get_departure_board(request) \
+            if self.hedger is None \
+            else await self.hedger.call_async(
+                lambda: self._call_get_departure_board(request))
+        if self.board_cache is not None:
+            await self._run_board_cache(
+                self.board_cache.put, request, departure_board)
+        return departure_board
+
+    async def _run_board_cache(self, function, *args):
+        if not self.board_cache.is_blocking:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, function, *args)
+
+    async def _call_get_departure_board(self, request: Mapping) -> Mapping:
+        if self.rate_limiter is None:
+            return await self._send_get_departure_board(request)
+        async with self.rate_limiter.limit_async():
+            return await self._send_get_departure_board(request)
+
+    async def _send_get_departure_board(self, request: Mapping) -> Mapping:
+        departure_board = await self._client.service.GetDepBoardWithDetails(
+            **request, _soapheaders=[self._header])
+        if self._is_raw_response:
+            departure_board = \
+                get_departure_board_from_response(departure_board)
+        return departure_board
+
+    async def aclose(self) -> None:
+        """Close the underlying http connections
+
+        :return: None
+        """
+        self.close()
+        await self._client.transport.aclose()
+
+
 class DarwinDataAccess(DataAccess):
     """Represent access to national rail data provided by Darwin"""
 
@@ -67,6 +275,41 @@ class DarwinDataAccess(DataAccess):
         :param config: Config settings for initialization
         """
         self._client = DarwinClient(config)
+        self._is_lazy = bool(config.get('lazy_services'))
+
+    def update_config(self, config: Mapping) -> None:
+        """Update config settings that do not require a new soap client
+
+        :param config: Config settings
+        :return: None
+        """
+        self._client.update_config(config)
+        self._is_lazy = bool(config.get('lazy_services'))
+
+    def get_statistics(self) -> Mapping:
+        """Get statistics of the client to Darwin web service
+
+        :return: Statistics of the departure board cache, rate limiter and
+                 hedger that are configured
+        """
+        return self._client.get_statistics()
+
+    def plan(self, services_origin_and_calling_point_names:
+             Iterable[OriginAndCallingPointNames]) -> 'DarwinDataAccess':
+        """Plan getting stations and services for a collection of services
+
+        The returned data access fetches each distinct departure board once
+        and shares it between the services that request it.
+
+        :param services_origin_and_calling_point_names: Services' origin and
+                                                        calling point names
+        :return: Data access to use for getting the planned stations and
+                 services
+        """
+        planned_data_access = copy.copy(self)
+        planned_data_access._client = DepartureBoardQueryPlanner(
+            self._client, services_origin_and_calling_point_names)
+        return planned_data_access
 
     def get_station_and_services(
             self, origin_and_calling_point_names: OriginAndCallingPointNames)\
@@ -77,14 +320,112 @@ class DarwinDataAccess(DataAccess):
                                                calling point names
         :return: an instance of `StationAndServices`
         """
-        origin_name = origin_and_calling_point_names.origin_name
         calling_point_names_included =\
             origin_and_calling_point_names.calling_point_names
-        departure_board =\
-            self._client.get_departure_board_with_details(origin_name)
+        departure_board = merge_departure_boards([
+            self._client.get_departure_board(request)
+            for request in self._client.create_departure_board_requests(
+                origin_and_calling_point_names)])
+        if self._is_lazy:
+            return get_lazy_station_and_services(
+                departure_board, calling_point_names_included)
         return get_station_and_services(departure_board,
                                         calling_point_names_included)
 
+    def close(self) -> None:
+        """Stop the threads of the client to Darwin web service
+
+        :return: None
+        """
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class AsyncDarwinDataAccess(AsyncDataAccess):
+    """Represent asynchronous access to national rail data provided by
+    Darwin"""
+
+    def __init__(self, config: Mapping):
+        """Create an instance of `AsyncDarwinDataAccess`
+
+        :param config: Config settings for initialization
+        """
+        self._client = AsyncDarwinClient(config)
+        self._is_lazy = bool(config.get('lazy_services'))
+
+    def update_config(self, config: Mapping) -> None:
+        """Update config settings that do not require a new soap client
+
+        :param config: Config settings
+        :return: None
+        """
+        self._client.update_config(config)
+        self._is_lazy = bool(config.get('lazy_services'))
+
+    def get_statistics(self) -> Mapping:
+        """Get statistics of the client to Darwin web service
+
+        :return: Statistics of the departure board cache, rate limiter and
+                 hedger that are configured
+        """
+        return self._client.get_statistics()
+
+    def plan(self, services_origin_and_calling_point_names:
+             Iterable[OriginAndCallingPointNames]) -> 'AsyncDarwinDataAccess':
+        """Plan getting stations and services for a collection of services
+
+        The returned data access fetches each distinct departure board once
+        and shares it between the services that request it.
+
+        :param services_origin_and_calling_point_names: Services' origin and
+                                                        calling point names
+        :return: Data access to use for getting the planned stations and
+                 services
+        """
+        planned_data_access = copy.copy(self)
+        planned_data_access._client = AsyncDepartureBoardQueryPlanner(
+            self._client, services_origin_and_calling_point_names)
+        return planned_data_access
+
+    async def get_station_and_services(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> StationAndServices:
+        """Get station and related services
+
+        :param origin_and_calling_point_names: The service's origin and
+                                               calling point names
+        :return: an instance of `StationAndServices`
+        """
+        calling_point_names_included =\
+            origin_and_calling_point_names.calling_point_names
+        departure_board = merge_departure_boards(await asyncio.gather(*(
+            self._client.get_departure_board(request)
+            for request in self._client.create_departure_board_requests(
+                origin_and_calling_point_names))))
+        if self._is_lazy:
+            return get_lazy_station_and_services(
+                departure_board, calling_point_names_included)
+        return get_station_and_services(departure_board,
+                                        calling_point_names_included)
+
+    async def aclose(self) -> None:
+        """Close the connections to Darwin web service
+
+        :return: None
+        """
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
 
 def get_station_and_services(
         departure_board_with_details, calling_point_names_included)\
@@ -93,3 +434,19 @@ def get_station_and_services(
     services = get_services(departure_board_with_details,
                             calling_point_names_included)
     return StationAndServices(station, services)
+
+
+def get_lazy_station_and_services(
+        departure_board_with_details, calling_point_names_included)\
+        -> StationAndServices:
+    """Get station and a `LazyServices` view of the related services, which
+    creates each service when first accessed
+
+    :param departure_board_with_details: Departure board with details
+    :param calling_point_names_included: Names of calling points included
+    :return: an instance of `StationAndServices`
+    """
+    station = get_station(departure_board_with_details)
+    services = LazyServices(departure_board_with_details,
+                            calling_point_names_included)
+    return StationAndServices(station, services)
@@ -0,0 +1,76 @@
+"""Functions for parsing Darwin `HH:MM` times
+
+Darwin times are one of the 1440 minutes of a day, so they are looked up in
+tables built once instead of parsed with `datetime.strptime`. Services
+sharing a time share its `datetime.time` and string objects.
+"""
+from datetime import time
+from typing import Mapping, Optional
+
+from error import DarwinTimeFormatError
+
+
+TIMES: Mapping[str, time] = {
+    f'{hour:02d}:{minute:02d}': time(hour, minute)
+    for hour in range(24) for minute in range(60)}
+TIME_TEXTS: Mapping[str, str] = {text: text for text in TIMES}
+
+
+def is_time(text: str) -> bool:
+    """Indicate if a text is a well formed `HH:MM` time
+
+    :param text: Text
+    :return: True if the text is a time
+    """
+    return text in TIMES
+
+
+def parse_time(text: str) -> time:
+    """Parse a `HH:MM` time strictly
+
+    :param text: `HH:MM` time, hours 00 to 23 and minutes 00 to 59
+    :return: Time, shared by all equal texts
+    """
+    try:
+        return TIMES[text]
+    except (KeyError, TypeError):
+        raise DarwinTimeFormatError(f'Malformed Darwin time {text!r}') \
+            from None
+
+
+def parse_optional_time(text: Optional[str]) -> Optional[time]:
+    """Parse a `HH:MM` time of an optional field leniently
+
+    :param text: `HH:MM` time, None if the field is missing
+    :return: Time, shared by all equal texts, None if the text is missing
+             or malformed
+    """
+    return TIMES.get(text) if isinstance(text, str) else None
+
+
+def get_time_text(text: str) -> str:
+    """Validate a `HH:MM` time strictly
+
+    :param text: `HH:MM` time, hours 00 to 23 and minutes 00 to 59
+    :return: Time text, shared by all equal texts
+    """
+    try:
+        return TIME_TEXTS[text]
+    except (KeyError, TypeError):
+        raise DarwinTimeFormatError(f'Malformed Darwin time {text!r}') \
+            from None
+
+
+def get_estimated_time_text(text: str) -> str:
+    """Validate an estimated or actual time, which is either a `HH:MM` time
+    or a status such as `On time`, `Delayed` or `Cancelled`
+
+    :param text: Estimated or actual time
+    :return: Time text shared by all equal texts, or the status unchanged
+    """
+    time_text = TIME_TEXTS.get(text)
+    if time_text is not None:
+        return time_text
+    if not text or text[0].isdigit():
+        raise DarwinTimeFormatError(f'Malformed Darwin time {text!r}')
+    return text
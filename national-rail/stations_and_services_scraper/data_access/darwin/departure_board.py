@@ -0,0 +1,112 @@
+"""Functions for creating departure board requests and merging their
+departure boards"""
+from datetime import datetime
+from typing import Hashable, List, Mapping, Optional, Sequence
+
+
+DEFAULT_NUM_ROWS = 20
+DEFAULT_TIME_OFFSET = 0
+DEFAULT_TIME_WINDOW = 120
+MINUTES_PER_DAY = 24 * 60
+
+
+def create_departure_board_request(
+        crs: str, filter_crs: Optional[str] = None,
+        num_rows: Optional[int] = None, time_offset: Optional[int] = None,
+        time_window: Optional[int] = None) -> Mapping:
+    """Create parameters of a `GetDepBoardWithDetails` request
+
+    :param crs: Crs code of the station
+    :param filter_crs: Crs code of a station the services must call at
+                       after this station, None to request all services
+    :param num_rows: Maximum number of services, None for the default 20
+    :param time_offset: Minutes from now that the board starts at, None for
+                        the default 0
+    :param time_window: Minutes that the board covers, None for the default
+                        120
+    :return: Parameters of the request
+    """
+    request = {
+        'numRows': DEFAULT_NUM_ROWS if num_rows is None else num_rows,
+        'crs': crs,
+        'timeOffset':
+            DEFAULT_TIME_OFFSET if time_offset is None else time_offset,
+        'timeWindow':
+            DEFAULT_TIME_WINDOW if time_window is None else time_window}
+    if filter_crs:
+        request['filterCrs'] = filter_crs
+        request['filterType'] = 'to'
+    return request
+
+
+def create_departure_board_requests(
+        crs: str, filter_crs_codes: Sequence[str],
+        num_rows: Optional[int] = None, time_offset: Optional[int] = None,
+        time_window: Optional[int] = None) -> List[Mapping]:
+    """Create a request filtered to each of several stations, or a single
+    unfiltered request if there are none
+
+    :param crs: Crs code of the station
+    :param filter_crs_codes: Crs codes of the stations to filter to
+    :param num_rows: Maximum number of services per request
+    :param time_offset: Minutes from now that the board starts at
+    :param time_window: Minutes that the board covers
+    :return: Parameters of the requests
+    """
+    return [create_departure_board_request(crs, filter_crs, num_rows,
+                                           time_offset, time_window)
+            for filter_crs in (filter_crs_codes or [None])]
+
+
+def get_departure_board_request_key(request: Mapping) -> Hashable:
+    """Get a key identifying the departure board of a request
+
+    :param request: Parameters of departure board request
+    :return: Key of the request
+    """
+    return tuple(sorted(request.items()))
+
+
+def merge_departure_boards(departure_boards: Sequence[Mapping]) -> Mapping:
+    """Merge departure boards of the same station requested with different
+    filters
+
+    Station details are taken from the first departure board. Services are
+    de-duplicated by service id and ordered by departure time.
+
+    :param departure_boards: Departure boards of the same station
+    :return: Merged departure board, the only one if there is just one
+    """
+    if len(departure_boards) == 1:
+        return departure_boards[0]
+
+    merged_departure_board = \
+        {key: departure_boards[0][key] for key in departure_boards[0]}
+    services = {}
+    for departure_board in departure_boards:
+        if departure_board['trainServices']:
+            for service in departure_board['trainServices']['service']:
+                services.setdefault(service['serviceID'], service)
+    generated_minute = \
+        get_minute_of_day(departure_boards[0]['generatedAt'])
+    merged_departure_board['trainServices'] = {'service': sorted(
+        services.values(),
+        key=lambda s: (get_minute_of_day(s['std']) - generated_minute
+                       + MINUTES_PER_DAY // 2) % MINUTES_PER_DAY)} \
+        if services else None
+    return merged_departure_board
+
+
+def get_minute_of_day(time) -> int:
+    """Get minutes since midnight of a `HH:MM` time or a date time
+
+    :param time: `HH:MM` string, date time or its ISO 8601 string
+    :return: Minutes since midnight
+    """
+    if isinstance(time, str):
+        if len(time) == 5:
+            return int(time[:2]) * 60 + int(time[3:])
+        time = datetime.fromisoformat(time[:19])
+    if isinstance(time, datetime):
+        return time.hour * 60 + time.minute
+    raise ValueError(f'Unsupported time {time!r}')
@@ -0,0 +1,235 @@
+"""Hedge slow calls to Darwin web service with a duplicate call"""
+import asyncio
+import concurrent.futures
+import math
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Mapping, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+class LatencyTracker:
+    """Represent latencies of the most recent calls"""
+
+    def __init__(self, window: int):
+        """Create an instance of `LatencyTracker`
+
+        :param window: Number of recent latencies kept
+        """
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def record(self, latency: float) -> None:
+        """Record latency of a call
+
+        :param latency: Seconds the call took
+        :return: None
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def get_percentile(self, percentile: float) -> Optional[float]:
+        """Get a percentile of the recent latencies
+
+        :param percentile: Percentile between 0 and 1
+        :return: Latency at the percentile, None if nothing is recorded
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1,
+                             max(0, math.ceil(percentile * len(latencies))
+                                 - 1))]
+
+
+class Hedger:
+    """Represent a policy that fires a duplicate of a call still running
+    after a percentile of recent latency, taking whichever answers first
+
+    At most `budget` duplicates are fired per call on average, so that
+    hedging does not use up the access token quota. A synchronous call runs
+    in a thread of the hedger, and the hedge delay counts from when the
+    call starts running rather than from when it is queued.
+    """
+
+    def __init__(self, percentile: float, budget: float, min_samples: int,
+                 window: int, max_workers: int = 2):
+        """Create an instance of `Hedger`
+
+        :param percentile: Percentile of recent latency after which a
+                           duplicate is fired
+        :param budget: Maximum ratio of duplicate calls to calls
+        :param min_samples: Latencies recorded before hedging starts
+        :param window: Number of recent latencies the percentile is over
+        :param max_workers: Maximum number of threads running synchronous
+                            calls, two per thread calling the hedger so that
+                            calls and their duplicates are never queued
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latency_tracker = LatencyTracker(window)
+        self._max_workers = max_workers
+        self._executor = None
+        self._statistics = {'calls': 0, 'hedges': 0, 'hedge_wins': 0}
+        self._lock = threading.Lock()
+
+    def get_hedge_delay(self) -> Optional[float]:
+        """Get seconds after which a duplicate call is fired
+
+        :return: Hedge delay, None if too few latencies are recorded
+        """
+        if len(self.latency_tracker) < self.min_samples:
+            return None
+        return self.latency_tracker.get_percentile(self.percentile)
+
+    def call(self, function: Callable[[], T]) -> T:
+        """Call a function, calling it again in another thread if it is
+        slow
+
+        :param function: Function to call
+        :return: Result of the call that completes first
+        """
+        hedge_delay = self._start_call()
+        if hedge_delay is None:
+            return self._timed(function)
+
+        executor = self._get_executor()
+        started = threading.Event()
+        futures = [executor.submit(self._timed, function, started)]
+        started.wait()
+        done, _ = concurrent.futures.wait(futures, timeout=hedge_delay)
+        if not done and self._fire_hedge():
+            futures.append(executor.submit(self._timed, function))
+        return self._get_first_result(futures)
+
+    async def call_async(self, function: Callable[[], Awaitable[T]]) -> T:
+        """Call a coroutine function, calling it again concurrently if it is
+        slow
+
+        :param function: Coroutine function to call
+        :return: Result of the call that completes first
+        """
+        hedge_delay = self._start_call()
+        if hedge_delay is None:
+            return await self._timed_async(function)
+
+        tasks = [asyncio.ensure_future(self._timed_async(function))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done and self._fire_hedge():
+                tasks.append(
+                    asyncio.ensure_future(self._timed_async(function)))
+            return await self._get_first_result_async(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_statistics(self) -> Mapping:
+        """Get numbers of calls, hedges fired and hedges that won
+
+        :return: Hedging statistics
+        """
+        with self._lock:
+            return {**self._statistics, 'hedge_delay': self.get_hedge_delay()}
+
+    def shutdown(self) -> None:
+        """Stop the threads running synchronous calls
+
+        :return: None
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _start_call(self) -> Optional[float]:
+        with self._lock:
+            self._statistics['calls'] += 1
+        return self.get_hedge_delay()
+
+    def _fire_hedge(self) -> bool:
+        with self._lock:
+            if self._statistics['hedges'] >= \
+                    self.budget * self._statistics['calls']:
+                return False
+            self._statistics['hedges'] += 1
+            return True
+
+    def _record_hedge_win(self, index: int) -> None:
+        if index:
+            with self._lock:
+                self._statistics['hedge_wins'] += 1
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix='darwin-hedge')
+            return self._executor
+
+    def _timed(self, function: Callable[[], T],
+               started: Optional[threading.Event] = None) -> T:
+        if started is not None:
+            started.set()
+        start_time = time.monotonic()
+        result = function()
+        self.latency_tracker.record(time.monotonic() - start_time)
+        return result
+
+    async def _timed_async(self, function: Callable[[], Awaitable[T]]) -> T:
+        start_time = time.monotonic()
+        result = await function()
+        self.latency_tracker.record(time.monotonic() - start_time)
+        return result
+
+    def _get_first_result(self, futures) -> T:
+        pending = set(futures)
+        while True:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for index, future in enumerate(futures):
+                if future in done and future.exception() is None:
+                    self._record_hedge_win(index)
+                    return future.result()
+            if not pending:
+                return futures[0].result()
+
+    async def _get_first_result_async(self, tasks) -> T:
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for index, task in enumerate(tasks):
+                if task in done and task.exception() is None:
+                    self._record_hedge_win(index)
+                    return task.result()
+            if not pending:
+                return tasks[0].result()
+
+
+def create_hedger(config: Optional[Mapping], scraper_max_workers: int = 1)\
+        -> Optional[Hedger]:
+    """Create a hedger from config
+
+    Supported settings are `percentile` of recent latency, `budget` as the
+    ratio of duplicate calls to calls, `min_samples`, `window` and
+    `max_workers` for synchronous calls, which defaults to two threads per
+    thread of the scraper.
+
+    :param config: Hedging config settings, no hedger is created if None
+    :param scraper_max_workers: Maximum number of threads of the scraper
+                                calling the hedger
+    :return: A hedger or None
+    """
+    if not config:
+        return None
+    return Hedger(config.get('percentile', 0.95), config.get('budget', 0.1),
+                  config.get('min_samples', 20), config.get('window', 100),
+                  config.get('max_workers', 2 * scraper_max_workers))
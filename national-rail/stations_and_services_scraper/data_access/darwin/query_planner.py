@@ -0,0 +1,191 @@
+"""Plan departure board queries to Darwin web service"""
+import asyncio
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Hashable, Iterable, List, Mapping
+
+from data_model import OriginAndCallingPointNames
+from error import StationCrsCodeNotFoundError
+from .departure_board import get_departure_board_request_key
+
+
+logger = logging.getLogger(__name__)
+
+
+def count_departure_board_queries(
+        client, services_origin_and_calling_point_names:
+        Iterable[OriginAndCallingPointNames]) -> Counter:
+    """Count how many services need the departure board of each request
+
+    Origins whose crs code cannot be found are left out, so that the error is
+    raised when their departure board is requested.
+
+    :param client: Darwin client used to create departure board requests
+    :param services_origin_and_calling_point_names: Services' origin and
+                                                    calling point names
+    :return: Number of services keyed by departure board request key
+    """
+    query_counts = Counter()
+    service_count = 0
+    for origin_and_calling_point_names in \
+            services_origin_and_calling_point_names:
+        try:
+            requests = client.create_departure_board_requests(
+                origin_and_calling_point_names)
+        except StationCrsCodeNotFoundError:
+            continue
+        service_count += 1
+        query_counts.update(get_departure_board_request_key(request)
+                            for request in requests)
+    logger.info('Planned %d departure board queries for %d services',
+                len(query_counts), service_count)
+    return query_counts
+
+
+class DepartureBoardQueryPlanner:
+    """Represent a planner that fetches each departure board once
+
+    Services sharing a departure board request share the departure board
+    fetched for the first of them. A board is released once every planned
+    service has received it.
+    """
+
+    def __init__(self, client, services_origin_and_calling_point_names:
+                 Iterable[OriginAndCallingPointNames]):
+        """Create an instance of `DepartureBoardQueryPlanner`
+
+        :param client: Darwin client that fetches departure boards
+        :param services_origin_and_calling_point_names: Services' origin and
+                                                        calling point names
+        """
+        self._client = client
+        self._pending_queries = count_departure_board_queries(
+            client, services_origin_and_calling_point_names)
+        self._departure_boards = {}
+        self._lock = threading.Lock()
+
+    def get_station_crs_code(self, station_name: str) -> str:
+        """Get crs code of a station
+
+        :param station_name: Name of the station
+        :return: Crs code of the station
+        """
+        return self._client.get_station_crs_code(station_name)
+
+    def create_departure_board_requests(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> List[Mapping]:
+        """Create the departure board requests for a service's origin
+
+        :param origin_and_calling_point_names: The service's origin and
+                                               calling point names
+        :return: Parameters of the departure board requests
+        """
+        return self._client.create_departure_board_requests(
+            origin_and_calling_point_names)
+
+    def get_departure_board(self, request: Mapping) -> Mapping:
+        """Get departure board of a request, fetching it from Darwin web
+        service only for the first service requesting it
+
+        :param request: Parameters of departure board request
+        :return: Departure board with details from Darwin web service
+        """
+        request_key = get_departure_board_request_key(request)
+        with self._lock:
+            if not self._pending_queries[request_key]:
+                departure_board = None
+            else:
+                departure_board = self._departure_boards.get(request_key)
+                is_first_query = departure_board is None
+                if is_first_query:
+                    departure_board = Future()
+                    self._departure_boards[request_key] = departure_board
+        if departure_board is None:
+            return self._client.get_departure_board(request)
+
+        try:
+            if is_first_query:
+                try:
+                    departure_board.set_result(
+                        self._client.get_departure_board(request))
+                except BaseException as error:
+                    departure_board.set_exception(error)
+            return departure_board.result()
+        finally:
+            self._release(request_key)
+
+    def _release(self, request_key: Hashable) -> None:
+        with self._lock:
+            self._pending_queries[request_key] -= 1
+            if not self._pending_queries[request_key]:
+                del self._departure_boards[request_key]
+
+
+class AsyncDepartureBoardQueryPlanner:
+    """Represent a planner that fetches each departure board once
+    asynchronously
+
+    Services sharing a departure board request share the departure board
+    fetched for the first of them. A board is released once every planned
+    service has received it.
+    """
+
+    def __init__(self, client, services_origin_and_calling_point_names:
+                 Iterable[OriginAndCallingPointNames]):
+        """Create an instance of `AsyncDepartureBoardQueryPlanner`
+
+        :param client: Asynchronous Darwin client that fetches departure
+                       boards
+        :param services_origin_and_calling_point_names: Services' origin and
+                                                        calling point names
+        """
+        self._client = client
+        self._pending_queries = count_departure_board_queries(
+            client, services_origin_and_calling_point_names)
+        self._departure_boards = {}
+
+    def get_station_crs_code(self, station_name: str) -> str:
+        """Get crs code of a station
+
+        :param station_name: Name of the station
+        :return: Crs code of the station
+        """
+        return self._client.get_station_crs_code(station_name)
+
+    def create_departure_board_requests(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> List[Mapping]:
+        """Create the departure board requests for a service's origin
+
+        :param origin_and_calling_point_names: The service's origin and
+                                               calling point names
+        :return: Parameters of the departure board requests
+        """
+        return self._client.create_departure_board_requests(
+            origin_and_calling_point_names)
+
+    async def get_departure_board(self, request: Mapping) -> Mapping:
+        """Get departure board of a request, fetching it from Darwin web
+        service only for the first service requesting it
+
+        :param request: Parameters of departure board request
+        :return: Departure board with details from Darwin web service
+        """
+        request_key = get_departure_board_request_key(request)
+        if not self._pending_queries[request_key]:
+            return await self._client.get_departure_board(request)
+
+        departure_board = self._departure_boards.get(request_key)
+        if departure_board is None:
+            departure_board = asyncio.ensure_future(
+                self._client.get_departure_board(request))
+            self._departure_boards[request_key] = departure_board
+        try:
+            return await asyncio.shield(departure_board)
+        finally:
+            self._pending_queries[request_key] -= 1
+            if not self._pending_queries[request_key]:
+                del self._departure_boards[request_key]
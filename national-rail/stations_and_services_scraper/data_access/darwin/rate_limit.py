@@ -0,0 +1,345 @@
+"""Limit the rate and concurrency of calls to Darwin web service"""
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Mapping, Optional
+
+import requests
+from zeep.exceptions import TransportError
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+OVERLOAD_STATUS_CODES = {429, 503}
+
+
+class TokenBucket:
+    """Represent a token bucket that lets calls through at a steady rate
+    with bursts up to its capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        """Create an instance of `TokenBucket`
+
+        :param rate: Tokens added per second
+        :param capacity: Maximum number of tokens, the largest burst allowed
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, borrowing it from the future if the bucket is empty
+
+        :return: Seconds to wait before the token may be used
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated_time) * self.rate)
+            self._updated_time = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Wait for a token
+
+        :return: Seconds waited
+        """
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """Wait for a token asynchronously
+
+        :return: Seconds waited
+        """
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class AimdConcurrencyController:
+    """Represent a concurrency limit that grows additively while calls are
+    fast and successful, and shrinks multiplicatively on throttling, timeouts
+    or slow calls
+
+    Only calls started after the latest decrease can decrease the limit
+    again, so a burst of failures from the same window halves it once.
+    """
+
+    def __init__(self, initial_limit: float, min_limit: float,
+                 max_limit: float, latency_target: float,
+                 increase: float = 1.0, decrease_factor: float = 0.5):
+        """Create an instance of `AimdConcurrencyController`
+
+        :param initial_limit: Concurrency limit to start with
+        :param min_limit: Lowest concurrency limit
+        :param max_limit: Highest concurrency limit
+        :param latency_target: Seconds above which a call counts as slow
+        :param increase: Limit added per limit's worth of successful calls
+        :param decrease_factor: Factor the limit is multiplied by on decrease
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._decrease_time = float('-inf')
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight"""
+        return max(1, int(self._limit))
+
+    def record_success(self, start_time: float, latency: float) -> None:
+        """Record a successful call, decreasing the limit if it was slow
+
+        :param start_time: Monotonic time the call started at
+        :param latency: Seconds the call took
+        :return: None
+        """
+        if latency > self.latency_target:
+            self.record_overload(start_time)
+            return
+        with self._lock:
+            self._limit = min(self.max_limit,
+                              self._limit + self.increase / self._limit)
+            self._notify()
+
+    def record_overload(self, start_time: float) -> None:
+        """Record a throttled or timed out call, decreasing the limit
+
+        :param start_time: Monotonic time the call started at
+        :return: None
+        """
+        with self._lock:
+            if start_time < self._decrease_time:
+                return
+            self._limit = max(self.min_limit,
+                              self._limit * self.decrease_factor)
+            self._decrease_time = time.monotonic()
+
+    def acquire(self) -> None:
+        """Wait for a free slot
+
+        :return: None
+        """
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        """Wait for a free slot asynchronously
+
+        :return: None
+        """
+        while True:
+            with self._lock:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                waiter = asyncio.get_running_loop().create_future()
+                self._async_waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+                    else:
+                        self._notify()
+                raise
+
+    def release(self) -> None:
+        """Free a slot
+
+        :return: None
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self._notify()
+
+    def _notify(self) -> None:
+        self._condition.notify(max(0, self.limit - self.in_flight))
+        for _ in range(max(0, self.limit - self.in_flight)):
+            while self._async_waiters:
+                waiter = self._async_waiters.popleft()
+                if not waiter.done():
+                    waiter.get_loop().call_soon_threadsafe(
+                        _set_waiter_result, waiter)
+                    break
+
+
+def _set_waiter_result(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateLimiter:
+    """Represent a limiter shared by the calls of a Darwin client, combining
+    a token bucket for the access token quota with an adaptive concurrency
+    limit"""
+
+    def __init__(self, token_bucket: TokenBucket,
+                 concurrency_controller: AimdConcurrencyController):
+        """Create an instance of `RateLimiter`
+
+        :param token_bucket: Token bucket limiting the call rate
+        :param concurrency_controller: Controller limiting calls in flight
+        """
+        self.token_bucket = token_bucket
+        self.concurrency_controller = concurrency_controller
+        self._statistics = {'calls': 0, 'overloads': 0, 'errors': 0,
+                            'cancellations': 0, 'queued': 0}
+        self._queueing_delay_total = 0.0
+        self._queueing_delay_max = 0.0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def limit(self):
+        """Wait until a call may start and record its outcome when done"""
+        queued_time = time.monotonic()
+        self._enqueue()
+        try:
+            self.concurrency_controller.acquire()
+        except BaseException:
+            self._dequeue(queued_time)
+            raise
+        try:
+            try:
+                self.token_bucket.acquire()
+            finally:
+                start_time = self._dequeue(queued_time)
+            try:
+                yield
+            except BaseException as error:
+                self._record_error(start_time, error)
+                raise
+            self._record_success(start_time)
+        finally:
+            self.concurrency_controller.release()
+
+    @contextlib.asynccontextmanager
+    async def limit_async(self):
+        """Wait asynchronously until a call may start and record its outcome
+        when done"""
+        queued_time = time.monotonic()
+        self._enqueue()
+        try:
+            await self.concurrency_controller.acquire_async()
+        except BaseException:
+            self._dequeue(queued_time)
+            raise
+        try:
+            try:
+                await self.token_bucket.acquire_async()
+            finally:
+                start_time = self._dequeue(queued_time)
+            try:
+                yield
+            except BaseException as error:
+                self._record_error(start_time, error)
+                raise
+            self._record_success(start_time)
+        finally:
+            self.concurrency_controller.release()
+
+    def get_metrics(self) -> Mapping:
+        """Get current limits, queueing delays and call outcomes
+
+        :return: Rate limiter metrics
+        """
+        with self._lock:
+            calls = self._statistics['calls']
+            return {
+                'rate': self.token_bucket.rate,
+                'burst': self.token_bucket.capacity,
+                'concurrency_limit': self.concurrency_controller.limit,
+                'in_flight': self.concurrency_controller.in_flight,
+                **self._statistics,
+                'mean_queueing_delay':
+                    self._queueing_delay_total / calls if calls else 0.0,
+                'max_queueing_delay': self._queueing_delay_max}
+
+    def _enqueue(self) -> None:
+        with self._lock:
+            self._statistics['queued'] += 1
+
+    def _dequeue(self, queued_time: float) -> float:
+        start_time = time.monotonic()
+        queueing_delay = start_time - queued_time
+        with self._lock:
+            self._statistics['queued'] -= 1
+            self._statistics['calls'] += 1
+            self._queueing_delay_total += queueing_delay
+            self._queueing_delay_max = \
+                max(self._queueing_delay_max, queueing_delay)
+        return start_time
+
+    def _record_success(self, start_time: float) -> None:
+        self.concurrency_controller.record_success(
+            start_time, time.monotonic() - start_time)
+
+    def _record_error(self, start_time: float, error: BaseException) -> None:
+        is_overload = is_overload_error(error)
+        with self._lock:
+            self._statistics[
+                'overloads' if is_overload
+                else 'cancellations' if isinstance(
+                    error, asyncio.CancelledError)
+                else 'errors'] += 1
+        if is_overload:
+            self.concurrency_controller.record_overload(start_time)
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Check if an error means Darwin web service is throttling or overloaded
+
+    :param error: Error raised by a call
+    :return: True for throttling responses and timeouts
+    """
+    if isinstance(error, TransportError):
+        return error.status_code in OVERLOAD_STATUS_CODES
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError,
+                          requests.exceptions.Timeout)):
+        return True
+    return httpx is not None and isinstance(error, httpx.TimeoutException)
+
+
+def create_rate_limiter(config: Optional[Mapping]) -> Optional[RateLimiter]:
+    """Create a rate limiter from config
+
+    Supported settings are `rate` in calls per second, `burst`,
+    `initial_concurrency`, `min_concurrency`, `max_concurrency` and
+    `latency_target` in seconds.
+
+    :param config: Rate limit config settings, no limiter is created if None
+    :return: A rate limiter or None
+    """
+    if not config:
+        return None
+    rate = config['rate']
+    max_concurrency = config.get('max_concurrency', 16)
+    return RateLimiter(
+        TokenBucket(rate, config.get('burst', rate)),
+        AimdConcurrencyController(
+            config.get('initial_concurrency', 4),
+            config.get('min_concurrency', 1), max_concurrency,
+            config.get('latency_target', 2.0)))
@@ -0,0 +1,188 @@
+"""Functions for extracting departure board from raw Darwin response"""
+from io import BytesIO
+from typing import Mapping
+
+import isodate
+from lxml import etree
+from zeep.exceptions import Fault, TransportError
+
+from error import DarwinResponseError
+
+
+SOAP_FAULT_TAG = '{http://schemas.xmlsoap.org/soap/envelope/}Fault'
+
+SKIPPED_TAGS = {'origin', 'destination', 'currentOrigins',
+                'currentDestinations', 'formation', 'previousCallingPoints',
+                'busServices', 'ferryServices'}
+
+
+def parse_bool(text: str) -> bool:
+    return text.strip() in ('true', '1')
+
+
+def parse_text(text: str) -> str:
+    return text
+
+
+BOARD_FIELDS = {'generatedAt': isodate.parse_datetime,
+                'locationName': parse_text, 'crs': parse_text,
+                'areServicesAvailable': parse_bool}
+SERVICE_FIELDS = {'std': parse_text, 'etd': parse_text,
+                  'platform': parse_text, 'isCancelled': parse_bool,
+                  'length': int, 'cancelReason': parse_text,
+                  'delayReason': parse_text, 'serviceID': parse_text}
+CALLING_POINT_FIELDS = {'locationName': parse_text, 'st': parse_text,
+                        'et': parse_text, 'at': parse_text,
+                        'isCancelled': parse_bool}
+
+
+def get_departure_board_from_response(response) -> Mapping:
+    """Get departure board from raw Darwin web service response
+
+    :param response: Http response from Darwin web service
+    :return: Departure board in the same shape as zeep deserializes it
+    """
+    departure_board = parse_departure_board(response.content)
+    if departure_board is None:
+        if response.status_code != 200:
+            raise TransportError(status_code=response.status_code,
+                                 content=response.content)
+        raise DarwinResponseError(
+            'Darwin response has no GetStationBoardResult')
+    return departure_board
+
+
+def parse_departure_board(content: bytes) -> Mapping:
+    """Extract departure board from a `GetDepBoardWithDetails` soap response
+
+    Only the fields read by `get_station` and `get_services` are extracted,
+    so the returned dictionaries are indexed in the same way as the objects
+    zeep deserializes. Optional fields missing from the response are None.
+
+    :param content: Raw soap response
+    :return: Departure board, None if the response has no board
+    """
+    builder = _DepartureBoardBuilder()
+    skipped_depth = 0
+
+    for event, element in etree.iterparse(BytesIO(content),
+                                          events=('start', 'end')):
+        tag = etree.QName(element).localname
+        if tag in SKIPPED_TAGS:
+            skipped_depth += 1 if event == 'start' else -1
+            if event == 'end':
+                element.clear()
+        elif skipped_depth:
+            continue
+        elif event == 'start':
+            builder.start(tag)
+        else:
+            builder.end(tag, element)
+
+    return builder.get_departure_board()
+
+
+class _DepartureBoardBuilder:
+    """Build a departure board from the elements of a soap response, the
+    innermost item being built, i.e. a calling point, a service or the
+    board, taking each element that ends"""
+
+    def __init__(self):
+        self._departure_board = None
+        self._service = None
+        self._calling_point = None
+        self._calling_point_list = None
+
+    def start(self, tag: str) -> None:
+        if tag == 'GetStationBoardResult':
+            self._departure_board = create_departure_board()
+        elif tag == 'service':
+            self._service = create_service()
+        elif tag == 'callingPointList':
+            self._calling_point_list = []
+        elif tag == 'callingPoint':
+            self._calling_point = create_calling_point()
+
+    def end(self, tag: str, element) -> None:
+        if element.tag == SOAP_FAULT_TAG:
+            raise create_fault(element)
+        if self._calling_point is not None:
+            self._end_in_calling_point(tag, element)
+        elif self._service is not None:
+            self._end_in_service(tag, element)
+        elif self._departure_board is not None:
+            self._end_in_departure_board(tag, element)
+
+    def _end_in_calling_point(self, tag: str, element) -> None:
+        if tag == 'callingPoint':
+            self._calling_point_list.append(self._calling_point)
+            self._calling_point = None
+            element.clear()
+        else:
+            set_field(self._calling_point, CALLING_POINT_FIELDS, tag,
+                      element)
+
+    def _end_in_service(self, tag: str, element) -> None:
+        service = self._service
+        if tag == 'service':
+            if not service['subsequentCallingPoints']['callingPointList']:
+                service['subsequentCallingPoints'] = None
+            self._departure_board['trainServices']['service'].append(service)
+            self._service = None
+            element.clear()
+        elif tag == 'callingPointList':
+            service['subsequentCallingPoints']['callingPointList']\
+                .append({'callingPoint': self._calling_point_list})
+        else:
+            set_field(service, SERVICE_FIELDS, tag, element)
+
+    def _end_in_departure_board(self, tag: str, element) -> None:
+        if tag == 'message':
+            self._departure_board['nrccMessages']['message'].append(
+                {'_value_1': ''.join(element.itertext())})
+        elif tag != 'trainServices':
+            set_field(self._departure_board, BOARD_FIELDS, tag, element)
+
+    def get_departure_board(self) -> Mapping:
+        departure_board = self._departure_board
+        if departure_board is not None:
+            if not departure_board['nrccMessages']['message']:
+                departure_board['nrccMessages'] = None
+            if not departure_board['trainServices']['service']:
+                departure_board['trainServices'] = None
+        return departure_board
+
+
+def create_departure_board() -> dict:
+    board = dict.fromkeys(BOARD_FIELDS)
+    board['nrccMessages'] = {'message': []}
+    board['trainServices'] = {'service': []}
+    return board
+
+
+def create_service() -> dict:
+    service = dict.fromkeys(SERVICE_FIELDS)
+    service['adhocAlerts'] = None
+    service['subsequentCallingPoints'] = {'callingPointList': []}
+    return service
+
+
+def create_calling_point() -> dict:
+    calling_point = dict.fromkeys(CALLING_POINT_FIELDS)
+    calling_point['adhocAlerts'] = None
+    return calling_point
+
+
+def set_field(item: dict, fields: Mapping, tag: str, element) -> None:
+    if tag == 'adhocAlertText':
+        if item['adhocAlerts'] is None:
+            item['adhocAlerts'] = {'adhocAlertText': []}
+        item['adhocAlerts']['adhocAlertText'].append(element.text or '')
+    elif tag in fields and element.text is not None:
+        item[tag] = fields[tag](element.text)
+
+
+def create_fault(element) -> Fault:
+    fault_code = element.findtext('faultcode')
+    fault_string = element.findtext('faultstring')
+    return Fault(message=fault_string, code=fault_code)
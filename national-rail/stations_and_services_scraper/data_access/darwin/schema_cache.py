@@ -0,0 +1,84 @@
+"""Cache for Darwin web service WSDL and XSD documents"""
+import argparse
+import logging
+import os
+import shutil
+from typing import Mapping, Optional
+
+import zeep
+from zeep.cache import Base, InMemoryCache, SqliteCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class VersionedSqliteCache(SqliteCache):
+    """Represent a WSDL and XSD documents cache stored in a sqlite database
+
+    Documents cached under a different version are treated as missing, so
+    that changing the version invalidates a cache built for an older WSDL.
+    """
+
+    def __init__(self, path: str, version: str = '',
+                 timeout: Optional[int] = None):
+        """Create an instance of `VersionedSqliteCache`
+
+        :param path: Path of the sqlite database file
+        :param version: Version of the cached documents
+        :param timeout: Seconds after which cached documents expire, never
+                        expire if None
+        """
+        self._version = f'{SqliteCache._version}.{version}' \
+            if version else SqliteCache._version
+        super().__init__(path=path, timeout=timeout)
+
+
+def create_schema_cache(config: Optional[Mapping]) -> Optional[Base]:
+    """Create a cache for WSDL and XSD documents from config
+
+    Supported settings are `type` (`sqlite` or `memory`), `path` of the
+    sqlite database, `seed_path` of a pre-populated database copied to `path`
+    when `path` does not exist yet, `version` and `timeout` in seconds.
+
+    :param config: Cache config settings, no cache is created if None
+    :return: A zeep cache or None
+    """
+    if not config:
+        return None
+    cache_type = config.get('type', 'sqlite')
+    if cache_type == 'memory':
+        return InMemoryCache(timeout=config.get('timeout'))
+    if cache_type != 'sqlite':
+        raise ValueError(f'Unknown WSDL cache type {cache_type}')
+
+    path = config['path']
+    seed_path = config.get('seed_path')
+    if seed_path and not os.path.exists(path) and os.path.exists(seed_path):
+        logger.info('Seeding WSDL cache %s from %s', path, seed_path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        shutil.copyfile(seed_path, path)
+    return VersionedSqliteCache(path, version=config.get('version', ''),
+                                timeout=config.get('timeout'))
+
+
+def populate_schema_cache(wsdl: str, config: Mapping) -> None:
+    """Load the WSDL and the XSD documents it imports into a cache
+
+    :param wsdl: Url of the WSDL
+    :param config: Cache config settings
+    :return: None
+    """
+    zeep.Client(wsdl=wsdl,
+                transport=zeep.Transport(cache=create_schema_cache(config)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Populate Darwin WSDL cache, e.g. at build time')
+    parser.add_argument('wsdl', help='Url of Darwin web service WSDL')
+    parser.add_argument('path', help='Path of the sqlite cache to populate')
+    parser.add_argument('--version', default='',
+                        help='Version of the cached documents')
+    arguments = parser.parse_args()
+    populate_schema_cache(arguments.wsdl, {'path': arguments.path,
+                                           'version': arguments.version})
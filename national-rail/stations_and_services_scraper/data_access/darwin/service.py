@@ -1,38 +1,174 @@
 """Functions for getting services"""
-from datetime import datetime
-from typing import List
+import threading
+from collections.abc import Sequence
+from datetime import time
+from typing import Iterator, List
 
 from data_model import Service, ServiceStatus, Status, CallingPoint
+from .darwin_time import parse_time, parse_optional_time, get_time_text, \
+    get_estimated_time_text
+
+
+ON_TIME = 'on time'
+CANCELLED = 'cancelled'
+DELAYED = 'delayed'
+ESTIMATED_TIMES_SHOWING_SCHEDULED_TIME = \
+    frozenset((ON_TIME, CANCELLED, DELAYED))
 
 
 def get_services(departure_board_with_details, calling_point_names_included) \
         -> List[Service]:
     services = departure_board_with_details['trainServices']
-    return [] if not services else \
-        [get_service(s, calling_point_names_included)
-         for s in filter(
-            lambda s: is_valid_service(s, calling_point_names_included),
-            services['service'])]
+    if not services:
+        return []
+    valid_services = []
+    for service_item in services['service']:
+        calling_point_items = get_included_calling_point_items(
+            service_item, calling_point_names_included)
+        if calling_point_items:
+            valid_services.append(
+                create_service(service_item, calling_point_items))
+    return valid_services
+
+
+class LazyServices(Sequence):
+    """Represent the valid services of a departure board, created when first
+    accessed
+
+    Iterating stops validating and creating services where the consumer
+    stops, `len` validates the services without creating them, and each
+    service is created once. It compares equal to the list of services
+    `get_services` returns. It keeps the departure board until all its
+    services are created. It is safe to share between threads, e.g. by the
+    sinks of `FanOutDataPublisher`: services are validated and created
+    under a lock, which is skipped once they have been.
+    """
+
+    def __init__(self, departure_board_with_details,
+                 calling_point_names_included):
+        """Create an instance of `LazyServices`
+
+        :param departure_board_with_details: Departure board with details
+        :param calling_point_names_included: Names of calling points included
+        """
+        services = departure_board_with_details['trainServices']
+        self._service_items = iter(services['service'] if services else ())
+        self._calling_point_names_included = calling_point_names_included
+        self._valid_service_items = []
+        self._services = []
+        self._lock = threading.Lock()
+
+    def _validate_up_to(self, number_of_services: int) -> None:
+        if len(self._valid_service_items) >= number_of_services:
+            return
+        with self._lock:
+            while len(self._valid_service_items) < number_of_services:
+                service_item = next(self._service_items, None)
+                if service_item is None:
+                    return
+                calling_point_items = get_included_calling_point_items(
+                    service_item, self._calling_point_names_included)
+                if calling_point_items:
+                    self._valid_service_items.append(
+                        (service_item, calling_point_items))
+
+    def _validate_all(self) -> None:
+        with self._lock:
+            for service_item in self._service_items:
+                calling_point_items = get_included_calling_point_items(
+                    service_item, self._calling_point_names_included)
+                if calling_point_items:
+                    self._valid_service_items.append(
+                        (service_item, calling_point_items))
+
+    def _get_service(self, index: int) -> Service:
+        if index < len(self._services):
+            return self._services[index]
+        with self._lock:
+            while len(self._services) <= index:
+                self._services.append(create_service(
+                    *self._valid_service_items[len(self._services)]))
+            return self._services[index]
+
+    def __iter__(self) -> Iterator[Service]:
+        index = 0
+        while True:
+            self._validate_up_to(index + 1)
+            if index >= len(self._valid_service_items):
+                return
+            yield self._get_service(index)
+            index += 1
+
+    def __len__(self) -> int:
+        self._validate_all()
+        return len(self._valid_service_items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) or index < 0:
+            self._validate_all()
+            indices = range(len(self._valid_service_items))[index]
+            return [self._get_service(i) for i in indices] \
+                if isinstance(index, slice) else self._get_service(indices)
+        self._validate_up_to(index + 1)
+        if index >= len(self._valid_service_items):
+            raise IndexError('service index out of range')
+        return self._get_service(index)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f'LazyServices({list(self)!r})'
 
 
 def get_service(service_item_with_calling_points,
                 calling_point_names_included) -> Service:
-    id_ = service_item_with_calling_points['serviceID']
-    status = get_service_status(service_item_with_calling_points)
-    time = get_service_time(service_item_with_calling_points)
-    calling_points = get_calling_points(service_item_with_calling_points,
-                                        calling_point_names_included)
-    service = Service(id_, status, time, calling_points)
-
-    if service_item_with_calling_points['length']:
-        service.set_length(service_item_with_calling_points['length'])
-    if 'platform' in service_item_with_calling_points \
-            and service_item_with_calling_points['platform']:
-        service.set_platform(service_item_with_calling_points['platform'])
+    return create_service(
+        service_item_with_calling_points,
+        get_included_calling_point_items(service_item_with_calling_points,
+                                         calling_point_names_included))
+
+
+def create_service(service_item, calling_point_items) -> Service:
+    """Create a service from a service item and its included calling points
+
+    The estimated departure time is normalised once for both the status
+    and the time of the service.
+
+    :param service_item: Service item of a departure board
+    :param calling_point_items: Calling point items of the service included
+    :return: Service
+    """
+    estimated_departure_time = service_item['etd']
+    normalised_estimated_departure_time = \
+        normalise_estimated_time(estimated_departure_time)
+    status = ServiceStatus(
+        get_status_of_estimated_time(normalised_estimated_departure_time,
+                                     service_item['isCancelled']),
+        get_abnormality_message(service_item))
+    time = get_departure_time(service_item['std'], estimated_departure_time,
+                              normalised_estimated_departure_time)
+    calling_points = [get_calling_point(c) for c in calling_point_items]
+    service = Service(service_item['serviceID'], status, time,
+                      calling_points)
+
+    if service_item['length']:
+        service.set_length(service_item['length'])
+    if 'platform' in service_item and service_item['platform']:
+        service.set_platform(service_item['platform'])
+    # Only kept for analysis, so a missing or malformed scheduled time does
+    # not fail the departure board
+    service.set_scheduled_time(parse_optional_time(service_item['std']))
 
     return service
 
 
+def normalise_estimated_time(estimated_time: str) -> str:
+    return estimated_time.casefold().strip()
+
+
 def get_service_status(service_item) -> ServiceStatus:
     status = get_status(service_item)
     abnormality_message = get_abnormality_message(service_item)
@@ -40,27 +176,33 @@ def get_service_status(service_item) -> ServiceStatus:
 
 
 def get_status(service_item) -> Status:
-    is_on_time = is_service_on_time(service_item)
-    is_cancelled = is_service_cancelled(service_item)
-    is_delayed = is_service_delayed(service_item)
-    return Status.Cancelled if is_cancelled \
-        else Status.Delayed if is_delayed \
-        else Status.OnTime if is_on_time else Status.NewTime
+    return get_status_of_estimated_time(
+        normalise_estimated_time(service_item['etd']),
+        service_item['isCancelled'])
+
+
+def get_status_of_estimated_time(normalised_estimated_departure_time: str,
+                                 is_cancelled) -> Status:
+    return Status.Cancelled \
+        if normalised_estimated_departure_time == CANCELLED or is_cancelled \
+        else Status.Delayed if normalised_estimated_departure_time == DELAYED \
+        else Status.OnTime if normalised_estimated_departure_time == ON_TIME \
+        else Status.NewTime
 
 
 def is_service_on_time(service_item) -> bool:
-    return service_item['etd'].casefold().strip() == 'on time'
+    return normalise_estimated_time(service_item['etd']) == ON_TIME
 
 
 def is_service_cancelled(service_item) -> bool:
-    if service_item['etd'].casefold().strip() == 'cancelled' \
+    if normalise_estimated_time(service_item['etd']) == CANCELLED \
        or service_item['isCancelled']:
         return True
     return False
 
 
 def is_service_delayed(service_item) -> bool:
-    return service_item['etd'].casefold().strip() == 'delayed'
+    return normalise_estimated_time(service_item['etd']) == DELAYED
 
 
 def get_abnormality_message(service_item) -> str:
@@ -70,27 +212,57 @@ def get_abnormality_message(service_item) -> str:
     if service_item['delayReason']:
         messages.append(f'Delay reason: {service_item["delayReason"]}')
     if service_item['adhocAlerts']:
-        alerts = '\n'.join(service_item["adhocAlerts"])
+        alerts = '\n'.join(get_alert_texts(service_item['adhocAlerts']))
         messages.append(f'Alerts:\n{alerts}')
     return '\n'.join(messages)
 
 
-def get_service_time(service_item) -> datetime.time:
-    scheduled_departure_time = service_item['std']
+def get_service_time(service_item) -> time:
     estimated_departure_time = service_item['etd']
-    return datetime.strptime(scheduled_departure_time, '%H:%M').time() \
-        if estimated_departure_time.casefold().strip() == 'on time' \
-        else datetime.strptime(estimated_departure_time, '%H:%M').time()
+    return get_departure_time(
+        service_item['std'], estimated_departure_time,
+        normalise_estimated_time(estimated_departure_time))
+
+
+def get_departure_time(scheduled_departure_time: str,
+                       estimated_departure_time: str,
+                       normalised_estimated_departure_time: str) -> time:
+    """Get the departure time of a service as a departure board shows it
+
+    A service on time, cancelled or delayed without an estimate shows its
+    scheduled departure time next to its status, which is how passengers
+    identify it. The status tells it is not a time the service departs.
+
+    :param scheduled_departure_time: Scheduled departure time
+    :param estimated_departure_time: Estimated departure time
+    :param normalised_estimated_departure_time: Estimated departure time
+    normalised
+    :return: Departure time
+    """
+    return parse_time(scheduled_departure_time) \
+        if normalised_estimated_departure_time \
+        in ESTIMATED_TIMES_SHOWING_SCHEDULED_TIME \
+        else parse_time(estimated_departure_time)
 
 
 def get_calling_points(service_item_with_calling_points,
                        calling_point_names_included) -> List[CallingPoint]:
-    calling_points = service_item_with_calling_points[
+    return [get_calling_point(c) for c in get_included_calling_point_items(
+        service_item_with_calling_points, calling_point_names_included)]
+
+
+def get_included_calling_point_items(service_item_with_calling_points,
+                                     calling_point_names_included) -> List:
+    """Get the subsequent calling point items of a service with included
+    names in one pass
+
+    :param service_item_with_calling_points: Service item with calling points
+    :param calling_point_names_included: Names of calling points included
+    :return: Calling point items included, empty if the service is not valid
+    """
+    return [c for c in service_item_with_calling_points[
         'subsequentCallingPoints']['callingPointList'][0]['callingPoint']
-    return list(map(
-        get_calling_point,
-        filter(lambda c: c['locationName'] in calling_point_names_included,
-               calling_points)))
+        if c['locationName'] in calling_point_names_included]
 
 
 def get_calling_point(calling_point) -> CallingPoint:
@@ -102,11 +274,11 @@ def get_calling_point(calling_point) -> CallingPoint:
 
 
 def get_calling_point_time(calling_point) -> str:
-    return calling_point['at'] \
+    return get_estimated_time_text(calling_point['at']) \
         if calling_point['at'] \
-        else calling_point['st'] \
-        if calling_point['et'].casefold().strip() == 'on time' \
-        else calling_point['et']
+        else get_time_text(calling_point['st']) \
+        if normalise_estimated_time(calling_point['et']) == ON_TIME \
+        else get_estimated_time_text(calling_point['et'])
 
 
 def is_calling_point_cancelled(calling_point) -> bool:
@@ -115,13 +287,22 @@ def is_calling_point_cancelled(calling_point) -> bool:
 
 def get_calling_point_alert(calling_point) -> str:
     return '' if not calling_point['adhocAlerts'] \
-        else '\n'.join(calling_point['adhocAlerts'])
+        else '\n'.join(get_alert_texts(calling_point['adhocAlerts']))
+
+
+def get_alert_texts(adhoc_alerts) -> List[str]:
+    """Get the texts of the adhoc alerts of a service or a calling point
+
+    :param adhoc_alerts: Adhoc alerts, an `ArrayOfAdhocAlert` holding the
+                         texts in `adhocAlertText`
+    :return: Alert texts
+    """
+    return adhoc_alerts['adhocAlertText'] or []
 
 
 def is_valid_service(service_item_with_calling_points,
                      calling_point_names_included) -> bool:
-    service_calling_points = service_item_with_calling_points[
-        'subsequentCallingPoints']['callingPointList'][0]['callingPoint']
-    return any(
-        filter(lambda c: c['locationName'] in calling_point_names_included,
-               service_calling_points))
+    return any(c['locationName'] in calling_point_names_included
+               for c in service_item_with_calling_points[
+                   'subsequentCallingPoints']['callingPointList'][0][
+                   'callingPoint'])
@@ -1,11 +1,38 @@
 """Represent access to national rail data"""
 from abc import ABC, abstractmethod
+from typing import Iterable, Mapping
 
 from data_model import OriginAndCallingPointNames, StationAndServices
 
 
 class DataAccess(ABC):
     """Represent access to national rail data"""
+    def plan(self, services_origin_and_calling_point_names:
+             Iterable[OriginAndCallingPointNames]) -> 'DataAccess':
+        """Plan getting stations and services for a collection of services
+
+        :param services_origin_and_calling_point_names: Services' origin and
+                                                        calling point names
+        :return: Data access to use for getting the planned stations and
+                 services
+        """
+        return self
+
+    def update_config(self, config: Mapping) -> None:
+        """Update config settings
+
+        :param config: Config settings
+        :return: None
+        """
+        pass
+
+    def get_statistics(self) -> Mapping:
+        """Get statistics accumulated since the data access was created
+
+        :return: Statistics, empty if none are kept
+        """
+        return {}
+
     @abstractmethod
     def get_station_and_services(
             self, origin_and_calling_point_names: OriginAndCallingPointNames)\
@@ -17,3 +44,44 @@ class DataAccess(ABC):
         :return: an instance of `StationAndServices`
         """
         pass
+
+
+class AsyncDataAccess(ABC):
+    """Represent asynchronous access to national rail data"""
+    def plan(self, services_origin_and_calling_point_names:
+             Iterable[OriginAndCallingPointNames]) -> 'AsyncDataAccess':
+        """Plan getting stations and services for a collection of services
+
+        :param services_origin_and_calling_point_names: Services' origin and
+                                                        calling point names
+        :return: Data access to use for getting the planned stations and
+                 services
+        """
+        return self
+
+    def update_config(self, config: Mapping) -> None:
+        """Update config settings
+
+        :param config: Config settings
+        :return: None
+        """
+        pass
+
+    def get_statistics(self) -> Mapping:
+        """Get statistics accumulated since the data access was created
+
+        :return: Statistics, empty if none are kept
+        """
+        return {}
+
+    @abstractmethod
+    async def get_station_and_services(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> StationAndServices:
+        """Get station and related services
+
+        :param origin_and_calling_point_names: The service's origin and
+                                               calling point names
+        :return: an instance of `StationAndServices`
+        """
+        pass
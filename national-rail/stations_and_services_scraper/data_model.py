@@ -1,23 +1,47 @@
-"""Represent data models"""
+"""Represent data models
+
+The models of scraped data have `__slots__` rather than a `__dict__` and
+intern the names and platforms repeated across services, to keep many of
+them in memory. They are compared by value but deliberately not hashable:
+services are filled in after they are created, e.g. by `set_length`, and
+hold their calling points and departure boards hold their services in
+lists, so a hash matching `__eq__` could change while the model is in a
+set or a dict.
+"""
 import datetime
 from enum import Enum
-from typing import Iterable, Set
+from sys import intern
+from typing import Iterable, Optional, Set
 
 
 class OriginAndCallingPointNames:
     """Represent a service's origin and calling point names"""
-    def __init__(self, origin_name: str, calling_point_names: Set[str]):
+    def __init__(self, origin_name: str, calling_point_names: Set[str],
+                 num_rows: Optional[int] = None,
+                 time_offset: Optional[int] = None,
+                 time_window: Optional[int] = None):
         """Create an instance of `OriginAndCallingPointNames`
 
         :param origin_name: Name of origin of this service
         :param calling_point_names: Names of calling points of this service
+        :param num_rows: Maximum number of services requested from the
+                         origin's departure board, None for the default
+        :param time_offset: Minutes from now that the origin's departure
+                            board starts at, None for the default
+        :param time_window: Minutes that the origin's departure board
+                            covers, None for the default
         """
         self.origin_name = origin_name
         self.calling_point_names = calling_point_names
+        self.num_rows = num_rows
+        self.time_offset = time_offset
+        self.time_window = time_window
 
 
 class Station:
     """Represent a station"""
+    __slots__ = ('name', 'are_services_available', 'message')
+
     def __init__(self, name: str, are_services_available: bool, message: str):
         """Create an instance of `Station`
 
@@ -26,7 +50,7 @@ class Station:
                                        at the station
         :param message: Message at the station
         """
-        self.name = name
+        self.name = intern(name)
         self.are_services_available = are_services_available
         self.message = message
 
@@ -46,6 +70,8 @@ class Status(str, Enum):
 
 class ServiceStatus:
     """Represent status of a service"""
+    __slots__ = ('status', 'abnormality_message')
+
     def __init__(self, status: Status, abnormality_message: str):
         """Create an instance of `ServiceStatus`
 
@@ -63,6 +89,8 @@ class ServiceStatus:
 
 class CallingPoint:
     """Represent a service's calling point"""
+    __slots__ = ('name', 'time', 'is_cancelled', 'alert')
+
     def __init__(self, name: str, time: str, is_cancelled: bool, alert: str):
         """Create an instance of `CallingPoint`
 
@@ -71,7 +99,7 @@ class CallingPoint:
         :param is_cancelled: Indicate if this calling point is cancelled
         :param alert: Alert at this calling point
         """
-        self.name = name
+        self.name = intern(name)
         self.time = time
         self.is_cancelled = is_cancelled
         self.alert = alert
@@ -86,6 +114,9 @@ class CallingPoint:
 
 class Service:
     """Represent a service"""
+    __slots__ = ('id', 'status', 'time', 'calling_points', 'length',
+                 'platform', 'scheduled_time')
+
     def __init__(self, id_: str, status: ServiceStatus, time: datetime.time,
                  calling_points: Iterable[CallingPoint]):
         """Create an instance of `Service`
@@ -101,6 +132,7 @@ class Service:
         self.calling_points = calling_points
         self.length = None
         self.platform = None
+        self.scheduled_time = None
 
     def set_length(self, length: int) -> None:
         """Set service length
@@ -110,13 +142,23 @@ class Service:
         """
         self.length = length
 
-    def set_platform(self, platform: str) -> None:
+    def set_platform(self, platform: Optional[str]) -> None:
         """Set service platform
 
-        :param platform: Service platform
+        :param platform: Service platform, None if not known
         :return: None
         """
-        self.platform = platform
+        self.platform = None if platform is None else intern(platform)
+
+    def set_scheduled_time(self, scheduled_time: Optional[datetime.time])\
+            -> None:
+        """Set service scheduled departure time
+
+        :param scheduled_time: Time that the service is scheduled to depart,
+                               None if not known
+        :return: None
+        """
+        self.scheduled_time = scheduled_time
 
     def __eq__(self, other):
         return isinstance(other, Service)\
@@ -125,11 +167,14 @@ class Service:
             and self.time == other.time\
             and self.calling_points == other.calling_points\
             and self.length == other.length\
-            and self.platform == other.platform
+            and self.platform == other.platform\
+            and self.scheduled_time == other.scheduled_time
 
 
 class StationAndServices:
     """Represent a station and related service"""
+    __slots__ = ('station', 'services')
+
     def __init__(self, station: Station, services: Iterable[Service]):
         """Create an instance of `StationAndServices`
 
@@ -1,2 +1,12 @@
-from .publish import publish, ConsoleDataPublisher
-from .serialize import JsonDataSerializer
+from .publish import publish, publish_stream, publish_stream_async, \
+    AwsDataPublisher, ConsoleDataPublisher, StreamDataPublisher
+from .serialize import JsonDataSerializer, CompactJsonDataSerializer, \
+    JsonStreamDataSerializer
+from .binary_serialize import BinaryDataSerializer, BinaryDataDeserializer
+from .compress import GzipCompressor, ZstdCompressor, \
+    CompressingDataSerializer, CompressingStreamDataSerializer, \
+    create_compressor
+from .fan_out import FanOutDataPublisher
+from .archive import ArchiveDataPublisher, ArchiveReader
+from .history import HistoryStore, HistoryDataPublisher
+from .factory import create_data_publisher
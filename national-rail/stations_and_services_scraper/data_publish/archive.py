@@ -0,0 +1,344 @@
+"""Represent an archive of station and services on a file system,
+partitioned by date, hour and station
+
+Layout: `<root>/<YYYY-MM-DD>/<HH>/<station>/<sequence>.ndjson`, dates and
+hours being UTC and station names percent-encoded. Segments have one json
+line per station and services published, `{"time": ..., "station_and_
+services": ...}`. A segment being written has an `.open` suffix and is only
+appended to, one whole line at a time. It is renamed without the suffix, an
+atomic roll-over, once it reaches the segment size or its hour is over, so
+that a sealed segment never changes. Segments left open in earlier hours,
+e.g. by a publisher that crashed, are sealed by the next publisher. One
+publisher writes to an archive at a time.
+"""
+import datetime
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, \
+    Optional, Tuple
+from urllib.parse import quote
+
+from .publish import DataPublisher
+from .serialize import CompactJsonDataSerializer
+
+
+SEGMENT_SUFFIX = '.ndjson'
+OPEN_SUFFIX = '.open'
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+# Bytes read at a time when looking for the end of the last whole line
+TAIL_CHUNK_SIZE = 64 * 1024
+
+
+def get_partition_path(root: str, time: datetime.datetime,
+                       station_name: str) -> str:
+    """Get the directory of the partition of a station at a time
+
+    :param root: Directory of the archive
+    :param time: Time in UTC
+    :param station_name: Name of the station
+    :return: Directory of the partition
+    """
+    return os.path.join(root, f'{time:%Y-%m-%d}', f'{time:%H}',
+                        quote(station_name, safe=''))
+
+
+def get_segment_paths(partition_path: str, is_including_open: bool = True)\
+        -> List[str]:
+    """Get the segments of a partition, in the order they are written
+
+    :param partition_path: Directory of the partition
+    :param is_including_open: Whether the segment being written is included
+    :return: Paths of the segments
+    """
+    segments = []
+    for name in os.listdir(partition_path):
+        is_open = name.endswith(OPEN_SUFFIX)
+        if is_open and not is_including_open:
+            continue
+        stem = name[:-len(OPEN_SUFFIX)] if is_open else name
+        if not stem.endswith(SEGMENT_SUFFIX):
+            continue
+        sequence = stem[:-len(SEGMENT_SUFFIX)]
+        # Files not named by the archive, e.g. copies, are not segments
+        if sequence.isascii() and sequence.isdigit():
+            segments.append((int(sequence), name))
+    return [os.path.join(partition_path, name)
+            for _, name in sorted(segments)]
+
+
+def truncate_partial_line(path: str) -> None:
+    """Drop a line cut short by a crash from the end of a segment, so that
+    the next line starts on its own
+
+    Only the tail of the segment after its last whole line is read.
+
+    :param path: Path of the segment
+    :return: None
+    """
+    with open(path, 'rb+') as file:
+        position = file.seek(0, os.SEEK_END)
+        if position == 0:
+            return
+        file.seek(position - 1)
+        if file.read(1) == b'\n':
+            return
+        while position > 0:
+            size = min(TAIL_CHUNK_SIZE, position)
+            position -= size
+            file.seek(position)
+            index = file.read(size).rfind(b'\n')
+            if index >= 0:
+                file.truncate(position + index + 1)
+                return
+        file.truncate(0)
+
+
+def seal_stale_segments(root: str, hour: datetime.datetime) -> None:
+    """Seal the segments left open in the hours before an hour
+
+    :param root: Directory of the archive
+    :param hour: Hour in UTC, its segments are left open
+    :return: None
+    """
+    if not os.path.isdir(root):
+        return
+    for date_name in os.listdir(root):
+        try:
+            date = datetime.date.fromisoformat(date_name)
+        except ValueError:
+            continue
+        if date > hour.date():
+            continue
+        date_path = os.path.join(root, date_name)
+        if not os.path.isdir(date_path):
+            continue
+        for hour_name in os.listdir(date_path):
+            if not (len(hour_name) == 2 and hour_name.isascii()
+                    and hour_name.isdigit()):
+                continue
+            if date == hour.date() and int(hour_name) >= hour.hour:
+                continue
+            hour_path = os.path.join(date_path, hour_name)
+            if not os.path.isdir(hour_path):
+                continue
+            for station_name in os.listdir(hour_path):
+                partition_path = os.path.join(hour_path, station_name)
+                if not os.path.isdir(partition_path):
+                    continue
+                for path in get_segment_paths(partition_path):
+                    if path.endswith(OPEN_SUFFIX):
+                        truncate_partial_line(path)
+                        os.replace(path, path[:-len(OPEN_SUFFIX)])
+
+
+def to_utc(time: datetime.datetime) -> datetime.datetime:
+    if time.tzinfo is None:
+        return time.replace(tzinfo=datetime.timezone.utc)
+    return time.astimezone(datetime.timezone.utc)
+
+
+class _Segment:
+    """Represent the open segment of a partition"""
+
+    def __init__(self, partition_path: str):
+        os.makedirs(partition_path, exist_ok=True)
+        open_paths = [path for path in get_segment_paths(partition_path)
+                      if path.endswith(OPEN_SUFFIX)]
+        if open_paths:
+            self.path = open_paths[-1]
+            truncate_partial_line(self.path)
+        else:
+            sealed_paths = get_segment_paths(partition_path, False)
+            sequence = 1 + (int(os.path.basename(sealed_paths[-1])
+                                [:-len(SEGMENT_SUFFIX)])
+                            if sealed_paths else 0)
+            self.path = os.path.join(
+                partition_path, f'{sequence:06d}{SEGMENT_SUFFIX}{OPEN_SUFFIX}')
+        self._file = open(self.path, 'ab')
+        self.size = self._file.tell()
+
+    def write(self, line: bytes) -> None:
+        self._file.write(line)
+        self.size += len(line)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def seal(self) -> None:
+        self._file.close()
+        os.replace(self.path, self.path[:-len(OPEN_SUFFIX)])
+
+
+class ArchiveDataPublisher(DataPublisher):
+    """Represent data publisher appending station and services to a
+    partitioned archive on a file system"""
+
+    def __init__(self, root: str, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 get_time: Optional[Callable[[], datetime.datetime]] = None):
+        """Create an instance of `ArchiveDataPublisher`
+
+        Segments left open by a previous publisher are appended to in the
+        current hour and sealed in earlier hours.
+
+        :param root: Directory of the archive
+        :param segment_size: Size in bytes from which a segment is sealed
+        :param get_time: Function getting the time station and services are
+                         published at, the current time if None
+        """
+        self._root = root
+        self._segment_size = segment_size
+        self._get_time = get_time or (
+            lambda: datetime.datetime.now(datetime.timezone.utc))
+        self._serializer = CompactJsonDataSerializer()
+        self._segments: Dict[Tuple[datetime.datetime, str], _Segment] = {}
+        self._is_stale_sealed = False
+
+    def publish(self, data: Iterable) -> None:
+        """Publish station and services
+
+        :param data: Station and services to be published
+        :return: None
+        """
+        self.publish_stream(data)
+
+    def publish_stream(self, items: Iterable) -> None:
+        """Append station and services to the archive as they come
+
+        :param items: Station and services to be published
+        :return: None
+        """
+        try:
+            for station_and_services in items:
+                time = to_utc(self._get_time())
+                hour = time.replace(minute=0, second=0, microsecond=0)
+                partition = (hour, station_and_services.station.name)
+                segment = self._get_segment(partition)
+                segment.write(self._serialize(time, station_and_services))
+                if segment.size >= self._segment_size:
+                    self._segments.pop(partition).seal()
+        finally:
+            for segment in self._segments.values():
+                segment.flush()
+
+    def seal(self) -> None:
+        """Seal all the open segments
+
+        :return: None
+        """
+        for segment in self._segments.values():
+            segment.seal()
+        self._segments.clear()
+
+    def close(self) -> None:
+        """Close the open segments, leaving them to be appended to later
+
+        :return: None
+        """
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+
+    def _get_segment(self, partition: Tuple[datetime.datetime, str])\
+            -> _Segment:
+        segment = self._segments.get(partition)
+        if segment is None:
+            hour, station_name = partition
+            if not self._is_stale_sealed:
+                seal_stale_segments(self._root, hour)
+                self._is_stale_sealed = True
+            # The hours before are over, so their segments are complete
+            for earlier_partition in [p for p in self._segments
+                                      if p[0] < hour]:
+                self._segments.pop(earlier_partition).seal()
+            segment = self._segments[partition] = _Segment(
+                get_partition_path(self._root, hour, station_name))
+        return segment
+
+    def _serialize(self, time: datetime.datetime,
+                   station_and_services: object) -> bytes:
+        return (self._serializer.serialize(
+            {'time': time.isoformat(),
+             'station_and_services': station_and_services}) + '\n').encode()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class ArchiveReader:
+    """Represent reading station and services back from an archive"""
+
+    def __init__(self, root: str):
+        """Create an instance of `ArchiveReader`
+
+        :param root: Directory of the archive
+        """
+        self._root = root
+
+    def get_partition_paths(self, start: datetime.datetime,
+                            end: datetime.datetime,
+                            station_names: Optional[Iterable[str]] = None)\
+            -> List[str]:
+        """Get the partitions holding station and services of a time range
+
+        Only the directories of the hours in the range are listed.
+
+        :param start: Start of the time range, UTC if naive
+        :param end: End of the time range, excluded, UTC if naive
+        :param station_names: Names of the stations, all if None
+        :return: Directories of the partitions, by hour
+        """
+        start, end = to_utc(start), to_utc(end)
+        paths = []
+        hour = start.replace(minute=0, second=0, microsecond=0)
+        while hour < end:
+            hour_path = os.path.dirname(
+                get_partition_path(self._root, hour, ''))
+            if os.path.isdir(hour_path):
+                names = sorted(os.listdir(hour_path)) \
+                    if station_names is None \
+                    else [quote(name, safe='') for name in station_names]
+                paths.extend(os.path.join(hour_path, name) for name in names
+                             if os.path.isdir(os.path.join(hour_path, name)))
+            hour += datetime.timedelta(hours=1)
+        return paths
+
+    def read(self, start: datetime.datetime, end: datetime.datetime,
+             station_names: Optional[Iterable[str]] = None,
+             is_including_open: bool = True) -> Iterator[Mapping]:
+        """Read station and services published in a time range
+
+        Records come by hour, then by station, in the order they were
+        written. The line being written to an open segment is skipped.
+
+        :param start: Start of the time range, UTC if naive
+        :param end: End of the time range, excluded, UTC if naive
+        :param station_names: Names of the stations, all if None
+        :param is_including_open: Whether segments being written are read
+        :return: Records with `time` in UTC and `station_and_services` as
+                 deserialized json
+        """
+        start, end = to_utc(start), to_utc(end)
+        for partition_path in self.get_partition_paths(start, end,
+                                                       station_names):
+            for segment_path in get_segment_paths(partition_path,
+                                                  is_including_open):
+                yield from read_segment(segment_path, start, end)
+
+
+def read_segment(path: str, start: datetime.datetime,
+                 end: datetime.datetime) -> Iterator[Mapping]:
+    with open(path, 'rb') as file:
+        for line in file:
+            if not line.endswith(b'\n'):
+                return
+            record = json.loads(line)
+            time = datetime.datetime.fromisoformat(record['time'])
+            if start <= time < end:
+                record['time'] = time
+                yield record
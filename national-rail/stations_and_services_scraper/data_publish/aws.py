@@ -0,0 +1,309 @@
+"""Represent pooled AWS clients, uploads to S3 and batches of records put
+to Kinesis and Firehose"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Mapping, Optional, Sequence
+
+import boto3
+from botocore.config import Config
+
+from error import DataPublishError
+
+
+MEBIBYTE = 1024 * 1024
+# S3 parts, except the last one, are at least 5 MiB
+MIN_PART_SIZE = 5 * MEBIBYTE
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service_name: str, region_name: Optional[str] = None,
+               endpoint_url: Optional[str] = None,
+               max_pool_connections: int = 10):
+    """Get a client of an AWS service shared with the callers asking for
+    the same service, region and endpoint
+
+    Clients are thread safe and keep their connections open, so sharing them
+    reuses the connections across publishers and invocations. Sessions are
+    not thread safe, so clients are created one at a time.
+
+    :param service_name: Name of the AWS service, e.g. s3
+    :param region_name: Region of the service, None for the default
+    :param endpoint_url: Endpoint of the service, None for the default
+    :param max_pool_connections: Maximum number of connections kept open
+    :return: Client of the AWS service
+    """
+    key = (service_name, region_name, endpoint_url, max_pool_connections)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = boto3.session.Session().client(
+                service_name, region_name=region_name,
+                endpoint_url=endpoint_url,
+                config=Config(max_pool_connections=max_pool_connections))
+    return client
+
+
+class S3Uploader:
+    """Represent uploads of objects to a S3 bucket, in parts uploaded in
+    parallel once they are large"""
+
+    def __init__(self, client, bucket_name: str,
+                 multipart_threshold: int = 8 * MEBIBYTE,
+                 part_size: int = 8 * MEBIBYTE, max_concurrency: int = 4):
+        """Create an instance of `S3Uploader`
+
+        :param client: S3 client
+        :param bucket_name: Name of the bucket uploaded to
+        :param multipart_threshold: Size in bytes from which objects are
+                                    uploaded in parts
+        :param part_size: Size in bytes of the parts, at least 5 MiB
+        :param max_concurrency: Maximum number of parts uploaded at once
+        """
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f'Part size {part_size} is less than '
+                             f'{MIN_PART_SIZE} bytes')
+        self._client = client
+        self._bucket_name = bucket_name
+        self._multipart_threshold = max(multipart_threshold, 1)
+        self._part_size = part_size
+        self._max_concurrency = max_concurrency
+
+    def upload(self, key: str, data: bytes, content_type: str,
+               content_encoding: Optional[str] = None) -> None:
+        """Upload an object
+
+        A multipart upload that fails is aborted, so that its parts are not
+        kept.
+
+        :param key: Key of the object
+        :param data: Content of the object
+        :param content_type: Content type of the object
+        :param content_encoding: Content encoding of the object, e.g. gzip,
+                                 None if not encoded
+        :return: None
+        """
+        metadata = {'ContentType': content_type}
+        if content_encoding is not None:
+            metadata['ContentEncoding'] = content_encoding
+        if len(data) < self._multipart_threshold:
+            self._client.put_object(Bucket=self._bucket_name, Key=key,
+                                    Body=data, **metadata)
+            return
+        upload_id = self._client.create_multipart_upload(
+            Bucket=self._bucket_name, Key=key, **metadata)['UploadId']
+        try:
+            parts = self._upload_parts(key, upload_id, data)
+            self._client.complete_multipart_upload(
+                Bucket=self._bucket_name, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts})
+        except BaseException:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket_name, Key=key, UploadId=upload_id)
+            raise
+
+    def _upload_parts(self, key: str, upload_id: str, data: bytes)\
+            -> List[Mapping]:
+        def upload_part(part_number: int) -> Mapping:
+            start = (part_number - 1) * self._part_size
+            response = self._client.upload_part(
+                Bucket=self._bucket_name, Key=key, UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data[start:start + self._part_size])
+            return {'ETag': response['ETag'], 'PartNumber': part_number}
+
+        number_of_parts = -(-len(data) // self._part_size)
+        with ThreadPoolExecutor(self._max_concurrency) as executor:
+            return list(executor.map(upload_part,
+                                     range(1, number_of_parts + 1)))
+
+
+class Record:
+    """Represent a record put to a stream"""
+    __slots__ = ('data', 'partition_key')
+
+    def __init__(self, data: bytes, partition_key: Optional[str] = None):
+        """Create an instance of `Record`
+
+        :param data: Content of the record
+        :param partition_key: Key of the shard the record is put to, None
+                              for streams without shards
+        """
+        self.data = data
+        self.partition_key = partition_key
+
+
+class RecordStream(ABC):
+    """Represent a stream that records are put to in batches"""
+    # Limits of a batch of records
+    max_records: int = None
+    max_record_bytes: int = None
+    max_batch_bytes: int = None
+
+    @abstractmethod
+    def create_record(self, data: bytes, partition_key: str) -> Record:
+        """Create a record of serialized data
+
+        :param data: Serialized data
+        :param partition_key: Key grouping related records
+        :return: Record
+        """
+        pass
+
+    @abstractmethod
+    def put_records(self, records: Sequence[Record]) -> List[Optional[str]]:
+        """Put a batch of records
+
+        :param records: Records within the limits of a batch
+        :return: Error code of each record, None for the records put
+        """
+        pass
+
+    def get_size(self, record: Record) -> int:
+        """Get the size of a record counted against the limits
+
+        :param record: Record
+        :return: Size in bytes
+        """
+        return len(record.data)
+
+
+class FirehoseRecordStream(RecordStream):
+    """Represent a Firehose delivery stream
+
+    Records are ended with a new line, so that the objects Firehose
+    delivers have one record per line.
+    """
+    max_records = 500
+    max_record_bytes = 1000 * 1024
+    max_batch_bytes = 4 * MEBIBYTE
+
+    def __init__(self, client, delivery_stream_name: str):
+        """Create an instance of `FirehoseRecordStream`
+
+        :param client: Firehose client
+        :param delivery_stream_name: Name of the delivery stream
+        """
+        self._client = client
+        self._delivery_stream_name = delivery_stream_name
+
+    def create_record(self, data: bytes, partition_key: str) -> Record:
+        return Record(data + b'\n')
+
+    def put_records(self, records: Sequence[Record]) -> List[Optional[str]]:
+        response = self._client.put_record_batch(
+            DeliveryStreamName=self._delivery_stream_name,
+            Records=[{'Data': record.data} for record in records])
+        return [result.get('ErrorCode')
+                for result in response['RequestResponses']]
+
+
+class KinesisRecordStream(RecordStream):
+    """Represent a Kinesis data stream"""
+    max_records = 500
+    max_record_bytes = MEBIBYTE
+    max_batch_bytes = 5 * MEBIBYTE
+
+    def __init__(self, client, stream_name: str):
+        """Create an instance of `KinesisRecordStream`
+
+        :param client: Kinesis client
+        :param stream_name: Name of the data stream
+        """
+        self._client = client
+        self._stream_name = stream_name
+
+    def create_record(self, data: bytes, partition_key: str) -> Record:
+        return Record(data, partition_key)
+
+    def put_records(self, records: Sequence[Record]) -> List[Optional[str]]:
+        response = self._client.put_records(
+            StreamName=self._stream_name,
+            Records=[{'Data': record.data,
+                      'PartitionKey': record.partition_key}
+                     for record in records])
+        return [result.get('ErrorCode') for result in response['Records']]
+
+    def get_size(self, record: Record) -> int:
+        return len(record.data) + len(record.partition_key.encode())
+
+
+class RecordBatcher:
+    """Represent records collected into batches within the limits of a
+    stream"""
+
+    def __init__(self, stream: RecordStream):
+        """Create an instance of `RecordBatcher`
+
+        :param stream: Stream the batches are put to
+        """
+        self.stream = stream
+        self._records = []
+        self._size = 0
+
+    def add(self, record: Record) -> Optional[List[Record]]:
+        """Add a record
+
+        :param record: Record
+        :return: Batch of the records added before, if the record does not
+                 fit in it, otherwise None
+        """
+        size = self.stream.get_size(record)
+        if size > self.stream.max_record_bytes:
+            raise DataPublishError(
+                f'Record of {size} bytes is larger than '
+                f'{self.stream.max_record_bytes} bytes')
+        batch = None
+        if len(self._records) == self.stream.max_records \
+                or self._size + size > self.stream.max_batch_bytes:
+            batch = self.flush()
+        self._records.append(record)
+        self._size += size
+        return batch
+
+    def flush(self) -> Optional[List[Record]]:
+        """Take the records added
+
+        :return: Batch of the records added, None if there are none
+        """
+        batch = self._records or None
+        self._records = []
+        self._size = 0
+        return batch
+
+
+def put_records_with_retry(stream: RecordStream, records: Sequence[Record],
+                           max_attempts: int = 3, retry_delay: float = 0.1,
+                           sleep: Callable[[float], None] = time.sleep)\
+        -> None:
+    """Put a batch of records, putting again the records that failed
+
+    A batch is put partially when some records are throttled or fail
+    internally, so only those records are put again, after a delay doubled
+    on each attempt.
+
+    :param stream: Stream the records are put to
+    :param records: Batch of records
+    :param max_attempts: Maximum number of times a record is put
+    :param retry_delay: Seconds to wait before the first retry
+    :param sleep: Function waiting a number of seconds
+    :return: None
+    """
+    error_codes = []
+    for attempt in range(max(max_attempts, 1)):
+        if attempt > 0:
+            sleep(retry_delay * 2 ** (attempt - 1))
+        error_codes = stream.put_records(records)
+        failed = [(record, error_code)
+                  for record, error_code in zip(records, error_codes)
+                  if error_code is not None]
+        if not failed:
+            return
+        records = [record for record, _ in failed]
+        error_codes = [error_code for _, error_code in failed]
+    raise DataPublishError(
+        f'{len(records)} records failed after {max_attempts} attempts, '
+        f'last with {error_codes[-1]}')
@@ -0,0 +1,258 @@
+"""Represent compact binary serializer for stations and services
+
+Layout of schema versions 1 and 2, integers being unsigned LEB128 varints
+unless stated otherwise:
+
+- magic `SAS` and the schema version as one byte
+- string table: number of strings, then each string's UTF-8 length and
+  bytes
+- number of stations and services, then each one:
+    - station: name, message, are services available
+    - number of services, then each service: id, status as one byte,
+      abnormality message, departure minute of day, length, platform,
+      scheduled departure minute of day in version 2 only, number of
+      calling points, then each calling point: name, time, is cancelled,
+      alert
+
+Strings are indices to the string table plus one, zero for None, so that
+repeated names, times and messages are written once. Booleans are one byte,
+0 for False, 1 for True and 2 for None. The departure minutes and the length
+are written plus one, zero for None.
+
+Version 1 is written unless scheduled departure times are asked for, so
+that published documents are unchanged. Both versions are read.
+"""
+import datetime
+import struct
+from typing import Iterable, List, Optional
+
+from data_model import Station, Status, ServiceStatus, CallingPoint, \
+    Service, StationAndServices
+from error import UnsupportedSchemaVersionError
+from .serialize import BytesDataSerializer, BytesDataDeserializer
+
+
+MAGIC = b'SAS'
+# Latest schema version, the one with scheduled departure times
+SCHEMA_VERSION = 2
+SCHEMA_VERSIONS = (1, 2)
+STATUSES = tuple(Status)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+BOOLEAN_CODES = {False: 0, True: 1, None: 2}
+BOOLEANS = (False, True, None)
+HEADER = struct.Struct('3sB')
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    while value > 0x7f:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+class _Writer:
+    """Represent the body of a serialized document and its string table"""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.body = bytearray()
+        self.strings = {}
+
+    def write_varint(self, value: int) -> None:
+        write_varint(self.body, value)
+
+    def write_string(self, value: Optional[str]) -> None:
+        if value is None:
+            self.body.append(0)
+            return
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        write_varint(self.body, index + 1)
+
+    def write_boolean(self, value: Optional[bool]) -> None:
+        self.body.append(BOOLEAN_CODES[value])
+
+    def write_optional_varint(self, value: Optional[int]) -> None:
+        write_varint(self.body, 0 if value is None else value + 1)
+
+    def get_bytes(self) -> bytes:
+        document = bytearray(HEADER.pack(MAGIC, self.version))
+        write_varint(document, len(self.strings))
+        for string in self.strings:
+            encoded = string.encode()
+            write_varint(document, len(encoded))
+            document += encoded
+        document += self.body
+        return bytes(document)
+
+
+class _Reader:
+    """Represent a serialized document read from the start of its body"""
+
+    def __init__(self, document: bytes):
+        self._document = document
+        magic, version = HEADER.unpack_from(document)
+        if magic != MAGIC:
+            raise ValueError('Not a serialized stations and services '
+                             'document')
+        if version not in SCHEMA_VERSIONS:
+            raise UnsupportedSchemaVersionError(
+                f'Unsupported schema version {version}, '
+                f'expected one of {SCHEMA_VERSIONS}')
+        self.version = version
+        self._position = HEADER.size
+        self._strings = [None]
+        for _ in range(self.read_varint()):
+            length = self.read_varint()
+            self._strings.append(
+                document[self._position:self._position + length].decode())
+            self._position += length
+        self._times = {}
+
+    def read_varint(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self._document[self._position]
+            self._position += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_byte(self) -> int:
+        byte = self._document[self._position]
+        self._position += 1
+        return byte
+
+    def read_string(self) -> Optional[str]:
+        return self._strings[self.read_varint()]
+
+    def read_boolean(self) -> Optional[bool]:
+        return BOOLEANS[self.read_byte()]
+
+    def read_optional_varint(self) -> Optional[int]:
+        value = self.read_varint()
+        return None if value == 0 else value - 1
+
+    def read_time(self) -> Optional[datetime.time]:
+        minute = self.read_optional_varint()
+        if minute is None:
+            return None
+        time = self._times.get(minute)
+        if time is None:
+            time = self._times[minute] = \
+                datetime.time(minute // 60, minute % 60)
+        return time
+
+
+class BinaryDataSerializer(BytesDataSerializer):
+    """Represent a serializer for serializing a collection of
+    `StationAndServices` to a compact binary document
+
+    Service times are written to the minute, as `JsonDataSerializer` does.
+    """
+
+    def __init__(self, is_including_scheduled_time: bool = False):
+        """Create an instance of `BinaryDataSerializer`
+
+        :param is_including_scheduled_time: Write scheduled departure times
+                                            of services, in schema version 2
+        """
+        self._version = SCHEMA_VERSION if is_including_scheduled_time else 1
+
+    def serialize(self, data: Iterable[StationAndServices]) -> bytes:
+        """Serialize a collection of station and services
+
+        :param data: A collection of `StationAndServices`
+        :return: Serialized data in bytes
+        """
+        data = list(data)
+        writer = _Writer(self._version)
+        writer.write_varint(len(data))
+        for station_and_services in data:
+            write_station_and_services(writer, station_and_services)
+        return writer.get_bytes()
+
+
+class BinaryDataDeserializer(BytesDataDeserializer):
+    """Represent a deserializer of documents written by
+    `BinaryDataSerializer`, services read from schema version 1 having no
+    scheduled departure time"""
+
+    def deserialize(self, data: bytes) -> List[StationAndServices]:
+        """Deserialize a collection of station and services
+
+        :param data: Serialized data in bytes
+        :return: A list of `StationAndServices`
+        """
+        reader = _Reader(data)
+        return [read_station_and_services(reader)
+                for _ in range(reader.read_varint())]
+
+
+def write_station_and_services(writer: _Writer,
+                               station_and_services: StationAndServices)\
+        -> None:
+    station = station_and_services.station
+    writer.write_string(station.name)
+    writer.write_string(station.message)
+    writer.write_boolean(station.are_services_available)
+    services = station_and_services.services
+    writer.write_varint(len(services))
+    for service in services:
+        write_service(writer, service)
+
+
+def get_minute(time: Optional[datetime.time]) -> Optional[int]:
+    return None if time is None else time.hour * 60 + time.minute
+
+
+def write_service(writer: _Writer, service: Service) -> None:
+    writer.write_string(service.id)
+    writer.body.append(STATUS_CODES[service.status.status])
+    writer.write_string(service.status.abnormality_message)
+    writer.write_optional_varint(get_minute(service.time))
+    writer.write_optional_varint(service.length)
+    writer.write_string(service.platform)
+    if writer.version >= 2:
+        writer.write_optional_varint(get_minute(service.scheduled_time))
+    writer.write_varint(len(service.calling_points))
+    for calling_point in service.calling_points:
+        writer.write_string(calling_point.name)
+        writer.write_string(calling_point.time)
+        writer.write_boolean(calling_point.is_cancelled)
+        writer.write_string(calling_point.alert)
+
+
+def read_station_and_services(reader: _Reader) -> StationAndServices:
+    name = reader.read_string()
+    message = reader.read_string()
+    station = Station(name, reader.read_boolean(), message)
+    return StationAndServices(station, [
+        read_service(reader) for _ in range(reader.read_varint())])
+
+
+def read_service(reader: _Reader) -> Service:
+    id_ = reader.read_string()
+    status = ServiceStatus(STATUSES[reader.read_byte()],
+                           reader.read_string())
+    time = reader.read_time()
+    length = reader.read_optional_varint()
+    platform = reader.read_string()
+    scheduled_time = reader.read_time() if reader.version >= 2 else None
+    service = Service(id_, status, time, [
+        read_calling_point(reader) for _ in range(reader.read_varint())])
+    if length is not None:
+        service.set_length(length)
+    if platform is not None:
+        service.set_platform(platform)
+    service.set_scheduled_time(scheduled_time)
+    return service
+
+
+def read_calling_point(reader: _Reader) -> CallingPoint:
+    name = reader.read_string()
+    time = reader.read_string()
+    return CallingPoint(name, time, reader.read_boolean(),
+                        reader.read_string())
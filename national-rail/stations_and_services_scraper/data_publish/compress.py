@@ -0,0 +1,169 @@
+"""Represent compression of serialized data before it is published"""
+import gzip
+import io
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterable, Mapping, Optional, Union
+
+from .serialize import StringDataSerializer, BytesDataSerializer, \
+    StreamDataSerializer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Compressor(ABC):
+    """Represent a compression format, named by its content encoding"""
+    content_encoding: Optional[str] = None
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Compress data
+
+        :param data: Data to be compressed
+        :return: Compressed data
+        """
+        pass
+
+    @abstractmethod
+    def open_writer(self, sink: BinaryIO) -> BinaryIO:
+        """Open a writer compressing what is written to it into a sink
+
+        Closing the writer finishes the compressed data without closing the
+        sink.
+
+        :param sink: File-like object with a `write` method
+        :return: Writer compressing into the sink
+        """
+        pass
+
+
+class GzipCompressor(Compressor):
+    """Represent gzip compression"""
+    content_encoding = 'gzip'
+
+    def __init__(self, level: int = 6):
+        """Create an instance of `GzipCompressor`
+
+        :param level: Compression level, 1 fastest to 9 smallest
+        """
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        # No modification time, so that equal data compresses the same
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def open_writer(self, sink: BinaryIO) -> BinaryIO:
+        return gzip.GzipFile(fileobj=sink, mode='wb',
+                             compresslevel=self.level, mtime=0)
+
+
+class ZstdCompressor(Compressor):
+    """Represent zstd compression, requiring the zstandard package"""
+    content_encoding = 'zstd'
+
+    def __init__(self, level: int = 3):
+        """Create an instance of `ZstdCompressor`
+
+        :param level: Compression level, 1 fastest to 22 smallest
+        """
+        if zstandard is None:
+            raise ValueError('zstd compression requires the zstandard '
+                             'package')
+        self.level = level
+        self._compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def open_writer(self, sink: BinaryIO) -> BinaryIO:
+        return self._compressor.stream_writer(sink, closefd=False)
+
+
+class CompressingDataSerializer(BytesDataSerializer):
+    """Represent a serializer compressing what another serializer
+    serializes"""
+
+    def __init__(self, serializer: Union[StringDataSerializer,
+                                         BytesDataSerializer],
+                 compressor: Compressor):
+        """Create an instance of `CompressingDataSerializer`
+
+        :param serializer: Serializer to string, encoded as UTF-8, or to
+                           bytes
+        :param compressor: Compression of the serialized data
+        """
+        self._serializer = serializer
+        self._compressor = compressor
+
+    @property
+    def content_encoding(self) -> Optional[str]:
+        return self._compressor.content_encoding
+
+    def serialize(self, data: object) -> bytes:
+        """Serialize and compress data
+
+        :param data: Data to be serialized
+        :return: Compressed serialized data
+        """
+        serialized_data = self._serializer.serialize(data)
+        if isinstance(serialized_data, str):
+            serialized_data = serialized_data.encode()
+        return self._compressor.compress(serialized_data)
+
+
+class CompressingStreamDataSerializer(StreamDataSerializer):
+    """Represent a stream serializer compressing what another stream
+    serializer writes, as it writes it, into a binary sink"""
+
+    def __init__(self, serializer: StreamDataSerializer,
+                 compressor: Compressor):
+        """Create an instance of `CompressingStreamDataSerializer`
+
+        :param serializer: Serializer writing data items to a text sink
+        :param compressor: Compression of the serialized data
+        """
+        self._serializer = serializer
+        self._compressor = compressor
+
+    @property
+    def content_encoding(self) -> Optional[str]:
+        return self._compressor.content_encoding
+
+    def serialize_to(self, items: Iterable, sink: BinaryIO) -> None:
+        """Serialize and compress data items to a binary sink, one item at a
+        time
+
+        :param items: Data items to be serialized
+        :param sink: Binary file-like object with a `write` method
+        :return: None
+        """
+        with self._compressor.open_writer(sink) as writer:
+            text_writer = io.TextIOWrapper(writer, encoding='utf-8',
+                                           write_through=True)
+            self._serializer.serialize_to(items, text_writer)
+            text_writer.flush()
+            # Leave the writer to the context manager, which finishes the
+            # compressed data
+            text_writer.detach()
+
+
+def create_compressor(config: Optional[Mapping]) -> Optional[Compressor]:
+    """Create compression of serialized data from its config settings
+
+    Supported settings are `encoding`, `gzip` or `zstd`, and `level`,
+    defaulting to 6 for gzip and 3 for zstd.
+
+    :param config: Compression config settings, None for no compression
+    :return: Compressor, None if compression is not configured
+    """
+    if not config:
+        return None
+    encoding = config.get('encoding', 'gzip')
+    level = config.get('level')
+    if encoding == 'gzip':
+        return GzipCompressor(6 if level is None else level)
+    if encoding == 'zstd':
+        return ZstdCompressor(3 if level is None else level)
+    raise ValueError(f'Unknown compression encoding {encoding}')
@@ -0,0 +1,54 @@
+"""Create data publishers from config settings"""
+from typing import Mapping
+
+from .archive import ArchiveDataPublisher, DEFAULT_SEGMENT_SIZE
+from .compress import CompressingDataSerializer, create_compressor
+from .fan_out import FanOutDataPublisher
+from .history import HistoryStore, HistoryDataPublisher
+from .publish import DataPublisher, AwsDataPublisher, ConsoleDataPublisher
+from .serialize import JsonDataSerializer, CompactJsonDataSerializer
+
+
+def create_data_publisher(config: Mapping) -> DataPublisher:
+    """Create data publisher from its config settings
+
+    Supported settings are `publisher`, `console`, `aws`, `archive`,
+    `history` or `fan_out`, the settings of `AwsDataPublisher` and
+    `compression`, see `create_compressor`. Station and services are printed
+    to console as indented json, and published to AWS as compact json,
+    compressed if configured. An archive publisher appends to the archive
+    with `root` and `segment_size` in `archive`, and a history publisher
+    adds to the SQLite database at `path` in `history`. A fan out publisher
+    publishes to the publishers created from the configs in `publishers`,
+    with `max_queued`, giving its publishers of serialized data compact
+    json. Station and services are only dropped for the publishers with a
+    `max_wait` in their config.
+
+    :param config: Data publisher config settings
+    :return: Data publisher
+    """
+    publisher = config.get('publisher') or 'console'
+    if publisher == 'console':
+        return ConsoleDataPublisher(JsonDataSerializer())
+    if publisher == 'aws':
+        serializer = CompactJsonDataSerializer()
+        compressor = create_compressor(config.get('compression'))
+        if compressor is not None:
+            serializer = CompressingDataSerializer(serializer, compressor)
+        return AwsDataPublisher(config, serializer)
+    if publisher == 'archive':
+        archive_config = config['archive']
+        return ArchiveDataPublisher(
+            archive_config['root'],
+            archive_config.get('segment_size', DEFAULT_SEGMENT_SIZE))
+    if publisher == 'history':
+        return HistoryDataPublisher(HistoryStore(config['history']['path']))
+    if publisher == 'fan_out':
+        publisher_configs = config.get('publishers') or ()
+        return FanOutDataPublisher(
+            [create_data_publisher(publisher_config)
+             for publisher_config in publisher_configs],
+            CompactJsonDataSerializer(), config.get('max_queued', 16),
+            [publisher_config.get('max_wait')
+             for publisher_config in publisher_configs])
+    raise ValueError(f'Unknown data publisher {publisher}')
@@ -0,0 +1,353 @@
+"""Represent publishing the same station and services to several
+publishers at once"""
+import collections.abc
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence, \
+    Union
+
+from error import DataPublishError
+from .publish import DataPublisher, SerializedDataPublisher, _EndOfItems
+from .serialize import StringDataSerializer, BytesDataSerializer
+
+
+logger = logging.getLogger(__name__)
+
+
+class SinkStatistics:
+    """Represent deliveries to a publisher, their latencies and failures"""
+
+    def __init__(self):
+        self._deliveries = 0
+        self._failures = 0
+        self._dropped = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        self._last_error = None
+        self._lock = threading.Lock()
+
+    def record_delivery(self, latency: float) -> None:
+        """Record a delivery to the publisher
+
+        :param latency: Seconds the delivery took
+        :return: None
+        """
+        with self._lock:
+            self._deliveries += 1
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+    def record_failure(self, error: BaseException) -> None:
+        """Record a failure of the publisher
+
+        :param error: Error the publisher raised
+        :return: None
+        """
+        with self._lock:
+            self._failures += 1
+            self._last_error = repr(error)
+
+    def record_dropped(self) -> None:
+        """Record an item dropped instead of delivered to the publisher
+
+        :return: None
+        """
+        with self._lock:
+            self._dropped += 1
+
+    def get_statistics(self) -> Mapping:
+        """Get numbers of deliveries, failures and dropped items, latencies
+        in seconds and the last error
+
+        :return: Statistics of the publisher
+        """
+        with self._lock:
+            return {'deliveries': self._deliveries,
+                    'failures': self._failures,
+                    'dropped': self._dropped,
+                    'mean_latency': self._total_latency / self._deliveries
+                    if self._deliveries else None,
+                    'max_latency': self._max_latency
+                    if self._deliveries else None,
+                    'last_error': self._last_error}
+
+
+class _Sink:
+    """Represent a publisher publishing items from its own bounded queue in
+    a thread
+
+    Items are queued with their serialized data, which a publisher of
+    serialized data is given instead of the items if they are serialized.
+    """
+
+    def __init__(self, publisher: DataPublisher, statistics: SinkStatistics,
+                 max_queued: int, max_wait: Optional[float],
+                 is_serialized: bool):
+        self.publisher = publisher
+        self.statistics = statistics
+        self._max_wait = max_wait
+        self._is_serialized = is_serialized \
+            and isinstance(publisher, SerializedDataPublisher)
+        self._queue = queue.Queue(max_queued)
+        self._is_stopped = threading.Event()
+        self._is_stop_logged = False
+        self._end = None
+
+    def offer(self, item, serialized_item) -> bool:
+        """Queue an item if there is room for it
+
+        Items for a publisher that stopped are dropped.
+
+        :param item: Item to be published
+        :param serialized_item: Item serialized, None if it is not
+        :return: Whether the item is queued or dropped
+        """
+        if self._is_stopped.is_set():
+            self._drop_for_stopped()
+            return True
+        try:
+            self._queue.put_nowait(
+                (item, serialized_item, time.perf_counter()))
+        except queue.Full:
+            return False
+        return True
+
+    def put(self, item, serialized_item) -> None:
+        """Queue an item, waiting for room while the publisher runs, without
+        a limit unless the sink drops items after a maximum wait
+
+        :param item: Item to be published
+        :param serialized_item: Item serialized, None if it is not
+        :return: None
+        """
+        if self._max_wait is not None and self._max_wait <= 0:
+            self._drop_for_full_queue()
+            return
+        deadline = None if self._max_wait is None \
+            else time.monotonic() + self._max_wait
+        if self._put((item, serialized_item, time.perf_counter()), deadline):
+            return
+        if self._is_stopped.is_set():
+            self._drop_for_stopped()
+        else:
+            self._drop_for_full_queue()
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Queue the end of the items, waiting for room while the publisher
+        runs
+
+        :param error: Error that ended the items early, None at their end
+        :return: None
+        """
+        self._end = _EndOfItems(error)
+        self._put(self._end)
+
+    def _drop_for_full_queue(self) -> None:
+        self.statistics.record_dropped()
+        logger.warning('Station and services dropped for data publisher %s '
+                       'after waiting %s seconds for room in its queue',
+                       type(self.publisher).__name__, self._max_wait)
+
+    def _drop_for_stopped(self) -> None:
+        self.statistics.record_dropped()
+        if not self._is_stop_logged:
+            self._is_stop_logged = True
+            logger.warning('Data publisher %s stopped, the station and '
+                           'services left are dropped for it',
+                           type(self.publisher).__name__)
+
+    def _put(self, entry, deadline: Optional[float] = None) -> bool:
+        while not self._is_stopped.is_set():
+            timeout = 0.1 if deadline is None \
+                else min(0.1, deadline - time.monotonic())
+            try:
+                self._queue.put(entry, timeout=max(timeout, 0))
+                return True
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+        return False
+
+    def run(self) -> Optional[BaseException]:
+        """Publish the queued items until their end
+
+        :return: Error the publisher raised, None if it succeeded
+        """
+        try:
+            if self._is_serialized:
+                self.publisher.publish_serialized_stream(self._iterate())
+            else:
+                self.publisher.publish_stream(self._iterate())
+        except Exception as error:
+            if self._end is not None and error is self._end.error:
+                return None
+            self.statistics.record_failure(error)
+            logger.exception('Data publisher %s failed',
+                             type(self.publisher).__name__)
+            return error
+        finally:
+            self._is_stopped.set()
+        return None
+
+    def _iterate(self) -> Iterator:
+        while True:
+            entry = self._queue.get()
+            if isinstance(entry, _EndOfItems):
+                if entry.error is not None:
+                    raise entry.error
+                return
+            item, serialized_item, queued_at = entry
+            yield serialized_item if self._is_serialized else item
+            # The publisher asks for the next item once it is done with this
+            self.statistics.record_delivery(time.perf_counter() - queued_at)
+
+
+class FanOutDataPublisher(DataPublisher):
+    """Represent data publisher publishing the same station and services to
+    several publishers at once
+
+    Station and services are serialized once for the publishers of
+    serialized data, which are given the same serialized data, and when
+    streamed each one is serialized once as it comes. Each publisher runs
+    in its own thread, so that a slow publisher does not hold back the
+    others, and a publisher that fails does not stop the others. Station
+    and services are only dropped for publishers that opt in with a maximum
+    wait, and each one dropped is logged.
+    """
+
+    def __init__(self, publishers: Sequence[DataPublisher],
+                 serializer: Optional[Union[StringDataSerializer,
+                                            BytesDataSerializer]] = None,
+                 max_queued: int = 16,
+                 max_waits: Optional[Sequence[Optional[float]]] = None):
+        """Create an instance of `FanOutDataPublisher`
+
+        :param publishers: Publishers the station and services are published
+                           to
+        :param serializer: Serializer of the station and services given to
+                           the publishers of serialized data, instead of
+                           their own, None for them to serialize themselves
+        :param max_queued: Maximum number of station and services streamed
+                           waiting for each publisher
+        :param max_waits: For each publisher, maximum seconds to wait for
+                          room in its full queue before station and services
+                          are dropped for it, 0 to drop them at once, None
+                          to wait without a limit. None for all the
+                          publishers to wait without a limit
+        """
+        if not publishers:
+            raise ValueError('At least one data publisher is required')
+        self._publishers = list(publishers)
+        self._max_waits = [None] * len(self._publishers) \
+            if max_waits is None else list(max_waits)
+        if len(self._max_waits) != len(self._publishers):
+            raise ValueError('A maximum wait is required for each data '
+                             'publisher')
+        self._serializer = serializer
+        self._max_queued = max_queued
+        self._statistics = [SinkStatistics() for _ in self._publishers]
+
+    def get_statistics(self) -> Mapping:
+        """Get statistics of each publisher
+
+        :return: Statistics of the publishers under `publishers`, in the
+                 order they are given
+        """
+        return {'publishers': [statistics.get_statistics()
+                               for statistics in self._statistics]}
+
+    def publish(self, data: object) -> None:
+        """Publish station and services to all the publishers at once
+
+        :param data: Station and services to be published
+        :return: None
+        """
+        if isinstance(data, collections.abc.Iterator):
+            data = list(data)
+        serialized_data = None
+        if self._is_serializing():
+            serialized_data = self._serializer.serialize(data)
+
+        def deliver(publisher: DataPublisher, statistics: SinkStatistics)\
+                -> Optional[BaseException]:
+            start = time.perf_counter()
+            try:
+                if serialized_data is not None \
+                        and isinstance(publisher, SerializedDataPublisher):
+                    publisher.publish_serialized(serialized_data)
+                else:
+                    publisher.publish(data)
+            except Exception as error:
+                statistics.record_failure(error)
+                logger.exception('Data publisher %s failed',
+                                 type(publisher).__name__)
+                return error
+            statistics.record_delivery(time.perf_counter() - start)
+            return None
+
+        with ThreadPoolExecutor(len(self._publishers)) as executor:
+            errors = list(executor.map(deliver, self._publishers,
+                                       self._statistics))
+        self._raise_if_all_failed(errors)
+
+    def publish_stream(self, items: Iterable) -> None:
+        """Publish station and services to all the publishers as they come
+        from an iterator
+
+        Each publisher takes the station and services from a queue of at
+        most `max_queued` of them. While a queue is full the iterator is not
+        advanced, but the other publishers carry on with the items already
+        queued for them. A publisher with a maximum wait has the station and
+        services dropped once it is over. Each station and
+        services is serialized once, for the publishers of serialized data
+        to publish as a stream of serialized items. Latency is from an item
+        being queued until the publisher asks for the next one.
+
+        :param items: Station and services to be published
+        :return: None
+        """
+        is_serializing = self._is_serializing()
+        sinks = [_Sink(publisher, statistics, self._max_queued, max_wait,
+                       is_serializing)
+                 for publisher, statistics, max_wait in zip(
+                     self._publishers, self._statistics, self._max_waits)]
+        with ThreadPoolExecutor(len(sinks)) as executor:
+            running = [executor.submit(sink.run) for sink in sinks]
+            try:
+                for item in items:
+                    serialized_item = self._serializer.serialize(item) \
+                        if is_serializing else None
+                    for sink in [sink for sink in sinks
+                                 if not sink.offer(item, serialized_item)]:
+                        sink.put(item, serialized_item)
+            except BaseException as error:
+                for sink in sinks:
+                    sink.end(error)
+                raise
+            for sink in sinks:
+                sink.end()
+            errors = [future.result() for future in running]
+        self._raise_if_all_failed(errors)
+
+    def close(self) -> None:
+        """Close the data publishers that can be closed
+
+        :return: None
+        """
+        for publisher in self._publishers:
+            if hasattr(publisher, 'close'):
+                publisher.close()
+
+    def _is_serializing(self) -> bool:
+        return self._serializer is not None and any(
+            isinstance(publisher, SerializedDataPublisher)
+            for publisher in self._publishers)
+
+    def _raise_if_all_failed(self, errors: List[Optional[BaseException]])\
+            -> None:
+        if all(error is not None for error in errors):
+            raise DataPublishError(
+                f'All {len(errors)} data publishers failed') from errors[-1]
@@ -0,0 +1,452 @@
+"""Represent a history of station and services kept in a SQLite database
+
+Schema:
+
+- `stations`: names of origins and calling points
+- `runs`: times station and services are published at
+- `station_snapshots`: station messages of each run
+- `services`: a service on a date, by service id and date, with its origin
+  and scheduled departure minute of day
+- `service_snapshots`: status, departure minute, length, platform and
+  abnormality message of a service in a run
+- `calling_point_snapshots`: calling points of a service snapshot
+
+The scheduled departure of a service is its scheduled time, or if that is
+not known, the departure of its snapshots that are on time, delayed or
+cancelled, since a new estimated time replaces it. The date of a service is
+that of its scheduled departure, so that a service delayed past midnight
+stays on one date. Departures are minutes of the day and dates are those of
+the departure boards, a departure half a day away from the run being on the
+day before or after it.
+
+Adding services needs SQLite 3.24 or later for `ON CONFLICT DO UPDATE`.
+"""
+import datetime
+import sqlite3
+from typing import Callable, Iterable, List, Mapping, Optional
+
+from data_model import Status, Service, StationAndServices
+from error import DataPublishError
+from .publish import DataPublisher
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS stations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    published_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS station_snapshots (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    station_id INTEGER NOT NULL REFERENCES stations (id),
+    are_services_available INTEGER,
+    message TEXT
+);
+CREATE TABLE IF NOT EXISTS services (
+    id INTEGER PRIMARY KEY,
+    service_id TEXT NOT NULL,
+    service_date TEXT NOT NULL,
+    origin_id INTEGER NOT NULL REFERENCES stations (id),
+    scheduled_minute INTEGER,
+    UNIQUE (service_id, service_date)
+);
+CREATE INDEX IF NOT EXISTS services_origin_scheduled_date
+    ON services (origin_id, scheduled_minute, service_date);
+CREATE TABLE IF NOT EXISTS service_snapshots (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    service_key INTEGER NOT NULL REFERENCES services (id),
+    status TEXT NOT NULL,
+    departure_minute INTEGER,
+    length INTEGER,
+    platform TEXT,
+    abnormality_message TEXT
+);
+CREATE INDEX IF NOT EXISTS service_snapshots_service
+    ON service_snapshots (service_key);
+CREATE TABLE IF NOT EXISTS calling_point_snapshots (
+    service_snapshot_id INTEGER NOT NULL REFERENCES service_snapshots (id),
+    station_id INTEGER NOT NULL REFERENCES stations (id),
+    time TEXT,
+    is_cancelled INTEGER,
+    alert TEXT
+);
+CREATE INDEX IF NOT EXISTS calling_point_snapshots_service_snapshot
+    ON calling_point_snapshots (service_snapshot_id);
+CREATE TEMP TABLE IF NOT EXISTS run_services (
+    service_id TEXT NOT NULL,
+    service_date TEXT NOT NULL,
+    origin_id INTEGER NOT NULL,
+    scheduled_minute INTEGER
+);
+'''
+MIN_SQLITE_VERSION = (3, 24, 0)
+SCHEDULED_STATUSES = (Status.OnTime, Status.Delayed, Status.Cancelled)
+MINUTES_PER_DAY = 24 * 60
+# Departures and their latest snapshot, as selected by the queries
+LATEST_DEPARTURES = '''
+SELECT s.service_date, s.service_id, s.scheduled_minute, ss.status,
+       ss.departure_minute, ss.abnormality_message
+FROM services s
+JOIN service_snapshots ss ON ss.id = (
+    SELECT MAX(id) FROM service_snapshots WHERE service_key = s.id)
+'''
+
+
+def get_minute(time: Optional[datetime.time]) -> Optional[int]:
+    return None if time is None else time.hour * 60 + time.minute
+
+
+def get_service_date(published_at: datetime.datetime,
+                     departure_minute: Optional[int]) -> datetime.date:
+    """Get the date of a departure on a board published at a time
+
+    :param published_at: Time the board is published at
+    :param departure_minute: Departure minute of the day, None if unknown
+    :return: Date of the departure
+    """
+    date = published_at.date()
+    if departure_minute is None:
+        return date
+    difference = departure_minute - get_minute(published_at.time())
+    if difference < -MINUTES_PER_DAY // 2:
+        return date + datetime.timedelta(days=1)
+    if difference > MINUTES_PER_DAY // 2:
+        return date - datetime.timedelta(days=1)
+    return date
+
+
+def get_delay(status: Status, scheduled_minute: Optional[int],
+              departure_minute: Optional[int]) -> Optional[int]:
+    """Get the delay of a departure in minutes
+
+    :param status: Status of the service
+    :param scheduled_minute: Scheduled departure minute, None if unknown
+    :param departure_minute: Departure minute, None if unknown
+    :return: Delay in minutes, None if unknown or cancelled
+    """
+    if status == Status.OnTime:
+        return 0
+    if status != Status.NewTime or scheduled_minute is None \
+            or departure_minute is None:
+        return None
+    delay = departure_minute - scheduled_minute
+    # A departure past midnight scheduled before it
+    if delay < -MINUTES_PER_DAY // 2:
+        delay += MINUTES_PER_DAY
+    return delay
+
+
+class HistoryStore:
+    """Represent a history of station and services in a SQLite database"""
+
+    def __init__(self, path: str):
+        """Create an instance of `HistoryStore`, creating the database
+        schema if it does not exist
+
+        :param path: Path of the database file, `:memory:` for a database in
+                     memory
+        """
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise DataPublishError(
+                f'History store needs SQLite 3.24.0 or later, found '
+                f'{sqlite3.sqlite_version}')
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # With write-ahead logging, a commit only syncs at checkpoints and a
+        # crash loses at most the last runs, never the database
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA synchronous = NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._station_ids = {}
+
+    def add(self, stations_and_services: Iterable[StationAndServices],
+            published_at: datetime.datetime) -> None:
+        """Add station and services published together, in one transaction
+
+        :param stations_and_services: A collection of `StationAndServices`
+        :param published_at: Time of the departure boards
+        :return: None
+        """
+        stations_and_services = list(stations_and_services)
+        try:
+            self._add(stations_and_services, published_at)
+        except BaseException:
+            # Station ids added in the transaction are rolled back too
+            self._station_ids.clear()
+            raise
+
+    def _add(self, stations_and_services: List[StationAndServices],
+             published_at: datetime.datetime) -> None:
+        with self._connection:
+            cursor = self._connection.cursor()
+            run_id = cursor.execute(
+                'INSERT INTO runs (published_at) VALUES (?)',
+                (published_at.isoformat(),)).lastrowid
+            station_ids = self._get_station_ids(cursor, {
+                name for s in stations_and_services
+                for name in get_station_names(s)})
+            cursor.executemany(
+                'INSERT INTO station_snapshots VALUES (?, ?, ?, ?)',
+                [(run_id, station_ids[s.station.name],
+                  s.station.are_services_available, s.station.message)
+                 for s in stations_and_services])
+
+            services = [(s.station.name, service)
+                        for s in stations_and_services
+                        for service in s.services]
+            service_keys = self._add_services(cursor, services, station_ids,
+                                              published_at)
+            snapshot_id = cursor.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM service_snapshots')\
+                .fetchone()[0]
+            snapshots = []
+            calling_points = []
+            for service_key, (_, service) in zip(service_keys, services):
+                snapshot_id += 1
+                snapshots.append((
+                    snapshot_id, run_id, service_key,
+                    service.status.status.value,
+                    get_minute(service.time), service.length,
+                    service.platform, service.status.abnormality_message))
+                calling_points.extend(
+                    (snapshot_id, station_ids[c.name], c.time,
+                     c.is_cancelled, c.alert)
+                    for c in service.calling_points)
+            cursor.executemany(
+                'INSERT INTO service_snapshots VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?)', snapshots)
+            cursor.executemany(
+                'INSERT INTO calling_point_snapshots VALUES (?, ?, ?, ?, ?)',
+                calling_points)
+
+    def get_departures(self, origin_name: str,
+                       scheduled_time: datetime.time,
+                       start_date: datetime.date, end_date: datetime.date)\
+            -> List[Mapping]:
+        """Get the departures of a scheduled service, as last published on
+        each date
+
+        :param origin_name: Name of the origin
+        :param scheduled_time: Scheduled departure time
+        :param start_date: First date
+        :param end_date: Last date, included
+        :return: Departures with `date`, `service_id`, `status`, `delay` in
+                 minutes, None if unknown or cancelled, and
+                 `abnormality_message`, by date
+        """
+        rows = self._connection.execute(
+            LATEST_DEPARTURES + '''
+            WHERE s.origin_id = (SELECT id FROM stations WHERE name = ?)
+              AND s.scheduled_minute = ?
+              AND s.service_date BETWEEN ? AND ?
+            ORDER BY s.service_date''',
+            (origin_name, get_minute(scheduled_time),
+             start_date.isoformat(), end_date.isoformat())).fetchall()
+        return [create_departure(*row) for row in rows]
+
+    def get_delay_statistics(self, origin_name: str,
+                             scheduled_time: datetime.time,
+                             start_date: datetime.date,
+                             end_date: datetime.date, late_after: int = 1)\
+            -> Mapping:
+        """Get how often a scheduled service is late or cancelled
+
+        :param origin_name: Name of the origin
+        :param scheduled_time: Scheduled departure time
+        :param start_date: First date
+        :param end_date: Last date, included
+        :param late_after: Minutes of delay from which a departure is late
+        :return: Numbers of departures, late and cancelled ones, and mean
+                 and maximum delays in minutes of the departures with a
+                 known delay
+        """
+        departures = self.get_departures(origin_name, scheduled_time,
+                                         start_date, end_date)
+        delays = [d['delay'] for d in departures if d['delay'] is not None]
+        return {
+            'departures': len(departures),
+            'late': sum(1 for d in departures
+                        if d['status'] == Status.Delayed
+                        or d['delay'] is not None
+                        and d['delay'] >= late_after),
+            'cancelled': sum(1 for d in departures
+                             if d['status'] == Status.Cancelled),
+            'mean_delay': sum(delays) / len(delays) if delays else None,
+            'max_delay': max(delays) if delays else None}
+
+    def get_cancellations(self, origin_name: str, start_date: datetime.date,
+                          end_date: datetime.date) -> List[Mapping]:
+        """Get the numbers of departures and cancellations from an origin on
+        each date
+
+        :param origin_name: Name of the origin
+        :param start_date: First date
+        :param end_date: Last date, included
+        :return: `date`, `departures` and `cancelled`, by date
+        """
+        rows = self._connection.execute(
+            '''SELECT service_date, COUNT(*), SUM(status = ?) FROM ('''
+            + LATEST_DEPARTURES + '''
+                WHERE s.origin_id = (SELECT id FROM stations WHERE name = ?)
+                  AND s.service_date BETWEEN ? AND ?)
+            GROUP BY service_date ORDER BY service_date''',
+            (Status.Cancelled.value, origin_name, start_date.isoformat(),
+             end_date.isoformat())).fetchall()
+        return [{'date': datetime.date.fromisoformat(date),
+                 'departures': departures, 'cancelled': cancelled}
+                for date, departures, cancelled in rows]
+
+    def get_service_history(self, service_id: str) -> List[Mapping]:
+        """Get the snapshots of a service
+
+        :param service_id: Service identifier
+        :return: Snapshots with `published_at`, `date`, `status`,
+                 `departure_time` and `delay` in minutes, in the order they
+                 are published
+        """
+        rows = self._connection.execute(
+            '''SELECT r.published_at, s.service_date, ss.status,
+                      s.scheduled_minute, ss.departure_minute
+            FROM services s
+            JOIN service_snapshots ss ON ss.service_key = s.id
+            JOIN runs r ON r.id = ss.run_id
+            WHERE s.service_id = ?
+            ORDER BY ss.id''', (service_id,)).fetchall()
+        return [{'published_at': datetime.datetime.fromisoformat(
+                    published_at),
+                 'date': datetime.date.fromisoformat(date),
+                 'status': Status(status),
+                 'departure_time': get_time(departure_minute),
+                 'delay': get_delay(Status(status), scheduled_minute,
+                                    departure_minute)}
+                for published_at, date, status, scheduled_minute,
+                departure_minute in rows]
+
+    def close(self) -> None:
+        """Close the database connection
+
+        :return: None
+        """
+        self._connection.close()
+
+    def _get_station_ids(self, cursor: sqlite3.Cursor,
+                         names: Iterable[str]) -> Mapping[str, int]:
+        new_names = [name for name in names if name not in self._station_ids]
+        if new_names:
+            cursor.executemany(
+                'INSERT OR IGNORE INTO stations (name) VALUES (?)',
+                [(name,) for name in new_names])
+            self._station_ids.update(
+                (name, id_) for id_, name in
+                cursor.execute('SELECT id, name FROM stations'))
+        return self._station_ids
+
+    def _add_services(self, cursor: sqlite3.Cursor, services: List,
+                      station_ids: Mapping[str, int],
+                      published_at: datetime.datetime) -> List[int]:
+        """Add the services on the dates of their scheduled departures,
+        keeping the scheduled minute once known
+
+        :return: Keys of the services, in the order they are given
+        """
+        rows = []
+        for origin_name, service in services:
+            scheduled_minute = get_scheduled_minute(service)
+            rows.append((
+                service.id,
+                get_service_date(
+                    published_at, get_minute(service.time)
+                    if scheduled_minute is None
+                    else scheduled_minute).isoformat(),
+                station_ids[origin_name],
+                scheduled_minute))
+        cursor.execute('DELETE FROM run_services')
+        cursor.executemany('INSERT INTO run_services VALUES (?, ?, ?, ?)',
+                           rows)
+        cursor.execute(
+            '''INSERT INTO services
+                (service_id, service_date, origin_id, scheduled_minute)
+            SELECT service_id, service_date, origin_id, scheduled_minute
+            FROM run_services WHERE true
+            ON CONFLICT (service_id, service_date) DO UPDATE SET
+                scheduled_minute = COALESCE(services.scheduled_minute,
+                                            excluded.scheduled_minute)''')
+        keys = dict(((service_id, service_date), key)
+                    for key, service_id, service_date in cursor.execute(
+                        '''SELECT s.id, s.service_id, s.service_date
+                        FROM services s JOIN run_services r
+                        ON r.service_id = s.service_id
+                        AND r.service_date = s.service_date'''))
+        return [keys[(service_id, service_date)]
+                for service_id, service_date, _, _ in rows]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def get_station_names(station_and_services: StationAndServices)\
+        -> Iterable[str]:
+    yield station_and_services.station.name
+    for service in station_and_services.services:
+        for calling_point in service.calling_points:
+            yield calling_point.name
+
+
+def get_scheduled_minute(service: Service) -> Optional[int]:
+    if service.scheduled_time is not None:
+        return get_minute(service.scheduled_time)
+    return get_minute(service.time) \
+        if service.status.status in SCHEDULED_STATUSES else None
+
+
+def get_time(minute: Optional[int]) -> Optional[datetime.time]:
+    return None if minute is None else datetime.time(minute // 60,
+                                                     minute % 60)
+
+
+def create_departure(date: str, service_id: str,
+                     scheduled_minute: Optional[int], status: str,
+                     departure_minute: Optional[int],
+                     abnormality_message: Optional[str]) -> Mapping:
+    status = Status(status)
+    return {'date': datetime.date.fromisoformat(date),
+            'service_id': service_id, 'status': status,
+            'delay': get_delay(status, scheduled_minute, departure_minute),
+            'abnormality_message': abnormality_message}
+
+
+class HistoryDataPublisher(DataPublisher):
+    """Represent data publisher adding station and services to a history
+    store"""
+
+    def __init__(self, store: HistoryStore,
+                 get_time: Optional[Callable[[], datetime.datetime]] = None):
+        """Create an instance of `HistoryDataPublisher`
+
+        :param store: History store
+        :param get_time: Function getting the time of the departure boards
+                         published, the current local time if None
+        """
+        self._store = store
+        self._get_time = get_time or datetime.datetime.now
+
+    def publish(self, data: Iterable[StationAndServices]) -> None:
+        """Publish station and services
+
+        :param data: Station and services to be published
+        :return: None
+        """
+        self._store.add(data, self._get_time())
+
+    def close(self) -> None:
+        """Close the history store
+
+        :return: None
+        """
+        self._store.close()
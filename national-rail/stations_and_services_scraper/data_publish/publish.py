@@ -1,9 +1,19 @@
 """Functions for publishing data"""
-from typing import Iterable, Mapping
+import asyncio
+import contextlib
+import datetime
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import AsyncIterable, Callable, Iterable, Iterator, List, \
+    Mapping, Optional, TextIO, Union
 from abc import ABC, abstractmethod
 
 from data_model import StationAndServices
-from .serialize import StringDataSerializer
+from .aws import MEBIBYTE, get_client, S3Uploader, Record, RecordStream, \
+    FirehoseRecordStream, KinesisRecordStream, RecordBatcher, \
+    put_records_with_retry
+from .serialize import StringDataSerializer, BytesDataSerializer, \
+    StreamDataSerializer, JsonStreamDataSerializer
 
 
 class DataPublisher(ABC):
@@ -17,47 +27,272 @@ class DataPublisher(ABC):
         """
         pass
 
+    def publish_stream(self, items: Iterable) -> None:
+        """Publish data items as they come from an iterator
+
+        Publishers that cannot stream collect the items and publish them
+        together.
+
+        :param items: Data items to be published
+        :return: None
+        """
+        self.publish(list(items))
+
+    def get_statistics(self) -> Mapping:
+        """Get statistics accumulated since the publisher was created
+
+        :return: Statistics, empty if none are kept
+        """
+        return {}
+
 
 class AwsDataPublisher(DataPublisher):
-    """Represent data publisher to AWS"""
+    """Represent data publisher to AWS
+
+    Station and services published together are uploaded as one object to
+    S3 and put one record each to Firehose or Kinesis, whichever are
+    configured. Records are put in batches, several at once.
+    """
 
-    def __init__(self, config: Mapping, serializer: StringDataSerializer):
+    def __init__(self, config: Mapping,
+                 serializer: Union[StringDataSerializer,
+                                   BytesDataSerializer],
+                 create_client: Optional[Callable[[str], object]] = None):
         """Create an instance of `AWSDataPublisher`
 
+        Supported settings are `region_name`, `endpoint_url` and
+        `max_pool_connections` of the clients, `max_concurrency` of the
+        batches put at once, `max_attempts` and `retry_delay` in seconds of
+        the records put again, and the destinations:
+
+        - `s3`: `bucket_name`, `key_prefix`, `key_suffix`, `content_type`,
+          `multipart_threshold` and `part_size` in bytes, `max_concurrency`
+          of the parts uploaded at once
+        - `firehose`: `delivery_stream_name`
+        - `kinesis`: `stream_name`, records being partitioned by station
+
         :param config: Config settings for initialization
-        :param serializer: Serializer that serializes data to string
+        :param serializer: Serializer that serializes data to string or bytes
+        :param create_client: Function creating a client of an AWS service
+                              from its name, pooled clients if None
         """
         self._serializer = serializer
-        raise NotImplementedError()
+        if create_client is None:
+            def create_client(service_name: str):
+                return get_client(service_name, config.get('region_name'),
+                                  config.get('endpoint_url'),
+                                  config.get('max_pool_connections', 10))
+        self._max_concurrency = config.get('max_concurrency', 4)
+        self._max_attempts = config.get('max_attempts', 3)
+        self._retry_delay = config.get('retry_delay', 0.1)
+        s3_config = config.get('s3')
+        self._s3_config = s3_config
+        self._s3_uploader = None if not s3_config else S3Uploader(
+            create_client('s3'), s3_config['bucket_name'],
+            s3_config.get('multipart_threshold', 8 * MEBIBYTE),
+            s3_config.get('part_size', 8 * MEBIBYTE),
+            s3_config.get('max_concurrency', 4))
+        self._record_streams = []
+        if config.get('firehose'):
+            self._record_streams.append(FirehoseRecordStream(
+                create_client('firehose'),
+                config['firehose']['delivery_stream_name']))
+        if config.get('kinesis'):
+            self._record_streams.append(KinesisRecordStream(
+                create_client('kinesis'), config['kinesis']['stream_name']))
 
-    def publish(self, data: object) -> None:
+    def publish(self, data: Iterable[StationAndServices]) -> None:
         """Publish station and services
 
         :param data: Station and services to be published
         :return: None
         """
+        self.publish_stream(data)
+
+    def publish_stream(self, items: Iterable[StationAndServices]) -> None:
+        """Publish station and services as they come from an iterator
+
+        Records are put as soon as a batch of them is full, while the S3
+        object is uploaded once all the station and services have come.
+
+        :param items: Station and services to be published
+        :return: None
+        """
+        stations_and_services = []
+        batchers = [RecordBatcher(stream) for stream in self._record_streams]
+        with ThreadPoolExecutor(self._max_concurrency) as executor:
+            putting = set()
+
+            def put(stream: RecordStream, batch: Optional[List[Record]]):
+                nonlocal putting
+                if batch is None:
+                    return
+                if len(putting) >= self._max_concurrency:
+                    done, putting = wait(putting,
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                putting.add(executor.submit(
+                    put_records_with_retry, stream, batch,
+                    self._max_attempts, self._retry_delay))
+
+            for station_and_services in items:
+                if self._s3_uploader is not None:
+                    stations_and_services.append(station_and_services)
+                if not batchers:
+                    continue
+                data = self._serialize(station_and_services)
+                for batcher in batchers:
+                    put(batcher.stream, batcher.add(
+                        batcher.stream.create_record(
+                            data, station_and_services.station.name)))
+            for batcher in batchers:
+                put(batcher.stream, batcher.flush())
+            for future in putting:
+                future.result()
+        if self._s3_uploader is not None:
+            self._upload(stations_and_services)
+
+    def _serialize(self, data: object) -> bytes:
         serialized_data = self._serializer.serialize(data)
-        raise NotImplementedError()
+        return serialized_data.encode() \
+            if isinstance(serialized_data, str) else serialized_data
+
+    def _upload(self, stations_and_services: List[StationAndServices]) \
+            -> None:
+        key = (f"{self._s3_config.get('key_prefix', '')}"
+               f"{datetime.datetime.utcnow():%Y/%m/%d/%H%M%S%f}"
+               f"{self._s3_config.get('key_suffix', '.json')}")
+        self._s3_uploader.upload(
+            key, self._serialize(stations_and_services),
+            self._s3_config.get('content_type', 'application/json'),
+            self._serializer.content_encoding)
+
+
+class SerializedDataPublisher(DataPublisher):
+    """Represent data publisher of serialized data, which can be given data
+    serialized once for several publishers"""
+
+    def __init__(self, serializer: Union[StringDataSerializer,
+                                         BytesDataSerializer]):
+        """Create an instance of `SerializedDataPublisher`
+
+        :param serializer: Serializer that serializes data to string or bytes
+        """
+        self._serializer = serializer
+
+    def publish(self, data: object) -> None:
+        """Publish station and services
+
+        :param data: Station and services to be published
+        :return: None
+        """
+        self.publish_serialized(self._serializer.serialize(data))
+
+    def publish_stream(self, items: Iterable) -> None:
+        """Publish station and services as they come from an iterator, each
+        one serialized on its own
+
+        :param items: Station and services to be published
+        :return: None
+        """
+        self.publish_serialized_stream(
+            self._serializer.serialize(item) for item in items)
+
+    @abstractmethod
+    def publish_serialized(self, serialized_data: Union[str, bytes])\
+            -> None:
+        """Publish serialized station and services
+
+        :param serialized_data: Serialized station and services
+        :return: None
+        """
+        pass
+
+    def publish_serialized_stream(
+            self, serialized_items: Iterable[Union[str, bytes]]) -> None:
+        """Publish station and services serialized one at a time, as they
+        come from an iterator
+
+        Publishers that cannot stream publish the serialized station and
+        services one by one.
+
+        :param serialized_items: Each station and services serialized
+        :return: None
+        """
+        for serialized_item in serialized_items:
+            self.publish_serialized(serialized_item)
 
 
-class ConsoleDataPublisher(DataPublisher):
+class ConsoleDataPublisher(SerializedDataPublisher):
     """Represent data publisher to console"""
 
     def __init__(self, serializer: StringDataSerializer):
-        """Create an instance of `AWSDataPublisher`
+        """Create an instance of `ConsoleDataPublisher`
 
         :param serializer: Serializer that serializes data to string
         """
+        super().__init__(serializer)
+
+    def publish_serialized(self, serialized_data: Union[str, bytes])\
+            -> None:
+        """Print serialized station and services
+
+        :param serialized_data: Serialized station and services, bytes
+                                being decoded as UTF-8
+        :return: None
+        """
+        print(serialized_data if isinstance(serialized_data, str)
+              else serialized_data.decode())
+
+    def publish_serialized_stream(
+            self, serialized_items: Iterable[Union[str, bytes]]) -> None:
+        """Print station and services serialized to json as a json array,
+        each one as it comes
+
+        :param serialized_items: Each station and services serialized to
+                                 json, bytes being decoded as UTF-8
+        :return: None
+        """
+        JsonStreamDataSerializer().write_serialized_to(
+            (serialized_item if isinstance(serialized_item, str)
+             else serialized_item.decode()
+             for serialized_item in serialized_items), sys.stdout)
+        print()
+
+
+class StreamDataPublisher(DataPublisher):
+    """Represent data publisher writing to a file-like sink, one item at a
+    time"""
+
+    def __init__(self, serializer: StreamDataSerializer,
+                 sink: Optional[TextIO] = None):
+        """Create an instance of `StreamDataPublisher`
+
+        :param serializer: Serializer that writes data items to the sink
+        :param sink: File-like object with a `write` method, standard output
+                     if None
+        """
         self._serializer = serializer
+        self._sink = sink
 
-    def publish(self, data: object) -> None:
+    def publish(self, data: Iterable) -> None:
         """Publish station and services
 
         :param data: Station and services to be published
         :return: None
         """
-        serialized_data = self._serializer.serialize(data)
-        print(serialized_data)
+        self.publish_stream(data)
+
+    def publish_stream(self, items: Iterable) -> None:
+        """Publish station and services as they come from an iterator
+
+        :param items: Station and services to be published
+        :return: None
+        """
+        sink = sys.stdout if self._sink is None else self._sink
+        self._serializer.serialize_to(items, sink)
+        sink.flush()
 
 
 def publish(data_publisher: DataPublisher,
@@ -69,3 +304,85 @@ def publish(data_publisher: DataPublisher,
     :return: None
     """
     data_publisher.publish(stations_and_services)
+
+
+def publish_stream(data_publisher: DataPublisher,
+                   stations_and_services: Iterable[StationAndServices])\
+        -> None:
+    """Publish station and services as they come from an iterator
+
+    :param data_publisher: Data publisher
+    :param stations_and_services: An iterator of `StationAndServices`
+    :return: None
+    """
+    data_publisher.publish_stream(stations_and_services)
+
+
+class _EndOfItems:
+    """Represent the end of the items queued for a publisher, with the error
+    that ended them early if any"""
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+async def publish_stream_async(
+        data_publisher: DataPublisher,
+        stations_and_services: AsyncIterable[StationAndServices],
+        max_queued: int = 1) -> None:
+    """Publish station and services as they come from an asynchronous
+    iterator
+
+    The publisher runs in a thread and takes the station and services from a
+    queue of at most `max_queued` of them. While the queue is full the
+    iterator is not advanced, so a slow publisher holds back scraping. An
+    error raised by the iterator is raised in the publisher too, so that it
+    does not complete a partial publication.
+
+    :param data_publisher: Data publisher
+    :param stations_and_services: An asynchronous iterator of
+                                  `StationAndServices`
+    :param max_queued: Maximum number of station and services waiting for
+                       the publisher
+    :return: None
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_queued)
+
+    def iterate_queue() -> Iterator[StationAndServices]:
+        while True:
+            item = asyncio.run_coroutine_threadsafe(queue.get(), loop)\
+                .result()
+            if isinstance(item, _EndOfItems):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+
+    publishing = loop.run_in_executor(None, data_publisher.publish_stream,
+                                      iterate_queue())
+
+    async def put(item) -> None:
+        putting = asyncio.ensure_future(queue.put(item))
+        await asyncio.wait((putting, publishing),
+                           return_when=asyncio.FIRST_COMPLETED)
+        if not putting.done():
+            putting.cancel()
+            # The publisher stopped taking items, raise its error if any
+            publishing.result()
+            raise RuntimeError('Data publisher stopped before the end of '
+                               'the station and services')
+
+    try:
+        async for station_and_services in stations_and_services:
+            await put(station_and_services)
+    except BaseException as error:
+        if not publishing.done():
+            with contextlib.suppress(Exception):
+                await put(_EndOfItems(error))
+            await asyncio.wait((publishing,))
+        if not publishing.cancelled():
+            # Retrieve the publisher's error, the iterator's is raised
+            publishing.exception()
+        raise
+    await put(_EndOfItems())
+    await publishing
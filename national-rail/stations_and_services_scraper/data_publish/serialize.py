@@ -1,12 +1,24 @@
 """Represent serializer for data"""
 import datetime
 import json
+from collections.abc import Sequence
 from json import JSONEncoder
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO
+
+from data_model import Station, ServiceStatus, CallingPoint, Service, \
+    StationAndServices
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 class StringDataSerializer(ABC):
     """Represent serializer that serialize data to string"""
+    content_encoding: Optional[str] = None
+
     @abstractmethod
     def serialize(self, data: object) -> str:
         """Serialize data
@@ -17,11 +29,60 @@ class StringDataSerializer(ABC):
         pass
 
 
+class BytesDataSerializer(ABC):
+    """Represent serializer that serialize data to bytes"""
+    # Content encoding of the serialized data, e.g. gzip, None if not encoded
+    content_encoding: Optional[str] = None
+
+    @abstractmethod
+    def serialize(self, data: object) -> bytes:
+        """Serialize data
+
+        :param data: Data to be serialized
+        :return: Serialized data in bytes
+        """
+        pass
+
+
+class BytesDataDeserializer(ABC):
+    """Represent deserializer that deserialize data from bytes"""
+    @abstractmethod
+    def deserialize(self, data: bytes) -> object:
+        """Deserialize data
+
+        :param data: Serialized data in bytes
+        :return: Deserialized data
+        """
+        pass
+
+
 class Encoder(JSONEncoder):
     def default(self, o):
         if isinstance(o, datetime.time):
             return o.strftime('%H:%M')
+        if isinstance(o, Sequence):
+            return list(o)
+        return get_fields(o)
+
+
+# Fields kept for analysis, e.g. by the history store, that are not
+# published so that the published data is unchanged
+UNPUBLISHED_FIELDS = {Service: ('scheduled_time',)}
+
+
+def get_fields(o: object) -> dict:
+    """Get the published fields of an object by name, in the order of its
+    `__slots__` if it has them
+
+    :param o: Object
+    :return: Fields of the object
+    """
+    slots = getattr(type(o), '__slots__', None)
+    if slots is None:
         return o.__dict__
+    unpublished_fields = UNPUBLISHED_FIELDS.get(type(o), ())
+    return {name: getattr(o, name) for name in slots
+            if name not in unpublished_fields}
 
 
 class JsonDataSerializer(StringDataSerializer):
@@ -36,3 +97,168 @@ class JsonDataSerializer(StringDataSerializer):
         :return: Serialized data in string format
         """
         return json.dumps(data, cls=self._encoder, indent=4)
+
+
+CONVERTERS: Dict[type, Callable[[Any], Any]] = {}
+
+
+def register_converter(type_: type, converter: Callable[[Any], Any]) -> None:
+    """Register the converter of a type to objects json can serialize
+
+    :param type_: Type converted, not including its subclasses
+    :param converter: Function converting an object of the type
+    :return: None
+    """
+    CONVERTERS[type_] = converter
+
+
+def convert(o: object) -> Any:
+    """Convert an object to objects json can serialize with the converter
+    registered for its type, as `Encoder` does
+
+    :param o: Object
+    :return: Converted object
+    """
+    converter = CONVERTERS.get(type(o))
+    if converter is not None:
+        return converter(o)
+    if isinstance(o, datetime.time):
+        return o.strftime('%H:%M')
+    if isinstance(o, Sequence):
+        return list(o)
+    return get_fields(o)
+
+
+register_converter(datetime.time, lambda o: f'{o.hour:02d}:{o.minute:02d}')
+register_converter(Station, lambda o: {
+    'name': o.name, 'are_services_available': o.are_services_available,
+    'message': o.message})
+register_converter(ServiceStatus, lambda o: {
+    'status': o.status, 'abnormality_message': o.abnormality_message})
+register_converter(CallingPoint, lambda o: {
+    'name': o.name, 'time': o.time, 'is_cancelled': o.is_cancelled,
+    'alert': o.alert})
+register_converter(Service, lambda o: {
+    'id': o.id, 'status': o.status, 'time': o.time,
+    'calling_points': o.calling_points, 'length': o.length,
+    'platform': o.platform})
+register_converter(StationAndServices, lambda o: {
+    'station': o.station, 'services': o.services})
+
+
+def convert_service_with_scheduled_time(o: Service) -> dict:
+    """Convert a service including its scheduled departure time, which is
+    not published by default
+
+    Register it with `register_converter(Service, ...)` to opt in.
+
+    :param o: Service
+    :return: Converted service, `scheduled_time` being its last field
+    """
+    return {'id': o.id, 'status': o.status, 'time': o.time,
+            'calling_points': o.calling_points, 'length': o.length,
+            'platform': o.platform, 'scheduled_time': o.scheduled_time}
+
+
+class CompactJsonDataSerializer(StringDataSerializer):
+    """Represent a serializer for serializing data to compact json, without
+    whitespace or escaped non-ASCII characters
+
+    Objects are converted by the converters registered for their types.
+    The orjson backend and the json backend give the same output.
+    """
+    BACKENDS = ('orjson', 'json')
+
+    def __init__(self, backend: Optional[str] = None):
+        """Create an instance of `CompactJsonDataSerializer`
+
+        :param backend: `orjson` or `json`, None for orjson when it is
+                        installed and json otherwise
+        """
+        if backend is None:
+            backend = 'json' if orjson is None else 'orjson'
+        if backend not in self.BACKENDS:
+            raise ValueError(f'Unknown json backend {backend}')
+        if backend == 'orjson' and orjson is None:
+            raise ValueError('orjson json backend is not installed')
+        self.backend = backend
+
+    def serialize(self, data: object) -> str:
+        """Serialize data
+
+        :param data: Data to be serialized
+        :return: Serialized data in string format
+        """
+        if self.backend == 'orjson':
+            return orjson.dumps(
+                data, default=convert,
+                option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+        return json.dumps(data, default=convert, separators=(',', ':'),
+                          ensure_ascii=False)
+
+
+class StreamDataSerializer(ABC):
+    """Represent serializer that writes data items to a text sink as they
+    come"""
+    content_encoding: Optional[str] = None
+
+    @abstractmethod
+    def serialize_to(self, items: Iterable, sink: TextIO) -> None:
+        """Serialize data items to a sink, one item at a time
+
+        :param items: Data items to be serialized
+        :param sink: File-like object with a `write` method
+        :return: None
+        """
+        pass
+
+
+class JsonStreamDataSerializer(StreamDataSerializer):
+    """Represent a serializer writing data items as a json array or as
+    newline delimited json, one item at a time
+
+    Only one serialized item is held in memory, however many items are
+    serialized.
+    """
+    def __init__(self, serializer: Optional[StringDataSerializer] = None,
+                 is_ndjson: bool = False):
+        """Create an instance of `JsonStreamDataSerializer`
+
+        :param serializer: Serializer of each item to json, a
+                           `CompactJsonDataSerializer` if None. It must not
+                           write new lines for newline delimited json
+        :param is_ndjson: Write newline delimited json instead of an array
+        """
+        self._serializer = serializer or CompactJsonDataSerializer()
+        self._is_ndjson = is_ndjson
+
+    def serialize_to(self, items: Iterable, sink: TextIO) -> None:
+        """Serialize data items to a sink, one item at a time
+
+        :param items: Data items to be serialized
+        :param sink: File-like object with a `write` method
+        :return: None
+        """
+        self.write_serialized_to(
+            (self._serializer.serialize(item) for item in items), sink)
+
+    def write_serialized_to(self, serialized_items: Iterable[str],
+                            sink: TextIO) -> None:
+        """Write data items already serialized to json to a sink, one item
+        at a time
+
+        :param serialized_items: Each data item serialized to json
+        :param sink: File-like object with a `write` method
+        :return: None
+        """
+        if self._is_ndjson:
+            for serialized_item in serialized_items:
+                sink.write(serialized_item)
+                sink.write('\n')
+            return
+        separator = '['
+        for serialized_item in serialized_items:
+            sink.write(separator)
+            sink.write(serialized_item)
+            separator = ','
+        sink.write('[]' if separator == '[' else ']')
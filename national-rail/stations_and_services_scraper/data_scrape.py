@@ -1,20 +1,281 @@
 """Functions for scraping data"""
-from typing import Iterable
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
 
-from data_access import DataAccess
+from data_access import DataAccess, AsyncDataAccess
 from data_model import OriginAndCallingPointNames, StationAndServices
 
 
+logger = logging.getLogger(__name__)
+
+
 def scrape_stations_and_services(data_access: DataAccess,
                                  services_origin_and_calling_point_names:
-                                 Iterable[OriginAndCallingPointNames])\
-        -> Iterable[StationAndServices]:
+                                 Iterable[OriginAndCallingPointNames],
+                                 max_workers: int = 1)\
+        -> List[StationAndServices]:
     """Scrape stations and services data from national rail
 
+    Data access plans the requests for all services up front, so that
+    shared work such as fetching the same departure board is done once.
+    When `max_workers` is greater than 1, stations and services are scraped
+    concurrently by a pool of at most `max_workers` threads. Results are
+    returned in the same order as `services_origin_and_calling_point_names`.
+
     :param data_access: Access to national rail data
-    :param services_origin_and_calling_point_names: Services' origin and 
+    :param services_origin_and_calling_point_names: Services' origin and
                                                     calling point names
+    :param max_workers: Maximum number of concurrent requests to data access
     :return: A collection of `StationAndServices`
     """
-    return list(map(data_access.get_station_and_services,
-                    services_origin_and_calling_point_names))
+    if max_workers < 1:
+        raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+    services_origin_and_calling_point_names = \
+        list(services_origin_and_calling_point_names)
+    data_access = data_access.plan(services_origin_and_calling_point_names)
+
+    def get_station_and_services(origin_and_calling_point_names):
+        return timed_get_station_and_services(
+            data_access, origin_and_calling_point_names)
+
+    if max_workers == 1:
+        return list(map(get_station_and_services,
+                        services_origin_and_calling_point_names))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(get_station_and_services,
+                                 services_origin_and_calling_point_names))
+
+
+def iterate_stations_and_services(data_access: DataAccess,
+                                  services_origin_and_calling_point_names:
+                                  Iterable[OriginAndCallingPointNames],
+                                  max_workers: int = 1,
+                                  max_pending: Optional[int] = None,
+                                  is_ordered: bool = True)\
+        -> Iterator[StationAndServices]:
+    """Scrape stations and services data from national rail, yielding each
+    one as soon as it is scraped
+
+    At most `max_pending` stations and services are being scraped or
+    waiting to be consumed at a time, so a slow consumer holds back
+    scraping instead of results piling up.
+
+    :param data_access: Access to national rail data
+    :param services_origin_and_calling_point_names: Services' origin and
+                                                    calling point names
+    :param max_workers: Maximum number of concurrent requests to data access
+    :param max_pending: Maximum number of stations and services scraped
+                        ahead of the consumer, twice `max_workers` if None
+    :param is_ordered: Yield in the same order as
+                       `services_origin_and_calling_point_names` instead of
+                       as soon as each one is scraped
+    :return: An iterator of `StationAndServices`
+    """
+    if max_workers < 1:
+        raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+    max_pending = get_max_pending(max_pending, 2 * max_workers)
+    services_origin_and_calling_point_names = \
+        list(services_origin_and_calling_point_names)
+    data_access = data_access.plan(services_origin_and_calling_point_names)
+    remaining = iter(services_origin_and_calling_point_names)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit_up_to_max_pending():
+            while len(pending) < max_pending:
+                origin_and_calling_point_names = next(remaining, None)
+                if origin_and_calling_point_names is None:
+                    return
+                pending.append(executor.submit(
+                    timed_get_station_and_services, data_access,
+                    origin_and_calling_point_names))
+
+        try:
+            submit_up_to_max_pending()
+            while pending:
+                if is_ordered:
+                    done = [pending.popleft()]
+                else:
+                    done_set, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    done = [f for f in pending if f in done_set]
+                    for future in done:
+                        pending.remove(future)
+                submit_up_to_max_pending()
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def get_max_pending(max_pending: Optional[int], default: int) -> int:
+    if max_pending is None:
+        return default
+    if max_pending < 1:
+        raise ValueError(f'max_pending must be at least 1, got {max_pending}')
+    return max_pending
+
+
+def timed_get_station_and_services(
+        data_access: DataAccess,
+        origin_and_calling_point_names: OriginAndCallingPointNames)\
+        -> StationAndServices:
+    """Get station and services, logging the time taken for the origin
+
+    :param data_access: Access to national rail data
+    :param origin_and_calling_point_names: The service's origin and
+                                           calling point names
+    :return: an instance of `StationAndServices`
+    """
+    start = time.perf_counter()
+    try:
+        return data_access.get_station_and_services(
+            origin_and_calling_point_names)
+    finally:
+        logger.info('Scraped %s in %.3f seconds',
+                    origin_and_calling_point_names.origin_name,
+                    time.perf_counter() - start)
+
+
+async def scrape_stations_and_services_async(
+        data_access: AsyncDataAccess,
+        services_origin_and_calling_point_names:
+        Iterable[OriginAndCallingPointNames],
+        max_concurrency: Optional[int] = None) -> List[StationAndServices]:
+    """Scrape stations and services data from national rail asynchronously
+
+    Data access plans the requests for all services up front, so that
+    shared work such as fetching the same departure board is done once.
+    All requests are in flight at the same time unless `max_concurrency` is
+    set. Results are returned in the same order as
+    `services_origin_and_calling_point_names`.
+
+    :param data_access: Asynchronous access to national rail data
+    :param services_origin_and_calling_point_names: Services' origin and
+                                                    calling point names
+    :param max_concurrency: Maximum number of requests in flight
+    :return: A collection of `StationAndServices`
+    """
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(
+            f'max_concurrency must be at least 1, got {max_concurrency}')
+    services_origin_and_calling_point_names = \
+        list(services_origin_and_calling_point_names)
+    data_access = data_access.plan(services_origin_and_calling_point_names)
+    semaphore = asyncio.Semaphore(max_concurrency) \
+        if max_concurrency else None
+
+    async def get_station_and_services(origin_and_calling_point_names):
+        if semaphore is None:
+            return await timed_get_station_and_services_async(
+                data_access, origin_and_calling_point_names)
+        async with semaphore:
+            return await timed_get_station_and_services_async(
+                data_access, origin_and_calling_point_names)
+
+    return list(await asyncio.gather(
+        *map(get_station_and_services,
+             services_origin_and_calling_point_names)))
+
+
+async def iterate_stations_and_services_async(
+        data_access: AsyncDataAccess,
+        services_origin_and_calling_point_names:
+        Iterable[OriginAndCallingPointNames],
+        max_concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        is_ordered: bool = True) -> AsyncIterator[StationAndServices]:
+    """Scrape stations and services data from national rail asynchronously,
+    yielding each one as soon as it is scraped
+
+    At most `max_pending` stations and services are being scraped or
+    waiting to be consumed at a time, so a slow consumer holds back
+    scraping instead of results piling up.
+
+    :param data_access: Asynchronous access to national rail data
+    :param services_origin_and_calling_point_names: Services' origin and
+                                                    calling point names
+    :param max_concurrency: Maximum number of requests in flight, at most
+                            `max_pending`
+    :param max_pending: Maximum number of stations and services scraped
+                        ahead of the consumer, twice `max_concurrency` if
+                        None, or all of them if both are None
+    :param is_ordered: Yield in the same order as
+                       `services_origin_and_calling_point_names` instead of
+                       as soon as each one is scraped
+    :return: An asynchronous iterator of `StationAndServices`
+    """
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(
+            f'max_concurrency must be at least 1, got {max_concurrency}')
+    services_origin_and_calling_point_names = \
+        list(services_origin_and_calling_point_names)
+    max_pending = get_max_pending(
+        max_pending, 2 * max_concurrency if max_concurrency
+        else max(1, len(services_origin_and_calling_point_names)))
+    data_access = data_access.plan(services_origin_and_calling_point_names)
+    semaphore = asyncio.Semaphore(max_concurrency) \
+        if max_concurrency else None
+    remaining = iter(services_origin_and_calling_point_names)
+    pending = deque()
+
+    async def get_station_and_services(origin_and_calling_point_names):
+        if semaphore is None:
+            return await timed_get_station_and_services_async(
+                data_access, origin_and_calling_point_names)
+        async with semaphore:
+            return await timed_get_station_and_services_async(
+                data_access, origin_and_calling_point_names)
+
+    def create_up_to_max_pending():
+        while len(pending) < max_pending:
+            origin_and_calling_point_names = next(remaining, None)
+            if origin_and_calling_point_names is None:
+                return
+            pending.append(asyncio.ensure_future(
+                get_station_and_services(origin_and_calling_point_names)))
+
+    try:
+        create_up_to_max_pending()
+        while pending:
+            if is_ordered:
+                done = [pending.popleft()]
+                await asyncio.wait(done)
+            else:
+                done_set, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                done = [t for t in pending if t in done_set]
+                for task in done:
+                    pending.remove(task)
+            create_up_to_max_pending()
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def timed_get_station_and_services_async(
+        data_access: AsyncDataAccess,
+        origin_and_calling_point_names: OriginAndCallingPointNames)\
+        -> StationAndServices:
+    """Get station and services asynchronously, logging the time taken for
+    the origin
+
+    :param data_access: Asynchronous access to national rail data
+    :param origin_and_calling_point_names: The service's origin and
+                                           calling point names
+    :return: an instance of `StationAndServices`
+    """
+    start = time.perf_counter()
+    try:
+        return await data_access.get_station_and_services(
+            origin_and_calling_point_names)
+    finally:
+        logger.info('Scraped %s in %.3f seconds',
+                    origin_and_calling_point_names.origin_name,
+                    time.perf_counter() - start)
@@ -5,3 +5,28 @@ class StationCrsCodeNotFoundError(KeyError):
     """Represent an error when station crs code is not found"""
     def __init__(self, message: str):
         super().__init__(message)
+
+
+class DarwinTimeFormatError(ValueError):
+    """Represent an error when a Darwin time is malformed"""
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class DarwinResponseError(ValueError):
+    """Represent an error when a Darwin response has no departure board"""
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class UnsupportedSchemaVersionError(ValueError):
+    """Represent an error when serialized data has a schema version that
+    cannot be deserialized"""
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class DataPublishError(RuntimeError):
+    """Represent an error when data cannot be published"""
+    def __init__(self, message: str):
+        super().__init__(message)
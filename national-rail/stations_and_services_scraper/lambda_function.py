@@ -1,11 +1,23 @@
 """Run the application in AWS lambda"""
 import json
+import logging
 
-from main import scrape_and_publish_stations_and_services
+from main import create_application_context, \
+    scrape_and_publish_stations_and_services_async
+
+
+# The lambda runtime installs a handler on the root logger, only its level
+# is set so that timings and statistics logged at INFO are shown
+logging.getLogger().setLevel(logging.INFO)
+
+# Built during the init phase and reused by warm invocations
+APPLICATION_CONTEXT = create_application_context()
+APPLICATION_CONTEXT.warm_up()
 
 
 def lambda_handler(event, context):
-    scrape_and_publish_stations_and_services()
+    APPLICATION_CONTEXT.run(
+        scrape_and_publish_stations_and_services_async(APPLICATION_CONTEXT))
 
     return {
         'statusCode': 200,
@@ -1,40 +1,116 @@
 """Run the application"""
-from config_access import ConfigAccessFromConfigDataSet
-from config_data import ConfigDataAwsS3, ConfigDataAwsSecretManager
-from data_access import DarwinDataAccess
-from data_scrape import scrape_stations_and_services
-from data_publish import ConsoleDataPublisher, JsonDataSerializer, publish
+import logging
+from datetime import timedelta
+from typing import Union
 
+from application_context import ApplicationContext
+from config_data import ConfigDataAwsS3, ConfigDataAwsSecretManager, \
+    ConfigDataRefreshed
+from data_access import DataAccess, AsyncDataAccess, AsyncDarwinDataAccess
+from data_scrape import scrape_stations_and_services_async, \
+    iterate_stations_and_services_async
+from data_publish import create_data_publisher, publish, publish_stream_async
+from data_publish.publish import DataPublisher
 
-def scrape_and_publish_stations_and_services():
-    config_access = \
-        ConfigAccessFromConfigDataSet(*create_config_data_collection())
+
+logger = logging.getLogger(__name__)
+
+# Maximum ages of origins and calling points, stations crs codes, darwin
+# access, darwin token and data publisher config data, None to keep for
+# process lifetime
+CONFIG_DATA_MAX_AGES = (timedelta(minutes=15), timedelta(hours=24), None,
+                        timedelta(minutes=30), None)
+
+
+async def scrape_and_publish_stations_and_services_async(
+        application_context: ApplicationContext):
+    config_access = application_context.get_config_access()
     data_access_config = config_access.get_data_access_config()
-    # data_publisher_config = config_settings.get_data_publisher_config()
+    data_publisher_config = config_access.get_data_publisher_config()
     services_origin_and_calling_point_names = \
         config_access.get_services_origin_and_calling_point_names()
 
-    data_access = DarwinDataAccess(data_access_config)
-    data_publisher = ConsoleDataPublisher(JsonDataSerializer())
+    data_access = application_context.get_data_access(data_access_config)
+    data_publisher = \
+        application_context.get_data_publisher(data_publisher_config)
+
+    pipeline_config = data_access_config.get('pipeline')
+    if pipeline_config:
+        await publish_stream_async(
+            data_publisher, iterate_stations_and_services_async(
+                data_access, services_origin_and_calling_point_names,
+                data_access_config['max_concurrency'],
+                pipeline_config.get('max_pending'),
+                pipeline_config.get('ordered', False)),
+            pipeline_config.get('max_queued', 1))
+    else:
+        publish(data_publisher, await scrape_stations_and_services_async(
+            data_access, services_origin_and_calling_point_names,
+            data_access_config['max_concurrency']))
+    log_statistics(data_access, data_publisher)
+
+
+def log_statistics(data_access: Union[DataAccess, AsyncDataAccess],
+                   data_publisher: DataPublisher) -> None:
+    """Log a summary of the statistics kept by data access and data
+    publisher, accumulated since they were created
+
+    :param data_access: Data access used by the run
+    :param data_publisher: Data publisher used by the run
+    :return: None
+    """
+    data_access_statistics = data_access.get_statistics()
+    if data_access_statistics:
+        logger.info('Data access statistics: %s', data_access_statistics)
+    data_publisher_statistics = data_publisher.get_statistics()
+    if data_publisher_statistics:
+        logger.info('Data publisher statistics: %s',
+                    data_publisher_statistics)
+
+
+def create_application_context(config_data_max_ages=CONFIG_DATA_MAX_AGES)\
+        -> ApplicationContext:
+    return ApplicationContext(
+        create_refreshed_config_data_collection(config_data_max_ages),
+        AsyncDarwinDataAccess,
+        create_data_publisher)
+
+
+def create_refreshed_config_data_collection(config_data_max_ages):
+    return tuple(ConfigDataRefreshed(create_config_data, max_age)
+                 for create_config_data, max_age in zip(
+                    create_config_data_factories(), config_data_max_ages))
+
+
+def create_config_data_factories():
+    def create_origins_and_calling_points_config_data():
+        return ConfigDataAwsS3('stations-and-services-scraper',
+                               'origins_and_calling_points.json')
+
+    def create_stations_crs_codes_config_data():
+        return ConfigDataAwsS3('stations-and-services-scraper',
+                               'station_name_crs_code_mapping.json')
+
+    def create_darwin_access_config_data():
+        return ConfigDataAwsS3('stations-and-services-scraper', 'darwin.json')
 
-    stations_and_services = scrape_stations_and_services(
-        data_access, services_origin_and_calling_point_names)
-    publish(data_publisher, stations_and_services)
+    def create_darwin_token_config_data():
+        return ConfigDataAwsSecretManager('eu-west-2', 'darwin/token',
+                                          'darwin_token')
 
+    def create_data_publisher_config_data():
+        return ConfigDataAwsS3('stations-and-services-scraper',
+                               'data_publisher.json', is_optional=True)
 
-def create_config_data_collection():
-    origins_and_calling_points_config_data = ConfigDataAwsS3(
-        'stations-and-services-scraper', 'origins_and_calling_points.json')
-    stations_crs_codes_config_data = ConfigDataAwsS3(
-        'stations-and-services-scraper', 'station_name_crs_code_mapping.json')
-    darwin_access_config_data = \
-        ConfigDataAwsS3('stations-and-services-scraper', 'darwin.json')
-    darwin_token_config_data = \
-        ConfigDataAwsSecretManager('eu-west-2', 'darwin/token', 'darwin_token')
-    return origins_and_calling_points_config_data, \
-        stations_crs_codes_config_data, darwin_access_config_data, \
-        darwin_token_config_data
+    return create_origins_and_calling_points_config_data, \
+        create_stations_crs_codes_config_data, \
+        create_darwin_access_config_data, create_darwin_token_config_data, \
+        create_data_publisher_config_data
 
 
 if __name__ == '__main__':
-    scrape_and_publish_stations_and_services()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    with create_application_context() as context:
+        context.run(scrape_and_publish_stations_and_services_async(context))
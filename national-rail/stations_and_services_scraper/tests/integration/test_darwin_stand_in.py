@@ -0,0 +1,112 @@
+"""Integration test of Darwin data access against the local stand-in"""
+import asyncio
+import json
+import pathlib
+import unittest
+from os import path
+
+from zeep.exceptions import Fault, TransportError
+
+from benchmarks.board_xml import create_departure_board_response
+from benchmarks.darwin_stand_in import DarwinStandInServer
+from data_access import DarwinDataAccess, AsyncDarwinDataAccess
+from data_access.darwin.darwin_access import get_station_and_services
+from data_access.darwin.raw_board import parse_departure_board
+from data_model import OriginAndCallingPointNames
+from data_scrape import scrape_stations_and_services, \
+    scrape_stations_and_services_async
+
+
+# The departure board the stand-in replays by default
+TEST_DATA_FILE = path.join(
+    str(pathlib.Path(__file__).parent.parent.resolve()), 'unit', 'test_data',
+    'test_darwin_departure_board.json')
+CALLING_POINT_NAMES = {'London Charing Cross', 'London Cannon Street'}
+STATION_NAME_CRS_CODE_MAPPING = {'Charlton': 'CTN', 'Blackheath': 'BKH',
+                                 'London Charing Cross': 'CHX',
+                                 'London Cannon Street': 'CST'}
+
+
+def create_config(wsdl, **config):
+    return {'station_name_crs_code_mapping':
+            json.dumps(STATION_NAME_CRS_CODE_MAPPING),
+            'wsdl': wsdl, 'token': 'token', **config}
+
+
+class TestDarwinStandIn(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_DATA_FILE) as file:
+            cls.departure_board = json.load(file)
+        cls.station_and_services_expected = get_station_and_services(
+            cls.departure_board, CALLING_POINT_NAMES)
+        cls.services_origin_and_calling_point_names = [
+            OriginAndCallingPointNames('Charlton', CALLING_POINT_NAMES),
+            OriginAndCallingPointNames('Blackheath', CALLING_POINT_NAMES)]
+
+    def test_written_departure_board_response_parsed_back(self):
+        station_and_services = get_station_and_services(
+            parse_departure_board(
+                create_departure_board_response(self.departure_board)),
+            CALLING_POINT_NAMES)
+
+        self.assertEqual(station_and_services,
+                         self.station_and_services_expected)
+
+    def test_scrape_stations_and_services_through_zeep(self):
+        for response_mode in ('zeep', 'raw'):
+            with self.subTest(response_mode=response_mode), \
+                    DarwinStandInServer() as server:
+                stations_and_services = scrape_stations_and_services(
+                    DarwinDataAccess(create_config(
+                        server.wsdl, response_mode=response_mode)),
+                    self.services_origin_and_calling_point_names, 2)
+
+                self.assertListEqual(stations_and_services, [
+                    self.station_and_services_expected] * 2)
+                self.assertEqual(server.get_statistics()['requests'], 2)
+
+    def test_scrape_stations_and_services_asynchronously(self):
+        async def scrape(wsdl):
+            async with AsyncDarwinDataAccess(create_config(wsdl)) \
+                    as data_access:
+                return await scrape_stations_and_services_async(
+                    data_access, self.services_origin_and_calling_point_names)
+
+        with DarwinStandInServer() as server:
+            stations_and_services = asyncio.run(scrape(server.wsdl))
+
+        self.assertListEqual(stations_and_services,
+                             [self.station_and_services_expected] * 2)
+
+    def test_synthetic_departure_board_filtered_by_server(self):
+        with DarwinStandInServer(lambda request: self.departure_board) \
+                as server:
+            station_and_services = DarwinDataAccess(create_config(
+                server.wsdl, filter_calling_points=True))\
+                .get_station_and_services(
+                    self.services_origin_and_calling_point_names[0])
+
+        self.assertEqual(station_and_services,
+                         self.station_and_services_expected)
+        self.assertEqual(server.get_statistics()['requests'], 2)
+
+    def test_server_error_raises_fault(self):
+        with DarwinStandInServer(error_rate=1.0) as server:
+            data_access = DarwinDataAccess(create_config(server.wsdl))
+            with self.assertRaises(Fault):
+                data_access.get_station_and_services(
+                    self.services_origin_and_calling_point_names[0])
+
+    def test_throttled_request_raises_transport_error(self):
+        with DarwinStandInServer(throttle={'rate': 0.001, 'burst': 1}) \
+                as server:
+            data_access = DarwinDataAccess(create_config(server.wsdl))
+            data_access.get_station_and_services(
+                self.services_origin_and_calling_point_names[0])
+            with self.assertRaises(TransportError) as context:
+                data_access.get_station_and_services(
+                    self.services_origin_and_calling_point_names[0])
+
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(server.get_statistics()['throttled'], 1)
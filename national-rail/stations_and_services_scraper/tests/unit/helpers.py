@@ -0,0 +1,16 @@
+"""Helpers shared by unit tests"""
+from config_data import ConfigData
+from data_model import Station, StationAndServices
+
+
+def create_stations_and_services(number):
+    return [StationAndServices(Station(f'Station {i}', True, ''), [])
+            for i in range(number)]
+
+
+class StaticConfigData(ConfigData):
+    def __init__(self, value: str):
+        self._value = value
+
+    def get(self) -> str:
+        return self._value
@@ -0,0 +1,119 @@
+"""Unit tests for application context and refreshed config data"""
+import asyncio
+import json
+import unittest
+from datetime import timedelta
+from unittest.mock import Mock
+
+from application_context import ApplicationContext
+from config_data import ConfigData, ConfigDataRefreshed
+from data_access import AsyncDataAccess
+from data_publish.publish import DataPublisher
+
+
+class FakeConfigData(ConfigData):
+    def __init__(self, values):
+        self._values = values
+
+    def get(self) -> str:
+        return self._values.pop(0)
+
+
+class TestConfigDataRefreshed(unittest.TestCase):
+    def test_config_data_fetched_once_without_max_age(self):
+        create_config_data = Mock(
+            side_effect=lambda: FakeConfigData(['token-1']))
+        config_data = ConfigDataRefreshed(create_config_data)
+
+        self.assertEqual(config_data.get(), 'token-1')
+        self.assertEqual(config_data.get(), 'token-1')
+        create_config_data.assert_called_once()
+
+    def test_config_data_fetched_again_after_max_age(self):
+        values = ['token-1', 'token-2']
+        config_data = ConfigDataRefreshed(
+            lambda: FakeConfigData(values), timedelta(0))
+
+        self.assertEqual(config_data.get(), 'token-1')
+        self.assertEqual(config_data.get(), 'token-2')
+
+    def test_config_data_kept_within_max_age(self):
+        values = ['token-1', 'token-2']
+        config_data = ConfigDataRefreshed(
+            lambda: FakeConfigData(values), timedelta(hours=1))
+
+        self.assertEqual(config_data.get(), 'token-1')
+        self.assertEqual(config_data.get(), 'token-1')
+
+
+class TestApplicationContext(unittest.TestCase):
+    def setUp(self):
+        self.tokens = ['token-1', 'token-2']
+        self.wsdls = [json.dumps({'wsdl': 'http://darwin/wsdl-1'})]
+        config_data_collection = (
+            FakeConfigData(['[]'] * 2),
+            FakeConfigData(['{}'] * 2),
+            ConfigDataRefreshed(lambda: FakeConfigData(self.wsdls)),
+            ConfigDataRefreshed(lambda: FakeConfigData(self.tokens),
+                                timedelta(0)))
+        self.create_data_access = Mock(
+            side_effect=lambda config: Mock(spec=AsyncDataAccess))
+        self.create_data_publisher = Mock(side_effect=lambda config: Mock())
+        self.context = ApplicationContext(
+            config_data_collection, self.create_data_access,
+            self.create_data_publisher)
+
+    def tearDown(self):
+        self.context.close()
+
+    def _get_data_access(self):
+        return self.context.get_data_access(
+            self.context.get_config_access().get_data_access_config())
+
+    def test_data_access_reused_and_updated_with_latest_config(self):
+        data_access_1 = self._get_data_access()
+        data_access_2 = self._get_data_access()
+
+        self.assertIs(data_access_1, data_access_2)
+        self.create_data_access.assert_called_once()
+        self.assertEqual(
+            data_access_2.update_config.call_args.args[0]['token'], 'token-2')
+
+    def test_data_publisher_reused(self):
+        data_publisher_1 = self.context.get_data_publisher({})
+        data_publisher_2 = self.context.get_data_publisher({})
+
+        self.assertIs(data_publisher_1, data_publisher_2)
+        self.create_data_publisher.assert_called_once()
+
+    def test_data_publisher_created_again_when_config_changes(self):
+        data_publisher_1 = self.context.get_data_publisher(
+            {'publisher': 'console'})
+        data_publisher_2 = self.context.get_data_publisher(
+            {'publisher': 'aws'})
+
+        self.assertIsNot(data_publisher_1, data_publisher_2)
+        self.assertEqual(2, self.create_data_publisher.call_count)
+        data_publisher_1.close.assert_called_once()
+        data_publisher_2.close.assert_not_called()
+
+    def test_data_publisher_closed_with_context(self):
+        data_publisher = self.context.get_data_publisher({})
+
+        self.context.close()
+
+        data_publisher.close.assert_called_once()
+
+    def test_data_publisher_without_close_not_closed(self):
+        self.create_data_publisher.side_effect = \
+            lambda config: Mock(spec=DataPublisher)
+
+        self.context.get_data_publisher({})
+        self.context.get_data_publisher({'publisher': 'aws'})
+
+    def test_run_coroutines_on_same_event_loop(self):
+        async def get_event_loop():
+            return asyncio.get_running_loop()
+
+        self.assertIs(self.context.run(get_event_loop()),
+                      self.context.run(get_event_loop()))
@@ -0,0 +1,62 @@
+"""Unit tests of the synthetic departure board generator and the
+benchmark runner"""
+import unittest
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from benchmarks.bench_service_extraction import get_services_in_passes
+from benchmarks.runner import Benchmark, run_benchmarks, \
+    compare_with_baseline
+from data_access.darwin.darwin_access import get_station_and_services
+from data_access.darwin.service import get_services
+from data_model import Status
+
+
+class TestBoardGenerator(unittest.TestCase):
+    def test_generated_board_extracted(self):
+        departure_board = generate_departure_board(
+            200, 10, cancelled_ratio=0.2, delayed_ratio=0.3, alert_ratio=0.5,
+            included_ratio=1.0)
+
+        station_and_services = get_station_and_services(
+            departure_board, CALLING_POINT_NAMES_INCLUDED)
+
+        self.assertEqual(station_and_services.station.name, 'Dartford')
+        self.assertEqual(len(station_and_services.services), 200)
+        self.assertSetEqual(
+            {s.status.status for s in station_and_services.services},
+            {Status.OnTime, Status.NewTime, Status.Cancelled,
+             Status.Delayed})
+
+    def test_same_seed_same_board(self):
+        self.assertEqual(generate_departure_board(seed=1),
+                         generate_departure_board(seed=1))
+
+    def test_services_not_included_filtered_out(self):
+        departure_board = generate_departure_board(50, 5, included_ratio=0.0)
+
+        station_and_services = get_station_and_services(
+            departure_board, CALLING_POINT_NAMES_INCLUDED)
+
+        self.assertEqual(station_and_services.services, [])
+
+    def test_services_extracted_in_single_pass_same_as_in_passes(self):
+        departure_board = generate_departure_board(
+            300, 15, cancelled_ratio=0.2, delayed_ratio=0.3, alert_ratio=0.5)
+
+        self.assertListEqual(
+            get_services(departure_board, CALLING_POINT_NAMES_INCLUDED),
+            get_services_in_passes(departure_board,
+                                   CALLING_POINT_NAMES_INCLUDED))
+
+    def test_compare_with_baseline(self):
+        results = run_benchmarks([Benchmark('sum', lambda: sum(range(10)))],
+                                 repeat=2, min_time=0.001)
+        baseline = {'results': [{**results['results'][0],
+                                 'median': results['results'][0]['median']
+                                 / 2}]}
+
+        comparisons = compare_with_baseline(results, baseline, 1.5)
+
+        self.assertEqual(len(comparisons), 1)
+        self.assertTrue(comparisons[0]['regressed'])
@@ -0,0 +1,107 @@
+"""Unit tests for config data stored by AWS S3, against a stubbed S3 client"""
+import io
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+import boto3
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from config_access import ConfigAccessFromConfigDataSet
+from config_data import ConfigDataAwsS3, ConfigDataRefreshed
+from data_publish import ConsoleDataPublisher, create_data_publisher
+from tests.unit.helpers import StaticConfigData
+
+
+class TestConfigDataAwsS3(unittest.TestCase):
+    def setUp(self):
+        self.s3 = boto3.session.Session().resource(
+            's3', region_name='eu-west-2', aws_access_key_id='key',
+            aws_secret_access_key='secret')
+        self.stubber = Stubber(self.s3.meta.client)
+        self.stubber.activate()
+        patcher = patch('config_data.config_data.boto3.resource',
+                        return_value=self.s3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.stubber.deactivate()
+
+    def _add_missing_key(self):
+        self.stubber.add_client_error(
+            'get_object', service_error_code='NoSuchKey',
+            http_status_code=404,
+            expected_params={'Bucket': 'bucket', 'Key': 'key.json'})
+
+    def test_config_data_fetched_once(self):
+        self.stubber.add_response(
+            'get_object', {'Body': StreamingBody(io.BytesIO(b'{}'), 2)},
+            {'Bucket': 'bucket', 'Key': 'key.json'})
+        config_data = ConfigDataAwsS3('bucket', 'key.json')
+
+        self.assertEqual(config_data.get(), b'{}')
+        self.assertEqual(config_data.get(), b'{}')
+        self.stubber.assert_no_pending_responses()
+
+    def test_missing_key_raises_error(self):
+        self._add_missing_key()
+
+        with self.assertRaises(ClientError):
+            ConfigDataAwsS3('bucket', 'key.json').get()
+
+    def test_missing_optional_key_fetched_once_as_none(self):
+        self._add_missing_key()
+        config_data = ConfigDataAwsS3('bucket', 'key.json', is_optional=True)
+
+        self.assertIsNone(config_data.get())
+        self.assertIsNone(config_data.get())
+        self.stubber.assert_no_pending_responses()
+
+    def test_optional_key_access_denied_fetched_as_none(self):
+        # S3 denies access to a missing key without s3:ListBucket
+        self.stubber.add_client_error(
+            'get_object', service_error_code='AccessDenied',
+            http_status_code=403,
+            expected_params={'Bucket': 'bucket', 'Key': 'key.json'})
+        config_data = ConfigDataAwsS3('bucket', 'key.json', is_optional=True)
+
+        self.assertIsNone(config_data.get())
+        self.stubber.assert_no_pending_responses()
+
+    def test_key_access_denied_raises_error(self):
+        self.stubber.add_client_error(
+            'get_object', service_error_code='AccessDenied',
+            http_status_code=403)
+
+        with self.assertRaises(ClientError):
+            ConfigDataAwsS3('bucket', 'key.json').get()
+
+    def test_optional_key_other_error_raised(self):
+        self.stubber.add_client_error(
+            'get_object', service_error_code='InternalError',
+            http_status_code=500)
+
+        with self.assertRaises(ClientError):
+            ConfigDataAwsS3('bucket', 'key.json', is_optional=True).get()
+
+    def test_start_up_without_data_publisher_config_publishes_to_console(
+            self):
+        self._add_missing_key()
+        data_publisher_config_data = ConfigDataRefreshed(
+            lambda: ConfigDataAwsS3('bucket', 'key.json', is_optional=True),
+            timedelta(hours=1))
+        config_access = ConfigAccessFromConfigDataSet(
+            StaticConfigData('[]'), StaticConfigData('{}'),
+            StaticConfigData('{}'), StaticConfigData('token'),
+            data_publisher_config_data)
+
+        data_publisher_config = config_access.get_data_publisher_config()
+
+        self.assertEqual(data_publisher_config, {'publisher': 'console'})
+        self.assertIsInstance(create_data_publisher(data_publisher_config),
+                              ConsoleDataPublisher)
+        self.assertIsNone(data_publisher_config_data.get())
+        self.stubber.assert_no_pending_responses()
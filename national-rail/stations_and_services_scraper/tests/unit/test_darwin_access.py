@@ -2,21 +2,27 @@
 import unittest
 import pathlib
 import json
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from os import path
 from datetime import datetime
 
 from error import StationCrsCodeNotFoundError
 from data_access.darwin.darwin_access import get_station_and_services,\
-                                             DarwinDataAccess
+                                             get_lazy_station_and_services,\
+                                             DarwinDataAccess,\
+                                             AsyncDarwinDataAccess
+from data_access.darwin.service import LazyServices
+from data_publish import JsonDataSerializer
 from data_model import Service, ServiceStatus, Status, CallingPoint, Station,\
                        StationAndServices, OriginAndCallingPointNames
-from config_access import ConfigAccess
 
 
 TEST_DATA_FILE = path.join(
     str(pathlib.Path(__file__).parent.resolve()), 'test_data',
     'test_darwin_departure_board.json')
+WSDL_FILE = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data', 'wsdl',
+    'ldb.wsdl')
 
 
 class TestGetStationAndServices(unittest.TestCase):
@@ -34,30 +40,40 @@ class TestGetStationAndServices(unittest.TestCase):
         datetime.strptime('13:08', '%H:%M').time(),
         [CallingPoint('London Charing Cross', '13:35', False, '')])
     service_expected_1.set_length(10)
+    service_expected_1.set_scheduled_time(
+        datetime.strptime('13:06', '%H:%M').time())
     service_expected_1.set_platform('1')
     service_expected_2 = Service(
         '14etaXoW2Uyf34f3euTuUg==', ServiceStatus(Status.OnTime, ''),
         datetime.strptime('13:20', '%H:%M').time(),
         [CallingPoint('London Cannon Street', '13:41', False, '')])
     service_expected_2.set_length(8)
+    service_expected_2.set_scheduled_time(
+        datetime.strptime('13:20', '%H:%M').time())
     service_expected_2.set_platform('1')
     service_expected_3 = Service(
         '3ohw4h+KUjXfevFqr64amg==', ServiceStatus(Status.OnTime, ''),
         datetime.strptime('13:36', '%H:%M').time(),
         [CallingPoint('London Charing Cross', '14:05', False, '')])
     service_expected_3.set_length(10)
+    service_expected_3.set_scheduled_time(
+        datetime.strptime('13:36', '%H:%M').time())
     service_expected_3.set_platform('1')
     service_expected_4 = Service(
         'tao5H+0gvJKNM8g6EqbLPA==', ServiceStatus(Status.OnTime, ''),
         datetime.strptime('13:50', '%H:%M').time(),
         [CallingPoint('London Cannon Street', '14:11', False, '')])
     service_expected_4.set_length(10)
+    service_expected_4.set_scheduled_time(
+        datetime.strptime('13:50', '%H:%M').time())
     service_expected_4.set_platform('1')
     service_expected_5 = Service(
         'Ybb/0Pq05hK6WHCG7IVbtQ==', ServiceStatus(Status.OnTime, ''),
         datetime.strptime('14:06', '%H:%M').time(),
         [CallingPoint('London Charing Cross', '14:35', False, '')])
     service_expected_5.set_length(10)
+    service_expected_5.set_scheduled_time(
+        datetime.strptime('14:06', '%H:%M').time())
     services_expected = [service_expected_1, service_expected_2,
                          service_expected_3, service_expected_4,
                          service_expected_5]
@@ -77,26 +93,93 @@ class TestGetStationAndServices(unittest.TestCase):
         self.assertEqual(station_and_services,
                          self.station_and_services_expected)
 
+    def test_return_lazy_station_and_services(self):
+        station_and_services = get_lazy_station_and_services(
+            self.departure_board, self.calling_point_names_included)
+
+        self.assertIsInstance(station_and_services.services, LazyServices)
+        self.assertEqual(station_and_services,
+                         self.station_and_services_expected)
+
+
+class TestLazyServices(unittest.TestCase):
+    services_expected = TestGetStationAndServices.services_expected
+
+    def setUp(self):
+        with open(TEST_DATA_FILE) as file:
+            self.departure_board = json.load(file)
+        self.services = LazyServices(
+            self.departure_board,
+            {'London Cannon Street', 'London Charing Cross'})
+
+    def test_iterate_services(self):
+        self.assertListEqual(list(self.services), self.services_expected)
+
+    def test_services_created_on_demand(self):
+        with patch('data_access.darwin.service.create_service',
+                   side_effect=lambda s, c: s['serviceID']) \
+                as mock_create_service:
+            first_service_id = next(iter(self.services))
+
+        self.assertEqual(first_service_id, self.services_expected[0].id)
+        self.assertEqual(mock_create_service.call_count, 1)
+
+    def test_len_does_not_create_services(self):
+        with patch('data_access.darwin.service.create_service') \
+                as mock_create_service:
+            self.assertEqual(len(self.services), 5)
+
+        mock_create_service.assert_not_called()
+
+    def test_index_services(self):
+        self.assertEqual(self.services[2], self.services_expected[2])
+        self.assertEqual(self.services[-1], self.services_expected[-1])
+        self.assertListEqual(self.services[1:3], self.services_expected[1:3])
+        with self.assertRaises(IndexError):
+            _ = self.services[5]
+
+    def test_service_created_once(self):
+        self.assertIs(self.services[0], next(iter(self.services)))
+
+    def test_compare_equal_to_list(self):
+        self.assertEqual(self.services, self.services_expected)
+        self.assertEqual(self.services_expected, self.services)
+        self.assertNotEqual(self.services, self.services_expected[1:])
+
+    def test_serialized_same_as_list(self):
+        serializer = JsonDataSerializer()
+
+        self.assertEqual(serializer.serialize(self.services),
+                         serializer.serialize(self.services_expected))
+
+    def test_no_services(self):
+        self.departure_board['trainServices'] = None
+
+        self.assertEqual(LazyServices(self.departure_board, set()), [])
+
 
 class TestDarwinDataAccess(unittest.TestCase):
     origin = 'Charlton'
     calling_point_names = {'London Cannon Street'}
     error_message = f'Station crs code cannot be found for {origin}'
+    request = {'numRows': 20, 'crs': 'CTN', 'timeOffset': 0,
+               'timeWindow': 120}
 
     @classmethod
     def setUpClass(cls) -> None:
         with open(TEST_DATA_FILE) as file:
             cls.departure_board = json.load(file)
-        cls.config_setting = Mock(spec=ConfigAccess)
+        cls.config_setting = {}
         cls.origin_and_calling_point_names = OriginAndCallingPointNames(
             cls.origin, cls.calling_point_names)
         cls.error = StationCrsCodeNotFoundError(cls.error_message)
 
-    def test_darwin_client_get_departure_board_with_details_is_called(self):
+    def test_darwin_client_get_departure_board_is_called(self):
         with patch('data_access.darwin.darwin_access.DarwinClient')\
                 as mock_darwin_client:
-            mock_darwin_client.get_departure_board_with_details\
-                .return_value = None
+            mock_darwin_client.create_departure_board_requests\
+                .return_value = [self.request]
+            mock_darwin_client.get_departure_board.return_value = None
             darwin_data_access = DarwinDataAccess(self.config_setting)
             darwin_data_access._client = mock_darwin_client
             with patch('data_access.darwin.darwin_access.'
@@ -105,14 +188,16 @@ class TestDarwinDataAccess(unittest.TestCase):
                 mock_get_station_and_services.return_value = None
                 darwin_data_access.get_station_and_services(
                     self.origin_and_calling_point_names)
-        mock_darwin_client.get_departure_board_with_details\
-            .assert_called_with(self.origin)
+        mock_darwin_client.create_departure_board_requests\
+            .assert_called_with(self.origin_and_calling_point_names)
+        mock_darwin_client.get_departure_board\
+            .assert_called_with(self.request)
 
-    def test_darwin_client_get_departure_board_with_details_raises_error(self):
+    def test_darwin_client_create_departure_board_requests_raises_error(self):
         with patch('data_access.darwin.darwin_access.DarwinClient')\
                 as mock_darwin_client:
             mock_darwin_client._station_name_crs_code_mapping = {}
-            mock_darwin_client.get_departure_board_with_details\
+            mock_darwin_client.create_departure_board_requests\
                 .side_effect = self.error
             darwin_data_access = DarwinDataAccess(self.config_setting)
             darwin_data_access._client = mock_darwin_client
@@ -121,10 +206,12 @@ class TestDarwinDataAccess(unittest.TestCase):
                     self.origin_and_calling_point_names)
         self.assertTrue(self.error_message in str(context.exception))
 
-    def test_get_departure_board_with_details_is_called(self):
+    def test_get_station_and_services_is_called(self):
         with patch('data_access.darwin.darwin_access.DarwinClient')\
                 as mock_darwin_client:
-            mock_darwin_client.get_departure_board_with_details\
+            mock_darwin_client.create_departure_board_requests\
+                .return_value = [self.request]
+            mock_darwin_client.get_departure_board\
                 .return_value = self.departure_board
             darwin_data_access = DarwinDataAccess(self.config_setting)
             darwin_data_access._client = mock_darwin_client
@@ -136,3 +223,81 @@ class TestDarwinDataAccess(unittest.TestCase):
                     self.origin_and_calling_point_names)
         mock_get_station_and_services.assert_called_with(
             self.departure_board, self.calling_point_names)
+
+    def test_get_lazy_station_and_services_is_called(self):
+        with patch('data_access.darwin.darwin_access.DarwinClient')\
+                as mock_darwin_client:
+            mock_darwin_client.create_departure_board_requests\
+                .return_value = [self.request]
+            mock_darwin_client.get_departure_board\
+                .return_value = self.departure_board
+            darwin_data_access = DarwinDataAccess({'lazy_services': True})
+            darwin_data_access._client = mock_darwin_client
+            with patch('data_access.darwin.darwin_access.'
+                       'get_lazy_station_and_services')\
+                    as mock_get_lazy_station_and_services:
+                darwin_data_access.get_station_and_services(
+                    self.origin_and_calling_point_names)
+        mock_get_lazy_station_and_services.assert_called_with(
+            self.departure_board, self.calling_point_names)
+
+    def test_statistics_of_configured_client_components(self):
+        darwin_data_access = DarwinDataAccess({
+            'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+            'wsdl': WSDL_FILE,
+            'token': 'token',
+            'board_cache': {'type': 'memory', 'ttl': 60, 'max_size': 8},
+            'rate_limit': {'rate': 100, 'burst': 10}})
+        darwin_data_access._client._client = Mock()
+        darwin_data_access._client._client.service.GetDepBoardWithDetails\
+            .return_value = self.departure_board
+
+        for _ in range(2):
+            darwin_data_access.get_station_and_services(
+                self.origin_and_calling_point_names)
+
+        statistics = darwin_data_access.get_statistics()
+        self.assertEqual(statistics.keys(), {'board_cache', 'rate_limiter'})
+        self.assertDictEqual(statistics['board_cache'],
+                             {'hits': 1, 'misses': 1})
+        self.assertEqual(statistics['rate_limiter']['calls'], 1)
+
+    def test_no_statistics_without_client_components(self):
+        darwin_data_access = DarwinDataAccess({'wsdl': WSDL_FILE,
+                                               'token': 'token'})
+
+        self.assertDictEqual(darwin_data_access.get_statistics(), {})
+
+
+class TestAsyncDarwinDataAccess(unittest.IsolatedAsyncioTestCase):
+    origin = 'Charlton'
+    calling_point_names = {'London Cannon Street'}
+    request = {'numRows': 20, 'crs': 'CTN', 'timeOffset': 0,
+               'timeWindow': 120}
+
+    def setUp(self) -> None:
+        with open(TEST_DATA_FILE) as file:
+            self.departure_board = json.load(file)
+        self.config_setting = {}
+        self.origin_and_calling_point_names = OriginAndCallingPointNames(
+            self.origin, self.calling_point_names)
+
+    async def test_get_departure_board_is_awaited(self):
+        with patch('data_access.darwin.darwin_access.AsyncDarwinClient')\
+                as mock_darwin_client:
+            mock_darwin_client.create_departure_board_requests\
+                .return_value = [self.request]
+            mock_darwin_client.get_departure_board = \
+                AsyncMock(return_value=self.departure_board)
+            darwin_data_access = AsyncDarwinDataAccess(self.config_setting)
+            darwin_data_access._client = mock_darwin_client
+            with patch('data_access.darwin.darwin_access.'
+                       'get_station_and_services')\
+                    as mock_get_station_and_services:
+                mock_get_station_and_services.return_value = None
+                await darwin_data_access.get_station_and_services(
+                    self.origin_and_calling_point_names)
+        mock_darwin_client.get_departure_board\
+            .assert_awaited_with(self.request)
+        mock_get_station_and_services.assert_called_with(
+            self.departure_board, self.calling_point_names)
@@ -0,0 +1,197 @@
+"""Unit tests for departure board caches"""
+import json
+import os
+import pathlib
+import pickle
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from os import path
+from unittest.mock import AsyncMock, Mock, patch
+
+from data_access.darwin.board_cache import InMemoryDepartureBoardCache, \
+    DiskDepartureBoardCache, create_departure_board_cache
+from data_access.darwin.darwin_access import DarwinClient, AsyncDarwinClient
+
+
+TEST_DATA_DIRECTORY = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data')
+TEST_DATA_FILE = path.join(TEST_DATA_DIRECTORY,
+                           'test_darwin_departure_board.json')
+WSDL_FILE = path.join(TEST_DATA_DIRECTORY, 'wsdl', 'ldb.wsdl')
+
+
+def create_request(crs):
+    return {'numRows': 20, 'crs': crs, 'timeOffset': 0, 'timeWindow': 120}
+
+
+class TestInMemoryDepartureBoardCache(unittest.TestCase):
+    def test_return_cached_departure_board_and_count_hits(self):
+        cache = InMemoryDepartureBoardCache(ttl=60, max_size=2)
+        cache.put(create_request('CTN'), {'crs': 'CTN'})
+
+        self.assertEqual(cache.get(create_request('CTN')), {'crs': 'CTN'})
+        self.assertIsNone(cache.get(create_request('BKH')))
+        self.assertDictEqual(cache.get_statistics(),
+                             {'hits': 1, 'misses': 1})
+
+    def test_request_parameters_are_part_of_key(self):
+        cache = InMemoryDepartureBoardCache(ttl=60, max_size=2)
+        cache.put(create_request('CTN'), {'crs': 'CTN'})
+
+        self.assertIsNone(cache.get({**create_request('CTN'), 'numRows': 10}))
+
+    def test_expired_departure_board_not_returned(self):
+        cache = InMemoryDepartureBoardCache(ttl=30, max_size=2)
+        with patch('data_access.darwin.board_cache.time.monotonic',
+                   side_effect=[100, 131]):
+            cache.put(create_request('CTN'), {'crs': 'CTN'})
+            self.assertIsNone(cache.get(create_request('CTN')))
+
+    def test_least_recently_used_departure_board_evicted(self):
+        cache = InMemoryDepartureBoardCache(ttl=60, max_size=2)
+        cache.put(create_request('CTN'), {'crs': 'CTN'})
+        cache.put(create_request('BKH'), {'crs': 'BKH'})
+        cache.get(create_request('CTN'))
+        cache.put(create_request('LEW'), {'crs': 'LEW'})
+
+        self.assertIsNotNone(cache.get(create_request('CTN')))
+        self.assertIsNone(cache.get(create_request('BKH')))
+        self.assertIsNotNone(cache.get(create_request('LEW')))
+
+
+class TestDiskDepartureBoardCache(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        with open(TEST_DATA_FILE) as file:
+            self.departure_board = json.load(file)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_departure_board_survives_new_cache_instance(self):
+        DiskDepartureBoardCache(self.temporary_directory.name, 60, 2).put(
+            create_request('CTN'), self.departure_board)
+        cache = DiskDepartureBoardCache(self.temporary_directory.name, 60, 2)
+
+        self.assertEqual(cache.get(create_request('CTN')),
+                         self.departure_board)
+        self.assertDictEqual(cache.get_statistics(),
+                             {'hits': 1, 'misses': 0})
+
+    def test_departure_board_stored_as_json_with_datetimes(self):
+        departure_board = {
+            **self.departure_board,
+            'generatedAt': datetime(2022, 2, 9, 7, 0, 12,
+                                    tzinfo=timezone(timedelta(hours=1)))}
+        cache = DiskDepartureBoardCache(self.temporary_directory.name, 60, 2)
+        cache.put(create_request('CTN'), departure_board)
+
+        [name] = os.listdir(self.temporary_directory.name)
+        with open(path.join(self.temporary_directory.name, name)) as file:
+            self.assertEqual(json.load(file)['generatedAt'],
+                             {'$datetime': '2022-02-09T07:00:12+01:00'})
+        self.assertEqual(cache.get(create_request('CTN')), departure_board)
+
+    def test_pickled_departure_board_not_loaded(self):
+        cache = DiskDepartureBoardCache(self.temporary_directory.name, 60, 2)
+        cache.put(create_request('CTN'), {'crs': 'CTN'})
+        [name] = os.listdir(self.temporary_directory.name)
+        with open(path.join(self.temporary_directory.name, name), 'wb') \
+                as file:
+            pickle.dump({'crs': 'CTN'}, file)
+
+        self.assertIsNone(cache.get(create_request('CTN')))
+
+    def test_expired_departure_board_not_returned(self):
+        cache = DiskDepartureBoardCache(self.temporary_directory.name, 0, 2)
+        cache.put(create_request('CTN'), self.departure_board)
+
+        self.assertIsNone(cache.get(create_request('CTN')))
+
+    def test_number_of_departure_boards_is_limited(self):
+        cache = DiskDepartureBoardCache(self.temporary_directory.name, 60, 2)
+        for crs in ('CTN', 'BKH', 'LEW'):
+            cache.put(create_request(crs), {'crs': crs})
+
+        self.assertEqual(
+            sum(cache.get(create_request(crs)) is not None
+                for crs in ('CTN', 'BKH', 'LEW')), 2)
+
+
+class TestCreateDepartureBoardCache(unittest.TestCase):
+    def test_no_config_return_no_cache(self):
+        self.assertIsNone(create_departure_board_cache(None))
+
+    def test_memory_config_return_in_memory_cache(self):
+        self.assertIsInstance(create_departure_board_cache({'ttl': 30}),
+                              InMemoryDepartureBoardCache)
+
+    def test_unknown_type_raises_error(self):
+        with self.assertRaises(ValueError):
+            create_departure_board_cache({'type': 'redis'})
+
+
+class TestDarwinClientBoardCache(unittest.TestCase):
+    def test_cache_hit_skips_soap_call(self):
+        darwin_client = DarwinClient({
+            'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+            'wsdl': WSDL_FILE,
+            'token': 'token',
+            'board_cache': {'type': 'memory', 'ttl': 60, 'max_size': 8}})
+        darwin_client._client = Mock()
+        darwin_client._client.service.GetDepBoardWithDetails.return_value = \
+            {'crs': 'CTN'}
+
+        departure_board_1 = \
+            darwin_client.get_departure_board_with_details('Charlton')
+        departure_board_2 = \
+            darwin_client.get_departure_board_with_details('Charlton')
+
+        self.assertEqual(departure_board_1, departure_board_2)
+        darwin_client._client.service.GetDepBoardWithDetails\
+            .assert_called_once()
+        self.assertDictEqual(darwin_client.board_cache.get_statistics(),
+                             {'hits': 1, 'misses': 1})
+
+
+class TestAsyncDarwinClientBoardCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    async def test_disk_cache_used_off_event_loop(self):
+        darwin_client = AsyncDarwinClient({
+            'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+            'wsdl': WSDL_FILE,
+            'token': 'token',
+            'board_cache': {'type': 'disk', 'ttl': 60, 'max_size': 8,
+                            'directory': self.temporary_directory.name}})
+        darwin_client._client = Mock()
+        darwin_client._client.service.GetDepBoardWithDetails = \
+            AsyncMock(return_value={'crs': 'CTN'})
+        thread_idents = []
+
+        def record_thread(method):
+            def call(*args):
+                thread_idents.append(threading.get_ident())
+                return method(*args)
+            return call
+
+        for name in ('get', 'put'):
+            setattr(darwin_client.board_cache, name, record_thread(
+                getattr(darwin_client.board_cache, name)))
+
+        departure_board_1 = \
+            await darwin_client.get_departure_board_with_details('Charlton')
+        departure_board_2 = \
+            await darwin_client.get_departure_board_with_details('Charlton')
+
+        self.assertEqual(departure_board_1, departure_board_2)
+        darwin_client._client.service.GetDepBoardWithDetails\
+            .assert_awaited_once()
+        self.assertEqual(len(thread_idents), 3)
+        self.assertNotIn(threading.get_ident(), thread_idents)
@@ -0,0 +1,162 @@
+"""Unit tests for departure board requests and merging"""
+import json
+import pathlib
+import unittest
+from os import path
+from unittest.mock import patch
+
+import requests
+
+from data_model import OriginAndCallingPointNames
+from data_access.darwin.darwin_access import DarwinClient, \
+    DarwinDataAccess
+from data_access.darwin.departure_board import \
+    create_departure_board_request, create_departure_board_requests, \
+    merge_departure_boards, get_minute_of_day
+
+
+TEST_DATA_DIRECTORY = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data')
+TEST_RAW_DATA_FILE = path.join(TEST_DATA_DIRECTORY,
+                               'test_darwin_departure_board.xml')
+WSDL_FILE = path.join(TEST_DATA_DIRECTORY, 'wsdl', 'ldb.wsdl')
+
+STATION_NAME_CRS_CODE_MAPPING = {
+    'Charlton': 'CTN', 'London Bridge': 'LBG', 'London Cannon Street': 'CST',
+    'Lewisham': 'LEW'}
+
+
+def create_service(service_id, std):
+    return {'serviceID': service_id, 'std': std}
+
+
+def create_departure_board(*services):
+    return {'generatedAt': '2022-02-09 23:50:15.775339',
+            'locationName': 'Charlton', 'crs': 'CTN',
+            'trainServices': {'service': list(services)} if services
+            else None}
+
+
+def create_darwin_client(filter_calling_points):
+    return DarwinClient({
+        'station_name_crs_code_mapping':
+            json.dumps(STATION_NAME_CRS_CODE_MAPPING),
+        'wsdl': WSDL_FILE,
+        'token': 'token',
+        'filter_calling_points': filter_calling_points})
+
+
+class TestCreateDepartureBoardRequest(unittest.TestCase):
+    def test_default_request_is_unfiltered(self):
+        self.assertDictEqual(create_departure_board_request('CTN'), {
+            'numRows': 20, 'crs': 'CTN', 'timeOffset': 0, 'timeWindow': 120})
+
+    def test_filtered_request_with_options(self):
+        self.assertDictEqual(
+            create_departure_board_request('CTN', 'LBG', 5, -10, 60),
+            {'numRows': 5, 'crs': 'CTN', 'timeOffset': -10,
+             'timeWindow': 60, 'filterCrs': 'LBG', 'filterType': 'to'})
+
+    def test_request_per_filter_crs_code(self):
+        requests_ = create_departure_board_requests('CTN', ['CST', 'LBG'])
+
+        self.assertListEqual([r['filterCrs'] for r in requests_],
+                             ['CST', 'LBG'])
+
+    def test_no_filter_crs_code_single_unfiltered_request(self):
+        self.assertListEqual(create_departure_board_requests('CTN', []),
+                             [create_departure_board_request('CTN')])
+
+
+class TestMergeDepartureBoards(unittest.TestCase):
+    def test_single_departure_board_returned_as_is(self):
+        departure_board = create_departure_board(create_service('1', '23:55'))
+
+        self.assertIs(merge_departure_boards([departure_board]),
+                      departure_board)
+
+    def test_services_deduplicated_and_ordered_across_midnight(self):
+        departure_board = merge_departure_boards([
+            create_departure_board(create_service('1', '23:55'),
+                                   create_service('3', '00:20')),
+            create_departure_board(create_service('2', '00:05'),
+                                   create_service('3', '00:20'))])
+
+        self.assertListEqual(
+            [s['serviceID']
+             for s in departure_board['trainServices']['service']],
+            ['1', '2', '3'])
+        self.assertEqual(departure_board['locationName'], 'Charlton')
+
+    def test_no_services_merged_into_none(self):
+        departure_board = merge_departure_boards(
+            [create_departure_board(), create_departure_board()])
+
+        self.assertIsNone(departure_board['trainServices'])
+
+    def test_minute_of_day(self):
+        self.assertEqual(get_minute_of_day('01:30'), 90)
+        self.assertEqual(
+            get_minute_of_day('2022-02-09T13:09:15.7753394+00:00'), 789)
+
+
+class TestDarwinClientDepartureBoardRequests(unittest.TestCase):
+    def test_filtered_request_per_calling_point(self):
+        darwin_client = create_darwin_client(True)
+
+        requests_ = darwin_client.create_departure_board_requests(
+            OriginAndCallingPointNames(
+                'Charlton', {'London Bridge', 'London Cannon Street'},
+                num_rows=5, time_window=60))
+
+        self.assertListEqual(requests_, [
+            create_departure_board_request('CTN', 'CST', 5, None, 60),
+            create_departure_board_request('CTN', 'LBG', 5, None, 60)])
+
+    def test_unknown_calling_point_unfiltered_request(self):
+        darwin_client = create_darwin_client(True)
+
+        with self.assertLogs('data_access.darwin.darwin_access', 'WARNING'):
+            requests_ = darwin_client.create_departure_board_requests(
+                OriginAndCallingPointNames('Charlton', {'Unknown'}))
+
+        self.assertListEqual(requests_,
+                             [create_departure_board_request('CTN')])
+
+    def test_filtering_off_unfiltered_request(self):
+        darwin_client = create_darwin_client(False)
+
+        requests_ = darwin_client.create_departure_board_requests(
+            OriginAndCallingPointNames('Charlton', {'London Bridge'}))
+
+        self.assertListEqual(requests_,
+                             [create_departure_board_request('CTN')])
+
+    def test_filter_sent_to_darwin_web_service(self):
+        with open(TEST_RAW_DATA_FILE, 'rb') as file:
+            response = requests.Response()
+            response.status_code = 200
+            response._content = file.read()
+            response.headers['Content-Type'] = 'text/xml; charset=utf-8'
+        data_access = DarwinDataAccess({
+            'station_name_crs_code_mapping':
+                json.dumps(STATION_NAME_CRS_CODE_MAPPING),
+            'wsdl': WSDL_FILE,
+            'token': 'token',
+            'filter_calling_points': True})
+
+        with patch.object(data_access._client._client.transport, 'post',
+                          return_value=response) as mock_post:
+            station_and_services = data_access.get_station_and_services(
+                OriginAndCallingPointNames(
+                    'Charlton', {'London Bridge', 'Lewisham'}))
+
+        messages = [c.args[1] for c in mock_post.call_args_list]
+        self.assertEqual(len(messages), 2)
+        self.assertIn(b'<ns0:filterCrs>LBG</ns0:filterCrs>', messages[0])
+        self.assertIn(b'<ns0:filterCrs>LEW</ns0:filterCrs>', messages[1])
+        self.assertIn(b'<ns0:filterType>to</ns0:filterType>', messages[1])
+        self.assertEqual(station_and_services.station.name, 'Charlton')
+        self.assertEqual(
+            len({s.id for s in station_and_services.services}),
+            len(station_and_services.services))
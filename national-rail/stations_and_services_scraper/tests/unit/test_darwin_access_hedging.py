@@ -0,0 +1,180 @@
+"""Unit tests for hedging Darwin calls"""
+import asyncio
+import itertools
+import json
+import pathlib
+import threading
+import time
+import unittest
+from os import path
+from unittest.mock import Mock
+
+from data_access.darwin.darwin_access import DarwinClient, DarwinDataAccess
+from data_access.darwin.hedging import LatencyTracker, Hedger, create_hedger
+
+
+WSDL_FILE = path.join(str(pathlib.Path(__file__).parent.resolve()),
+                      'test_data', 'wsdl', 'ldb.wsdl')
+
+
+def create_primed_hedger(budget=1.0):
+    hedger = Hedger(percentile=0.9, budget=budget, min_samples=5, window=10)
+    for _ in range(5):
+        hedger.latency_tracker.record(0.01)
+    return hedger
+
+
+def create_slow_then_fast_function(slow_seconds=1.0):
+    counter = itertools.count()
+    released = threading.Event()
+
+    def function():
+        if next(counter) == 0:
+            released.wait(slow_seconds)
+            return 'primary'
+        return 'hedge'
+    return function, released
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_percentile_of_recent_latencies(self):
+        latency_tracker = LatencyTracker(window=10)
+        for latency in range(1, 21):
+            latency_tracker.record(latency)
+
+        self.assertEqual(latency_tracker.get_percentile(0.5), 15)
+        self.assertEqual(latency_tracker.get_percentile(1.0), 20)
+
+    def test_no_latency_recorded_no_percentile(self):
+        self.assertIsNone(LatencyTracker(window=10).get_percentile(0.5))
+
+
+class TestHedger(unittest.TestCase):
+    def test_no_hedge_before_enough_samples(self):
+        hedger = Hedger(percentile=0.9, budget=1.0, min_samples=5, window=10)
+
+        self.assertEqual(hedger.call(lambda: 'primary'), 'primary')
+        self.assertDictEqual(
+            hedger.get_statistics(),
+            {'calls': 1, 'hedges': 0, 'hedge_wins': 0, 'hedge_delay': None})
+
+    def test_slow_call_hedged_and_hedge_wins(self):
+        hedger = create_primed_hedger()
+        function, released = create_slow_then_fast_function()
+
+        result = hedger.call(function)
+        released.set()
+        hedger.shutdown()
+
+        self.assertEqual(result, 'hedge')
+        statistics = hedger.get_statistics()
+        self.assertEqual(statistics['hedges'], 1)
+        self.assertEqual(statistics['hedge_wins'], 1)
+
+    def test_hedges_limited_by_budget(self):
+        hedger = create_primed_hedger(budget=0.0)
+        function, released = create_slow_then_fast_function(0.05)
+
+        result = hedger.call(function)
+        hedger.shutdown()
+
+        self.assertEqual(result, 'primary')
+        self.assertEqual(hedger.get_statistics()['hedges'], 0)
+
+    def test_failed_primary_falls_back_to_hedge(self):
+        hedger = create_primed_hedger()
+        counter = itertools.count()
+
+        def function():
+            if next(counter) == 0:
+                time.sleep(0.05)
+                raise TimeoutError()
+            time.sleep(0.1)
+            return 'hedge'
+
+        self.assertEqual(hedger.call(function), 'hedge')
+        hedger.shutdown()
+
+    def test_time_queued_not_counted_towards_hedge_delay(self):
+        hedger = Hedger(percentile=0.9, budget=1.0, min_samples=5, window=10,
+                        max_workers=1)
+        for _ in range(5):
+            hedger.latency_tracker.record(0.01)
+        hedger._get_executor().submit(time.sleep, 0.1)
+
+        self.assertEqual(hedger.call(lambda: 'primary'), 'primary')
+        hedger.shutdown()
+        self.assertEqual(hedger.get_statistics()['hedges'], 0)
+
+    def test_no_config_return_no_hedger(self):
+        self.assertIsNone(create_hedger(None))
+
+    def test_threads_default_to_two_per_scraper_thread(self):
+        self.assertEqual(create_hedger({'budget': 0.1}, 4)._max_workers, 8)
+        self.assertEqual(
+            create_hedger({'max_workers': 3}, 4)._max_workers, 3)
+
+
+class TestHedgerAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_call_hedged_and_loser_cancelled(self):
+        hedger = create_primed_hedger()
+        counter = itertools.count()
+        cancelled = []
+
+        async def function():
+            if next(counter) == 0:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+                return 'primary'
+            return 'hedge'
+
+        result = await hedger.call_async(function)
+        await asyncio.sleep(0)
+
+        self.assertEqual(result, 'hedge')
+        self.assertListEqual(cancelled, [True])
+        self.assertEqual(hedger.get_statistics()['hedge_wins'], 1)
+
+    async def test_fast_call_not_hedged(self):
+        hedger = create_primed_hedger()
+
+        async def function():
+            return 'primary'
+
+        self.assertEqual(await hedger.call_async(function), 'primary')
+        self.assertEqual(hedger.get_statistics()['hedges'], 0)
+
+
+class TestDarwinClientHedger(unittest.TestCase):
+    def test_departure_board_calls_go_through_hedger(self):
+        darwin_client = DarwinClient({
+            'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+            'wsdl': WSDL_FILE,
+            'token': 'token',
+            'hedging': {'percentile': 0.99, 'budget': 0.05}})
+        darwin_client._client = Mock()
+        darwin_client._client.service.GetDepBoardWithDetails.return_value = \
+            {'crs': 'CTN'}
+
+        departure_board = \
+            darwin_client.get_departure_board_with_details('Charlton')
+
+        self.assertDictEqual(departure_board, {'crs': 'CTN'})
+        self.assertEqual(darwin_client.hedger.get_statistics()['calls'], 1)
+        self.assertEqual(len(darwin_client.hedger.latency_tracker), 1)
+
+    def test_hedger_shut_down_when_data_access_closed(self):
+        config = {
+            'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+            'wsdl': WSDL_FILE,
+            'token': 'token',
+            'hedging': {'percentile': 0.99}}
+        with DarwinDataAccess(config) as data_access:
+            hedger = data_access._client.hedger
+            executor = hedger._get_executor()
+
+        with self.assertRaises(RuntimeError):
+            executor.submit(lambda: None)
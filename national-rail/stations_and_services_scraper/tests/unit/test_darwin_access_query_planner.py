@@ -0,0 +1,133 @@
+"""Unit tests for departure board query planners"""
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from error import StationCrsCodeNotFoundError
+from data_model import OriginAndCallingPointNames
+from data_access.darwin.query_planner import DepartureBoardQueryPlanner, \
+    AsyncDepartureBoardQueryPlanner
+
+
+STATION_NAME_CRS_CODE_MAPPING = {
+    'Charlton': 'CTN', 'Blackheath': 'BKH', 'Charlton (Kent)': 'CTN'}
+CRS_CODE_STATION_NAME_MAPPING = {'CTN': 'Charlton', 'BKH': 'Blackheath'}
+
+
+class FakeDarwinClient:
+    def __init__(self):
+        self.station_names_requested = []
+        self._lock = threading.Lock()
+
+    def get_station_crs_code(self, station_name):
+        if station_name not in STATION_NAME_CRS_CODE_MAPPING:
+            raise StationCrsCodeNotFoundError(
+                f'Station crs code cannot be found for {station_name}')
+        return STATION_NAME_CRS_CODE_MAPPING[station_name]
+
+    def create_departure_board_requests(self, origin_and_calling_point_names):
+        return [{'crs': self.get_station_crs_code(
+            origin_and_calling_point_names.origin_name)}]
+
+    def get_departure_board(self, request):
+        with self._lock:
+            self.station_names_requested.append(
+                CRS_CODE_STATION_NAME_MAPPING[request['crs']])
+        return {'crs': request['crs']}
+
+
+class FakeAsyncDarwinClient(FakeDarwinClient):
+    async def get_departure_board(self, request):
+        await asyncio.sleep(0)
+        return super().get_departure_board(request)
+
+
+def get_departure_board(planner, origin_and_calling_point_names):
+    request, = planner.create_departure_board_requests(
+        origin_and_calling_point_names)
+    return planner.get_departure_board(request)
+
+
+class TestDepartureBoardQueryPlanner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.services_origin_and_calling_point_names = [
+            OriginAndCallingPointNames('Charlton', {'London Bridge'}),
+            OriginAndCallingPointNames('Blackheath', {'London Bridge'}),
+            OriginAndCallingPointNames('Charlton', {'London Cannon Street'}),
+            OriginAndCallingPointNames('Charlton (Kent)', {'Lewisham'})]
+
+    def test_departure_board_fetched_once_per_crs_code(self):
+        client = FakeDarwinClient()
+        planner = DepartureBoardQueryPlanner(
+            client, self.services_origin_and_calling_point_names)
+
+        departure_boards = [
+            get_departure_board(planner, s)
+            for s in self.services_origin_and_calling_point_names]
+
+        self.assertListEqual(client.station_names_requested,
+                             ['Charlton', 'Blackheath'])
+        self.assertListEqual(departure_boards, [
+            {'crs': 'CTN'}, {'crs': 'BKH'}, {'crs': 'CTN'}, {'crs': 'CTN'}])
+        self.assertDictEqual(planner._departure_boards, {})
+
+    def test_departure_board_fetched_once_per_crs_code_concurrently(self):
+        client = FakeDarwinClient()
+        planner = DepartureBoardQueryPlanner(
+            client, self.services_origin_and_calling_point_names)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            departure_boards = list(executor.map(
+                lambda s: get_departure_board(planner, s),
+                self.services_origin_and_calling_point_names))
+
+        self.assertCountEqual(client.station_names_requested,
+                              ['Charlton', 'Blackheath'])
+        self.assertListEqual(departure_boards, [
+            {'crs': 'CTN'}, {'crs': 'BKH'}, {'crs': 'CTN'}, {'crs': 'CTN'}])
+
+    def test_unplanned_departure_board_fetched_each_time(self):
+        client = FakeDarwinClient()
+        planner = DepartureBoardQueryPlanner(client, [])
+
+        get_departure_board(
+            planner, OriginAndCallingPointNames('Charlton', set()))
+        get_departure_board(
+            planner, OriginAndCallingPointNames('Charlton', set()))
+
+        self.assertListEqual(client.station_names_requested,
+                             ['Charlton', 'Charlton'])
+
+    def test_unknown_station_raises_error(self):
+        planner = DepartureBoardQueryPlanner(
+            FakeDarwinClient(),
+            [OriginAndCallingPointNames('Unknown', {'London Bridge'})])
+
+        with self.assertRaises(StationCrsCodeNotFoundError):
+            get_departure_board(planner, OriginAndCallingPointNames(
+                'Unknown', {'London Bridge'}))
+
+
+class TestAsyncDepartureBoardQueryPlanner(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.services_origin_and_calling_point_names = [
+            OriginAndCallingPointNames('Charlton', {'London Bridge'}),
+            OriginAndCallingPointNames('Blackheath', {'London Bridge'}),
+            OriginAndCallingPointNames('Charlton', {'London Cannon Street'})]
+
+    async def test_departure_board_fetched_once_per_crs_code(self):
+        client = FakeAsyncDarwinClient()
+        planner = AsyncDepartureBoardQueryPlanner(
+            client, self.services_origin_and_calling_point_names)
+
+        departure_boards = await asyncio.gather(*(
+            get_departure_board(planner, s)
+            for s in self.services_origin_and_calling_point_names))
+
+        self.assertCountEqual(client.station_names_requested,
+                              ['Charlton', 'Blackheath'])
+        self.assertListEqual(departure_boards, [
+            {'crs': 'CTN'}, {'crs': 'BKH'}, {'crs': 'CTN'}])
+        self.assertDictEqual(planner._departure_boards, {})
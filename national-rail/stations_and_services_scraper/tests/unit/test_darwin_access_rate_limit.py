@@ -0,0 +1,173 @@
+"""Unit tests for rate and concurrency limits of Darwin calls"""
+import asyncio
+import json
+import pathlib
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from unittest.mock import Mock, patch
+
+from zeep.exceptions import TransportError
+
+from data_access.darwin.darwin_access import DarwinClient
+from data_access.darwin.rate_limit import TokenBucket, \
+    AimdConcurrencyController, RateLimiter, create_rate_limiter, \
+    is_overload_error
+
+
+WSDL_FILE = path.join(str(pathlib.Path(__file__).parent.resolve()),
+                      'test_data', 'wsdl', 'ldb.wsdl')
+
+
+def create_rate_limiter_for_test(initial_limit=2):
+    return RateLimiter(TokenBucket(1000, 1000),
+                       AimdConcurrencyController(initial_limit, 1, 8, 1.0))
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_passes_then_calls_wait_for_rate(self):
+        with patch('data_access.darwin.rate_limit.time.monotonic',
+                   return_value=100.0):
+            token_bucket = TokenBucket(rate=2, capacity=2)
+
+            self.assertListEqual(
+                [token_bucket.reserve() for _ in range(4)],
+                [0.0, 0.0, 0.5, 1.0])
+
+    def test_tokens_refilled_over_time(self):
+        with patch('data_access.darwin.rate_limit.time.monotonic',
+                   side_effect=[100.0, 100.0, 100.0, 101.0]):
+            token_bucket = TokenBucket(rate=1, capacity=2)
+            token_bucket.reserve()
+            token_bucket.reserve()
+
+            self.assertEqual(token_bucket.reserve(), 0.0)
+
+
+class TestAimdConcurrencyController(unittest.TestCase):
+    def test_fast_success_increases_limit_additively(self):
+        controller = AimdConcurrencyController(2, 1, 8, 1.0)
+        for _ in range(4):
+            controller.record_success(time.monotonic(), 0.1)
+
+        self.assertEqual(controller.limit, 3)
+
+    def test_overload_decreases_limit_once_per_window(self):
+        controller = AimdConcurrencyController(8, 1, 8, 1.0)
+        start_time = time.monotonic()
+        controller.record_overload(start_time)
+        controller.record_overload(start_time)
+
+        self.assertEqual(controller.limit, 4)
+
+        controller.record_overload(time.monotonic())
+
+        self.assertEqual(controller.limit, 2)
+
+    def test_slow_success_decreases_limit_within_bounds(self):
+        controller = AimdConcurrencyController(1, 1, 8, 1.0)
+        controller.record_success(time.monotonic(), 5.0)
+
+        self.assertEqual(controller.limit, 1)
+
+    def test_calls_in_flight_limited_across_threads(self):
+        controller = AimdConcurrencyController(2, 1, 2, 1.0)
+        in_flight = []
+        lock = threading.Lock()
+
+        def call(_):
+            controller.acquire()
+            try:
+                with lock:
+                    in_flight.append(controller.in_flight)
+                time.sleep(0.01)
+            finally:
+                controller.release()
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(call, range(6)))
+
+        self.assertEqual(len(in_flight), 6)
+        self.assertLessEqual(max(in_flight), 2)
+        self.assertEqual(controller.in_flight, 0)
+
+
+class TestAimdConcurrencyControllerAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_in_flight_limited(self):
+        controller = AimdConcurrencyController(2, 1, 2, 1.0)
+        in_flight = []
+
+        async def call():
+            await controller.acquire_async()
+            try:
+                in_flight.append(controller.in_flight)
+                await asyncio.sleep(0.01)
+            finally:
+                controller.release()
+
+        await asyncio.gather(*(call() for _ in range(6)))
+
+        self.assertEqual(len(in_flight), 6)
+        self.assertLessEqual(max(in_flight), 2)
+
+    async def test_cancelled_waiter_does_not_hold_slot(self):
+        controller = AimdConcurrencyController(1, 1, 1, 1.0)
+        await controller.acquire_async()
+        waiting = asyncio.ensure_future(controller.acquire_async())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        controller.release()
+
+        await asyncio.wait_for(controller.acquire_async(), 1)
+
+        self.assertEqual(controller.in_flight, 1)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_throttled_call_counted_and_decreases_limit(self):
+        rate_limiter = create_rate_limiter_for_test(initial_limit=4)
+
+        with self.assertRaises(TransportError):
+            with rate_limiter.limit():
+                raise TransportError(status_code=503)
+        with self.assertRaises(ValueError):
+            with rate_limiter.limit():
+                raise ValueError()
+
+        metrics = rate_limiter.get_metrics()
+        self.assertEqual(metrics['calls'], 2)
+        self.assertEqual(metrics['overloads'], 1)
+        self.assertEqual(metrics['errors'], 1)
+        self.assertEqual(metrics['concurrency_limit'], 2)
+        self.assertEqual(metrics['in_flight'], 0)
+        self.assertEqual(metrics['queued'], 0)
+
+    def test_is_overload_error(self):
+        self.assertTrue(is_overload_error(TransportError(status_code=429)))
+        self.assertTrue(is_overload_error(TimeoutError()))
+        self.assertFalse(is_overload_error(TransportError(status_code=500)))
+
+    def test_no_config_return_no_rate_limiter(self):
+        self.assertIsNone(create_rate_limiter(None))
+
+
+class TestDarwinClientRateLimiter(unittest.TestCase):
+    def test_departure_board_calls_go_through_rate_limiter(self):
+        darwin_client = DarwinClient({
+            'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+            'wsdl': WSDL_FILE,
+            'token': 'token',
+            'rate_limit': {'rate': 100, 'burst': 10}})
+        darwin_client._client = Mock()
+        darwin_client._client.service.GetDepBoardWithDetails.return_value = \
+            {'crs': 'CTN'}
+
+        darwin_client.get_departure_board_with_details('Charlton')
+        darwin_client.get_departure_board_with_details('Charlton')
+
+        metrics = darwin_client.rate_limiter.get_metrics()
+        self.assertEqual(metrics['calls'], 2)
+        self.assertEqual(metrics['rate'], 100)
+        self.assertEqual(metrics['burst'], 10)
@@ -0,0 +1,181 @@
+"""Unit tests for extracting departure board from raw Darwin response"""
+import json
+import pathlib
+import unittest
+from os import path
+from unittest.mock import patch
+
+import requests
+from zeep.exceptions import Fault, TransportError
+
+from data_access.darwin.darwin_access import DarwinClient, \
+    get_station_and_services
+from data_access.darwin.raw_board import parse_departure_board, \
+    get_departure_board_from_response
+from error import DarwinResponseError
+
+
+TEST_DATA_DIRECTORY = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data')
+TEST_DATA_FILE = path.join(TEST_DATA_DIRECTORY,
+                           'test_darwin_departure_board.json')
+TEST_RAW_DATA_FILE = path.join(TEST_DATA_DIRECTORY,
+                               'test_darwin_departure_board.xml')
+WSDL_FILE = path.join(TEST_DATA_DIRECTORY, 'wsdl', 'ldb.wsdl')
+
+SOAP_FAULT = b'''<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap:Body>
+    <soap:Fault>
+      <faultcode>soap:Client</faultcode>
+      <faultstring>Invalid crs code supplied</faultstring>
+    </soap:Fault>
+  </soap:Body>
+</soap:Envelope>'''
+
+EMPTY_DEPARTURE_BOARD = b'''<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap:Body>
+    <GetDepBoardWithDetailsResponse
+        xmlns="http://thalesgroup.com/RTTI/2021-11-01/ldb/">
+      <GetStationBoardResult
+          xmlns:lt="http://thalesgroup.com/RTTI/2021-11-01/ldb/types">
+        <lt:generatedAt>2022-02-09T23:59:15.7753394+00:00</lt:generatedAt>
+        <lt:locationName>Blackheath</lt:locationName>
+        <lt:crs>BKH</lt:crs>
+        <lt:areServicesAvailable>false</lt:areServicesAvailable>
+      </GetStationBoardResult>
+    </GetDepBoardWithDetailsResponse>
+  </soap:Body>
+</soap:Envelope>'''
+
+
+SERVICE_ALERTS = (
+    b'<lt:serviceID>Ejj51DopLBG4oePJ8QS1vw==</lt:serviceID>',
+    b'<lt:serviceID>Ejj51DopLBG4oePJ8QS1vw==</lt:serviceID>'
+    b'<lt:adhocAlerts>'
+    b'<lt:adhocAlertText>Bus replacement</lt:adhocAlertText>'
+    b'<lt:adhocAlertText>Toilets are unavailable.</lt:adhocAlertText>'
+    b'</lt:adhocAlerts>')
+CALLING_POINT_ALERTS = (
+    b'<lt:st>13:35</lt:st>\n'
+    b'                  <lt:et>On time</lt:et>\n'
+    b'                  <lt:length>10</lt:length>',
+    b'<lt:st>13:35</lt:st>\n'
+    b'                  <lt:et>On time</lt:et>\n'
+    b'                  <lt:length>10</lt:length>'
+    b'<lt:adhocAlerts>'
+    b'<lt:adhocAlertText>Lift is not available.</lt:adhocAlertText>'
+    b'</lt:adhocAlerts>')
+
+EMPTY_RESPONSE = b'''<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap:Body>
+    <GetDepBoardWithDetailsResponse
+        xmlns="http://thalesgroup.com/RTTI/2021-11-01/ldb/"/>
+  </soap:Body>
+</soap:Envelope>'''
+
+
+def create_response(content, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers['Content-Type'] = 'text/xml; charset=utf-8'
+    return response
+
+
+def create_darwin_client(response_mode):
+    return DarwinClient({
+        'station_name_crs_code_mapping': json.dumps({'Charlton': 'CTN'}),
+        'wsdl': WSDL_FILE,
+        'token': 'token',
+        'response_mode': response_mode})
+
+
+class TestParseDepartureBoard(unittest.TestCase):
+    calling_point_names_included = {
+        'London Cannon Street', 'London Charing Cross', 'London Bridge',
+        'Lewisham', 'Blackheath'}
+
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_RAW_DATA_FILE, 'rb') as file:
+            cls.raw_departure_board = file.read()
+        with open(TEST_DATA_FILE) as file:
+            cls.departure_board = json.load(file)
+
+    def test_return_same_station_and_services_as_recorded_board(self):
+        station_and_services = get_station_and_services(
+            parse_departure_board(self.raw_departure_board),
+            self.calling_point_names_included)
+        station_and_services_expected = get_station_and_services(
+            self.departure_board, self.calling_point_names_included)
+
+        self.assertEqual(station_and_services, station_and_services_expected)
+
+    def get_station_and_services_by_response_mode(self, raw_departure_board):
+        station_and_services = {}
+        for response_mode in ('zeep', 'raw'):
+            darwin_client = create_darwin_client(response_mode)
+            with patch.object(darwin_client._client.transport, 'post',
+                              return_value=create_response(
+                                  raw_departure_board)):
+                station_and_services[response_mode] = \
+                    get_station_and_services(
+                        darwin_client.get_departure_board_with_details(
+                            'Charlton'),
+                        self.calling_point_names_included)
+        return station_and_services
+
+    def test_return_same_station_and_services_as_zeep_client(self):
+        station_and_services = self.get_station_and_services_by_response_mode(
+            self.raw_departure_board)
+
+        self.assertEqual(station_and_services['raw'],
+                         station_and_services['zeep'])
+
+    def test_return_same_alerts_as_zeep_client(self):
+        self.assertIn(SERVICE_ALERTS[0], self.raw_departure_board)
+        self.assertIn(CALLING_POINT_ALERTS[0], self.raw_departure_board)
+        station_and_services = self.get_station_and_services_by_response_mode(
+            self.raw_departure_board.replace(*SERVICE_ALERTS).replace(
+                *CALLING_POINT_ALERTS))
+
+        for response_mode, station_and_services_of_mode \
+                in station_and_services.items():
+            with self.subTest(response_mode=response_mode):
+                service = station_and_services_of_mode.services[0]
+                self.assertEqual(
+                    service.status.abnormality_message,
+                    'Alerts:\nBus replacement\nToilets are unavailable.')
+                self.assertEqual(service.calling_points[-1].alert,
+                                 'Lift is not available.')
+        self.assertEqual(station_and_services['raw'],
+                         station_and_services['zeep'])
+
+    def test_return_board_without_services_and_messages(self):
+        departure_board = parse_departure_board(EMPTY_DEPARTURE_BOARD)
+
+        self.assertEqual(departure_board['locationName'], 'Blackheath')
+        self.assertIs(departure_board['areServicesAvailable'], False)
+        self.assertIsNone(departure_board['nrccMessages'])
+        self.assertIsNone(departure_board['trainServices'])
+
+    def test_soap_fault_raises_fault(self):
+        with self.assertRaises(Fault) as context:
+            get_departure_board_from_response(
+                create_response(SOAP_FAULT, 500))
+        self.assertEqual(context.exception.message,
+                         'Invalid crs code supplied')
+
+    def test_success_status_without_board_raises_darwin_response_error(self):
+        with self.assertRaises(DarwinResponseError):
+            get_departure_board_from_response(
+                create_response(EMPTY_RESPONSE))
+
+    def test_error_status_without_board_raises_transport_error(self):
+        with self.assertRaises(TransportError) as context:
+            get_departure_board_from_response(
+                create_response(b'<html><body>Busy</body></html>', 503))
+        self.assertEqual(context.exception.status_code, 503)
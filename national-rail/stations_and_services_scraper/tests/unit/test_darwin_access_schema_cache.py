@@ -0,0 +1,97 @@
+"""Unit tests for Darwin WSDL and XSD documents cache"""
+import functools
+import os
+import pathlib
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from os import path
+
+import requests
+import zeep
+from zeep.cache import InMemoryCache
+
+from data_access.darwin.schema_cache import create_schema_cache, \
+    populate_schema_cache, VersionedSqliteCache
+
+
+WSDL_DIRECTORY = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data', 'wsdl')
+
+
+class QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(
+            ('127.0.0.1', 0), functools.partial(QuietHTTPRequestHandler,
+                                                directory=WSDL_DIRECTORY))
+        threading.Thread(target=self.server.serve_forever,
+                         kwargs={'poll_interval': 0.01}, daemon=True).start()
+        self.wsdl = \
+            f'http://127.0.0.1:{self.server.server_port}/ldb.wsdl'
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.cache_path = path.join(self.temporary_directory.name,
+                                    'wsdl_cache.db')
+
+    def tearDown(self):
+        self._stop_server()
+        self.temporary_directory.cleanup()
+
+    def _stop_server(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def _create_client(self, config):
+        return zeep.Client(
+            wsdl=self.wsdl,
+            transport=zeep.Transport(cache=create_schema_cache(config)))
+
+    def test_no_config_return_no_cache(self):
+        self.assertIsNone(create_schema_cache(None))
+
+    def test_memory_config_return_in_memory_cache(self):
+        self.assertIsInstance(create_schema_cache({'type': 'memory'}),
+                              InMemoryCache)
+
+    def test_unknown_type_raises_error(self):
+        with self.assertRaises(ValueError):
+            create_schema_cache({'type': 'redis'})
+
+    def test_client_created_offline_from_populated_cache(self):
+        populate_schema_cache(self.wsdl, {'path': self.cache_path,
+                                          'version': '2021-11-01'})
+        self._stop_server()
+
+        client = self._create_client({'path': self.cache_path,
+                                      'version': '2021-11-01'})
+
+        self.assertIn('GetDepBoardWithDetails',
+                      dir(client.service))
+
+    def test_cache_of_other_version_is_not_used(self):
+        populate_schema_cache(self.wsdl, {'path': self.cache_path,
+                                          'version': '2017-10-01'})
+        self._stop_server()
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self._create_client({'path': self.cache_path,
+                                 'version': '2021-11-01'})
+
+    def test_cache_seeded_from_pre_populated_cache(self):
+        seed_path = path.join(self.temporary_directory.name, 'seed.db')
+        populate_schema_cache(self.wsdl, {'path': seed_path})
+        self._stop_server()
+
+        cache = create_schema_cache({'path': self.cache_path,
+                                     'seed_path': seed_path})
+
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertIsInstance(cache, VersionedSqliteCache)
+        self.assertIsNotNone(cache.get(self.wsdl))
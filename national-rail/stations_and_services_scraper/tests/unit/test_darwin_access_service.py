@@ -9,6 +9,7 @@ from data_access.darwin.service \
     get_service_time, get_calling_point_time, is_calling_point_cancelled,\
     get_calling_point_alert, get_calling_point, get_calling_points,\
     get_service, is_valid_service, get_services
+from error import DarwinTimeFormatError
 
 
 class TestIsServiceOnTime(unittest.TestCase):
@@ -118,7 +119,7 @@ class TestGetAbnormalityMessage(unittest.TestCase):
     def test_return_adhoc_alerts_message(self):
         service_item = {'cancelReason': None,
                         'delayReason': None,
-                        'adhocAlerts': self.adhoc_alerts}
+                        'adhocAlerts': {'adhocAlertText': self.adhoc_alerts}}
         message = get_abnormality_message(service_item)
 
         self.assertEqual(message, self.adhoc_alerts_message)
@@ -135,7 +136,7 @@ class TestGetAbnormalityMessage(unittest.TestCase):
     def test_return_cancel_delay_adhoc_alerts_messages(self):
         service_item = {'cancelReason': self.cancel_reason,
                         'delayReason': self.delay_reason,
-                        'adhocAlerts': self.adhoc_alerts}
+                        'adhocAlerts': {'adhocAlertText': self.adhoc_alerts}}
         message = get_abnormality_message(service_item)
         message_expected = '\n'.join((self.cancel_message, self.delay_message,
                                       self.adhoc_alerts_message))
@@ -144,7 +145,7 @@ class TestGetAbnormalityMessage(unittest.TestCase):
     def test_return_cancel_adhoc_alerts_messages(self):
         service_item = {'cancelReason': self.cancel_reason,
                         'delayReason': None,
-                        'adhocAlerts': self.adhoc_alerts}
+                        'adhocAlerts': {'adhocAlertText': self.adhoc_alerts}}
         message = get_abnormality_message(service_item)
         message_expected = '\n'.join((self.cancel_message,
                                       self.adhoc_alerts_message))
@@ -154,7 +155,7 @@ class TestGetAbnormalityMessage(unittest.TestCase):
     def test_return_delay_adhoc_alerts_messages(self):
         service_item = {'cancelReason': None,
                         'delayReason': self.delay_reason,
-                        'adhocAlerts': self.adhoc_alerts}
+                        'adhocAlerts': {'adhocAlertText': self.adhoc_alerts}}
         message = get_abnormality_message(service_item)
         message_expected = '\n'.join((self.delay_message,
                                       self.adhoc_alerts_message))
@@ -201,6 +202,11 @@ class TestGetStatus(unittest.TestCase):
 
         self.assertIs(get_status(service_item), Status.Cancelled)
 
+    def test_etd_normalised_before_compared(self):
+        service_item = {'etd': ' ON TIME ', 'isCancelled': None}
+
+        self.assertIs(get_status(service_item), Status.OnTime)
+
 
 class TestGetServiceStatus(unittest.TestCase):
     def test_return_on_time_service_status(self):
@@ -267,8 +273,10 @@ class TestGetServiceStatus(unittest.TestCase):
             'isCancelled': None,
             'cancelReason': None,
             'delayReason': None,
-            'adhocAlerts': ['Toilets are unavailable.',
-                            'Doors are not working at first carriage.']
+            'adhocAlerts': {
+                'adhocAlertText': ['Toilets are unavailable.',
+                                   'Doors are not working at first carriage.']
+            }
         }
         service_status = get_service_status(service_item)
         service_status_expected =\
@@ -296,6 +304,40 @@ class TestGetServiceTime(unittest.TestCase):
 
         self.assertEqual(service_time, service_time_expected)
 
+    def test_cancelled_return_scheduled_departure_time(self):
+        service_item = {'std': '07:36',
+                        'etd': 'Cancelled'}
+        service_time = get_service_time(service_item)
+        service_time_expected = datetime.strptime('07:36', '%H:%M').time()
+
+        self.assertEqual(service_time, service_time_expected)
+
+    def test_delayed_return_scheduled_departure_time(self):
+        service_item = {'std': '07:36',
+                        'etd': 'Delayed'}
+        service_time = get_service_time(service_item)
+        service_time_expected = datetime.strptime('07:36', '%H:%M').time()
+
+        self.assertEqual(service_time, service_time_expected)
+
+    def test_malformed_estimated_departure_time_raise_error(self):
+        for etd in ('24:00', '7:37', '07:37:00', '', 'Bus'):
+            with self.subTest(etd=etd):
+                with self.assertRaises(DarwinTimeFormatError):
+                    get_service_time({'std': '07:36', 'etd': etd})
+
+    def test_malformed_scheduled_departure_time_shown_raise_error(self):
+        for etd in ('On time', 'Cancelled', 'Delayed'):
+            with self.subTest(etd=etd):
+                with self.assertRaises(DarwinTimeFormatError):
+                    get_service_time({'std': '7:36', 'etd': etd})
+
+    def test_malformed_scheduled_departure_time_not_shown_ignored(self):
+        service_time = get_service_time({'std': '7:36', 'etd': '07:37'})
+
+        self.assertEqual(service_time,
+                         datetime.strptime('07:37', '%H:%M').time())
+
 
 class TestGetCallingPointTime(unittest.TestCase):
     def test_return_time_from_at(self):
@@ -322,6 +364,14 @@ class TestGetCallingPointTime(unittest.TestCase):
 
         self.assertEqual(time, time_expected)
 
+    def test_malformed_time_raise_error(self):
+        for calling_point in ({'st': '00:41', 'et': '00:43', 'at': '0:42'},
+                              {'st': '0:41', 'et': 'On time', 'at': None},
+                              {'st': '00:41', 'et': '24:43', 'at': None}):
+            with self.subTest(calling_point=calling_point):
+                with self.assertRaises(DarwinTimeFormatError):
+                    get_calling_point_time(calling_point)
+
 
 class TestIsCallingPointCancelled(unittest.TestCase):
     def test_return_cancelled(self):
@@ -350,7 +400,7 @@ class TestGetCallingPointAlert(unittest.TestCase):
             'Lift at the station is not available.',
             'Toilet at the station is open.'
         ]
-        calling_point = {'adhocAlerts': alert_content}
+        calling_point = {'adhocAlerts': {'adhocAlertText': alert_content}}
         alert_message = get_calling_point_alert(calling_point)
         self.assertEqual(alert_message, '\n'.join(alert_content))
 
@@ -493,9 +543,82 @@ class TestGetService(unittest.TestCase):
             [CallingPoint('London Charing Cross', '13:35', False, '')])
         service_expected.set_length(10)
         service_expected.set_platform('1')
+        service_expected.set_scheduled_time(
+            datetime.strptime('13:06', '%H:%M').time())
         service = get_service(service_item, calling_point_names_included)
         self.assertEqual(service, service_expected)
 
+    def test_return_cancelled_service_with_scheduled_departure_time(self):
+        service_item = {
+            'std': '13:06',
+            'etd': 'Cancelled',
+            'platform': None,
+            'isCancelled': True,
+            'length': None,
+            'cancelReason': 'This train has been cancelled because of a '
+                            'shortage of train crew',
+            'delayReason': None,
+            'serviceID': 'Ejj51DopLBG4oePJ8QS1vw==',
+            'adhocAlerts': None,
+            'subsequentCallingPoints': {
+                'callingPointList': [
+                    {
+                        'callingPoint': [
+                            {
+                                'locationName': 'London Charing Cross',
+                                'crs': 'CHX',
+                                'st': '13:35',
+                                'et': 'Cancelled',
+                                'at': None,
+                                'isCancelled': True,
+                                'adhocAlerts': None
+                            }
+                        ]
+                    }
+                ]
+            }
+        }
+        service_status_expected = ServiceStatus(
+            Status.Cancelled,
+            'Cancel reason: This train has been cancelled because of a '
+            'shortage of train crew')
+        service_expected = Service(
+            'Ejj51DopLBG4oePJ8QS1vw==', service_status_expected,
+            datetime.strptime('13:06', '%H:%M').time(),
+            [CallingPoint('London Charing Cross', 'Cancelled', True, '')])
+        service_expected.set_scheduled_time(
+            datetime.strptime('13:06', '%H:%M').time())
+        service = get_service(service_item, {'London Charing Cross'})
+        self.assertEqual(service, service_expected)
+
+    def test_malformed_or_missing_scheduled_time_not_set(self):
+        for std in ('25:99', '', None):
+            service_item = {
+                'std': std,
+                'etd': '13:08',
+                'platform': None,
+                'isCancelled': None,
+                'length': None,
+                'cancelReason': None,
+                'delayReason': None,
+                'serviceID': 'Ejj51DopLBG4oePJ8QS1vw==',
+                'adhocAlerts': None,
+                'subsequentCallingPoints': {
+                    'callingPointList': [{'callingPoint': [{
+                        'locationName': 'London Charing Cross',
+                        'crs': 'CHX',
+                        'st': '13:35',
+                        'et': 'On time',
+                        'at': None,
+                        'isCancelled': None,
+                        'adhocAlerts': None}]}]}}
+            with self.subTest(std=std):
+                service = get_service(service_item, {'London Charing Cross'})
+
+                self.assertEqual(
+                    service.time, datetime.strptime('13:08', '%H:%M').time())
+                self.assertIsNone(service.scheduled_time)
+
 
 class TestIsValidService(unittest.TestCase):
     @classmethod
@@ -535,12 +658,16 @@ class TestGetServices(unittest.TestCase):
         [CallingPoint('London Charing Cross', '13:35', False, '')])
     service_expected_1.set_length(10)
     service_expected_1.set_platform('1')
+    service_expected_1.set_scheduled_time(
+        datetime.strptime('13:06', '%H:%M').time())
     service_expected_2 = Service(
         '14etaXoW2Uyf34f3euTuUg==', ServiceStatus(Status.OnTime, ''),
         datetime.strptime('13:20', '%H:%M').time(),
         [CallingPoint('London Cannon Street', '13:41', False, '')])
     service_expected_2.set_length(8)
     service_expected_2.set_platform('1')
+    service_expected_2.set_scheduled_time(
+        datetime.strptime('13:20', '%H:%M').time())
 
     @classmethod
     def setUpClass(cls):
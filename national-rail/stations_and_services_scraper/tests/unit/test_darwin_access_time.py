@@ -0,0 +1,80 @@
+"""Unit tests for parsing Darwin times"""
+import unittest
+from datetime import time
+
+from data_access.darwin.darwin_time import is_time, parse_time, \
+    parse_optional_time, get_time_text, get_estimated_time_text
+from error import DarwinTimeFormatError
+
+
+MALFORMED_TIMES = ('24:00', '12:60', '9:41', '09:41:00', ' 09:41', '0941',
+                   '', None)
+
+
+class TestParseTime(unittest.TestCase):
+    def test_return_time(self):
+        self.assertEqual(parse_time('00:00'), time(0, 0))
+        self.assertEqual(parse_time('09:41'), time(9, 41))
+        self.assertEqual(parse_time('23:59'), time(23, 59))
+
+    def test_equal_texts_share_time(self):
+        self.assertIs(parse_time('09:41'), parse_time(''.join('09:41')))
+
+    def test_malformed_time_raise_error(self):
+        for text in MALFORMED_TIMES:
+            with self.subTest(text=text):
+                with self.assertRaises(DarwinTimeFormatError):
+                    parse_time(text)
+
+    def test_malformed_time_error_is_value_error(self):
+        with self.assertRaises(ValueError):
+            parse_time('On time')
+
+
+class TestParseOptionalTime(unittest.TestCase):
+    def test_return_time(self):
+        self.assertIs(parse_optional_time('09:41'), parse_time('09:41'))
+
+    def test_missing_or_malformed_time_return_none(self):
+        for text in MALFORMED_TIMES + ('On time',):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_optional_time(text))
+
+
+class TestIsTime(unittest.TestCase):
+    def test_time(self):
+        self.assertTrue(is_time('14:26'))
+
+    def test_not_time(self):
+        self.assertFalse(is_time('On time'))
+        self.assertFalse(is_time('25:00'))
+
+
+class TestGetTimeText(unittest.TestCase):
+    def test_equal_texts_share_text(self):
+        text = ''.join(['14', ':', '26'])
+
+        self.assertEqual(get_time_text(text), '14:26')
+        self.assertIs(get_time_text(text), get_time_text('14:26'))
+
+    def test_malformed_time_raise_error(self):
+        for text in MALFORMED_TIMES:
+            with self.subTest(text=text):
+                with self.assertRaises(DarwinTimeFormatError):
+                    get_time_text(text)
+
+
+class TestGetEstimatedTimeText(unittest.TestCase):
+    def test_return_time_text(self):
+        self.assertEqual(get_estimated_time_text('14:31'), '14:31')
+
+    def test_return_status_unchanged(self):
+        for text in ('On time', 'Delayed', 'Cancelled', 'No report'):
+            with self.subTest(text=text):
+                self.assertEqual(get_estimated_time_text(text), text)
+
+    def test_malformed_time_raise_error(self):
+        for text in ('24:00', '9:41', '0941', ''):
+            with self.subTest(text=text):
+                with self.assertRaises(DarwinTimeFormatError):
+                    get_estimated_time_text(text)
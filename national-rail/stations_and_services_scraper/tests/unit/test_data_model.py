@@ -0,0 +1,107 @@
+"""Unit tests for data models"""
+import json
+import unittest
+from datetime import time
+
+from data_model import Station, Status, ServiceStatus, CallingPoint, \
+    Service, StationAndServices
+from data_publish import JsonDataSerializer, CompactJsonDataSerializer
+from data_publish.serialize import CONVERTERS, \
+    convert_service_with_scheduled_time, register_converter
+
+
+def create_station_and_services(platform='2'):
+    service = Service('1', ServiceStatus(Status.OnTime, ''), time(7, 32), [
+        CallingPoint('London Bridge', '07:46', False, ''),
+        CallingPoint('London Charing Cross', '07:55', False, '')])
+    service.set_length(8)
+    service.set_platform(platform)
+    service.set_scheduled_time(time(7, 30))
+    return StationAndServices(Station('Charlton', True, ''), [service])
+
+
+class TestDataModel(unittest.TestCase):
+    def test_no_instance_dict(self):
+        station_and_services = create_station_and_services()
+
+        for o in (station_and_services, station_and_services.station,
+                  station_and_services.services[0],
+                  station_and_services.services[0].status,
+                  station_and_services.services[0].calling_points[0]):
+            with self.subTest(type=type(o).__name__):
+                self.assertFalse(hasattr(o, '__dict__'))
+
+    def test_equal_objects(self):
+        self.assertEqual(create_station_and_services(),
+                         create_station_and_services())
+
+    def test_mutable_objects_not_hashable(self):
+        station_and_services = create_station_and_services()
+
+        for o in (station_and_services, station_and_services.station,
+                  station_and_services.services[0],
+                  station_and_services.services[0].status,
+                  station_and_services.services[0].calling_points[0]):
+            with self.subTest(type=type(o).__name__):
+                with self.assertRaises(TypeError):
+                    hash(o)
+
+    def test_no_platform(self):
+        service = Service('1', ServiceStatus(Status.OnTime, ''), time(7, 32),
+                          [])
+
+        service.set_platform(None)
+
+        self.assertIsNone(service.platform)
+
+    def test_different_objects_not_equal(self):
+        self.assertNotEqual(create_station_and_services('1'),
+                            create_station_and_services('2'))
+
+    def test_names_and_platforms_interned(self):
+        name = ''.join(['London ', 'Bridge'])
+        platform = ''.join(['1', '2'])
+        service = Service('1', ServiceStatus(Status.OnTime, ''), time(7, 32),
+                          [])
+        service.set_platform(platform)
+
+        self.assertIs(CallingPoint(name, '07:46', False, '').name,
+                      CallingPoint('London Bridge', '07:46', False, '').name)
+        self.assertIs(service.platform, '12')
+
+    def test_serialized_fields_in_order(self):
+        serialized = JsonDataSerializer().serialize(
+            [create_station_and_services()])
+
+        self.assertEqual(json.loads(serialized), [{
+            'station': {'name': 'Charlton', 'are_services_available': True,
+                        'message': ''},
+            'services': [{
+                'id': '1',
+                'status': {'status': 'OnTime', 'abnormality_message': ''},
+                'time': '07:32',
+                'calling_points': [
+                    {'name': 'London Bridge', 'time': '07:46',
+                     'is_cancelled': False, 'alert': ''},
+                    {'name': 'London Charing Cross', 'time': '07:55',
+                     'is_cancelled': False, 'alert': ''}],
+                'length': 8,
+                'platform': '2'}]}])
+        self.assertListEqual(
+            list(json.loads(serialized)[0]['services'][0]),
+            ['id', 'status', 'time', 'calling_points', 'length', 'platform'])
+        self.assertEqual(
+            CompactJsonDataSerializer().serialize(
+                create_station_and_services()),
+            json.dumps(json.loads(serialized)[0], separators=(',', ':')))
+
+    def test_scheduled_time_serialized_when_opted_in(self):
+        converter = CONVERTERS[Service]
+        register_converter(Service, convert_service_with_scheduled_time)
+        self.addCleanup(register_converter, Service, converter)
+
+        serialized = CompactJsonDataSerializer().serialize(
+            create_station_and_services())
+
+        self.assertEqual(json.loads(serialized)['services'][0]
+                         ['scheduled_time'], '07:30')
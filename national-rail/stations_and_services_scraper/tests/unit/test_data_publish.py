@@ -0,0 +1,146 @@
+"""Unit tests for publishers"""
+import asyncio
+import io
+import json
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import Mock
+
+from data_publish import publish_stream, publish_stream_async, \
+    ConsoleDataPublisher, StreamDataPublisher, JsonDataSerializer, \
+    JsonStreamDataSerializer
+from data_publish.publish import DataPublisher
+from tests.unit.helpers import create_stations_and_services
+
+
+class TestDataPublisher(unittest.TestCase):
+    def test_publish_stream_publish_items_together(self):
+        class ListDataPublisher(DataPublisher):
+            publish = Mock()
+
+        data_publisher = ListDataPublisher()
+        stations_and_services = create_stations_and_services(2)
+
+        publish_stream(data_publisher, iter(stations_and_services))
+
+        data_publisher.publish.assert_called_once_with(stations_and_services)
+
+
+class TestConsoleDataPublisher(unittest.TestCase):
+    def test_publish_stream_print_json_array(self):
+        stations_and_services = create_stations_and_services(2)
+        output = io.StringIO()
+
+        with redirect_stdout(output):
+            ConsoleDataPublisher(JsonDataSerializer()).publish_stream(
+                iter(stations_and_services))
+
+        self.assertEqual(json.loads(output.getvalue()), json.loads(
+            JsonDataSerializer().serialize(stations_and_services)))
+
+
+class TestStreamDataPublisher(unittest.TestCase):
+    def test_publish_stream_write_to_sink(self):
+        sink = io.StringIO()
+        data_publisher = StreamDataPublisher(
+            JsonStreamDataSerializer(is_ndjson=True), sink)
+
+        publish_stream(data_publisher,
+                       iter(create_stations_and_services(3)))
+
+        self.assertListEqual(
+            [json.loads(line)['station']['name']
+             for line in sink.getvalue().splitlines()],
+            ['Station 0', 'Station 1', 'Station 2'])
+
+    def test_publish_write_to_sink(self):
+        sink = io.StringIO()
+        data_publisher = StreamDataPublisher(JsonStreamDataSerializer(), sink)
+
+        data_publisher.publish(create_stations_and_services(2))
+
+        self.assertEqual(len(json.loads(sink.getvalue())), 2)
+
+
+class RecordingDataPublisher(DataPublisher):
+    def __init__(self, error=None):
+        self.items = []
+        self.error = None
+        self._error = error
+
+    def publish(self, data):
+        pass
+
+    def publish_stream(self, items):
+        try:
+            for item in items:
+                if self._error is not None:
+                    raise self._error
+                self.items.append(item)
+        except Exception as error:
+            self.error = error
+            raise
+
+
+class TestPublishStreamAsync(unittest.IsolatedAsyncioTestCase):
+    async def produce(self, stations_and_services, error=None):
+        for station_and_services in stations_and_services:
+            await asyncio.sleep(0)
+            yield station_and_services
+        if error is not None:
+            raise error
+
+    async def test_publish_all_items(self):
+        stations_and_services = create_stations_and_services(5)
+        data_publisher = RecordingDataPublisher()
+
+        await publish_stream_async(data_publisher,
+                                   self.produce(stations_and_services))
+
+        self.assertListEqual(data_publisher.items, stations_and_services)
+
+    async def test_full_queue_holds_back_iterator(self):
+        produced = []
+        release = threading.Event()
+
+        class BlockedDataPublisher(RecordingDataPublisher):
+            def publish_stream(self, items):
+                release.wait(timeout=5)
+                super().publish_stream(items)
+
+        async def produce():
+            for station_and_services in create_stations_and_services(10):
+                produced.append(station_and_services)
+                yield station_and_services
+
+        data_publisher = BlockedDataPublisher()
+        publishing = asyncio.ensure_future(publish_stream_async(
+            data_publisher, produce(), max_queued=2))
+        await asyncio.sleep(0.05)
+
+        # Two queued and one waiting to be queued
+        self.assertEqual(len(produced), 3)
+        release.set()
+        await publishing
+        self.assertEqual(len(data_publisher.items), 10)
+
+    async def test_iterator_error_raised_in_publisher(self):
+        data_publisher = RecordingDataPublisher()
+        error = ValueError('scraping failed')
+
+        with self.assertRaises(ValueError):
+            await publish_stream_async(
+                data_publisher,
+                self.produce(create_stations_and_services(2), error))
+
+        self.assertEqual(len(data_publisher.items), 2)
+        self.assertIs(data_publisher.error, error)
+
+    async def test_publisher_error_raised(self):
+        data_publisher = RecordingDataPublisher(RuntimeError('sink closed'))
+
+        with self.assertRaisesRegex(RuntimeError, 'sink closed'):
+            await publish_stream_async(
+                data_publisher,
+                self.produce(create_stations_and_services(5)))
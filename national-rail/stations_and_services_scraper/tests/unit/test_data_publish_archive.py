@@ -0,0 +1,244 @@
+"""Unit tests for the partitioned file system archive"""
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from data_model import Station, StationAndServices
+from data_publish import ArchiveDataPublisher, ArchiveReader, \
+    create_data_publisher
+from data_publish.archive import get_segment_paths, truncate_partial_line
+
+
+START = datetime(2022, 2, 9, 7, 50, tzinfo=timezone.utc)
+
+
+def create_stations_and_services(*names):
+    return [StationAndServices(Station(name, True, ''), []) for name in names]
+
+
+class Clock:
+    """Time advancing by a step each time it is read"""
+    def __init__(self, time: datetime, step: timedelta):
+        self.time = time
+        self._step = step
+
+    def __call__(self) -> datetime:
+        time = self.time
+        self.time += self._step
+        return time
+
+
+class TestArchiveDataPublisher(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.root = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def list_files(self):
+        return sorted(os.path.relpath(os.path.join(path, name), self.root)
+                      for path, _, names in os.walk(self.root)
+                      for name in names)
+
+    def test_partitioned_by_date_hour_and_station(self):
+        with ArchiveDataPublisher(self.root,
+                                  get_time=lambda: START) as publisher:
+            publisher.publish(create_stations_and_services(
+                'Dartford', 'London Bridge'))
+
+        self.assertEqual(
+            [os.path.join('2022-02-09', '07', 'Dartford',
+                          '000001.ndjson.open'),
+             os.path.join('2022-02-09', '07', 'London%20Bridge',
+                          '000001.ndjson.open')],
+            self.list_files())
+
+    def test_segments_of_earlier_hours_sealed(self):
+        clock = Clock(START, timedelta(minutes=5))
+        with ArchiveDataPublisher(self.root, get_time=clock) as publisher:
+            for _ in range(3):
+                publisher.publish(create_stations_and_services('Dartford'))
+
+        self.assertEqual(
+            [os.path.join('2022-02-09', '07', 'Dartford', '000001.ndjson'),
+             os.path.join('2022-02-09', '08', 'Dartford',
+                          '000001.ndjson.open')],
+            self.list_files())
+
+    def test_segment_sealed_at_segment_size(self):
+        with ArchiveDataPublisher(self.root, 100,
+                                  get_time=lambda: START) as publisher:
+            publisher.publish_stream(iter(create_stations_and_services(
+                *['Dartford'] * 3)))
+
+        self.assertEqual(
+            [os.path.join('2022-02-09', '07', 'Dartford', f'{i:06d}.ndjson')
+             for i in range(1, 4)], self.list_files())
+
+    def test_open_segment_appended_by_next_publisher(self):
+        for _ in range(2):
+            with ArchiveDataPublisher(self.root,
+                                      get_time=lambda: START) as publisher:
+                publisher.publish(create_stations_and_services('Dartford'))
+
+        self.assertEqual(2, len(list(ArchiveReader(self.root).read(
+            START, START + timedelta(hours=1)))))
+        self.assertEqual(1, len(self.list_files()))
+
+    def test_partial_line_of_open_segment_dropped(self):
+        with ArchiveDataPublisher(self.root,
+                                  get_time=lambda: START) as publisher:
+            publisher.publish(create_stations_and_services('Dartford'))
+        path = os.path.join(self.root, self.list_files()[0])
+        with open(path, 'ab') as file:
+            file.write(b'{"time": "2022-')
+
+        self.assertEqual(1, len(list(ArchiveReader(self.root).read(
+            START, START + timedelta(hours=1)))))
+        with ArchiveDataPublisher(self.root,
+                                  get_time=lambda: START) as publisher:
+            publisher.publish(create_stations_and_services('Dartford'))
+
+        self.assertEqual(2, len(list(ArchiveReader(self.root).read(
+            START, START + timedelta(hours=1)))))
+
+    def test_open_segments_of_earlier_hours_sealed_by_next_publisher(self):
+        with ArchiveDataPublisher(self.root,
+                                  get_time=lambda: START) as publisher:
+            publisher.publish(create_stations_and_services(
+                'Dartford', 'London Bridge'))
+        path = os.path.join(self.root, self.list_files()[0])
+        with open(path, 'ab') as file:
+            file.write(b'{"time": "2022-')
+
+        with ArchiveDataPublisher(
+                self.root, get_time=lambda: START + timedelta(hours=1))\
+                as publisher:
+            publisher.publish(create_stations_and_services('Dartford'))
+
+        self.assertEqual(
+            [os.path.join('2022-02-09', '07', 'Dartford', '000001.ndjson'),
+             os.path.join('2022-02-09', '07', 'London%20Bridge',
+                          '000001.ndjson'),
+             os.path.join('2022-02-09', '08', 'Dartford',
+                          '000001.ndjson.open')],
+            self.list_files())
+        self.assertEqual(2, len(list(ArchiveReader(self.root).read(
+            START, START + timedelta(hours=1), is_including_open=False))))
+
+    def test_files_not_named_by_archive_skipped(self):
+        with ArchiveDataPublisher(self.root,
+                                  get_time=lambda: START) as publisher:
+            publisher.publish(create_stations_and_services('Dartford'))
+        partition_path = os.path.join(self.root, '2022-02-09', '07',
+                                      'Dartford')
+        for name in ('000001 copy.ndjson', 'notes.ndjson.open'):
+            open(os.path.join(partition_path, name), 'w').close()
+
+        self.assertEqual(
+            [os.path.join(partition_path, '000001.ndjson.open')],
+            get_segment_paths(partition_path))
+        with ArchiveDataPublisher(self.root,
+                                  get_time=lambda: START) as publisher:
+            publisher.publish(create_stations_and_services('Dartford'))
+
+    def test_create_archive_publisher(self):
+        publisher = create_data_publisher({
+            'publisher': 'archive',
+            'archive': {'root': self.root, 'segment_size': 1024}})
+
+        self.assertIsInstance(publisher, ArchiveDataPublisher)
+
+
+class TestTruncatePartialLine(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, '000001.ndjson.open')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def truncate(self, content: bytes) -> bytes:
+        with open(self.path, 'wb') as file:
+            file.write(content)
+        # Chunks smaller than the lines make the search cross chunks
+        with patch('data_publish.archive.TAIL_CHUNK_SIZE', 4):
+            truncate_partial_line(self.path)
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+    def test_partial_line_dropped(self):
+        self.assertEqual(b'{"a": 1}\n{"b": 2}\n',
+                         self.truncate(b'{"a": 1}\n{"b": 2}\n{"c": 3'))
+
+    def test_whole_lines_kept(self):
+        self.assertEqual(b'{"a": 1}\n', self.truncate(b'{"a": 1}\n'))
+
+    def test_only_partial_line_dropped(self):
+        self.assertEqual(b'', self.truncate(b'{"a": 1'))
+
+    def test_empty_segment_kept(self):
+        self.assertEqual(b'', self.truncate(b''))
+
+
+class TestArchiveReader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._directory = tempfile.TemporaryDirectory()
+        cls.root = cls._directory.name
+        clock = Clock(START, timedelta(minutes=10))
+        with ArchiveDataPublisher(cls.root, 200, clock) as publisher:
+            for _ in range(12):
+                publisher.publish(create_stations_and_services(
+                    'Dartford', 'London Bridge'))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._directory.cleanup()
+
+    def test_read_time_range(self):
+        # Each station and services is published 10 minutes after the one
+        # before, alternating stations, and records come by station
+        records = list(ArchiveReader(self.root).read(
+            START + timedelta(minutes=10), START + timedelta(minutes=40)))
+
+        self.assertEqual(
+            [(START + timedelta(minutes=minutes), name)
+             for minutes, name in ((20, 'Dartford'), (10, 'London Bridge'),
+                                   (30, 'London Bridge'))],
+            [(r['time'], r['station_and_services']['station']['name'])
+             for r in records])
+
+    def test_read_stations(self):
+        records = list(ArchiveReader(self.root).read(
+            datetime(2022, 2, 9), datetime(2022, 2, 10), ['London Bridge']))
+
+        self.assertEqual(12, len(records))
+        self.assertEqual(
+            {'London Bridge'},
+            {r['station_and_services']['station']['name'] for r in records})
+        self.assertEqual(sorted(r['time'] for r in records),
+                         [r['time'] for r in records])
+
+    def test_partitions_of_time_range_only(self):
+        paths = ArchiveReader(self.root).get_partition_paths(
+            START + timedelta(minutes=20), START + timedelta(minutes=30),
+            ['Dartford', 'Erith'])
+
+        self.assertEqual(
+            [os.path.join(self.root, '2022-02-09', '08', 'Dartford')],
+            paths)
+
+    def test_read_sealed_segments_only(self):
+        records = list(ArchiveReader(self.root).read(
+            START, START + timedelta(hours=3), is_including_open=False))
+
+        self.assertLess(len(records), 24)
+        self.assertGreater(len(records), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,325 @@
+"""Unit tests for the AWS data publisher, against stubbed AWS clients"""
+import gzip
+import json
+import threading
+import unittest
+from unittest.mock import Mock
+
+import boto3
+from botocore.stub import Stubber, ANY
+
+from config_access import ConfigAccessFromConfigDataSet
+from data_publish import AwsDataPublisher, ConsoleDataPublisher, \
+    CompactJsonDataSerializer, create_data_publisher
+from data_publish.aws import MEBIBYTE, Record, RecordBatcher, S3Uploader, \
+    FirehoseRecordStream, KinesisRecordStream, put_records_with_retry
+from error import DataPublishError
+from tests.unit.helpers import create_stations_and_services, StaticConfigData
+
+
+def create_client(service_name):
+    return boto3.session.Session().client(
+        service_name, region_name='eu-west-2', aws_access_key_id='key',
+        aws_secret_access_key='secret')
+
+
+class TestS3Uploader(unittest.TestCase):
+    def setUp(self):
+        self.client = create_client('s3')
+        self.stubber = Stubber(self.client)
+        self.stubber.activate()
+
+    def tearDown(self):
+        self.stubber.deactivate()
+
+    def test_small_object_put_at_once(self):
+        self.stubber.add_response('put_object', {}, {
+            'Bucket': 'bucket', 'Key': 'key', 'Body': b'data',
+            'ContentType': 'application/json', 'ContentEncoding': 'gzip'})
+
+        S3Uploader(self.client, 'bucket').upload(
+            'key', b'data', 'application/json', 'gzip')
+
+        self.stubber.assert_no_pending_responses()
+
+    def test_large_object_uploaded_in_parts(self):
+        data = bytes(11 * MEBIBYTE)
+        self.stubber.add_response(
+            'create_multipart_upload', {'UploadId': 'upload'},
+            {'Bucket': 'bucket', 'Key': 'key',
+             'ContentType': 'application/json'})
+        for part_number, start, end in ((1, 0, 5), (2, 5, 10), (3, 10, 11)):
+            self.stubber.add_response(
+                'upload_part', {'ETag': f'etag-{part_number}'},
+                {'Bucket': 'bucket', 'Key': 'key', 'UploadId': 'upload',
+                 'PartNumber': part_number,
+                 'Body': data[start * MEBIBYTE:end * MEBIBYTE]})
+        self.stubber.add_response(
+            'complete_multipart_upload', {},
+            {'Bucket': 'bucket', 'Key': 'key', 'UploadId': 'upload',
+             'MultipartUpload': {'Parts': [
+                 {'ETag': 'etag-1', 'PartNumber': 1},
+                 {'ETag': 'etag-2', 'PartNumber': 2},
+                 {'ETag': 'etag-3', 'PartNumber': 3}]}})
+
+        S3Uploader(self.client, 'bucket', 8 * MEBIBYTE, 5 * MEBIBYTE, 1)\
+            .upload('key', data, 'application/json')
+
+        self.stubber.assert_no_pending_responses()
+
+    def test_failed_multipart_upload_aborted(self):
+        self.stubber.add_response(
+            'create_multipart_upload', {'UploadId': 'upload'})
+        self.stubber.add_client_error('upload_part', 'InternalError')
+        self.stubber.add_response(
+            'abort_multipart_upload', {},
+            {'Bucket': 'bucket', 'Key': 'key', 'UploadId': 'upload'})
+
+        with self.assertRaises(Exception):
+            S3Uploader(self.client, 'bucket', 1, 5 * MEBIBYTE, 1).upload(
+                'key', b'data', 'application/json')
+
+        self.stubber.assert_no_pending_responses()
+
+    def test_parts_uploaded_concurrently(self):
+        client = Mock()
+        client.create_multipart_upload.return_value = {'UploadId': 'upload'}
+        barrier = threading.Barrier(3, timeout=5)
+
+        def upload_part(**kwargs):
+            barrier.wait()
+            return {'ETag': f"etag-{kwargs['PartNumber']}"}
+
+        client.upload_part.side_effect = upload_part
+
+        S3Uploader(client, 'bucket', 1, 5 * MEBIBYTE, 3).upload(
+            'key', bytes(11 * MEBIBYTE), 'application/json')
+
+        self.assertEqual(
+            [{'ETag': 'etag-1', 'PartNumber': 1},
+             {'ETag': 'etag-2', 'PartNumber': 2},
+             {'ETag': 'etag-3', 'PartNumber': 3}],
+            client.complete_multipart_upload.call_args.kwargs[
+                'MultipartUpload']['Parts'])
+
+    def test_part_size_less_than_s3_minimum(self):
+        with self.assertRaises(ValueError):
+            S3Uploader(self.client, 'bucket', part_size=MEBIBYTE)
+
+
+class TestRecordBatcher(unittest.TestCase):
+    def test_batch_full_of_records(self):
+        stream = FirehoseRecordStream(Mock(), 'stream')
+        batcher = RecordBatcher(stream)
+
+        batches = [batcher.add(Record(b'x')) for _ in range(501)]
+
+        self.assertEqual(500, len(batches[-1]))
+        self.assertEqual([None] * 500, batches[:-1])
+        self.assertEqual(1, len(batcher.flush()))
+        self.assertIsNone(batcher.flush())
+
+    def test_batch_full_of_bytes(self):
+        batcher = RecordBatcher(KinesisRecordStream(Mock(), 'stream'))
+        record = Record(bytes(MEBIBYTE - 1), 'k')
+
+        batches = [batcher.add(record) for _ in range(6)]
+
+        self.assertEqual(5, len(batches[-1]))
+
+    def test_record_too_large(self):
+        batcher = RecordBatcher(KinesisRecordStream(Mock(), 'stream'))
+
+        with self.assertRaises(DataPublishError):
+            batcher.add(Record(bytes(MEBIBYTE), 'k'))
+
+
+class TestPutRecordsWithRetry(unittest.TestCase):
+    def setUp(self):
+        self.client = create_client('firehose')
+        self.stubber = Stubber(self.client)
+        self.stubber.activate()
+        self.stream = FirehoseRecordStream(self.client, 'stream')
+
+    def tearDown(self):
+        self.stubber.deactivate()
+
+    def add_response(self, data, error_codes):
+        self.stubber.add_response(
+            'put_record_batch',
+            {'FailedPutCount': sum(c is not None for c in error_codes),
+             'RequestResponses': [
+                 {'RecordId': 'id'} if c is None
+                 else {'ErrorCode': c, 'ErrorMessage': c}
+                 for c in error_codes]},
+            {'DeliveryStreamName': 'stream',
+             'Records': [{'Data': d} for d in data]})
+
+    def test_failed_records_put_again(self):
+        self.add_response([b'a', b'b', b'c'],
+                          [None, 'ServiceUnavailableException', None])
+        self.add_response([b'b'], [None])
+        sleep = Mock()
+
+        put_records_with_retry(
+            self.stream, [Record(b'a'), Record(b'b'), Record(b'c')],
+            sleep=sleep)
+
+        self.stubber.assert_no_pending_responses()
+        sleep.assert_called_once_with(0.1)
+
+    def test_records_failing_every_attempt(self):
+        for _ in range(3):
+            self.add_response([b'a'], ['InternalFailure'])
+        sleep = Mock()
+
+        with self.assertRaises(DataPublishError):
+            put_records_with_retry(self.stream, [Record(b'a')], 3, 1, sleep)
+
+        self.assertEqual([((1,),), ((2,),)], sleep.call_args_list)
+
+
+class TestAwsDataPublisher(unittest.TestCase):
+    def setUp(self):
+        self.clients = {name: create_client(name)
+                        for name in ('s3', 'firehose', 'kinesis')}
+        self.stubbers = {name: Stubber(client)
+                         for name, client in self.clients.items()}
+        for stubber in self.stubbers.values():
+            stubber.activate()
+
+    def tearDown(self):
+        for stubber in self.stubbers.values():
+            stubber.deactivate()
+
+    def create_publisher(self, config, serializer=None):
+        return AwsDataPublisher(
+            config, serializer or CompactJsonDataSerializer(),
+            self.clients.__getitem__)
+
+    def test_publish_to_s3(self):
+        stations_and_services = create_stations_and_services(2)
+        self.stubbers['s3'].add_response('put_object', {}, {
+            'Bucket': 'bucket', 'Key': ANY,
+            'Body': CompactJsonDataSerializer().serialize(
+                stations_and_services).encode(),
+            'ContentType': 'application/json'})
+
+        self.create_publisher({'s3': {'bucket_name': 'bucket'}}).publish(
+            stations_and_services)
+
+        self.stubbers['s3'].assert_no_pending_responses()
+
+    def test_publish_compressed_to_s3(self):
+        stations_and_services = create_stations_and_services(2)
+        publisher = create_data_publisher({
+            'publisher': 'aws', 's3': {'bucket_name': 'bucket',
+                                       'key_prefix': 'boards/'},
+            'compression': {'encoding': 'gzip'}})
+        client = Mock()
+        publisher._s3_uploader._client = client
+
+        publisher.publish(stations_and_services)
+
+        kwargs = client.put_object.call_args.kwargs
+        self.assertEqual('gzip', kwargs['ContentEncoding'])
+        self.assertTrue(kwargs['Key'].startswith('boards/'))
+        self.assertTrue(kwargs['Key'].endswith('.json'))
+        self.assertEqual(
+            ['Station 0', 'Station 1'],
+            [s['station']['name']
+             for s in json.loads(gzip.decompress(kwargs['Body']))])
+
+    def test_publish_to_firehose_and_kinesis(self):
+        stations_and_services = create_stations_and_services(3)
+        serialized = [CompactJsonDataSerializer().serialize(s).encode()
+                      for s in stations_and_services]
+        self.stubbers['firehose'].add_response(
+            'put_record_batch',
+            {'FailedPutCount': 0,
+             'RequestResponses': [{'RecordId': 'id'}] * 3},
+            {'DeliveryStreamName': 'delivery',
+             'Records': [{'Data': d + b'\n'} for d in serialized]})
+        self.stubbers['kinesis'].add_response(
+            'put_records',
+            {'Records': [{'SequenceNumber': '1', 'ShardId': 'shard'}] * 3},
+            {'StreamName': 'stream',
+             'Records': [{'Data': d, 'PartitionKey': f'Station {i}'}
+                         for i, d in enumerate(serialized)]})
+
+        self.create_publisher({
+            'firehose': {'delivery_stream_name': 'delivery'},
+            'kinesis': {'stream_name': 'stream'}}).publish_stream(
+            iter(stations_and_services))
+
+        self.stubbers['firehose'].assert_no_pending_responses()
+        self.stubbers['kinesis'].assert_no_pending_responses()
+
+    def test_publish_stream_puts_full_batches_as_items_come(self):
+        first_batch_put = threading.Event()
+        client = Mock()
+
+        def put_record_batch(**kwargs):
+            first_batch_put.set()
+            return {'FailedPutCount': 0,
+                    'RequestResponses': [{'RecordId': 'id'}]
+                    * len(kwargs['Records'])}
+
+        client.put_record_batch.side_effect = put_record_batch
+        is_put_before_last_item = []
+
+        def get_items():
+            stations_and_services = create_stations_and_services(502)
+            yield from stations_and_services[:-1]
+            is_put_before_last_item.append(first_batch_put.wait(5))
+            yield stations_and_services[-1]
+
+        AwsDataPublisher({'firehose': {'delivery_stream_name': 'delivery'}},
+                         CompactJsonDataSerializer(), lambda name: client)\
+            .publish_stream(get_items())
+
+        self.assertEqual([True], is_put_before_last_item)
+        self.assertEqual(
+            [500, 2], [len(c.kwargs['Records'])
+                       for c in client.put_record_batch.call_args_list])
+
+    def test_publish_raises_error_of_records_failing(self):
+        self.stubbers['kinesis'].add_client_error(
+            'put_records', 'ResourceNotFoundException')
+
+        with self.assertRaises(Exception):
+            self.create_publisher({'kinesis': {'stream_name': 'stream'}})\
+                .publish(create_stations_and_services(1))
+
+
+class TestCreateDataPublisher(unittest.TestCase):
+    def test_console_by_default(self):
+        self.assertIsInstance(create_data_publisher({}),
+                              ConsoleDataPublisher)
+
+    def test_unknown_publisher(self):
+        with self.assertRaises(ValueError):
+            create_data_publisher({'publisher': 'ftp'})
+
+    def test_config_from_config_data(self):
+        config_data = [StaticConfigData(value)
+                       for value in ('[]', '{}', '{"wsdl": "wsdl"}', 'token')]
+        publisher_config_data = StaticConfigData(json.dumps({
+            'publisher': 'aws', 'region_name': 'eu-west-2',
+            'firehose': {'delivery_stream_name': 'delivery'}}))
+
+        config = ConfigAccessFromConfigDataSet(
+            *config_data, publisher_config_data).get_data_publisher_config()
+        without_config = ConfigAccessFromConfigDataSet(*config_data)\
+            .get_data_publisher_config()
+
+        self.assertEqual('aws', config['publisher'])
+        self.assertEqual({'delivery_stream_name': 'delivery'},
+                         config['firehose'])
+        self.assertIsNone(config['s3'])
+        self.assertEqual(3, config['max_attempts'])
+        self.assertEqual({'publisher': 'console'}, without_config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Unit tests for the binary serializer"""
+import json
+import pathlib
+import unittest
+from datetime import time
+from os import path
+
+from data_access.darwin.darwin_access import get_station_and_services, \
+    get_lazy_station_and_services
+from data_model import Station, Status, ServiceStatus, CallingPoint, \
+    Service, StationAndServices
+from data_publish import JsonDataSerializer, BinaryDataSerializer, \
+    BinaryDataDeserializer
+from data_publish.binary_serialize import SCHEMA_VERSION
+from error import UnsupportedSchemaVersionError
+
+
+TEST_DATA_FILE = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data',
+    'test_darwin_departure_board.json')
+CALLING_POINT_NAMES = {'London Cannon Street', 'London Charing Cross'}
+
+
+class TestBinaryDataSerializer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_DATA_FILE) as file:
+            departure_board = json.load(file)
+        cls.stations_and_services = [
+            get_station_and_services(departure_board, CALLING_POINT_NAMES),
+            get_lazy_station_and_services(departure_board,
+                                          CALLING_POINT_NAMES)]
+
+    def test_deserialize_serialized_data(self):
+        serialized = BinaryDataSerializer(
+            is_including_scheduled_time=True).serialize(
+                self.stations_and_services)
+
+        stations_and_services = BinaryDataDeserializer().deserialize(
+            serialized)
+
+        self.assertEqual(serialized[3], SCHEMA_VERSION)
+        self.assertListEqual(stations_and_services,
+                             self.stations_and_services)
+        self.assertEqual(
+            JsonDataSerializer().serialize(stations_and_services),
+            JsonDataSerializer().serialize(self.stations_and_services))
+
+    def test_schema_version_1_written_without_scheduled_time(self):
+        serialized = BinaryDataSerializer().serialize(
+            self.stations_and_services)
+
+        stations_and_services = BinaryDataDeserializer().deserialize(
+            serialized)
+
+        self.assertEqual(serialized[3], 1)
+        self.assertEqual(
+            [None] * len(stations_and_services[0].services),
+            [service.scheduled_time
+             for service in stations_and_services[0].services])
+        self.assertEqual(
+            JsonDataSerializer().serialize(stations_and_services),
+            JsonDataSerializer().serialize(self.stations_and_services))
+
+    def test_deserialize_missing_values(self):
+        service = Service('1', ServiceStatus(Status.Cancelled, 'Cancelled'),
+                          None, [CallingPoint('Lewisham', 'Cancelled', True,
+                                              'Fault on this train')])
+        stations_and_services = [
+            StationAndServices(Station('Charlton', False, ''), [service]),
+            StationAndServices(Station('Blackheath', None, 'Ünïcode'), [])]
+
+        self.assertListEqual(
+            BinaryDataDeserializer().deserialize(
+                BinaryDataSerializer().serialize(stations_and_services)),
+            stations_and_services)
+
+    def test_deserialize_times_to_the_minute(self):
+        service = Service('1', ServiceStatus(Status.OnTime, ''),
+                          time(23, 59), [])
+        service.set_length(12)
+
+        service_deserialized = BinaryDataDeserializer().deserialize(
+            BinaryDataSerializer().serialize([StationAndServices(
+                Station('Charlton', True, ''), [service])]))[0].services[0]
+
+        self.assertEqual(service_deserialized.time, time(23, 59))
+        self.assertEqual(service_deserialized.length, 12)
+
+    def test_repeated_strings_written_once(self):
+        serializer = BinaryDataSerializer()
+        serialized_once = serializer.serialize(self.stations_and_services[:1])
+
+        serialized_twice = serializer.serialize(self.stations_and_services)
+
+        self.assertLess(len(serialized_twice), 2 * len(serialized_once) - 100)
+
+    def test_unsupported_schema_version_raise_error(self):
+        serialized = bytearray(BinaryDataSerializer().serialize([]))
+        serialized[3] = SCHEMA_VERSION + 1
+
+        with self.assertRaises(UnsupportedSchemaVersionError):
+            BinaryDataDeserializer().deserialize(bytes(serialized))
+
+    def test_not_serialized_data_raise_error(self):
+        with self.assertRaises(ValueError):
+            BinaryDataDeserializer().deserialize(b'[{"station": {}}]')
@@ -0,0 +1,187 @@
+"""Unit tests for compression of serialized data"""
+import gzip
+import io
+import json
+import pathlib
+import unittest
+from os import path
+
+from data_access.darwin.darwin_access import get_station_and_services
+from data_publish import JsonDataSerializer, CompactJsonDataSerializer, \
+    JsonStreamDataSerializer, BinaryDataSerializer, BinaryDataDeserializer, \
+    GzipCompressor, ZstdCompressor, CompressingDataSerializer, \
+    CompressingStreamDataSerializer, create_compressor
+from data_publish.compress import zstandard
+
+
+TEST_DATA_FILE = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data',
+    'test_darwin_departure_board.json')
+CALLING_POINT_NAMES = {'London Cannon Street', 'London Charing Cross'}
+
+
+def decompress_zstd(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class CountingSink(io.BytesIO):
+    """Binary sink counting the writes to it"""
+    def __init__(self):
+        super().__init__()
+        self.number_of_writes = 0
+
+    def write(self, data) -> int:
+        self.number_of_writes += 1
+        return super().write(data)
+
+
+class TestCompressingDataSerializer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_DATA_FILE) as file:
+            departure_board = json.load(file)
+        departure_board['locationName'] = 'Charlton – “Kent”'
+        cls.stations_and_services = [
+            get_station_and_services(departure_board, CALLING_POINT_NAMES)]
+
+    def test_gzip_string_serializer(self):
+        serializer = CompressingDataSerializer(JsonDataSerializer(),
+                                               GzipCompressor())
+
+        compressed = serializer.serialize(self.stations_and_services)
+
+        self.assertEqual(
+            JsonDataSerializer().serialize(self.stations_and_services),
+            gzip.decompress(compressed).decode())
+        self.assertEqual('gzip', serializer.content_encoding)
+
+    def test_gzip_is_deterministic(self):
+        serializer = CompressingDataSerializer(CompactJsonDataSerializer(),
+                                               GzipCompressor(9))
+
+        self.assertEqual(serializer.serialize(self.stations_and_services),
+                         serializer.serialize(self.stations_and_services))
+
+    def test_gzip_bytes_serializer(self):
+        serializer = CompressingDataSerializer(
+            BinaryDataSerializer(is_including_scheduled_time=True),
+            GzipCompressor(1))
+
+        compressed = serializer.serialize(self.stations_and_services)
+
+        self.assertEqual(self.stations_and_services,
+                         BinaryDataDeserializer().deserialize(
+                             gzip.decompress(compressed)))
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_string_serializer(self):
+        serializer = CompressingDataSerializer(CompactJsonDataSerializer(),
+                                               ZstdCompressor())
+
+        compressed = serializer.serialize(self.stations_and_services)
+
+        self.assertEqual(
+            CompactJsonDataSerializer().serialize(self.stations_and_services),
+            decompress_zstd(compressed).decode())
+        self.assertEqual('zstd', serializer.content_encoding)
+
+    def test_serializer_without_compression_has_no_content_encoding(self):
+        self.assertIsNone(JsonDataSerializer().content_encoding)
+        self.assertIsNone(BinaryDataSerializer().content_encoding)
+        self.assertIsNone(JsonStreamDataSerializer().content_encoding)
+
+
+class TestCompressingStreamDataSerializer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_DATA_FILE) as file:
+            departure_board = json.load(file)
+        departure_board['locationName'] = 'Charlton – “Kent”'
+        cls.stations_and_services = [
+            get_station_and_services(departure_board, CALLING_POINT_NAMES)
+            for _ in range(3)]
+
+    def test_gzip_stream(self):
+        serializer = CompressingStreamDataSerializer(
+            JsonStreamDataSerializer(is_ndjson=True), GzipCompressor())
+        sink = io.BytesIO()
+
+        serializer.serialize_to(iter(self.stations_and_services), sink)
+
+        expected = io.StringIO()
+        JsonStreamDataSerializer(is_ndjson=True).serialize_to(
+            self.stations_and_services, expected)
+        self.assertEqual(expected.getvalue(),
+                         gzip.decompress(sink.getvalue()).decode())
+        self.assertEqual('gzip', serializer.content_encoding)
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_stream(self):
+        serializer = CompressingStreamDataSerializer(
+            JsonStreamDataSerializer(), ZstdCompressor(1))
+        sink = io.BytesIO()
+
+        serializer.serialize_to(iter(self.stations_and_services), sink)
+
+        self.assertEqual(
+            CompactJsonDataSerializer().serialize(self.stations_and_services),
+            decompress_zstd(sink.getvalue()).decode())
+        self.assertEqual('zstd', serializer.content_encoding)
+
+    def test_stream_leaves_sink_open(self):
+        serializer = CompressingStreamDataSerializer(
+            JsonStreamDataSerializer(), GzipCompressor())
+        sink = io.BytesIO()
+
+        serializer.serialize_to(iter(self.stations_and_services), sink)
+
+        self.assertFalse(sink.closed)
+
+    def test_stream_writes_to_sink_before_the_last_item(self):
+        sink = CountingSink()
+        writes_before_last_item = []
+
+        def get_items():
+            for station_and_services in self.stations_and_services:
+                yield station_and_services
+            writes_before_last_item.append(sink.number_of_writes)
+
+        # Level 0 stores data, so that each item reaches the sink as written
+        CompressingStreamDataSerializer(
+            JsonStreamDataSerializer(), GzipCompressor(0)).serialize_to(
+            get_items(), sink)
+
+        self.assertGreater(writes_before_last_item[0], 1)
+
+
+class TestCreateCompressor(unittest.TestCase):
+    def test_no_config(self):
+        self.assertIsNone(create_compressor(None))
+        self.assertIsNone(create_compressor({}))
+
+    def test_gzip(self):
+        compressor = create_compressor({'encoding': 'gzip', 'level': 9})
+
+        self.assertIsInstance(compressor, GzipCompressor)
+        self.assertEqual(9, compressor.level)
+
+    def test_default_encoding_and_level(self):
+        compressor = create_compressor({'level': None})
+
+        self.assertIsInstance(compressor, GzipCompressor)
+        self.assertEqual(6, compressor.level)
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        compressor = create_compressor({'encoding': 'zstd'})
+
+        self.assertIsInstance(compressor, ZstdCompressor)
+        self.assertEqual(3, compressor.level)
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            create_compressor({'encoding': 'lzma'})
+
+
+if __name__ == '__main__':
+    unittest.main()
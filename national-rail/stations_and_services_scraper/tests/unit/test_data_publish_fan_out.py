@@ -0,0 +1,321 @@
+"""Unit tests for the fan out data publisher"""
+import sys
+import threading
+import unittest
+from typing import Iterable, Union
+from unittest.mock import Mock
+
+from benchmarks.board_generator import generate_departure_board, \
+    CALLING_POINT_NAMES_INCLUDED
+from data_access.darwin.service import LazyServices, get_services
+from data_model import Station, StationAndServices
+from data_publish import FanOutDataPublisher, ConsoleDataPublisher, \
+    JsonDataSerializer, CompactJsonDataSerializer, create_data_publisher
+from data_publish.publish import DataPublisher, SerializedDataPublisher
+from error import DataPublishError
+from tests.unit.helpers import create_stations_and_services
+
+
+class ListDataPublisher(DataPublisher):
+    """Publisher keeping the items it is given, after an event is set"""
+    def __init__(self, event: threading.Event = None):
+        self.items = []
+        self._event = event
+
+    def publish(self, data: object) -> None:
+        self.items.append(data)
+
+    def publish_stream(self, items: Iterable) -> None:
+        for item in items:
+            if self._event is not None:
+                self._event.wait(5)
+            self.items.append(item)
+
+
+class ServiceIdsDataPublisher(DataPublisher):
+    """Publisher keeping the ids of the services of the items it is given,
+    read as they are published"""
+    def __init__(self):
+        self.service_ids = []
+
+    def publish(self, data: object) -> None:
+        self.publish_stream(data)
+
+    def publish_stream(self, items: Iterable) -> None:
+        for item in items:
+            self.service_ids.append(
+                [service.id for service in item.services])
+
+
+class ListSerializedDataPublisher(SerializedDataPublisher):
+    def __init__(self):
+        super().__init__(JsonDataSerializer())
+        self.serialized_data = []
+
+    def publish_serialized(self, serialized_data: Union[str, bytes])\
+            -> None:
+        self.serialized_data.append(serialized_data)
+
+
+class FailingDataPublisher(DataPublisher):
+    def publish(self, data: object) -> None:
+        raise RuntimeError('Publisher is down')
+
+
+class TestFanOutDataPublisher(unittest.TestCase):
+    def test_publish_serialized_once_for_serialized_data_publishers(self):
+        serializer = Mock()
+        serializer.serialize.return_value = 'serialized'
+        publishers = [ListSerializedDataPublisher(),
+                      ListSerializedDataPublisher(), ListDataPublisher()]
+        stations_and_services = create_stations_and_services(2)
+
+        FanOutDataPublisher(publishers, serializer).publish(
+            iter(stations_and_services))
+
+        serializer.serialize.assert_called_once_with(stations_and_services)
+        self.assertEqual(['serialized'], publishers[0].serialized_data)
+        self.assertIs(publishers[0].serialized_data[0],
+                      publishers[1].serialized_data[0])
+        self.assertEqual([stations_and_services], publishers[2].items)
+
+    def test_publish_without_serializer(self):
+        publisher = ListSerializedDataPublisher()
+
+        FanOutDataPublisher([publisher]).publish(
+            create_stations_and_services(1))
+
+        self.assertEqual(
+            [JsonDataSerializer().serialize(create_stations_and_services(1))],
+            publisher.serialized_data)
+
+    def test_failing_publisher_does_not_stop_others(self):
+        publisher = ListDataPublisher()
+        fan_out_publisher = FanOutDataPublisher(
+            [FailingDataPublisher(), publisher])
+
+        with self.assertLogs('data_publish.fan_out'):
+            fan_out_publisher.publish(create_stations_and_services(1))
+
+        self.assertEqual(1, len(publisher.items))
+        failing_statistics, statistics = \
+            fan_out_publisher.get_statistics()['publishers']
+        self.assertEqual(1, failing_statistics['failures'])
+        self.assertIn('Publisher is down', failing_statistics['last_error'])
+        self.assertEqual(0, failing_statistics['deliveries'])
+        self.assertEqual(1, statistics['deliveries'])
+        self.assertGreaterEqual(statistics['max_latency'], 0)
+
+    def test_all_publishers_failing(self):
+        fan_out_publisher = FanOutDataPublisher(
+            [FailingDataPublisher(), FailingDataPublisher()])
+
+        with self.assertLogs('data_publish.fan_out'), \
+                self.assertRaises(DataPublishError):
+            fan_out_publisher.publish(create_stations_and_services(1))
+
+    def test_no_publishers(self):
+        with self.assertRaises(ValueError):
+            FanOutDataPublisher([])
+
+    def test_max_wait_required_for_each_publisher(self):
+        with self.assertRaises(ValueError):
+            FanOutDataPublisher([ListDataPublisher(), ListDataPublisher()],
+                                max_waits=[0])
+
+    def test_publish_stream_slow_publisher_does_not_hold_back_others(self):
+        release = threading.Event()
+        slow_publisher = ListDataPublisher(release)
+        fast_publisher = ListDataPublisher()
+        stations_and_services = create_stations_and_services(5)
+        fast_items_before_release = []
+
+        def get_items():
+            yield from stations_and_services
+            # Room is left in the slow publisher's queue, so the iterator
+            # ends while it is blocked
+            for _ in range(50):
+                if len(fast_publisher.items) == 5:
+                    break
+                threading.Event().wait(0.01)
+            fast_items_before_release.extend(fast_publisher.items)
+            release.set()
+
+        FanOutDataPublisher([slow_publisher, fast_publisher],
+                            max_queued=10).publish_stream(get_items())
+
+        self.assertEqual(stations_and_services, fast_items_before_release)
+        self.assertEqual(stations_and_services, slow_publisher.items)
+
+    def test_publish_stream_waits_for_full_queue_by_default(self):
+        release = threading.Event()
+        slow_publisher = ListDataPublisher(release)
+        fast_publisher = ListDataPublisher()
+        stations_and_services = create_stations_and_services(5)
+        fan_out_publisher = FanOutDataPublisher(
+            [slow_publisher, fast_publisher], max_queued=1)
+
+        # The slow publisher holds its queue full for longer than the old
+        # default maximum wait would have allowed
+        timer = threading.Timer(1.2, release.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        fan_out_publisher.publish_stream(iter(stations_and_services))
+
+        self.assertEqual(stations_and_services, slow_publisher.items)
+        self.assertEqual(stations_and_services, fast_publisher.items)
+        self.assertEqual(
+            [0, 0], [statistics['dropped'] for statistics in
+                     fan_out_publisher.get_statistics()['publishers']])
+
+    def test_publish_stream_drops_items_when_queue_full(self):
+        release = threading.Event()
+        slow_publisher = ListDataPublisher(release)
+        fast_publisher = ListDataPublisher()
+        stations_and_services = create_stations_and_services(10)
+        fan_out_publisher = FanOutDataPublisher(
+            [slow_publisher, fast_publisher], max_queued=1,
+            max_waits=[0, None])
+
+        def get_items():
+            for number, item in enumerate(stations_and_services, 1):
+                yield item
+                # Let the fast publisher keep up with the items
+                for _ in range(100):
+                    if len(fast_publisher.items) >= number:
+                        break
+                    threading.Event().wait(0.01)
+            release.set()
+
+        with self.assertLogs('data_publish.fan_out', 'WARNING') as logs:
+            fan_out_publisher.publish_stream(get_items())
+
+        slow_statistics, fast_statistics = \
+            fan_out_publisher.get_statistics()['publishers']
+        self.assertGreater(slow_statistics['dropped'], 0)
+        self.assertEqual(10, slow_statistics['deliveries']
+                         + slow_statistics['dropped'])
+        self.assertEqual(len(slow_publisher.items),
+                         slow_statistics['deliveries'])
+        self.assertEqual(stations_and_services, fast_publisher.items)
+        self.assertEqual(10, fast_statistics['deliveries'])
+        self.assertEqual(slow_statistics['dropped'], len(logs.output))
+        self.assertIn('ListDataPublisher', logs.output[0])
+
+    def test_publish_stream_waits_for_full_queue_at_most_max_wait(self):
+        release = threading.Event()
+        slow_publisher = ListDataPublisher(release)
+        fast_publisher = ListDataPublisher()
+        stations_and_services = create_stations_and_services(5)
+        fan_out_publisher = FanOutDataPublisher(
+            [slow_publisher, fast_publisher], max_queued=1,
+            max_waits=[0.05, None])
+
+        def get_items():
+            yield from stations_and_services
+            release.set()
+
+        with self.assertLogs('data_publish.fan_out', 'WARNING'):
+            fan_out_publisher.publish_stream(get_items())
+
+        slow_statistics, _ = fan_out_publisher.get_statistics()['publishers']
+        self.assertGreater(slow_statistics['dropped'], 0)
+        self.assertEqual(5, slow_statistics['deliveries']
+                         + slow_statistics['dropped'])
+        self.assertEqual(stations_and_services, fast_publisher.items)
+
+    def test_publish_stream_serialized_once_per_item(self):
+        serializer = Mock()
+        serializer.serialize.side_effect = lambda item: item.station.name
+        publishers = [ListSerializedDataPublisher(),
+                      ListSerializedDataPublisher(), ListDataPublisher()]
+        stations_and_services = create_stations_and_services(3)
+
+        FanOutDataPublisher(publishers, serializer).publish_stream(
+            iter(stations_and_services))
+
+        self.assertEqual(3, serializer.serialize.call_count)
+        self.assertEqual(['Station 0', 'Station 1', 'Station 2'],
+                         publishers[0].serialized_data)
+        self.assertEqual(publishers[0].serialized_data,
+                         publishers[1].serialized_data)
+        self.assertEqual(stations_and_services, publishers[2].items)
+
+    def test_publish_stream_failing_publisher_does_not_stop_others(self):
+        publisher = ListDataPublisher()
+        fan_out_publisher = FanOutDataPublisher(
+            [FailingDataPublisher(), publisher], max_queued=1)
+        stations_and_services = create_stations_and_services(5)
+
+        with self.assertLogs('data_publish.fan_out'):
+            fan_out_publisher.publish_stream(iter(stations_and_services))
+
+        self.assertEqual(stations_and_services, publisher.items)
+        failing_statistics, _ = \
+            fan_out_publisher.get_statistics()['publishers']
+        self.assertEqual(1, failing_statistics['failures'])
+
+    def test_publish_stream_error_of_items_raised_in_publishers(self):
+        publisher = Mock(spec=DataPublisher)
+        publisher.publish_stream.side_effect = lambda items: list(items)
+        fan_out_publisher = FanOutDataPublisher([publisher])
+
+        def get_items():
+            yield from create_stations_and_services(2)
+            raise ValueError('Scrape failed')
+
+        with self.assertRaises(ValueError):
+            fan_out_publisher.publish_stream(get_items())
+
+        self.assertEqual(0, fan_out_publisher.get_statistics()[
+            'publishers'][0]['failures'])
+
+    def test_close_closes_publishers_that_can_be_closed(self):
+        publisher = Mock(spec=ListDataPublisher)
+        publisher.close = Mock()
+
+        FanOutDataPublisher([publisher, ListDataPublisher()]).close()
+
+        publisher.close.assert_called_once()
+
+    def test_publish_stream_lazy_services_shared_by_publishers(self):
+        departure_board = generate_departure_board(150, 10,
+                                                   included_ratio=1)
+        service_ids = [service.id for service in get_services(
+            departure_board, CALLING_POINT_NAMES_INCLUDED)]
+        # Switching threads as often as possible makes publishers iterate
+        # the services at the same time
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+
+        for _ in range(10):
+            publishers = [ServiceIdsDataPublisher() for _ in range(4)]
+            FanOutDataPublisher(publishers).publish_stream(iter([
+                StationAndServices(Station('Dartford', True, ''),
+                                   LazyServices(
+                                       departure_board,
+                                       CALLING_POINT_NAMES_INCLUDED))]))
+
+            for publisher in publishers:
+                self.assertEqual([service_ids], publisher.service_ids)
+
+
+class TestCreateDataPublisher(unittest.TestCase):
+    def test_fan_out(self):
+        publisher = create_data_publisher({
+            'publisher': 'fan_out', 'max_queued': 4,
+            'publishers': [{'publisher': 'console', 'max_wait': 0.5}, {}]})
+
+        self.assertIsInstance(publisher, FanOutDataPublisher)
+        self.assertEqual(2, len(publisher.get_statistics()['publishers']))
+        self.assertEqual([0.5, None], publisher._max_waits)
+        self.assertTrue(all(isinstance(p, ConsoleDataPublisher)
+                            for p in publisher._publishers))
+        self.assertIsInstance(publisher._serializer,
+                              CompactJsonDataSerializer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+"""Unit tests for the SQLite history store"""
+import unittest
+from datetime import date, datetime, time
+from unittest.mock import Mock, patch
+
+from data_model import Station, Status, ServiceStatus, CallingPoint, \
+    Service, StationAndServices
+from data_publish import HistoryStore, HistoryDataPublisher, \
+    create_data_publisher
+from data_publish.history import LATEST_DEPARTURES, get_service_date
+from error import DataPublishError
+
+
+def create_station_and_services(*services, name='Dartford'):
+    return StationAndServices(Station(name, True, None), list(services))
+
+
+def create_service(id_, status, departure_time, message=None,
+                   scheduled_time=time(7, 42)):
+    service = Service(id_, ServiceStatus(status, message), departure_time, [
+        CallingPoint('London Cannon Street', '08:30',
+                     status == Status.Cancelled, None)])
+    service.set_platform('2')
+    service.set_scheduled_time(scheduled_time)
+    return service
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.store = HistoryStore(':memory:')
+
+    def tearDown(self):
+        self.store.close()
+
+    def add(self, published_at, *services):
+        self.store.add([create_station_and_services(*services)],
+                       published_at)
+
+    def add_week(self):
+        # On time, late after being on time, cancelled, delayed without a
+        # time and late throughout
+        self.add(datetime(2022, 2, 7, 7, 0),
+                 create_service('a', Status.OnTime, time(7, 42)))
+        self.add(datetime(2022, 2, 8, 7, 0),
+                 create_service('b', Status.OnTime, time(7, 42)))
+        self.add(datetime(2022, 2, 8, 7, 30),
+                 create_service('b', Status.NewTime, time(7, 50)))
+        self.add(datetime(2022, 2, 9, 7, 0),
+                 create_service('c', Status.Cancelled, time(7, 42),
+                                'Shortage of train crew'))
+        self.add(datetime(2022, 2, 10, 7, 0),
+                 create_service('d', Status.Delayed, time(7, 42)))
+        self.add(datetime(2022, 2, 11, 7, 0),
+                 create_service('e', Status.NewTime, time(7, 46)))
+
+    def test_get_departures(self):
+        self.add_week()
+
+        departures = self.store.get_departures(
+            'Dartford', time(7, 42), date(2022, 2, 7), date(2022, 2, 11))
+
+        self.assertEqual(
+            [(date(2022, 2, 7), 'a', Status.OnTime, 0),
+             (date(2022, 2, 8), 'b', Status.NewTime, 8),
+             (date(2022, 2, 9), 'c', Status.Cancelled, None),
+             (date(2022, 2, 10), 'd', Status.Delayed, None),
+             (date(2022, 2, 11), 'e', Status.NewTime, 4)],
+            [(d['date'], d['service_id'], d['status'], d['delay'])
+             for d in departures])
+        self.assertEqual('Shortage of train crew',
+                         departures[2]['abnormality_message'])
+
+    def test_get_departures_in_date_range(self):
+        self.add_week()
+
+        departures = self.store.get_departures(
+            'Dartford', time(7, 42), date(2022, 2, 8), date(2022, 2, 9))
+
+        self.assertEqual(['b', 'c'], [d['service_id'] for d in departures])
+
+    def test_unknown_scheduled_time_known_from_later_snapshot(self):
+        self.add(datetime(2022, 2, 8, 7, 0),
+                 create_service('b', Status.NewTime, time(7, 50),
+                                scheduled_time=None))
+        self.add(datetime(2022, 2, 8, 7, 30),
+                 create_service('b', Status.NewTime, time(7, 52),
+                                scheduled_time=None))
+        self.add(datetime(2022, 2, 8, 7, 35),
+                 create_service('b', Status.Delayed, time(7, 42),
+                                scheduled_time=None))
+
+        # The scheduled time known from the last snapshot gives the delays
+        # of the earlier ones
+        self.assertEqual(
+            [8, 10, None],
+            [s['delay'] for s in self.store.get_service_history('b')])
+        self.assertEqual(1, len(self.store.get_departures(
+            'Dartford', time(7, 42), date(2022, 2, 8), date(2022, 2, 8))))
+
+    def test_get_delay_statistics(self):
+        self.add_week()
+
+        statistics = self.store.get_delay_statistics(
+            'Dartford', time(7, 42), date(2022, 2, 1), date(2022, 2, 28))
+
+        self.assertEqual({'departures': 5, 'late': 3, 'cancelled': 1,
+                          'mean_delay': 4, 'max_delay': 8}, statistics)
+
+    def test_get_cancellations(self):
+        self.add_week()
+
+        self.assertEqual(
+            [{'date': date(2022, 2, 9), 'departures': 1, 'cancelled': 1},
+             {'date': date(2022, 2, 10), 'departures': 1, 'cancelled': 0}],
+            self.store.get_cancellations('Dartford', date(2022, 2, 9),
+                                         date(2022, 2, 10)))
+
+    def test_get_service_history(self):
+        self.add_week()
+
+        history = self.store.get_service_history('b')
+
+        self.assertEqual(
+            [(datetime(2022, 2, 8, 7, 0), Status.OnTime, time(7, 42), 0),
+             (datetime(2022, 2, 8, 7, 30), Status.NewTime, time(7, 50), 8)],
+            [(h['published_at'], h['status'], h['departure_time'],
+              h['delay']) for h in history])
+
+    def test_service_delayed_past_midnight_on_scheduled_date(self):
+        self.add(datetime(2022, 2, 9, 23, 50),
+                 create_service('a', Status.OnTime, time(23, 55),
+                                scheduled_time=time(23, 55)))
+        self.add(datetime(2022, 2, 10, 0, 10),
+                 create_service('a', Status.NewTime, time(0, 15),
+                                scheduled_time=time(23, 55)))
+
+        self.assertEqual(
+            [(date(2022, 2, 9), 0), (date(2022, 2, 9), 20)],
+            [(h['date'], h['delay'])
+             for h in self.store.get_service_history('a')])
+
+    def test_old_sqlite_version_not_supported(self):
+        with patch('data_publish.history.sqlite3.sqlite_version_info',
+                   (3, 23, 1)):
+            with self.assertRaises(DataPublishError):
+                HistoryStore(':memory:')
+
+    def test_failed_add_rolled_back(self):
+        self.add(datetime(2022, 2, 7, 7, 0),
+                 create_service('a', Status.OnTime, time(7, 42)))
+
+        with self.assertRaises(AttributeError):
+            self.add(datetime(2022, 2, 8, 7, 0),
+                     create_service('b', Status.OnTime, '07:42'))
+        self.store.add([create_station_and_services(
+            create_service('c', Status.OnTime, time(7, 42)),
+            name='Erith')], datetime(2022, 2, 9, 7, 0))
+
+        self.assertEqual(['a'], [h['service_id'] for h in
+                                 self.store.get_departures(
+                                     'Dartford', time(7, 42),
+                                     date(2022, 2, 1), date(2022, 2, 28))])
+        self.assertEqual(1, len(self.store.get_departures(
+            'Erith', time(7, 42), date(2022, 2, 1), date(2022, 2, 28))))
+
+    def test_departures_query_uses_index(self):
+        plan = self.store._connection.execute(
+            'EXPLAIN QUERY PLAN ' + LATEST_DEPARTURES + '''
+            WHERE s.origin_id = 1 AND s.scheduled_minute = 462
+              AND s.service_date BETWEEN '2022-02-01' AND '2022-02-28'
+            ''').fetchall()
+
+        details = ' '.join(row[-1] for row in plan)
+        self.assertIn('services_origin_scheduled_date', details)
+        self.assertIn('service_snapshots_service', details)
+
+
+class TestGetServiceDate(unittest.TestCase):
+    def test_departure_after_midnight(self):
+        self.assertEqual(date(2022, 2, 10), get_service_date(
+            datetime(2022, 2, 9, 23, 50), 5))
+
+    def test_departure_before_midnight(self):
+        self.assertEqual(date(2022, 2, 8), get_service_date(
+            datetime(2022, 2, 9, 0, 10), 23 * 60 + 55))
+
+    def test_departure_on_same_date(self):
+        self.assertEqual(date(2022, 2, 9), get_service_date(
+            datetime(2022, 2, 9, 7, 0), 7 * 60 + 42))
+
+
+class TestHistoryDataPublisher(unittest.TestCase):
+    def test_publish_adds_to_store(self):
+        with HistoryStore(':memory:') as store:
+            HistoryDataPublisher(store, lambda: datetime(2022, 2, 9, 7, 0))\
+                .publish(iter([create_station_and_services(
+                    create_service('a', Status.OnTime, time(7, 42)))]))
+
+            self.assertEqual(1, len(store.get_service_history('a')))
+
+    def test_create_history_publisher(self):
+        publisher = create_data_publisher({
+            'publisher': 'history', 'history': {'path': ':memory:'}})
+
+        self.assertIsInstance(publisher, HistoryDataPublisher)
+
+    def test_close_closes_store(self):
+        store = Mock(spec=HistoryStore)
+
+        HistoryDataPublisher(store).close()
+
+        store.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Unit tests for serializers"""
+import io
+import json
+import pathlib
+import unittest
+from os import path
+
+from data_access.darwin.darwin_access import get_station_and_services, \
+    get_lazy_station_and_services
+from data_publish import JsonDataSerializer, CompactJsonDataSerializer, \
+    JsonStreamDataSerializer
+from data_publish.serialize import orjson
+
+
+TEST_DATA_FILE = path.join(
+    str(pathlib.Path(__file__).parent.resolve()), 'test_data',
+    'test_darwin_departure_board.json')
+CALLING_POINT_NAMES = {'London Cannon Street', 'London Charing Cross'}
+
+
+class TestCompactJsonDataSerializer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_DATA_FILE) as file:
+            departure_board = json.load(file)
+        departure_board['locationName'] = 'Charlton – “Kent”'
+        cls.stations_and_services = [
+            get_station_and_services(departure_board, CALLING_POINT_NAMES),
+            get_lazy_station_and_services(departure_board,
+                                          CALLING_POINT_NAMES)]
+
+    def test_same_data_as_json_serializer(self):
+        serialized = CompactJsonDataSerializer('json').serialize(
+            self.stations_and_services)
+
+        self.assertEqual(serialized, json.dumps(
+            json.loads(JsonDataSerializer().serialize(
+                self.stations_and_services)),
+            separators=(',', ':'), ensure_ascii=False))
+
+    def test_compact_and_not_ascii_escaped(self):
+        serialized = CompactJsonDataSerializer('json').serialize(
+            self.stations_and_services)
+
+        self.assertTrue(serialized.startswith(
+            '[{"station":{"name":"Charlton – “Kent”",'))
+        self.assertIn('"time":"13:08","calling_points":[', serialized)
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_same_as_json(self):
+        self.assertEqual(
+            CompactJsonDataSerializer('orjson').serialize(
+                self.stations_and_services),
+            CompactJsonDataSerializer('json').serialize(
+                self.stations_and_services))
+
+    def test_default_backend(self):
+        self.assertEqual(CompactJsonDataSerializer().backend,
+                         'json' if orjson is None else 'orjson')
+
+    def test_unknown_backend_raise_error(self):
+        with self.assertRaises(ValueError):
+            CompactJsonDataSerializer('simplejson')
+
+
+class TestJsonStreamDataSerializer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_DATA_FILE) as file:
+            cls.departure_board = json.load(file)
+        cls.stations_and_services = [
+            get_station_and_services(cls.departure_board,
+                                     CALLING_POINT_NAMES)] * 3
+
+    def test_write_json_array(self):
+        sink = io.StringIO()
+
+        JsonStreamDataSerializer().serialize_to(
+            iter(self.stations_and_services), sink)
+
+        self.assertEqual(sink.getvalue(), CompactJsonDataSerializer()
+                         .serialize(self.stations_and_services))
+
+    def test_write_json_array_of_each_item_serialized(self):
+        sink = io.StringIO()
+
+        JsonStreamDataSerializer(JsonDataSerializer()).serialize_to(
+            iter(self.stations_and_services), sink)
+
+        self.assertEqual(json.loads(sink.getvalue()), json.loads(
+            JsonDataSerializer().serialize(self.stations_and_services)))
+
+    def test_write_empty_json_array(self):
+        sink = io.StringIO()
+
+        JsonStreamDataSerializer().serialize_to(iter(()), sink)
+
+        self.assertEqual(sink.getvalue(), '[]')
+
+    def test_write_ndjson(self):
+        sink = io.StringIO()
+
+        JsonStreamDataSerializer(is_ndjson=True).serialize_to(
+            iter(self.stations_and_services), sink)
+
+        lines = sink.getvalue().split('\n')
+        self.assertEqual(lines[-1], '')
+        self.assertListEqual(
+            lines[:-1], [CompactJsonDataSerializer().serialize(s)
+                         for s in self.stations_and_services])
+
+    def test_write_each_item_before_next_is_produced(self):
+        sink = io.StringIO()
+        written_before_next = []
+
+        def produce():
+            for station_and_services in self.stations_and_services:
+                written_before_next.append(len(sink.getvalue()))
+                yield station_and_services
+
+        JsonStreamDataSerializer(is_ndjson=True).serialize_to(produce(), sink)
+
+        self.assertEqual(written_before_next[0], 0)
+        self.assertLess(written_before_next[0], written_before_next[1])
+        self.assertLess(written_before_next[1], written_before_next[2])
@@ -0,0 +1,224 @@
+"""Unit tests for data_scrape functions"""
+import asyncio
+import threading
+import time
+import unittest
+
+from data_access import DataAccess, AsyncDataAccess
+from data_model import OriginAndCallingPointNames, Station, StationAndServices
+from data_scrape import scrape_stations_and_services, \
+    scrape_stations_and_services_async, iterate_stations_and_services, \
+    iterate_stations_and_services_async
+
+
+class FakeDataAccess(DataAccess):
+    def __init__(self, barrier=None):
+        self._barrier = barrier
+
+    def get_station_and_services(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> StationAndServices:
+        if self._barrier:
+            self._barrier.wait(timeout=5)
+        return StationAndServices(
+            Station(origin_and_calling_point_names.origin_name, True, ''), [])
+
+
+class SlowFakeDataAccess(DataAccess):
+    def __init__(self):
+        self.started = 0
+        self._lock = threading.Lock()
+
+    def get_station_and_services(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> StationAndServices:
+        with self._lock:
+            self.started += 1
+        # Finish later requests first to check results keep input order
+        time.sleep(0.05 / len(origin_and_calling_point_names.origin_name))
+        return StationAndServices(
+            Station(origin_and_calling_point_names.origin_name, True, ''), [])
+
+
+class FakeAsyncDataAccess(AsyncDataAccess):
+    def __init__(self, delay=0.01):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = 0
+        self._delay = delay
+
+    async def get_station_and_services(
+            self, origin_and_calling_point_names: OriginAndCallingPointNames)\
+            -> StationAndServices:
+        self.in_flight += 1
+        self.started += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Finish later requests first to check results keep input order
+        await asyncio.sleep(self._delay / len(
+            origin_and_calling_point_names.origin_name))
+        self.in_flight -= 1
+        return StationAndServices(
+            Station(origin_and_calling_point_names.origin_name, True, ''), [])
+
+
+class TestScrapeStationsAndServices(unittest.TestCase):
+    origin_names = ['Charlton', 'Blackheath', 'Lewisham', 'Woolwich Arsenal']
+
+    @classmethod
+    def setUpClass(cls):
+        cls.services_origin_and_calling_point_names = [
+            OriginAndCallingPointNames(n, {'London Bridge'})
+            for n in cls.origin_names]
+        cls.stations_and_services_expected = [
+            StationAndServices(Station(n, True, ''), [])
+            for n in cls.origin_names]
+
+    def test_return_stations_and_services_sequentially(self):
+        stations_and_services = scrape_stations_and_services(
+            FakeDataAccess(), self.services_origin_and_calling_point_names)
+
+        self.assertListEqual(stations_and_services,
+                             self.stations_and_services_expected)
+
+    def test_return_stations_and_services_concurrently_in_input_order(self):
+        barrier = threading.Barrier(len(self.origin_names))
+        stations_and_services = scrape_stations_and_services(
+            FakeDataAccess(barrier),
+            self.services_origin_and_calling_point_names,
+            max_workers=len(self.origin_names))
+
+        self.assertListEqual(stations_and_services,
+                             self.stations_and_services_expected)
+
+    def test_max_workers_less_than_one_raises_error(self):
+        with self.assertRaises(ValueError):
+            scrape_stations_and_services(
+                FakeDataAccess(),
+                self.services_origin_and_calling_point_names, max_workers=0)
+
+
+class TestScrapeStationsAndServicesAsync(unittest.IsolatedAsyncioTestCase):
+    origin_names = ['Charlton', 'Blackheath', 'Lewisham', 'Woolwich Arsenal']
+
+    def setUp(self):
+        self.services_origin_and_calling_point_names = [
+            OriginAndCallingPointNames(n, {'London Bridge'})
+            for n in self.origin_names]
+        self.stations_and_services_expected = [
+            StationAndServices(Station(n, True, ''), [])
+            for n in self.origin_names]
+
+    async def test_return_stations_and_services_in_input_order(self):
+        data_access = FakeAsyncDataAccess()
+        stations_and_services = await scrape_stations_and_services_async(
+            data_access, self.services_origin_and_calling_point_names)
+
+        self.assertListEqual(stations_and_services,
+                             self.stations_and_services_expected)
+        self.assertEqual(data_access.max_in_flight, len(self.origin_names))
+
+    async def test_max_concurrency_limits_requests_in_flight(self):
+        data_access = FakeAsyncDataAccess()
+        stations_and_services = await scrape_stations_and_services_async(
+            data_access, self.services_origin_and_calling_point_names,
+            max_concurrency=2)
+
+        self.assertListEqual(stations_and_services,
+                             self.stations_and_services_expected)
+        self.assertEqual(data_access.max_in_flight, 2)
+
+
+class TestIterateStationsAndServices(unittest.TestCase):
+    origin_names = ['Charlton', 'Blackheath', 'Lewisham', 'Woolwich Arsenal']
+
+    @classmethod
+    def setUpClass(cls):
+        cls.services_origin_and_calling_point_names = [
+            OriginAndCallingPointNames(n, {'London Bridge'})
+            for n in cls.origin_names]
+        cls.stations_and_services_expected = [
+            StationAndServices(Station(n, True, ''), [])
+            for n in cls.origin_names]
+
+    def test_yield_stations_and_services_in_input_order(self):
+        stations_and_services = list(iterate_stations_and_services(
+            SlowFakeDataAccess(),
+            self.services_origin_and_calling_point_names, max_workers=4))
+
+        self.assertListEqual(stations_and_services,
+                             self.stations_and_services_expected)
+
+    def test_yield_stations_and_services_as_scraped(self):
+        stations_and_services = list(iterate_stations_and_services(
+            SlowFakeDataAccess(),
+            self.services_origin_and_calling_point_names, max_workers=4,
+            is_ordered=False))
+
+        self.assertEqual(stations_and_services[0].station.name,
+                         'Woolwich Arsenal')
+        self.assertCountEqual(stations_and_services,
+                              self.stations_and_services_expected)
+
+    def test_max_pending_holds_back_scraping(self):
+        data_access = SlowFakeDataAccess()
+        stations_and_services = iterate_stations_and_services(
+            data_access, self.services_origin_and_calling_point_names,
+            max_workers=1, max_pending=2)
+
+        next(stations_and_services)
+        time.sleep(0.05)
+
+        self.assertEqual(data_access.started, 3)
+        stations_and_services.close()
+
+    def test_max_pending_less_than_one_raises_error(self):
+        with self.assertRaises(ValueError):
+            next(iterate_stations_and_services(
+                SlowFakeDataAccess(),
+                self.services_origin_and_calling_point_names, max_pending=0))
+
+
+class TestIterateStationsAndServicesAsync(unittest.IsolatedAsyncioTestCase):
+    origin_names = ['Charlton', 'Blackheath', 'Lewisham', 'Woolwich Arsenal']
+
+    def setUp(self):
+        self.services_origin_and_calling_point_names = [
+            OriginAndCallingPointNames(n, {'London Bridge'})
+            for n in self.origin_names]
+        self.stations_and_services_expected = [
+            StationAndServices(Station(n, True, ''), [])
+            for n in self.origin_names]
+
+    async def test_yield_stations_and_services_in_input_order(self):
+        stations_and_services = [
+            s async for s in iterate_stations_and_services_async(
+                FakeAsyncDataAccess(),
+                self.services_origin_and_calling_point_names)]
+
+        self.assertListEqual(stations_and_services,
+                             self.stations_and_services_expected)
+
+    async def test_yield_stations_and_services_as_scraped(self):
+        stations_and_services = [
+            s async for s in iterate_stations_and_services_async(
+                FakeAsyncDataAccess(0.1),
+                self.services_origin_and_calling_point_names,
+                is_ordered=False)]
+
+        self.assertEqual(stations_and_services[0].station.name,
+                         'Woolwich Arsenal')
+        self.assertCountEqual(stations_and_services,
+                              self.stations_and_services_expected)
+
+    async def test_max_pending_holds_back_scraping(self):
+        data_access = FakeAsyncDataAccess()
+        stations_and_services = iterate_stations_and_services_async(
+            data_access, self.services_origin_and_calling_point_names,
+            max_concurrency=1, max_pending=2)
+
+        await stations_and_services.__anext__()
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(data_access.started, 3)
+        self.assertEqual(data_access.max_in_flight, 1)
+        await stations_and_services.aclose()
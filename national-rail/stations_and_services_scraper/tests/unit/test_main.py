@@ -0,0 +1,36 @@
+"""Unit tests for running the application"""
+import unittest
+from unittest.mock import Mock, patch
+
+import main
+from main import log_statistics
+
+
+class TestLogStatistics(unittest.TestCase):
+    def test_statistics_logged(self):
+        data_access = Mock()
+        data_access.get_statistics.return_value = \
+            {'board_cache': {'hits': 1, 'misses': 1}}
+        data_publisher = Mock()
+        data_publisher.get_statistics.return_value = \
+            {'publishers': [{'deliveries': 2}]}
+
+        with self.assertLogs('main', level='INFO') as logs:
+            log_statistics(data_access, data_publisher)
+
+        self.assertEqual(logs.output, [
+            "INFO:main:Data access statistics: "
+            "{'board_cache': {'hits': 1, 'misses': 1}}",
+            "INFO:main:Data publisher statistics: "
+            "{'publishers': [{'deliveries': 2}]}"])
+
+    def test_empty_statistics_not_logged(self):
+        data_access = Mock()
+        data_access.get_statistics.return_value = {}
+        data_publisher = Mock()
+        data_publisher.get_statistics.return_value = {}
+
+        with patch.object(main.logger, 'info') as info:
+            log_statistics(data_access, data_publisher)
+
+        info.assert_not_called()